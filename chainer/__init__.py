@@ -15,6 +15,7 @@ from chainer import function_hook  # NOQA
 from chainer import function_hooks  # NOQA
 from chainer import function_node  # NOQA
 from chainer import functions  # NOQA
+from chainer import graph_optimizations  # NOQA
 from chainer import initializer  # NOQA
 from chainer import initializers  # NOQA
 from chainer import iterators  # NOQA
@@ -25,6 +26,7 @@ from chainer import optimizers  # NOQA
 from chainer import reporter  # NOQA
 from chainer import serializer  # NOQA
 from chainer import serializers  # NOQA
+from chainer import serving  # NOQA
 from chainer import training  # NOQA
 from chainer import variable  # NOQA
 
@@ -45,6 +47,8 @@ from chainer.function_node import FunctionNode  # NOQA
 from chainer.function_node import grad  # NOQA
 from chainer.functions import array  # NOQA
 from chainer.functions.math import basic_math  # NOQA
+from chainer.graph_optimizations.inference import inference  # NOQA
+from chainer.graph_optimizations.static_graph import static_graph  # NOQA
 from chainer.initializer import Initializer  # NOQA
 from chainer.link import Chain  # NOQA
 from chainer.link import ChainList  # NOQA
@@ -52,6 +56,8 @@ from chainer.link import Link  # NOQA
 from chainer.optimizer import GradientMethod  # NOQA
 from chainer.optimizer import Optimizer  # NOQA
 from chainer.optimizer import UpdateRule  # NOQA
+from chainer.reporter import BufferedDictSummary  # NOQA
+from chainer.reporter import BufferedSummary  # NOQA
 from chainer.reporter import DictSummary  # NOQA
 from chainer.reporter import get_current_reporter  # NOQA
 from chainer.reporter import report  # NOQA
@@ -142,6 +148,8 @@ global_config.cudnn_deterministic = False
 global_config.enable_backprop = True
 global_config.keep_graph_on_report = bool(int(
     os.environ.get('CHAINER_KEEP_GRAPH_ON_REPORT', '0')))
+global_config.recompute_dropout_mask = False
+global_config.report_as_array = False
 global_config.train = True
 global_config.type_check = bool(int(os.environ.get('CHAINER_TYPE_CHECK', '1')))
 global_config.use_cudnn = os.environ.get('CHAINER_USE_CUDNN', 'auto')
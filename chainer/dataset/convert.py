@@ -37,7 +37,7 @@ def to_device(device, x):
         return cuda.to_gpu(x, device)
 
 
-def concat_examples(batch, device=None, padding=None):
+def concat_examples(batch, device=None, padding=None, copy=True):
     """Concatenates a list of examples into array(s).
 
     Dataset iterator yields a list of examples. If each example is an array,
@@ -61,6 +61,12 @@ def concat_examples(batch, device=None, padding=None):
     contents of all arrays can be substituted to. The padding value is then
     used to the extra elements of the resulting arrays.
 
+    If ``copy`` is ``False`` and the arrays to concatenate are read-only
+    NumPy arrays laid out consecutively in one buffer, e.g. rows of a batch
+    written to shared memory by
+    :class:`~chainer.iterators.MultiprocessIterator` with ``zero_copy=True``,
+    a read-only view of the buffer is returned instead of a new array.
+
     TODO(beam2d): Add an example.
 
     Args:
@@ -74,6 +80,10 @@ def concat_examples(batch, device=None, padding=None):
             minimum dimensionalities that can accommodate all arrays is
             created, and elements outside of the examples are padded by this
             value.
+        copy (bool): If ``False``, read-only arrays laid out consecutively in
+            one buffer are concatenated into a read-only view of the buffer
+            instead of a new array. The view shares the memory with the
+            examples.
 
     Returns:
         Array, a tuple of arrays, or a dictionary of arrays. The type depends
@@ -92,7 +102,7 @@ def concat_examples(batch, device=None, padding=None):
 
         for i in six.moves.range(len(first_elem)):
             result.append(to_device(device, _concat_arrays(
-                [example[i] for example in batch], padding[i])))
+                [example[i] for example in batch], padding[i], copy)))
 
         return tuple(result)
 
@@ -103,15 +113,15 @@ def concat_examples(batch, device=None, padding=None):
 
         for key in first_elem:
             result[key] = to_device(device, _concat_arrays(
-                [example[key] for example in batch], padding[key]))
+                [example[key] for example in batch], padding[key], copy))
 
         return result
 
     else:
-        return to_device(device, _concat_arrays(batch, padding))
+        return to_device(device, _concat_arrays(batch, padding, copy))
 
 
-def _concat_arrays(arrays, padding):
+def _concat_arrays(arrays, padding, copy=True):
     # Convert `arrays` to numpy.ndarray if `arrays` consists of the built-in
     # types such as int or float.
     if not isinstance(arrays[0], numpy.ndarray) and\
@@ -120,11 +130,49 @@ def _concat_arrays(arrays, padding):
     if padding is not None:
         return _concat_arrays_with_padding(arrays, padding)
 
+    if not copy and isinstance(arrays[0], numpy.ndarray):
+        view = _stacked_view(arrays)
+        if view is not None:
+            return view
+
     xp = cuda.get_array_module(arrays[0])
     with cuda.get_device_from_array(arrays[0]):
         return xp.concatenate([array[None] for array in arrays])
 
 
+def _root_base(array):
+    # Returns the object owning the memory of the array.
+    while isinstance(array.base, numpy.ndarray):
+        array = array.base
+    return array if array.base is None else array.base
+
+
+def _stacked_view(arrays):
+    # Returns a view stacking the given arrays if they are read-only and
+    # placed one after another in the same buffer, otherwise returns None.
+    first = arrays[0]
+    if first.flags.writeable or not first.flags.c_contiguous or \
+            first.nbytes == 0:
+        return None
+    root = _root_base(first)
+    address = first.__array_interface__['data'][0]
+    for array in arrays[1:]:
+        address += first.nbytes
+        if not isinstance(array, numpy.ndarray) or \
+                array.flags.writeable or \
+                not array.flags.c_contiguous or \
+                array.dtype != first.dtype or \
+                array.shape != first.shape or \
+                array.__array_interface__['data'][0] != address or \
+                _root_base(array) is not root:
+            return None
+    view = numpy.lib.stride_tricks.as_strided(
+        first, (len(arrays),) + first.shape,
+        (first.nbytes,) + first.strides)
+    view.flags.writeable = False
+    return view
+
+
 def _concat_arrays_with_padding(arrays, padding):
     shape = numpy.array(arrays[0].shape, dtype=int)
     for array in arrays[1:]:
@@ -2,6 +2,7 @@ from chainer.datasets import cifar  # NOQA
 from chainer.datasets import dict_dataset  # NOQA
 from chainer.datasets import fashion_mnist  # NOQA
 from chainer.datasets import image_dataset  # NOQA
+from chainer.datasets import mmap_dataset  # NOQA
 from chainer.datasets import mnist  # NOQA
 from chainer.datasets import ptb  # NOQA
 from chainer.datasets import sub_dataset  # NOQA
@@ -18,6 +19,8 @@ from chainer.datasets.dict_dataset import DictDataset  # NOQA
 from chainer.datasets.fashion_mnist import get_fashion_mnist  # NOQA
 from chainer.datasets.image_dataset import ImageDataset  # NOQA
 from chainer.datasets.image_dataset import LabeledImageDataset  # NOQA
+from chainer.datasets.mmap_dataset import MmapDataset  # NOQA
+from chainer.datasets.mmap_dataset import MmapDatasetWriter  # NOQA
 from chainer.datasets.mnist import get_mnist  # NOQA
 from chainer.datasets.ptb import get_ptb_words  # NOQA
 from chainer.datasets.ptb import get_ptb_words_vocabulary  # NOQA
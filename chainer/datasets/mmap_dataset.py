@@ -0,0 +1,277 @@
+import json
+import struct
+
+import numpy
+import six
+
+from chainer.dataset import dataset_mixin
+
+
+_MAGIC = b'CHMMAP\x00\x01'
+_FOOTER = struct.Struct('<Q8s')  # size of the metadata and the magic
+
+
+class _Int64Buffer(object):
+
+    # Growable buffer of int64 rows not to keep the index of a large dataset
+    # as Python objects.
+
+    def __init__(self, n_cols):
+        self.array = numpy.empty((16, n_cols), numpy.int64)
+        self.size = 0
+
+    def append(self, row):
+        if self.size == len(self.array):
+            self.array = numpy.concatenate((self.array, self.array))
+        self.array[self.size] = row
+        self.size += 1
+
+    def get(self):
+        return self.array[:self.size]
+
+
+class MmapDatasetWriter(object):
+
+    """Writer of the file format read by :class:`MmapDataset`.
+
+    The writer appends the arrays of each example to a single file, and
+    writes the index of their offsets and shapes at the end of the file on
+    :meth:`close`. Each example is an array or a tuple of arrays; the
+    structure and the dtype of each item are fixed by the first example, while
+    the shapes can vary across examples. Scalars are stored as 0-dimensional
+    arrays.
+
+    .. admonition:: Example
+
+       >>> import os, tempfile
+       >>> path = os.path.join(tempfile.mkdtemp(), 'train.mmap')
+       >>> with chainer.datasets.MmapDatasetWriter(path) as writer:
+       ...     for i in range(3):
+       ...         writer.write((np.arange(i + 1, dtype=np.float32), i))
+       >>> dataset = chainer.datasets.MmapDataset(path)
+       >>> dataset[2]
+       (array([0., 1., 2.], dtype=float32), 2)
+
+    Args:
+        path (str): Path of the file to write.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(_MAGIC)
+        self._position = len(_MAGIC)
+        self._is_tuple = None
+        self._dtypes = None
+        self._ndims = None
+        self._offsets = None
+        self._shapes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, example):
+        """Appends an example.
+
+        Args:
+            example: An array or a tuple of arrays.
+
+        """
+        is_tuple = isinstance(example, tuple)
+        arrays = example if is_tuple else (example,)
+        arrays = [numpy.asarray(a) for a in arrays]
+
+        if self._dtypes is None:
+            for a in arrays:
+                if a.dtype.hasobject:
+                    raise ValueError(
+                        'arrays of objects cannot be written: {}'.format(a))
+            self._is_tuple = is_tuple
+            self._dtypes = [a.dtype for a in arrays]
+            self._ndims = [a.ndim for a in arrays]
+            self._offsets = _Int64Buffer(len(arrays))
+            self._shapes = _Int64Buffer(sum(self._ndims))
+        elif is_tuple != self._is_tuple or \
+                [a.dtype for a in arrays] != self._dtypes or \
+                [a.ndim for a in arrays] != self._ndims:
+            raise ValueError(
+                'the structure, dtypes or dimensionalities of the example '
+                'differ from the first example')
+
+        offsets = []
+        shape = []
+        for a in arrays:
+            # Align each array to its dtype to get aligned views.
+            pad = -self._position % a.dtype.alignment
+            if pad:
+                self._file.write(b'\x00' * pad)
+                self._position += pad
+            offsets.append(self._position)
+            shape.extend(a.shape)
+            self._file.write(a.tobytes())
+            self._position += a.nbytes
+        self._offsets.append(offsets)
+        self._shapes.append(shape)
+
+    def extend(self, examples):
+        """Appends examples.
+
+        Args:
+            examples: An iterable of examples, e.g. a dataset.
+
+        """
+        for example in examples:
+            self.write(example)
+
+    def close(self):
+        """Writes the index and closes the file."""
+        if self._file is None:
+            return
+        if self._dtypes is None:
+            raise ValueError('no examples are written')
+        try:
+            offsets = self._offsets.get()
+            shapes = self._shapes.get()
+
+            # Shapes of the items having the same shape in all examples are
+            # stored in the metadata instead of the index.
+            fixed_shapes = []
+            columns = []
+            col = 0
+            for ndim in self._ndims:
+                item_shapes = shapes[:, col:col + ndim]
+                if (item_shapes == item_shapes[0]).all():
+                    fixed_shapes.append([int(s) for s in item_shapes[0]])
+                else:
+                    fixed_shapes.append(None)
+                    columns.extend(six.moves.range(col, col + ndim))
+                col += ndim
+            shapes = shapes[:, columns]
+
+            meta = {
+                'n_examples': len(offsets),
+                'is_tuple': self._is_tuple,
+                'dtypes': [dtype.str for dtype in self._dtypes],
+                'ndims': self._ndims,
+                'shapes': fixed_shapes,
+            }
+            for name, index in (('offsets', offsets),
+                                ('index_shapes', shapes)):
+                pad = -self._position % 8
+                self._file.write(b'\x00' * pad)
+                self._position += pad
+                meta[name] = self._position
+                index = numpy.ascontiguousarray(index, '<i8')
+                self._file.write(index.tobytes())
+                self._position += index.nbytes
+            meta = json.dumps(meta).encode('utf-8')
+            self._file.write(meta)
+            self._file.write(_FOOTER.pack(len(meta), _MAGIC))
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class MmapDataset(dataset_mixin.DatasetMixin):
+
+    """Dataset stored in a memory-mapped file.
+
+    This dataset reads the file written by :class:`MmapDatasetWriter` with
+    :class:`numpy.memmap`. Only the index of the examples is read on
+    construction, and the arrays of each example are returned as read-only
+    views of the mapped file without copying, so datasets larger than the
+    physical memory can be used. The pages of the file are loaded by the
+    operating system on access and kept in the page cache, which is shared
+    by all the processes mapping the file, e.g. the workers of
+    :class:`~chainer.iterators.MultiprocessIterator`. When the dataset is
+    pickled, only the path is serialized and the file is mapped again on
+    unpickling.
+
+    Each example is an array or a tuple of arrays as written by the writer.
+    The items written as scalars are returned as NumPy scalars.
+
+    Args:
+        path (str): Path of the file written by :class:`MmapDatasetWriter`.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._open()
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self._open()
+
+    def _open(self):
+        buf = numpy.asarray(numpy.memmap(self.path, numpy.uint8, 'r'))
+        self._buffer = buf
+        if len(buf) < len(_MAGIC) + _FOOTER.size or \
+                buf[:len(_MAGIC)].tobytes() != _MAGIC:
+            raise ValueError('{} is not a dataset file'.format(self.path))
+        meta_size, magic = _FOOTER.unpack(buf[-_FOOTER.size:].tobytes())
+        if magic != _MAGIC:
+            raise ValueError(
+                '{} is not a dataset file or is not closed properly'.format(
+                    self.path))
+        meta_end = len(buf) - _FOOTER.size
+        meta = json.loads(
+            buf[meta_end - meta_size:meta_end].tobytes().decode('utf-8'))
+
+        n = meta['n_examples']
+        self._length = n
+        self._is_tuple = meta['is_tuple']
+        self._dtypes = [numpy.dtype(dtype) for dtype in meta['dtypes']]
+        n_items = len(self._dtypes)
+        self._offsets = self._index(meta['offsets'], (n, n_items))
+        n_cols = sum([ndim for shape, ndim
+                      in zip(meta['shapes'], meta['ndims']) if shape is None])
+        self._index_shapes = self._index(meta['index_shapes'], (n, n_cols))
+
+        # List of pairs of the fixed shape and the columns of the shape in
+        # the index for each item.
+        self._shapes = []
+        col = 0
+        for shape, ndim in zip(meta['shapes'], meta['ndims']):
+            if shape is None:
+                self._shapes.append((None, slice(col, col + ndim)))
+                col += ndim
+            else:
+                self._shapes.append((tuple(shape), None))
+
+    def _index(self, offset, shape):
+        size = 8 * shape[0] * shape[1]
+        return self._buffer[offset:offset + size].view('<i8').reshape(shape)
+
+    def __len__(self):
+        return self._length
+
+    def get_example(self, i):
+        if i < 0:
+            i += self._length
+        if not 0 <= i < self._length:
+            raise IndexError('index {} is out of range'.format(i))
+
+        offsets = self._offsets[i]
+        items = []
+        for k, dtype in enumerate(self._dtypes):
+            shape, columns = self._shapes[k]
+            if shape is None:
+                shape = tuple(self._index_shapes[i, columns])
+            size = dtype.itemsize
+            for s in shape:
+                size *= s
+            offset = offsets[k]
+            item = self._buffer[offset:offset + size].view(dtype).reshape(
+                shape)
+            if item.ndim == 0:
+                item = item[()]
+            items.append(item)
+        return tuple(items) if self._is_tuple else items[0]
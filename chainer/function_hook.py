@@ -147,6 +147,11 @@ class FunctionHook(object):
         """
         pass
 
+    def _forward_postprocess(self, function, in_data, out_data):
+        # FunctionNode.apply calls this method with the output arrays.
+        # Hooks that need the outputs override it.
+        self.forward_postprocess(function, in_data)
+
     # backward
     def backward_preprocess(self, function, in_data, out_grad):
         """Callback function invoked before backward propagation.
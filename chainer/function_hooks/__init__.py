@@ -1,6 +1,7 @@
 from chainer.function_hooks import cuda_profile  # NOQA
 from chainer.function_hooks import cupy_memory_profile  # NOQA
 from chainer.function_hooks import debug_print  # NOQA
+from chainer.function_hooks import function_profile  # NOQA
 from chainer.function_hooks import timer  # NOQA
 
 
@@ -8,4 +9,6 @@ from chainer.function_hooks import timer  # NOQA
 from chainer.function_hooks.cuda_profile import CUDAProfileHook  # NOQA
 from chainer.function_hooks.cupy_memory_profile import CupyMemoryProfileHook  # NOQA
 from chainer.function_hooks.debug_print import PrintHook  # NOQA
+from chainer.function_hooks.function_profile import FunctionProfileHook  # NOQA
+from chainer.function_hooks.function_profile import register_flop_counter  # NOQA
 from chainer.function_hooks.timer import TimerHook  # NOQA
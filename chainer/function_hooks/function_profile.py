@@ -0,0 +1,443 @@
+import collections
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+
+import numpy
+import six
+
+import chainer
+from chainer.backends import cuda
+from chainer import function_hook
+
+try:
+    import tracemalloc
+    _tracemalloc_available = True
+except ImportError:
+    _tracemalloc_available = False
+
+
+_chainer_dir = os.path.dirname(os.path.abspath(chainer.__file__))
+
+
+def _size(shape):
+    size = 1
+    for s in shape:
+        size *= s
+    return size
+
+
+def _linear_flops(function, in_shapes, out_shapes):
+    x, W = in_shapes[0], in_shapes[1]
+    n = _size(x) // W[1]
+    flops = 2 * n * W[0] * W[1]
+    if len(in_shapes) == 3:
+        flops += n * W[0]
+    return flops
+
+
+def _convolution_flops(function, in_shapes, out_shapes):
+    # Each output element is a dot product over the filter.
+    W = in_shapes[1]
+    flops = 2 * _size(out_shapes[0]) * _size(W[1:])
+    if len(in_shapes) == 3:
+        flops += _size(out_shapes[0])
+    return flops
+
+
+def _deconvolution_flops(function, in_shapes, out_shapes):
+    # Each input element is scattered through the filter.
+    W = in_shapes[1]
+    flops = 2 * _size(in_shapes[0]) * _size(W[1:])
+    if len(in_shapes) == 3:
+        flops += _size(out_shapes[0])
+    return flops
+
+
+def _matmul_flops(function, in_shapes, out_shapes):
+    a = in_shapes[0]
+    if len(a) == 1:
+        k = a[0]
+    else:
+        k = a[-2] if getattr(function, 'transa', False) else a[-1]
+    return 2 * _size(out_shapes[0]) * k
+
+
+def _elementwise_flops(function, in_shapes, out_shapes):
+    return _size(out_shapes[0])
+
+
+_flop_counters = {
+    'LinearFunction': _linear_flops,
+    'Convolution2DFunction': _convolution_flops,
+    'ConvolutionND': _convolution_flops,
+    'Deconvolution2DFunction': _deconvolution_flops,
+    'DeconvolutionND': _deconvolution_flops,
+    'MatMul': _matmul_flops,
+    'BatchMatMul': _matmul_flops,
+}
+for _name in ('Add', 'AddConstant', 'Sub', 'SubFromConstant', 'Mul',
+              'MulConstant', 'Div', 'DivFromConstant', 'Neg', 'Absolute',
+              'ReLU', 'LeakyReLU', 'Sigmoid', 'Tanh', 'Exp', 'Log', 'Sqrt'):
+    _flop_counters[_name] = _elementwise_flops
+
+
+def register_flop_counter(name, counter):
+    """Registers a function to estimate the FLOPs of a function node.
+
+    Args:
+        name (str): Name of the function node class (e.g.
+            ``'LinearFunction'``).
+        counter (callable): A function that takes the function node, the
+            list of the input shapes and the list of the output shapes, and
+            returns the estimated number of floating point operations of the
+            forward computation.
+
+    """
+    _flop_counters[name] = counter
+
+
+def _nbytes(arrays):
+    return sum([0 if a is None else a.nbytes for a in arrays])
+
+
+def _shapes(arrays):
+    return [None if a is None else tuple(a.shape) for a in arrays]
+
+
+class FunctionProfileHook(function_hook.FunctionHook):
+    """Function hook for profiling functions per call site and link.
+
+    This hook records every forward and backward computation of function
+    nodes with the following information:
+
+    - the name of the function,
+    - the path of the innermost link (in the link hierarchy of ``link``) on
+      the call stack when the function is applied,
+    - the call site, i.e. the innermost source location on the call stack
+      that is outside Chainer,
+    - the elapsed time,
+    - the shapes of the inputs and outputs (of the output gradients on
+      backward),
+    - the estimated number of floating point operations (for the functions
+      with a registered counter; see :func:`register_flop_counter`),
+    - the estimated number of bytes read and written, and
+    - the net host memory allocated (only if ``trace_memory`` is ``True``).
+
+    The backward computation of a function node is attributed to the link
+    and call site of its forward computation, and so are the functions
+    applied inside it. Such nested computations have a positive ``'depth'``
+    in the records and are excluded from :meth:`summary`. The estimated FLOPs
+    of the backward computation are twice those of the forward computation.
+
+    The records can be aggregated by :meth:`summary`, printed by
+    :meth:`print_report` and exported in the Chrome trace event format by
+    :meth:`export_chrome_trace`.
+
+    .. admonition:: Example
+
+       .. code-block:: python
+
+          hook = FunctionProfileHook(link=model)
+          with hook:
+              loss = model(x)
+              loss.backward()
+          hook.print_report(group_by='link', sort_by='time')
+          hook.export_chrome_trace('trace.json')
+
+       Then open ``trace.json`` with ``chrome://tracing``.
+
+    Args:
+        link (~chainer.Link): Root link whose sublinks are used to name the
+            records. If it is ``None``, the class name of the innermost link
+            on the call stack is used instead.
+        trace_memory (bool): If ``True``, the net host memory allocated by
+            each computation is measured with :mod:`tracemalloc`. It is only
+            available on Python 3 and slows down the computation.
+
+    Attributes:
+        records (list of dict): The records of the computations.
+
+    """
+
+    name = 'FunctionProfileHook'
+
+    def __init__(self, link=None, trace_memory=False):
+        self.records = []
+        self._link_paths = {}
+        if link is not None:
+            for path, l in link.namedlinks():
+                self._link_paths[id(l)] = (l, path)
+        if trace_memory and not _tracemalloc_available:
+            raise RuntimeError('trace_memory requires tracemalloc')
+        self.trace_memory = trace_memory
+        self._started_tracemalloc = False
+        self._forward_sites = weakref.WeakKeyDictionary()
+        self._running_stack = []
+        self._origin = time.time()
+
+    def added(self, function=None):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def deleted(self, function=None):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _find_site(self):
+        # Frames inside Chainer and those of function hooks are skipped, so
+        # the search does not depend on the depth it is called from.
+        frame = sys._getframe()
+        link_path = None
+        call_site = None
+        while frame is not None and (link_path is None or call_site is None):
+            code = frame.f_code
+            obj = None
+            if code.co_argcount > 0:
+                # The first argument of a method
+                obj = frame.f_locals.get(code.co_varnames[0])
+            if link_path is None and isinstance(obj, chainer.Link):
+                entry = self._link_paths.get(id(obj))
+                if entry is not None and entry[0] is obj:
+                    link_path = entry[1]
+                elif not self._link_paths:
+                    link_path = type(obj).__name__
+            if call_site is None and not isinstance(
+                    obj, function_hook.FunctionHook):
+                filename = os.path.abspath(code.co_filename)
+                if not filename.startswith(_chainer_dir):
+                    call_site = '{}:{} ({})'.format(
+                        code.co_filename, frame.f_lineno, code.co_name)
+            frame = frame.f_back
+        return link_path, call_site
+
+    def _preprocess(self, xp, phase, site):
+        if xp is numpy:
+            sync = None
+        else:
+            sync = cuda.Event(), cuda.Event()
+            sync[0].record()
+        memory = (tracemalloc.get_traced_memory()[0]
+                  if self.trace_memory else None)
+        self._running_stack.append((time.time(), sync, memory, phase, site))
+
+    def _postprocess(self, function, in_shapes, out_shapes, nbytes, flops):
+        start, sync, memory, phase, site = self._running_stack.pop()
+        if sync is None:
+            elapsed_time = time.time() - start
+        else:
+            sync[1].record()
+            sync[1].synchronize()
+            elapsed_time = cuda.cupy.cuda.get_elapsed_time(*sync) / 1000
+        if memory is not None:
+            memory = tracemalloc.get_traced_memory()[0] - memory
+        self.records.append({
+            'name': function._impl_name,
+            'phase': phase,
+            'link': site[0],
+            'call_site': site[1],
+            'start': start - self._origin,
+            'time': elapsed_time,
+            'input_shapes': in_shapes,
+            'output_shapes': out_shapes,
+            'flops': flops,
+            'bytes': nbytes,
+            'memory': memory,
+            'depth': len(self._running_stack),
+            'thread': threading.current_thread().ident,
+        })
+
+    def forward_preprocess(self, function, in_data):
+        stack = self._running_stack
+        if stack and stack[-1][3] == 'backward':
+            # Functions applied by a backward computation are attributed to
+            # the node being backpropagated.
+            site = stack[-1][4]
+        else:
+            site = self._find_site()
+            self._forward_sites[function] = site
+        self._preprocess(cuda.get_array_module(*in_data), 'forward', site)
+
+    def forward_postprocess(self, function, in_data):
+        # The outputs are unknown if the hook is called without them.
+        self._forward_postprocess(function, in_data, ())
+
+    def _forward_postprocess(self, function, in_data, outputs):
+        in_shapes = _shapes(in_data)
+        out_shapes = _shapes(outputs)
+        counter = _flop_counters.get(function._impl_name)
+        flops = None
+        if counter is not None and outputs:
+            flops = counter(function, in_shapes, out_shapes)
+        self._postprocess(function, in_shapes, out_shapes,
+                          _nbytes(in_data) + _nbytes(outputs), flops)
+
+    def backward_preprocess(self, function, in_data, out_grad):
+        site = self._forward_sites.get(function, (None, None))
+        self._preprocess(cuda.get_array_module(*(in_data + out_grad)),
+                         'backward', site)
+
+    def backward_postprocess(self, function, in_data, out_grad):
+        in_shapes = _shapes(in_data)
+        out_shapes = _shapes(out_grad)
+        flops = None
+        counter = _flop_counters.get(function._impl_name)
+        if counter is not None and all([s is not None for s in out_shapes]):
+            flops = 2 * counter(function, in_shapes, out_shapes)
+        # Input gradients have the same sizes as the inputs.
+        nbytes = 2 * _nbytes(in_data) + _nbytes(out_grad)
+        self._postprocess(function, in_shapes, out_shapes, nbytes, flops)
+
+    def summary(self, group_by='link', sort_by='time'):
+        """Returns the aggregated records.
+
+        Args:
+            group_by (str or tuple of str): Keys of the records to group by,
+                e.g. ``'link'``, ``'name'``, ``'call_site'`` or ``'phase'``.
+            sort_by (str): Column to sort the rows in the descending order:
+                ``'time'``, ``'flops'``, ``'bytes'``, ``'memory'`` or
+                ``'occurrence'``.
+
+        Returns:
+            list of dict: Rows of the summary. Each row has the group keys
+            and ``'time'``, ``'forward_time'``, ``'backward_time'``,
+            ``'flops'``, ``'bytes'``, ``'memory'`` and ``'occurrence'``. The
+            FLOPs and memory are ``None`` if no record in the group has
+            them.
+
+        """
+        if isinstance(group_by, six.string_types):
+            group_by = (group_by,)
+        rows = collections.OrderedDict()
+        for record in self.records:
+            if record['depth'] > 0:
+                continue
+            key = tuple([record[k] for k in group_by])
+            row = rows.get(key)
+            if row is None:
+                row = dict(zip(group_by, key))
+                row.update({'time': 0, 'forward_time': 0,
+                            'backward_time': 0, 'flops': None, 'bytes': 0,
+                            'memory': None, 'occurrence': 0})
+                rows[key] = row
+            row['time'] += record['time']
+            row[record['phase'] + '_time'] += record['time']
+            row['bytes'] += record['bytes']
+            row['occurrence'] += 1
+            for k in ('flops', 'memory'):
+                if record[k] is not None:
+                    row[k] = (row[k] or 0) + record[k]
+        return sorted(six.itervalues(rows),
+                      key=lambda row: -(row[sort_by] or 0))
+
+    def total_time(self):
+        """Returns total elapsed time in seconds.
+
+        Nested computations (e.g. functions applied inside a backward
+        computation) are only counted in their outer computations.
+
+        """
+        return sum([r['time'] for r in self.records if r['depth'] == 0])
+
+    @staticmethod
+    def _humanize(value, units, base):
+        if value is None:
+            return '-'
+        for unit in units[:-1]:
+            if abs(value) < base:
+                return '%3.2f%s' % (value, unit)
+            value /= float(base)
+        return '%3.2f%s' % (value, units[-1])
+
+    def _humanized_time(self, second):
+        for unit in ['sec', 'ms', 'us']:
+            if second >= 1:
+                return '%3.2f%s' % (second, unit)
+            second *= 1000.0
+        return '%.2f%s' % (second, 'ns')
+
+    def print_report(self, file=sys.stdout, group_by='link', sort_by='time',
+                     n_rows=None):
+        """Prints the summary table.
+
+        Args:
+            file: Output file-like object.
+            group_by (str or tuple of str): See :meth:`summary`.
+            sort_by (str): See :meth:`summary`.
+            n_rows (int): Maximum number of rows to print. If it is ``None``,
+                all rows are printed.
+
+        """
+        if isinstance(group_by, six.string_types):
+            group_by = (group_by,)
+        rows = self.summary(group_by, sort_by)
+        if n_rows is not None:
+            rows = rows[:n_rows]
+        header = [k.replace('_', ' ').title() for k in group_by] + [
+            'Forward', 'Backward', 'FLOPs', 'Bytes', 'Memory', 'Occurrence']
+        entries = [header]
+        for row in rows:
+            entries.append([str(row[k]) for k in group_by] + [
+                self._humanized_time(row['forward_time']),
+                self._humanized_time(row['backward_time']),
+                self._humanize(row['flops'], ['', 'K', 'M', 'G', 'T'], 1000),
+                self._humanize(row['bytes'], ['B', 'KB', 'MB', 'GB'], 1024),
+                self._humanize(row['memory'], ['B', 'KB', 'MB', 'GB'], 1024),
+                str(row['occurrence'])])
+        widths = [max([len(e[i]) for e in entries])
+                  for i in six.moves.range(len(header))]
+        template = '  '.join(['{:>%d}' % w for w in widths])
+        for entry in entries:
+            file.write(template.format(*entry))
+            file.write('\n')
+        file.flush()
+
+    def chrome_trace(self):
+        """Returns the records in the Chrome trace event format.
+
+        Returns:
+            dict: A dictionary that can be serialized to JSON and loaded by
+            ``chrome://tracing``.
+
+        """
+        pid = os.getpid()
+        events = []
+        for record in self.records:
+            events.append({
+                'name': record['name'],
+                'cat': record['phase'],
+                'ph': 'X',
+                'ts': record['start'] * 1e6,
+                'dur': record['time'] * 1e6,
+                'pid': pid,
+                'tid': record['thread'],
+                'args': {
+                    'link': record['link'],
+                    'call_site': record['call_site'],
+                    'input_shapes': record['input_shapes'],
+                    'output_shapes': record['output_shapes'],
+                    'flops': record['flops'],
+                    'bytes': record['bytes'],
+                    'memory': record['memory'],
+                },
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, file):
+        """Writes the records in the Chrome trace event format.
+
+        Args:
+            file (str or file-like object): Path or file to write the JSON
+                document to.
+
+        """
+        if isinstance(file, six.string_types):
+            with open(file, 'w') as f:
+                json.dump(self.chrome_trace(), f)
+        else:
+            json.dump(self.chrome_trace(), file)
@@ -12,6 +12,7 @@ from chainer.backends import cuda
 from chainer import configuration
 from chainer import function_hook
 from chainer.utils import experimental
+from chainer.utils import sparse_rows
 from chainer.utils import type_check
 from chainer import variable
 
@@ -127,6 +128,7 @@ class FunctionNode(object):
     _input_indexes_to_retain = None
     _output_indexes_to_retain = None
     _retained_output_data = None
+    _retained_arrays_released = False
     _local_function_hooks = None
     lazy_grad_sum = False
 
@@ -272,7 +274,7 @@ Use apply() method instead.\
                     ', '.join(str(type(x)) for x in outputs)))
 
         for hook in hooks:
-            hook.forward_postprocess(self, in_data)
+            hook._forward_postprocess(self, in_data, outputs)
 
         # NaN check of output values
         if is_debug:
@@ -293,6 +295,9 @@ Use apply() method instead.\
             for y in ret:
                 y.creator_node = self
             self.inputs = tuple([x.node for x in input_vars])
+            self_ref = weakref.ref(self)
+            for x in self.inputs:
+                x._consumers += self_ref,
             # Add forward edges (must be weak references)
             self.outputs = tuple([weakref.ref(y.node) for y in ret])
 
@@ -311,6 +316,12 @@ Use apply() method instead.\
             if self.lazy_grad_sum:
                 experimental('config.lazy_grad_sum')
 
+        # Record the application if a static graph is being captured
+        recorder = getattr(
+            chainer._thread_local, 'static_graph_recorder', None)
+        if recorder is not None:
+            recorder.record(self, input_vars, ret)
+
         return ret
 
     def _check_data_type_forward(self, in_data):
@@ -581,6 +592,7 @@ Use apply() method instead.\
             A tuple of retained input variables.
 
         """
+        self._check_retained_arrays()
         inputs = self.inputs
         return tuple([inputs[index].get_variable()
                       for index in self._input_indexes_to_retain])
@@ -602,6 +614,7 @@ Use apply() method instead.\
            node of the function node.
 
         """
+        self._check_retained_arrays()
         ret = []
         outputs = self.outputs
 
@@ -626,6 +639,13 @@ Use apply() method instead.\
 
         return tuple(ret)
 
+    def _check_retained_arrays(self):
+        if self._retained_arrays_released:
+            raise RuntimeError(
+                'the retained arrays of {} have already been released by '
+                'BackwardMemoryPlanner; backprop cannot be done twice through '
+                'the same graph'.format(self.label))
+
     def unchain(self):
         """Purges in/out nodes and this function node itself from the graph."""
         for y in self.outputs:
@@ -824,7 +844,10 @@ def grad(outputs, inputs, grad_outputs=None, grad_inputs=None, set_grad=False,
 
     # Backprop implementation. It edits grads which will only contain the
     # gradients w.r.t. the inputs.
-    with chainer.using_config('enable_backprop', enable_double_backprop):
+    # The gradients are returned instead of being accumulated into the
+    # parameters, so that they are not given as sparse gradients.
+    with chainer.using_config('enable_backprop', enable_double_backprop), \
+            sparse_rows.sparse_grad_scope(False):
         _backprop(outputs, inputs, grad_required, retain_grad, grads,
                   loss_scale)
 
@@ -839,6 +862,7 @@ def grad(outputs, inputs, grad_outputs=None, grad_inputs=None, set_grad=False,
 
 def _backprop(outputs, inputs, grad_required, retain_grad, grads, loss_scale):
     candidate_funcs, push_candidate, pop_candidate = _get_ordered_func_heap()
+    plan = chainer.graph_optimizations.memory_planner._get_plan(outputs)
 
     for y in outputs:
         creator = y.creator_node
@@ -885,6 +909,8 @@ def _backprop(outputs, inputs, grad_required, retain_grad, grads, loss_scale):
         input_indexes = tuple(input_indexes)
 
         if not input_indexes:
+            if plan is not None:
+                plan.release(func)
             continue
 
         # Do backward
@@ -892,6 +918,8 @@ def _backprop(outputs, inputs, grad_required, retain_grad, grads, loss_scale):
                      chainer.functions.add(*gy)
                      for gy in gys])
         new_gxs = func.backward_accumulate(input_indexes, gys, gxs)
+        if plan is not None:
+            plan.release(func)
 
         # Delete output gradients that are not required to return
         for y_ref in func.outputs:
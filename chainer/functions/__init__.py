@@ -307,6 +307,9 @@ from chainer.functions.pooling.upsampling_2d import upsampling_2d  # NOQA
 
 from chainer.functions.theano.theano_function import TheanoFunction  # NOQA
 
+from chainer.functions.util.checkpoint import checkpoint  # NOQA
+from chainer.functions.util.checkpoint import checkpoint_sequential  # NOQA
+from chainer.functions.util.checkpoint import Checkpoint  # NOQA
 from chainer.functions.util.forget import forget  # NOQA
 from chainer.functions.util.forget import Forget  # NOQA
 
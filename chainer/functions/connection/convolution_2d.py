@@ -7,6 +7,7 @@ from chainer.backends import intel64
 from chainer import configuration
 from chainer import function_node
 import chainer.functions
+from chainer.functions.connection import convolution_2d_cpu
 from chainer.utils import argument
 from chainer.utils import conv
 from chainer.utils import type_check
@@ -138,15 +139,13 @@ class Convolution2DFunction(function_node.FunctionNode):
             return self._forward_cpu_core(x, W, b)
 
     def _forward_cpu_core(self, x, W, b):
-        kh, kw = W.shape[2:]
-        col = conv.im2col_cpu(
-            x, kh, kw, self.sy, self.sx, self.ph, self.pw,
-            cover_all=self.cover_all, dy=self.dy, dx=self.dx)
-        y = numpy.tensordot(
-            col, W, ((1, 2, 3), (1, 2, 3))).astype(x.dtype, copy=False)
+        out_h, out_w = self._get_out_size((x, W))
+        params = convolution_2d_cpu.ConvolutionParams(
+            self.sy, self.sx, self.ph, self.pw, self.dy, self.dx,
+            self.cover_all, out_h, out_w)
+        y = convolution_2d_cpu.convolution_forward(x, W, params)
         if b is not None:
-            y += b
-        y = numpy.rollaxis(y, 3, 1)
+            y += b.reshape(1, b.size, 1, 1)
         return y,
 
     def _forward_ideep(self, inputs):
@@ -375,12 +374,12 @@ class Convolution2DGradW(function_node.FunctionNode):
             return self._forward_cpu_core(x, gy)
 
     def _forward_cpu_core(self, x, gy):
-        col = conv.im2col_cpu(
-            x, self.kh, self.kw, self.sy, self.sx, self.ph, self.pw,
-            cover_all=self.cover_all, dy=self.dy, dx=self.dx)
-        gW = numpy.tensordot(gy, col, ((0, 2, 3), (0, 4, 5))
-                             ).astype(self.W_dtype, copy=False)
-        return gW,
+        params = convolution_2d_cpu.ConvolutionParams(
+            self.sy, self.sx, self.ph, self.pw, self.dy, self.dx,
+            self.cover_all, gy.shape[2], gy.shape[3])
+        gW = convolution_2d_cpu.convolution_grad_w(
+            x, gy, (self.kh, self.kw), params)
+        return gW.astype(self.W_dtype, copy=False),
 
     def _forward_ideep(self, inputs):
         self.retain_inputs((0, 1))
@@ -618,6 +617,9 @@ def convolution_2d(x, W, b=None, stride=1, pad=0, cover_all=False, groups=1,
     selects the most efficient CNN algorithm for images of fixed-size,
     can provide a significant performance boost for fixed neural nets.
     To enable, set `chainer.using_config('autotune', True)`
+    On CPU, the autotuning benchmarks im2col, Winograd's minimal filtering
+    for 3x3 filters of stride 1 and FFT for large filters of stride 1 in the
+    same way.
 
     When the dilation factor is greater than one, cuDNN is not used unless
     the version is 6.0 or higher.
@@ -0,0 +1,387 @@
+import collections
+import time
+
+import numpy
+import six
+
+from chainer import configuration
+from chainer.utils import conv
+
+
+ConvolutionParams = collections.namedtuple(
+    'ConvolutionParams',
+    ('sy', 'sx', 'ph', 'pw', 'dy', 'dx', 'cover_all', 'out_h', 'out_w'))
+
+
+# Algorithms chosen by the autotuner, keyed by the operation, the shapes and
+# the dtypes of the arrays, and the parameters.
+_tuned_algorithms = {}
+
+
+def _key(op, a, b, params):
+    return op, a.shape, b.shape, a.dtype, b.dtype, params
+
+
+def _dot_into(out, a, b):
+    # numpy.dot requires the output of the exact dtype of the result.
+    if out.dtype == numpy.result_type(a, b) and out.flags.c_contiguous:
+        numpy.dot(a, b, out=out)
+    else:
+        out[...] = numpy.dot(a, b)
+
+
+# Convolution
+
+def _is_strided_1x1(x, ksize, p):
+    # The output is the GEMM of the strided input and the filter.
+    h, w = x.shape[2:]
+    return (ksize == (1, 1) and p.ph == 0 and p.pw == 0 and
+            (h - 1) // p.sy + 1 == p.out_h and
+            (w - 1) // p.sx + 1 == p.out_w)
+
+
+def _is_1x1(x, W, p):
+    return _is_strided_1x1(x, W.shape[2:], p)
+
+
+def _is_3x3_s1(x, W, p):
+    return (W.shape[2:] == (3, 3) and p.sy == 1 and p.sx == 1 and
+            p.dy == 1 and p.dx == 1)
+
+
+def _is_large_s1(x, W, p):
+    # FFT pays off only for large filters.
+    return (min(W.shape[2:]) >= 5 and p.sy == 1 and p.sx == 1 and
+            p.dy == 1 and p.dx == 1)
+
+
+def _always(x, W, p):
+    return True
+
+
+def _conv_1x1(x, W, p):
+    # Pure GEMM of each sample without im2col.
+    n, c = x.shape[:2]
+    out_c = W.shape[0]
+    xs = x[:, :, ::p.sy, ::p.sx]
+    W = W.reshape(out_c, c)
+    y = numpy.empty((n, out_c, p.out_h, p.out_w), dtype=x.dtype)
+    y_mat = y.reshape(n, out_c, -1)
+    for i in six.moves.range(n):
+        _dot_into(y_mat[i], W, xs[i].reshape(c, -1))
+    return y
+
+
+def _conv_im2col(x, W, p):
+    kh, kw = W.shape[2:]
+    col = conv.im2col_cpu(
+        x, kh, kw, p.sy, p.sx, p.ph, p.pw,
+        cover_all=p.cover_all, dy=p.dy, dx=p.dx)
+    y = numpy.tensordot(
+        col, W, ((1, 2, 3), (1, 2, 3))).astype(x.dtype, copy=False)
+    return numpy.rollaxis(y, 3, 1)
+
+
+def _pad_to(x, ph, pw, h, w, dtype):
+    # Pads x of the shape (c, n, h_in, w_in) into the shape (c, n, h, w).
+    c, n, h_in, w_in = x.shape
+    x_pad = numpy.zeros((c, n, h, w), dtype=dtype)
+    h_in = min(h_in, h - ph)
+    w_in = min(w_in, w - pw)
+    x_pad[:, :, ph:ph + h_in, pw:pw + w_in] = x[:, :, :h_in, :w_in]
+    return x_pad
+
+
+def _conv_winograd(x, W, p):
+    # Winograd's minimal filtering F(2x2, 3x3), which computes each 2x2
+    # tile of the output with 16 multiplications instead of 36 by
+    # transforming 4x4 tiles of the input and the filter:
+    # Y = A^T [(G g G^T) * (B^T d B)] A.
+    n, c = x.shape[:2]
+    out_c = W.shape[0]
+    out_h, out_w = p.out_h, p.out_w
+    th = (out_h + 1) // 2
+    tw = (out_w + 1) // 2
+    dtype = numpy.result_type(x.dtype, W.dtype, numpy.float32)
+
+    # The channel axis comes first so that each transformed tile is a
+    # matrix of (c, n * th * tw) elements.
+    d = _pad_to(x.transpose(1, 0, 2, 3), p.ph, p.pw,
+                2 * th + 2, 2 * tw + 2, dtype)
+
+    def rows(a):
+        return a[:, :, 0:2 * th:2], a[:, :, 1:2 * th + 1:2], \
+            a[:, :, 2:2 * th + 2:2], a[:, :, 3:2 * th + 3:2]
+
+    def cols(a):
+        return a[..., 0:2 * tw:2], a[..., 1:2 * tw + 1:2], \
+            a[..., 2:2 * tw + 2:2], a[..., 3:2 * tw + 3:2]
+
+    # B^T d B, where B^T = [[1, 0, -1, 0], [0, 1, 1, 0], [0, -1, 1, 0],
+    # [0, 1, 0, -1]].
+    d0, d1, d2, d3 = rows(d)
+    V = []
+    for t in (d0 - d2, d1 + d2, d2 - d1, d1 - d3):
+        t0, t1, t2, t3 = cols(t)
+        V.append([u.reshape(c, -1) for u in
+                  (t0 - t2, t1 + t2, t2 - t1, t1 - t3)])
+    del d, d0, d1, d2, d3
+
+    # G g G^T, where G = [[1, 0, 0], [.5, .5, .5], [.5, -.5, .5], [0, 0, 1]].
+    G = numpy.array([[1, 0, 0], [.5, .5, .5], [.5, -.5, .5], [0, 0, 1]],
+                    dtype=dtype)
+    U = numpy.einsum('ik,ockl,jl->ijoc', G, W.astype(dtype, copy=False), G)
+
+    M = [[numpy.dot(U[i, j], V[i][j]) for j in six.moves.range(4)]
+         for i in six.moves.range(4)]
+    del V
+
+    # A^T M A, where A^T = [[1, 1, 1, 0], [0, 1, -1, -1]].
+    s0 = [M[0][j] + M[1][j] + M[2][j] for j in six.moves.range(4)]
+    s1 = [M[1][j] - M[2][j] - M[3][j] for j in six.moves.range(4)]
+    del M
+    y = numpy.empty((n, out_c, 2 * th, 2 * tw), dtype=x.dtype)
+    for r, s in enumerate((s0, s1)):
+        for q, u in enumerate((s[0] + s[1] + s[2], s[1] - s[2] - s[3])):
+            y[:, :, r::2, q::2] = u.reshape(
+                out_c, n, th, tw).transpose(1, 0, 2, 3)
+    return numpy.ascontiguousarray(y[:, :, :out_h, :out_w])
+
+
+def _conv_fft(x, W, p):
+    # Cross-correlation by the products of the Fourier transforms of the
+    # padded input and the flipped filter.
+    n, c, h, w = x.shape
+    out_c, _, kh, kw = W.shape
+    x_pad = _pad_to(x.transpose(1, 0, 2, 3), p.ph, p.pw,
+                    p.out_h + kh - 1, p.out_w + kw - 1, x.dtype)
+    size = x_pad.shape[2:]
+    fx = numpy.fft.rfft2(x_pad, size)
+    fW = numpy.fft.rfft2(W[:, :, ::-1, ::-1], size)
+    # Sums over the channels of each frequency.
+    fx = fx.reshape(c, n, -1).transpose(2, 1, 0)
+    fW = fW.reshape(out_c, c, -1).transpose(2, 1, 0)
+    fy = numpy.matmul(fx, fW).transpose(1, 2, 0).reshape(
+        (n, out_c, size[0], -1))
+    y = numpy.fft.irfft2(fy, size)[:, :, kh - 1:, kw - 1:]
+    return y.astype(x.dtype)
+
+
+# Deconvolution, i.e., the gradient of convolution w.r.t. the input
+
+def _as_convolution(x, W, p):
+    # Deconvolution of stride 1 is convolution by the flipped and transposed
+    # filter with the complementary padding.
+    kh, kw = W.shape[2:]
+    W = numpy.ascontiguousarray(W.transpose(1, 0, 2, 3)[:, :, ::-1, ::-1])
+    return W, p._replace(ph=kh - 1 - p.ph, pw=kw - 1 - p.pw)
+
+
+def _is_deconv_s1(x, W, p):
+    n, c, h, w = x.shape
+    kh, kw = W.shape[2:]
+    return (p.sy == 1 and p.sx == 1 and p.dy == 1 and p.dx == 1 and
+            p.ph < kh and p.pw < kw and
+            p.out_h == h + kh - 1 - 2 * p.ph and
+            p.out_w == w + kw - 1 - 2 * p.pw)
+
+
+def _is_deconv_3x3_s1(x, W, p):
+    return W.shape[2:] == (3, 3) and _is_deconv_s1(x, W, p)
+
+
+def _is_deconv_large_s1(x, W, p):
+    return min(W.shape[2:]) >= 5 and _is_deconv_s1(x, W, p)
+
+
+def _is_deconv_1x1(x, W, p):
+    # Each input pixel is scattered to a pixel of the output on the stride
+    # grid; the extra input pixels of cover_all and the outputs smaller
+    # than the grid are left to col2im.
+    h, w = x.shape[2:]
+    return (W.shape[2:] == (1, 1) and p.ph == 0 and p.pw == 0 and
+            (h - 1) * p.sy < p.out_h and (w - 1) * p.sx < p.out_w)
+
+
+def _deconv_1x1(x, W, p):
+    n, c, h, w = x.shape
+    out_c = W.shape[1]
+    W = W.reshape(c, out_c).T
+    x = x.reshape(n, c, -1)
+    dense = (p.sy == 1 and p.sx == 1 and
+             p.out_h == h and p.out_w == w)
+    if dense:
+        y = numpy.empty((n, out_c, h, w), dtype=x.dtype)
+    else:
+        y = numpy.zeros((n, out_c, p.out_h, p.out_w), dtype=x.dtype)
+    ys = y[:, :, :h * p.sy:p.sy, :w * p.sx:p.sx]
+    for i in six.moves.range(n):
+        if dense:
+            _dot_into(y[i].reshape(out_c, -1), W, x[i])
+        else:
+            ys[i] = numpy.dot(W, x[i]).reshape(out_c, h, w)
+    return y
+
+
+def _deconv_col2im(x, W, p):
+    gcol = numpy.tensordot(W, x, (0, 1)).astype(x.dtype, copy=False)
+    gcol = numpy.rollaxis(gcol, 3)
+    return conv.col2im_cpu(
+        gcol, p.sy, p.sx, p.ph, p.pw, p.out_h, p.out_w, dy=p.dy, dx=p.dx)
+
+
+def _deconv_winograd(x, W, p):
+    return _conv_winograd(x, *_as_convolution(x, W, p))
+
+
+def _deconv_fft(x, W, p):
+    return _conv_fft(x, *_as_convolution(x, W, p))
+
+
+# Gradient of convolution w.r.t. the filter
+
+def _grad_w_1x1(x, gy, p):
+    n, c = x.shape[:2]
+    out_c = gy.shape[1]
+    xs = x[:, :, ::p.sy, ::p.sx]
+    gW = numpy.zeros((out_c, c), dtype=numpy.result_type(x, gy))
+    for i in six.moves.range(n):
+        gW += numpy.dot(gy[i].reshape(out_c, -1), xs[i].reshape(c, -1).T)
+    return gW.reshape(out_c, c, 1, 1)
+
+
+def _grad_w_im2col(x, gy, p, ksize):
+    kh, kw = ksize
+    col = conv.im2col_cpu(
+        x, kh, kw, p.sy, p.sx, p.ph, p.pw,
+        cover_all=p.cover_all, dy=p.dy, dx=p.dx)
+    return numpy.tensordot(gy, col, ((0, 2, 3), (0, 4, 5)))
+
+
+# Algorithms of each operation in the order of preference. Each entry is a
+# tuple of the name, the function, the predicate telling whether it is
+# applicable, and whether it is used without autotuning. The algorithms
+# which are faster only for some shapes are tried only by the autotuner.
+_algorithms = {
+    'forward': [
+        ('gemm_1x1', _conv_1x1, _is_1x1, True),
+        ('im2col', _conv_im2col, _always, True),
+        ('winograd', _conv_winograd, _is_3x3_s1, False),
+        ('fft', _conv_fft, _is_large_s1, False),
+    ],
+    'backward_data': [
+        ('gemm_1x1', _deconv_1x1, _is_deconv_1x1, True),
+        ('col2im', _deconv_col2im, _always, True),
+        ('winograd', _deconv_winograd, _is_deconv_3x3_s1, False),
+        ('fft', _deconv_fft, _is_deconv_large_s1, False),
+    ],
+}
+
+
+def _run(op, a, b, params):
+    candidates = [(name, func) for name, func, applicable, default
+                  in _algorithms[op] if applicable(a, b, params) and
+                  (default or configuration.config.autotune)]
+    if not configuration.config.autotune:
+        return candidates[0][1](a, b, params)
+
+    key = _key(op, a, b, params)
+    name = _tuned_algorithms.get(key)
+    if name is not None:
+        return dict(candidates)[name](a, b, params)
+
+    # Benchmarks the candidates on the actual inputs and keeps the output of
+    # the fastest one.
+    best = None
+    for name, func in candidates:
+        start = time.time()
+        y = func(a, b, params)
+        elapsed = time.time() - start
+        if best is None or elapsed < best[0]:
+            best = elapsed, name, y
+    _tuned_algorithms[key] = best[1]
+    return best[2]
+
+
+def get_algorithm(op, a, b, params):
+    """Returns the name of the algorithm used for the given arguments.
+
+    Args:
+        op (str): ``'forward'`` or ``'backward_data'``.
+        a (numpy.ndarray): The input array.
+        b (numpy.ndarray): The filter array.
+        params (ConvolutionParams): The parameters of the convolution.
+
+    Returns:
+        str: The name of the algorithm, or ``None`` if it is not tuned yet
+        in the autotuning mode.
+
+    """
+    if configuration.config.autotune:
+        return _tuned_algorithms.get(_key(op, a, b, params))
+    for name, _, applicable, default in _algorithms[op]:
+        if default and applicable(a, b, params):
+            return name
+
+
+def convolution_forward(x, W, params):
+    """Computes 2D convolution on CPU without the bias.
+
+    The algorithm is chosen from the registered ones applicable to the
+    arguments. If ``chainer.config.autotune`` is ``True``, all the applicable
+    algorithms including those only for the autotuner, i.e., Winograd's
+    minimal filtering and FFT, are benchmarked on the first call for each
+    combination of the shapes, the dtypes and the parameters, and the
+    fastest one is used from then on. Otherwise, a GEMM without im2col is
+    used for 1x1 filters, and im2col is used for the other filters.
+
+    Args:
+        x (numpy.ndarray): Input of the shape ``(n, c, h, w)``.
+        W (numpy.ndarray): Filter of the shape ``(out_c, c, kh, kw)``.
+        params (ConvolutionParams): The parameters of the convolution.
+            ``out_h`` and ``out_w`` are the sizes of the output.
+
+    Returns:
+        numpy.ndarray: Output of the dtype of ``x``.
+
+    """
+    return _run('forward', x, W, params)
+
+
+def deconvolution_forward(x, W, params):
+    """Computes 2D deconvolution on CPU without the bias.
+
+    This is the gradient of convolution w.r.t. its input. The algorithm is
+    chosen as :func:`convolution_forward` does. Winograd's minimal filtering
+    and FFT are applicable to the deconvolution of stride 1, which is the
+    convolution by the flipped and transposed filter.
+
+    Args:
+        x (numpy.ndarray): Input of the shape ``(n, c, h, w)``.
+        W (numpy.ndarray): Filter of the shape ``(c, out_c, kh, kw)``.
+        params (ConvolutionParams): The parameters of the deconvolution.
+            ``out_h`` and ``out_w`` are the sizes of the output.
+
+    Returns:
+        numpy.ndarray: Output of the dtype of ``x``.
+
+    """
+    return _run('backward_data', x, W, params)
+
+
+def convolution_grad_w(x, gy, ksize, params):
+    """Computes the gradient of 2D convolution w.r.t. the filter on CPU.
+
+    Args:
+        x (numpy.ndarray): Input of the convolution.
+        gy (numpy.ndarray): Gradient w.r.t. the output of the convolution.
+        ksize (tuple of ints): Size of the filter.
+        params (ConvolutionParams): The parameters of the convolution.
+
+    Returns:
+        numpy.ndarray: Gradient w.r.t. the filter.
+
+    """
+    if _is_strided_1x1(x, tuple(ksize), params):
+        return _grad_w_1x1(x, gy, params)
+    return _grad_w_im2col(x, gy, params, ksize)
@@ -8,6 +8,7 @@ from chainer import configuration
 from chainer import function_node
 import chainer.functions
 from chainer.functions.connection import convolution_2d
+from chainer.functions.connection import convolution_2d_cpu
 from chainer.utils import argument
 from chainer.utils import conv
 from chainer.utils import type_check
@@ -155,11 +156,10 @@ class Deconvolution2DFunction(function_node.FunctionNode):
             return self._forward_cpu_core(x, W, b)
 
     def _forward_cpu_core(self, x, W, b):
-        gcol = numpy.tensordot(W, x, (0, 1)).astype(x.dtype, copy=False)
-        gcol = numpy.rollaxis(gcol, 3)
-        y = conv.col2im_cpu(
-            gcol, self.sy, self.sx, self.ph, self.pw, self.outh, self.outw,
-            dy=self.dy, dx=self.dx)
+        params = convolution_2d_cpu.ConvolutionParams(
+            self.sy, self.sx, self.ph, self.pw, self.dy, self.dx,
+            False, self.outh, self.outw)
+        y = convolution_2d_cpu.deconvolution_forward(x, W, params)
         # b, k, h, w
         if b is not None:
             y += b.reshape(1, b.size, 1, 1)
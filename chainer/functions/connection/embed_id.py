@@ -4,13 +4,15 @@ import six
 import chainer
 from chainer.backends import cuda
 from chainer import function_node
+from chainer.utils import sparse_rows
 from chainer.utils import type_check
 
 
 class EmbedIDFunction(function_node.FunctionNode):
 
-    def __init__(self, ignore_label=None):
+    def __init__(self, ignore_label=None, sparse_grad=False):
         self.ignore_label = ignore_label
+        self.sparse_grad = sparse_grad
 
     def check_type_forward(self, in_types):
         type_check.expect(in_types.size() == 2)
@@ -46,6 +48,21 @@ class EmbedIDFunction(function_node.FunctionNode):
 
     def backward(self, indexes, grad_outputs):
         inputs = self.get_retained_inputs()
+        param = None
+        if self.sparse_grad:
+            param = sparse_rows.get_sparse_grad_target(self, 1)
+        if param is not None:
+            # The rows of the IDs are given to the parameter without
+            # scattering them into a dense gradient.
+            x = inputs[0].array.ravel()
+            gy = grad_outputs[0].array.reshape(x.size, -1)
+            if self.ignore_label is not None:
+                mask = x != self.ignore_label
+                x, gy = x[mask], gy[mask]
+            param.add_sparse_grad(
+                sparse_rows.SparseRows(x, gy, self._w_shape))
+            return None, None
+
         gW = EmbedIDGrad(
             self._w_shape, self.ignore_label).apply(inputs + grad_outputs)[0]
         return None, gW
@@ -115,7 +132,7 @@ class EmbedIDGrad(function_node.FunctionNode):
         return None, ggy
 
 
-def embed_id(x, W, ignore_label=None):
+def embed_id(x, W, ignore_label=None, sparse_grad=False):
     """Efficient linear function for one-hot input.
 
     This function implements so called *word embeddings*. It takes two
@@ -136,6 +153,12 @@ def embed_id(x, W, ignore_label=None):
         ignore_label (:class:`int` or :class:`None`):
             If ``ignore_label`` is an int value, ``i``-th column of return
             value is filled with ``0``.
+        sparse_grad (bool): If ``True`` and ``W`` is a
+            :class:`~chainer.Parameter`, the gradient w.r.t. ``W`` is given to
+            it as :attr:`~chainer.Parameter.sparse_grad` containing only the
+            rows of the IDs instead of a dense gradient array, unless the
+            gradient is differentiated again. Update rules supporting sparse
+            gradients then update only these rows.
 
     Returns:
         ~chainer.Variable: Output variable.
@@ -162,4 +185,5 @@ def embed_id(x, W, ignore_label=None):
                [0., 0., 0.]], dtype=float32)
 
     """
-    return EmbedIDFunction(ignore_label=ignore_label).apply((x, W))[0]
+    return EmbedIDFunction(
+        ignore_label=ignore_label, sparse_grad=sparse_grad).apply((x, W))[0]
@@ -444,6 +444,11 @@ def n_step_lstm_base(
         ys = chainer.functions.split_axis(ys, sections, 0)
         return hy, cy, ys
 
+    elif xp is numpy:
+        return n_step_rnn.n_step_rnn_cpu(
+            'lstm', _lstm, n_layers, dropout_ratio, hx, cx, ws, bs, xs,
+            use_bi_direction)
+
     else:
         return n_step_rnn.n_step_rnn_impl(
             _lstm, n_layers, dropout_ratio, hx, cx, ws, bs, xs,
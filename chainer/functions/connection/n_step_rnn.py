@@ -10,6 +10,7 @@ import chainer
 from chainer.backends import cuda
 from chainer import configuration
 from chainer import function
+from chainer import function_node
 from chainer.functions.activation import relu
 from chainer.functions.activation import tanh
 from chainer.functions.array import concat
@@ -820,24 +821,47 @@ def n_step_rnn_base(n_layers, dropout_ratio, hx, ws, bs, xs,
         ys = chainer.functions.split_axis(ys, sections, 0)
         return hy, ys
 
-    else:
-
-        def f(x, h, c, w, b):
-            xw, hw = w
-            xb, hb = b
-            rnn_in = linear.linear(x, xw, xb) + linear.linear(h, hw, hb)
-            if activation == 'tanh':
-                return tanh.tanh(rnn_in), None
-            elif activation == 'relu':
-                return relu.relu(rnn_in), None
+    elif xp is numpy:
+        hy, _, ys = n_step_rnn_cpu(
+            'rnn_' + activation, _rnn_cells[activation], n_layers,
+            dropout_ratio, hx, None, ws, bs, xs, use_bi_direction)
+        return hy, ys
 
+    else:
         hy, _, ys = n_step_rnn_impl(
-            f, n_layers, dropout_ratio, hx, None, ws, bs, xs, use_bi_direction)
+            _rnn_cells[activation], n_layers, dropout_ratio, hx, None, ws, bs,
+            xs, use_bi_direction)
         return hy, ys
 
 
+def _rnn_tanh(x, h, c, w, b):
+    xw, hw = w
+    xb, hb = b
+    return tanh.tanh(linear.linear(x, xw, xb) + linear.linear(h, hw, hb)), None
+
+
+def _rnn_relu(x, h, c, w, b):
+    xw, hw = w
+    xb, hb = b
+    return relu.relu(linear.linear(x, xw, xb) + linear.linear(h, hw, hb)), None
+
+
+_rnn_cells = {'tanh': _rnn_tanh, 'relu': _rnn_relu}
+
+
 def n_step_rnn_impl(
         f, n_layers, dropout_ratio, hx, cx, ws, bs, xs, use_bi_direction):
+    def dropout_sequence(xs, idx):
+        return _dropout_sequence(xs, dropout_ratio)
+
+    return _n_step_rnn_graph(
+        f, n_layers, dropout_sequence, hx, cx, ws, bs, xs, use_bi_direction)
+
+
+def _n_step_rnn_graph(
+        f, n_layers, dropout_sequence, hx, cx, ws, bs, xs, use_bi_direction):
+    # Builds the graph of each step. dropout_sequence(xs, idx) applies the
+    # dropout to the inputs of the idx-th cell.
     direction = 2 if use_bi_direction else 1
     hx = chainer.functions.separate(hx)
     use_cell = cx is not None
@@ -852,11 +876,11 @@ def n_step_rnn_impl(
     for layer in six.moves.range(n_layers):
 
         # Forward RNN
+        idx = direction * layer
         if layer == 0:
             xs = xs_next
         else:
-            xs = _dropout_sequence(xs_next, dropout_ratio)
-        idx = direction * layer
+            xs = dropout_sequence(xs_next, idx)
         h, c, h_forward = _one_directional_loop(
             f, xs, hx[idx], cx[idx], ws[idx], bs[idx])
         hy.append(h)
@@ -868,7 +892,7 @@ def n_step_rnn_impl(
             if layer == 0:
                 xs = xs_next
             else:
-                xs = _dropout_sequence(xs_next, dropout_ratio)
+                xs = dropout_sequence(xs_next, idx)
             h, c, h_backward = _one_directional_loop(
                 f, reversed(xs), hx[idx], cx[idx], ws[idx], bs[idx])
             h_backward.reverse()
@@ -912,3 +936,420 @@ def _one_directional_loop(f, xs, h, c, w, b):
 
 def _dropout_sequence(xs, dropout_ratio):
     return [dropout.dropout(x, ratio=dropout_ratio) for x in xs]
+
+
+# Number of the gates of each cell on CPU. Each weight matrix and bias vector
+# corresponds to a gate, and a cell has the same number of the matrices for
+# the inputs and for the hidden states.
+_cpu_n_gates = {
+    'rnn_relu': 1,
+    'rnn_tanh': 1,
+    'gru': 3,
+    'lstm': 4,
+}
+
+
+def _sigmoid_inplace(x):
+    x *= 0.5
+    numpy.tanh(x, out=x)
+    x *= 0.5
+    x += 0.5
+
+
+class NStepRNNCPU(function_node.FunctionNode):
+
+    """Fused n-step RNN, GRU and LSTM on CPU.
+
+    Instead of building a graph of the functions of each step, this function
+    computes all the steps of all the layers at once. The weight matrices of
+    each cell are stacked once per call, the projection of the inputs of all
+    the steps is computed by a single matrix multiplication, and only the
+    multiplication by the hidden states is done in the recurrent loop, which
+    writes the activations to preallocated buffers. The backward computation
+    runs the loop in the reverse order with these buffers, and computes the
+    gradients of the weights by single matrix multiplications.
+
+    The inputs are ``hx``, ``cx`` (only for LSTM), the weights and the biases
+    flattened in the same order as :class:`BaseNStepRNN`, and the inputs of
+    the steps. The outputs are ``hy``, ``cy`` (only for LSTM) and the
+    outputs of the steps.
+
+    When the gradients are differentiated again, the backward computation
+    builds the graph of each step by ``cell`` with the same dropout masks as
+    the forward computation, i.e., it falls back to
+    :func:`n_step_rnn_impl`.
+
+    """
+
+    def __init__(self, n_layers, dropout_ratio, lengths, rnn_dir, rnn_mode,
+                 cell):
+        if rnn_dir not in ('uni', 'bi'):
+            raise ValueError('Invalid rnn_dir: "%s". Please select from '
+                             '[uni,bi]' % rnn_dir)
+        if rnn_mode not in _cpu_n_gates:
+            raise ValueError('Invalid rnn_mode: "%s". Please select from [%s]'
+                             % (rnn_mode, ','.join(sorted(_cpu_n_gates))))
+        self.n_layers = n_layers
+        self.dropout_ratio = dropout_ratio
+        self.lengths = lengths
+        self.offsets = numpy.cumsum([0] + list(lengths))
+        self.rnn_mode = rnn_mode
+        self.rnn_direction = 2 if rnn_dir == 'bi' else 1
+        self.use_cell = rnn_mode == 'lstm'
+        self.n_gates = _cpu_n_gates[rnn_mode]
+        self.n_W = self.n_gates * 2
+        self.cell = cell
+
+    @property
+    def _n_cell(self):
+        return 2 if self.use_cell else 1
+
+    @property
+    def _n_params(self):
+        return self.n_layers * self.rnn_direction * self.n_W
+
+    def check_type_forward(self, in_types):
+        n_steps = len(self.lengths)
+        type_check.expect(
+            in_types.size() == self._n_cell + self._n_params * 2 + n_steps)
+        h_type = in_types[0]
+        type_check.expect(
+            h_type.dtype.kind == 'f',
+            h_type.ndim == 3,
+            h_type.shape[0] == self.n_layers * self.rnn_direction,
+        )
+        if self.use_cell:
+            c_type = in_types[1]
+            type_check.expect(
+                c_type.dtype == h_type.dtype,
+                c_type.shape == h_type.shape,
+            )
+        for i in six.moves.range(self._n_cell + self._n_params * 2,
+                                 len(in_types)):
+            type_check.expect(
+                in_types[i].dtype == h_type.dtype,
+                in_types[i].ndim == 2,
+            )
+
+    def _split_inputs(self, inputs):
+        if self.use_cell:
+            (hx, cx), inputs = _split(inputs, 2)
+        else:
+            (hx,), inputs = _split(inputs, 1)
+            cx = None
+        ws, inputs = _split(inputs, self._n_params)
+        bs, xs = _split(inputs, self._n_params)
+        n_W = self.n_W
+        ws = [ws[i:i + n_W] for i in six.moves.range(0, len(ws), n_W)]
+        bs = [bs[i:i + n_W] for i in six.moves.range(0, len(bs), n_W)]
+        return hx, cx, ws, bs, xs
+
+    def _stack_params(self, w, b):
+        # Returns the stacked weights for the inputs and the hidden states,
+        # and the biases added to the input projection and to the hidden
+        # projection.
+        n = self.n_gates
+        w_x = numpy.concatenate(w[:n], axis=0)
+        w_h = numpy.concatenate(w[n:], axis=0)
+        b_x = numpy.concatenate(b[:n], axis=0)
+        b_h = numpy.concatenate(b[n:], axis=0)
+        if self.rnn_mode != 'gru':
+            # The biases of the hidden states of GRU are multiplied by the
+            # reset gate; the others are just added.
+            b_x = b_x + b_h
+            b_h = None
+        return w_x, w_h, b_x, b_h
+
+    def _steps(self, di):
+        steps = six.moves.range(len(self.lengths))
+        if di == 1:
+            steps = reversed(steps)
+        return steps
+
+    def forward_cpu(self, inputs):
+        self.retain_inputs(tuple(six.moves.range(len(inputs))))
+        hx, cx, ws, bs, xs = self._split_inputs(inputs)
+        n_layers = self.n_layers
+        n_dir = self.rnn_direction
+        N = hx.shape[2]
+        dtype = hx.dtype
+        total = int(self.offsets[-1])
+        use_dropout = configuration.config.train and self.dropout_ratio > 0
+
+        hy = numpy.empty_like(hx)
+        cy = numpy.empty_like(cx) if self.use_cell else None
+        self.records = []
+        layer_in = numpy.concatenate(xs, axis=0)
+        for layer in six.moves.range(n_layers):
+            y = numpy.empty((total, N * n_dir), dtype=dtype)
+            for di in six.moves.range(n_dir):
+                idx = layer * n_dir + di
+                mask = None
+                x = layer_in
+                if use_dropout and layer > 0:
+                    scale = dtype.type(1. / (1 - self.dropout_ratio))
+                    mask = (numpy.random.rand(*x.shape) >=
+                            self.dropout_ratio) * scale
+                    mask = mask.astype(dtype, copy=False)
+                    x = x * mask
+                record = self._forward_cell(
+                    idx, di, x, hx, cx, ws[idx], bs[idx], hy, cy,
+                    y[:, di * N:(di + 1) * N])
+                record['x'] = x
+                record['mask'] = mask
+                self.records.append(record)
+            layer_in = y
+
+        ys = tuple([layer_in[self.offsets[t]:self.offsets[t + 1]]
+                    for t in six.moves.range(len(self.lengths))])
+        if self.use_cell:
+            return (hy, cy) + ys
+        return (hy,) + ys
+
+    def _forward_cell(self, idx, di, x, hx, cx, w, b, hy, cy, y):
+        mode = self.rnn_mode
+        N = hx.shape[2]
+        total = x.shape[0]
+        w_x, w_h, b_x, b_h = self._stack_params(w, b)
+        w_h_T = w_h.T
+
+        # Pre-activations of the gates of all the steps, which are replaced
+        # with the activations in the loop.
+        act = x.dot(w_x.T)
+        act += b_x
+        h = hx[idx].copy()
+        h_prev = numpy.empty((total, N), dtype=h.dtype)
+        record = {'act': act, 'h_prev': h_prev, 'w_x': w_x, 'w_h': w_h}
+        if self.use_cell:
+            c = cx[idx].copy()
+            record['c_prev'] = c_prev = numpy.empty_like(h_prev)
+            record['c'] = c_all = numpy.empty_like(h_prev)
+        if mode == 'gru':
+            record['h_proj'] = h_proj_all = numpy.empty_like(h_prev)
+
+        offsets = self.offsets
+        for t in self._steps(di):
+            batch = self.lengths[t]
+            s = slice(offsets[t], offsets[t + 1])
+            hp = h[:batch]
+            h_prev[s] = hp
+            g = act[s]
+            if mode == 'lstm':
+                g += hp.dot(w_h_T)
+                _sigmoid_inplace(g[:, :2 * N])
+                numpy.tanh(g[:, 2 * N:3 * N], out=g[:, 2 * N:3 * N])
+                _sigmoid_inplace(g[:, 3 * N:])
+                i, f, a, o = (g[:, :N], g[:, N:2 * N], g[:, 2 * N:3 * N],
+                              g[:, 3 * N:])
+                cp = c[:batch]
+                c_prev[s] = cp
+                c_new = f * cp
+                c_new += i * a
+                c_all[s] = c_new
+                c[:batch] = c_new
+                h_new = o * numpy.tanh(c_new)
+            elif mode == 'gru':
+                h_proj = hp.dot(w_h_T)
+                h_proj += b_h
+                g[:, :2 * N] += h_proj[:, :2 * N]
+                _sigmoid_inplace(g[:, :2 * N])
+                r, z = g[:, :N], g[:, N:2 * N]
+                h_proj_all[s] = h_proj[:, 2 * N:]
+                h_bar = g[:, 2 * N:]
+                h_bar += r * h_proj[:, 2 * N:]
+                numpy.tanh(h_bar, out=h_bar)
+                h_new = hp - h_bar
+                h_new *= z
+                h_new += h_bar
+            else:
+                g += hp.dot(w_h_T)
+                if mode == 'rnn_tanh':
+                    numpy.tanh(g, out=g)
+                else:
+                    numpy.maximum(g, 0, out=g)
+                h_new = g
+            h[:batch] = h_new
+            y[s] = h_new
+
+        hy[idx] = h
+        if self.use_cell:
+            cy[idx] = c
+        return record
+
+    def backward(self, indexes, grad_outputs):
+        inputs = self.get_retained_inputs()
+        if configuration.config.enable_backprop:
+            gxs = self._backward_graph(inputs, grad_outputs)
+        else:
+            gxs = self._backward_cpu(
+                [x.array for x in inputs],
+                [None if gy is None else gy.array for gy in grad_outputs])
+            gxs = [chainer.Variable(gx) for gx in gxs]
+        return tuple([gxs[i] for i in indexes])
+
+    def _backward_graph(self, inputs, grad_outputs):
+        hx, cx, ws, bs, xs = self._split_inputs(inputs)
+        offsets = self.offsets
+        masks = [record['mask'] for record in self.records]
+
+        def dropout_sequence(xs, idx):
+            mask = masks[idx]
+            if mask is None:
+                return xs
+            return [x * mask[offsets[t]:offsets[t + 1]]
+                    for t, x in enumerate(xs)]
+
+        hy, cy, ys = _n_step_rnn_graph(
+            self.cell, self.n_layers, dropout_sequence, hx, cx, ws, bs, xs,
+            self.rnn_direction == 2)
+        outputs = (hy, cy) + ys if self.use_cell else (hy,) + ys
+        pairs = [(y, gy) for y, gy in six.moves.zip(outputs, grad_outputs)
+                 if gy is not None]
+        return chainer.grad(
+            [y for y, _ in pairs], list(inputs), [gy for _, gy in pairs],
+            enable_double_backprop=True)
+
+    def _backward_cpu(self, inputs, grads):
+        hx, cx, ws, bs, xs = self._split_inputs(inputs)
+        n_layers = self.n_layers
+        n_dir = self.rnn_direction
+        N = hx.shape[2]
+        dtype = hx.dtype
+
+        if self.use_cell:
+            (ghy, gcy), gys = _split(grads, 2)
+        else:
+            (ghy,), gys = _split(grads, 1)
+            gcy = None
+        gys = [numpy.zeros((len(x), N * n_dir), dtype=dtype) if gy is None
+               else gy for x, gy in six.moves.zip(xs, gys)]
+        g_out = numpy.concatenate(gys, axis=0)
+
+        ghx = numpy.empty_like(hx)
+        gcx = numpy.empty_like(cx) if self.use_cell else None
+        gws = [None] * len(ws)
+        gbs = [None] * len(bs)
+        for layer in reversed(six.moves.range(n_layers)):
+            g_in = None
+            for di in six.moves.range(n_dir):
+                idx = layer * n_dir + di
+                record = self.records[idx]
+                g_x, gws[idx], gbs[idx] = self._backward_cell(
+                    idx, di, record, hx, cx, ghy, gcy, ghx, gcx,
+                    g_out[:, di * N:(di + 1) * N])
+                if record['mask'] is not None:
+                    g_x *= record['mask']
+                if g_in is None:
+                    g_in = g_x
+                else:
+                    g_in += g_x
+            g_out = g_in
+
+        gxs = tuple([g_out[self.offsets[t]:self.offsets[t + 1]]
+                     for t in six.moves.range(len(self.lengths))])
+        gws = sum(gws, [])
+        gbs = sum(gbs, [])
+        if self.use_cell:
+            return tuple([ghx, gcx] + gws + gbs) + gxs
+        return tuple([ghx] + gws + gbs) + gxs
+
+    def _backward_cell(self, idx, di, record, hx, cx, ghy, gcy, ghx, gcx,
+                       gy):
+        mode = self.rnn_mode
+        N = hx.shape[2]
+        n = self.n_gates
+        act = record['act']
+        h_prev = record['h_prev']
+        w_x = record['w_x']
+        w_h = record['w_h']
+
+        gh = numpy.zeros_like(hx[idx]) if ghy is None else ghy[idx].copy()
+        if self.use_cell:
+            gc = numpy.zeros_like(cx[idx]) if gcy is None else gcy[idx].copy()
+            c_all = record['c']
+            c_prev = record['c_prev']
+        # Gradients of the pre-activations of the input projection, and those
+        # of the hidden projection if they differ.
+        g_act = numpy.empty_like(act)
+        if mode == 'gru':
+            g_act_h = numpy.empty_like(act)
+            h_proj_all = record['h_proj']
+        else:
+            g_act_h = g_act
+
+        offsets = self.offsets
+        for t in reversed(list(self._steps(di))):
+            batch = self.lengths[t]
+            s = slice(offsets[t], offsets[t + 1])
+            g_h = gh[:batch] + gy[s]
+            a_s = act[s]
+            ga = g_act[s]
+            if mode == 'lstm':
+                i, f, a, o = (a_s[:, :N], a_s[:, N:2 * N],
+                              a_s[:, 2 * N:3 * N], a_s[:, 3 * N:])
+                tc = numpy.tanh(c_all[s])
+                g_c = gc[:batch] + g_h * o * (1 - tc * tc)
+                ga[:, :N] = g_c * a * i * (1 - i)
+                ga[:, N:2 * N] = g_c * c_prev[s] * f * (1 - f)
+                ga[:, 2 * N:3 * N] = g_c * i * (1 - a * a)
+                ga[:, 3 * N:] = g_h * tc * o * (1 - o)
+                gc[:batch] = g_c * f
+                gh[:batch] = ga.dot(w_h)
+            elif mode == 'gru':
+                r, z, h_bar = a_s[:, :N], a_s[:, N:2 * N], a_s[:, 2 * N:]
+                g_bar = g_h * (1 - z) * (1 - h_bar * h_bar)
+                ga[:, :N] = g_bar * h_proj_all[s] * r * (1 - r)
+                ga[:, N:2 * N] = g_h * (h_prev[s] - h_bar) * z * (1 - z)
+                ga[:, 2 * N:] = g_bar
+                gah = g_act_h[s]
+                gah[:, :2 * N] = ga[:, :2 * N]
+                gah[:, 2 * N:] = g_bar * r
+                gh[:batch] = g_h * z + gah.dot(w_h)
+            else:
+                if mode == 'rnn_tanh':
+                    numpy.multiply(g_h, 1 - a_s * a_s, out=ga)
+                else:
+                    numpy.multiply(g_h, a_s > 0, out=ga)
+                gh[:batch] = ga.dot(w_h)
+
+        ghx[idx] = gh
+        if self.use_cell:
+            gcx[idx] = gc
+
+        g_w_x = g_act.T.dot(record['x'])
+        g_w_h = g_act_h.T.dot(h_prev)
+        g_b_x = g_act.sum(axis=0)
+        g_b_h = g_act_h.sum(axis=0)
+        g_x = g_act.dot(w_x)
+
+        gw = ([g_w_x[k * N:(k + 1) * N] for k in six.moves.range(n)] +
+              [g_w_h[k * N:(k + 1) * N] for k in six.moves.range(n)])
+        gb = ([g_b_x[k * N:(k + 1) * N] for k in six.moves.range(n)] +
+              [g_b_h[k * N:(k + 1) * N] for k in six.moves.range(n)])
+        return g_x, gw, gb
+
+
+def n_step_rnn_cpu(rnn_mode, cell, n_layers, dropout_ratio, hx, cx, ws, bs,
+                   xs, use_bi_direction):
+    """Applies :class:`NStepRNNCPU` to the arguments of n-step functions.
+
+    ``cell`` is the function computing a step of a cell for
+    :func:`n_step_rnn_impl`, which is used for double backprop.
+
+    Returns:
+        tuple: ``hy``, ``cy`` (``None`` except for LSTM) and ``ys``.
+
+    """
+    lengths = [len(x) for x in xs]
+    rnn_dir = 'bi' if use_bi_direction else 'uni'
+    inputs = tuple(itertools.chain(
+        (hx,) if cx is None else (hx, cx),
+        itertools.chain.from_iterable(ws),
+        itertools.chain.from_iterable(bs),
+        xs))
+    outputs = NStepRNNCPU(
+        n_layers, dropout_ratio, lengths, rnn_dir, rnn_mode, cell).apply(
+            inputs)
+    if cx is None:
+        return outputs[0], None, outputs[1:]
+    return outputs[0], outputs[1], outputs[2:]
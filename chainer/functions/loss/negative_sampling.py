@@ -4,6 +4,7 @@ import six
 import chainer
 from chainer.backends import cuda
 from chainer import function_node
+from chainer.utils import sparse_rows
 from chainer.utils import type_check
 
 
@@ -16,7 +17,7 @@ class NegativeSamplingFunction(function_node.FunctionNode):
 
     ignore_label = -1
 
-    def __init__(self, sampler, sample_size, reduce='sum'):
+    def __init__(self, sampler, sample_size, reduce='sum', sparse_grad=False):
         if reduce not in ('sum', 'no'):
             raise ValueError(
                 "only 'sum' and 'no' are valid for 'reduce', but '%s' is "
@@ -25,6 +26,7 @@ class NegativeSamplingFunction(function_node.FunctionNode):
         self.sampler = sampler
         self.sample_size = sample_size
         self.reduce = reduce
+        self.sparse_grad = sparse_grad
         self.wx = None
 
     def _make_samples(self, t):
@@ -124,26 +126,51 @@ class NegativeSamplingFunction(function_node.FunctionNode):
     def backward(self, indexes, grad_outputs):
         x, t, W = self.get_retained_inputs()
         gy, = grad_outputs
-        return NegativeSamplingFunctionGrad(
+        param = None
+        if self.sparse_grad and 2 in indexes:
+            param = sparse_rows.get_sparse_grad_target(self, 2)
+        grad = NegativeSamplingFunctionGrad(
             self.reduce, self.ignore_mask, self.sample_size, self.samples,
-            self.wx).apply((x, W, gy))
+            self.wx, sparse=param is not None)
+        gx, gt, gW = grad.apply((x, W, gy))
+        if param is not None:
+            param.add_sparse_grad(grad.sparse_gW)
+            gW = None
+        return gx, gt, gW
 
 
 class NegativeSamplingFunctionGrad(function_node.FunctionNode):
 
-    def __init__(self, reduce, ignore_mask, sample_size, samples, wx):
+    def __init__(self, reduce, ignore_mask, sample_size, samples, wx,
+                 sparse=False):
         self.reduce = reduce
         self.ignore_mask = ignore_mask
         self.sample_size = sample_size
         self.samples = samples
         self.wx = wx
+        # If sparse is True, the gradient w.r.t. W is not returned but kept as
+        # sparse_gW.
+        self.sparse = sparse
+        self.sparse_gW = None
+
+    def _make_sparse_gW(self, x, W, g):
+        # The rows of the samples scaled by g for each sample.
+        mask = self.ignore_mask
+        rows = self.samples[mask].ravel()
+        values = (g[mask][:, :, None] * x[mask][:, None, :]).reshape(
+            len(rows), -1)
+        self.sparse_gW = sparse_rows.SparseRows(rows, values, W.shape)
 
     def forward_cpu(self, inputs):
         self.retain_inputs((0, 1, 2))
         x, W, gloss = inputs
 
         gx = numpy.zeros_like(x)
-        gW = numpy.zeros_like(W)
+        if self.sparse:
+            gW = None
+            gs = numpy.empty(self.samples.shape, dtype=x.dtype)
+        else:
+            gW = numpy.zeros_like(W)
 
         for i in numpy.arange(len(self.ignore_mask))[self.ignore_mask]:
             ix = x[i]
@@ -163,8 +190,14 @@ class NegativeSamplingFunctionGrad(function_node.FunctionNode):
             g[0] *= -1
 
             gx[i] = g.dot(w)
+            if self.sparse:
+                gs[i] = g
+                continue
             for ik, ig in six.moves.zip(k, g):
                 gW[ik] += ig * ix
+
+        if self.sparse:
+            self._make_sparse_gW(x, W, gs)
         return gx, None, gW
 
     def forward_gpu(self, inputs):
@@ -208,6 +241,10 @@ class NegativeSamplingFunctionGrad(function_node.FunctionNode):
         )(g, W, self.ignore_mask[:, None], self.samples, n_in,
           self.sample_size + 1, gx)
 
+        if self.sparse:
+            self._make_sparse_gW(x, W, g)
+            return gx, None, None
+
         gW = cupy.zeros_like(W)
         cuda.elementwise(
             'T g, raw T x, S k, bool mask, int32 c, int32 m',
@@ -312,7 +349,8 @@ class NegativeSamplingFunctionGrad(function_node.FunctionNode):
         return ret
 
 
-def negative_sampling(x, t, W, sampler, sample_size, reduce='sum'):
+def negative_sampling(x, t, W, sampler, sample_size, reduce='sum',
+                      sparse_grad=False):
     """Negative sampling loss function.
 
     In natural language processing, especially language modeling, the number of
@@ -357,6 +395,11 @@ def negative_sampling(x, t, W, sampler, sample_size, reduce='sum'):
         sample_size (int): Number of samples.
         reduce (str): Reduction option. Its value must be either
             ``'sum'`` or ``'no'``. Otherwise, :class:`ValueError` is raised.
+        sparse_grad (bool): If ``True`` and ``W`` is a
+            :class:`~chainer.Parameter`, the gradient w.r.t. ``W`` is given to
+            it as :attr:`~chainer.Parameter.sparse_grad` containing only the
+            rows of the samples instead of a dense gradient array (see
+            :func:`~chainer.functions.embed_id`).
 
     Returns:
         ~chainer.Variable:
@@ -373,6 +416,6 @@ def negative_sampling(x, t, W, sampler, sample_size, reduce='sum'):
 
     """
     return (
-        NegativeSamplingFunction(sampler, sample_size, reduce)
+        NegativeSamplingFunction(sampler, sample_size, reduce, sparse_grad)
         .apply((x, t, W))
     )[0]
@@ -1,11 +1,10 @@
-import numpy
-
 import chainer
 from chainer.backends import cuda
 from chainer.backends import intel64
 from chainer import configuration
 from chainer import function_node
 from chainer.utils import argument
+from chainer.utils import counter_rng
 from chainer.utils import type_check
 
 
@@ -13,75 +12,110 @@ class Dropout(function_node.FunctionNode):
 
     """Dropout regularization."""
 
-    mask = None
+    _flag = None
+    _mask = None
+    _ideep_mask = None
 
     def __init__(self, dropout_ratio):
         if not 0.0 <= dropout_ratio < 1.0:
             raise ValueError('dropout_ratio must be in the range [0, 1)')
         self.dropout_ratio = dropout_ratio
 
+    @property
+    def mask(self):
+        """Mask multiplied to the input.
+
+        Only the boolean flags of the kept elements (or their key) are kept
+        by this function, and the mask is computed from them on access. A
+        mask can also be set explicitly before the forward computation, in
+        which case it is used instead of a random one.
+
+        """
+        if self._mask is not None:
+            return self._mask
+        if self._ideep_mask is not None:
+            return self._ideep_mask
+        if self._flag is None:
+            return None
+        return self._flag.array * self._scale
+
+    @mask.setter
+    def mask(self, mask):
+        self._mask = mask
+        self._reset_random_state()
+
+    def _reset_random_state(self):
+        # Discards the generated mask so that the next forward computation
+        # draws a new one. A mask set explicitly is kept.
+        self._flag = None
+        self._ideep_mask = None
+
     def check_type_forward(self, in_types):
         type_check.expect(in_types.size() == 1)
         type_check.expect(in_types[0].dtype.kind == 'f')
 
     def forward(self, x):
+        mask = self._mask
+        if mask is None:
+            mask = self._ideep_mask
+        if mask is not None:
+            return x[0] * mask,
+
         if (intel64.should_use_ideep('>=auto')
                 and intel64.inputs_all_ready(x)):
             return self._forward_ideep(x)
 
-        if self.mask is not None:
-            y = x[0] * self.mask
-        else:
-            scale = x[0].dtype.type(1. / (1 - self.dropout_ratio))
-            xp = cuda.get_array_module(*x)
-            if xp == numpy:
-                flag = xp.random.rand(*x[0].shape) >= self.dropout_ratio
-                self.mask = scale * flag
-                y = x[0] * self.mask
-            else:
-                rand = xp.random.rand(*x[0].shape, dtype=numpy.float32)
-                self.mask, y = cuda.elementwise(
-                    'T x, R r, T scale, T ratio', 'T mask, T y',
-                    '''
-                    mask = (r >= ratio) * scale;
-                    y = x * mask;
-                    ''',
-                    'dropout_fwd',
-                )(x[0], rand, scale, self.dropout_ratio)
-        return y,
+        if self._flag is None:
+            # The mask is generated by the counter-based generator, so that
+            # it can be regenerated from the key instead of being stored.
+            self._flag = counter_rng.BernoulliMask(
+                cuda.get_array_module(*x), x[0].shape,
+                1 - self.dropout_ratio,
+                configuration.config.recompute_dropout_mask)
+        self._scale = x[0].dtype.type(1. / (1 - self.dropout_ratio))
+        return self._apply_mask(x[0]),
+
+    def _apply_mask(self, x):
+        y = x * self._scale
+        y *= self._flag.array
+        return y
 
     def _forward_ideep(self, x):
         mask, y = intel64.ideep.dropout.Forward(
             intel64.ideep.array(x[0]),
             self.dropout_ratio)
-        self.mask = mask
+        self._ideep_mask = mask
         return y,
 
     def backward(self, x, gy):
-        return DropoutGrad(self.mask).apply(gy)
+        return DropoutGrad(self).apply(gy)
 
 
 class DropoutGrad(function_node.FunctionNode):
     """Computes the gradient of the Dropout function."""
 
-    def __init__(self, mask):
-        self.mask = mask
+    def __init__(self, dropout):
+        self.dropout = dropout
 
     def forward(self, inputs):
+        if self.dropout._flag is not None:
+            return self.dropout._apply_mask(inputs[0]),
+        mask = self.dropout.mask
+
         if (intel64.should_use_ideep('>=auto')
                 and intel64.inputs_all_ready(inputs)):
             return self._forward_ideep(inputs)
 
-        y = inputs[0] * self.mask
+        y = inputs[0] * mask
         return y,
 
     def _forward_ideep(self, inputs):
         return intel64.ideep.dropout.Backward(
-            intel64.ideep.array(self.mask),
+            intel64.ideep.array(self.dropout.mask),
             intel64.ideep.array(inputs[0])),
 
     def backward(self, indexes, gy):
-        return DropoutGrad(self.mask).apply(gy)
+        return DropoutGrad(self.dropout).apply(gy)
 
 
 def dropout(x, ratio=.5, **kwargs):
@@ -93,6 +127,11 @@ def dropout(x, ratio=.5, **kwargs):
     scales the remaining elements by factor ``1 / (1 - ratio)``. In testing
     mode, it does nothing and just returns ``x``.
 
+    The mask is generated by :func:`chainer.utils.counter_rng.bernoulli` and
+    kept as a boolean array for the backward computation. If
+    ``chainer.config.recompute_dropout_mask`` is ``True``, only the key of
+    the generator is kept and the mask is regenerated on backward.
+
     .. warning::
 
        ``train`` argument is not supported anymore since v2.
@@ -118,9 +157,9 @@ def dropout(x, ratio=.5, **kwargs):
         >>> with chainer.using_config('train', True):
         ...     y = F.dropout(x)
         >>> y.data
-        array([[-2.,  0.],
-               [ 4., -6.],
-               [-0.,  2.]], dtype=float32)
+        array([[-0.,  0.],
+               [ 0., -6.],
+               [-4.,  2.]], dtype=float32)
         >>> with chainer.using_config('train', True):
         ...     y = F.dropout(x, ratio=0.0) \
 # dropout returns original input if ratio=0.0
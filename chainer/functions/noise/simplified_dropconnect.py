@@ -1,8 +1,10 @@
 import numpy
 
 from chainer.backends import cuda
+from chainer import configuration
 from chainer import function_node
 import chainer.functions
+from chainer.utils import counter_rng
 from chainer.utils import type_check
 from chainer import variable
 
@@ -26,11 +28,30 @@ class SimplifiedDropconnect(function_node.FunctionNode):
 
     """Linear unit regularized by simplified dropconnect."""
 
+    _flag = None
+
     def __init__(self, ratio, mask=None, use_batchwise_mask=True):
         self.ratio = ratio
-        self.mask = mask
+        self._mask = mask
         self.use_batchwise_mask = use_batchwise_mask
 
+    @property
+    def mask(self):
+        """Boolean mask of the weight matrix.
+
+        If the mask is not given, it is generated by the counter-based
+        generator, and it may be regenerated on each access.
+
+        """
+        if self._flag is not None:
+            return self._flag.array
+        return self._mask
+
+    def _reset_random_state(self):
+        # Discards the generated mask so that the next forward computation
+        # draws a new one. A mask given explicitly is kept.
+        self._flag = None
+
     def check_type_forward(self, in_types):
         n_in = in_types.size()
         type_check.expect(2 <= n_in, n_in <= 3)
@@ -51,33 +72,33 @@ class SimplifiedDropconnect(function_node.FunctionNode):
                 b_type.shape[0] == w_type.shape[0],
             )
 
-        if self.mask is not None:
+        # The shape of the mask is checked without regenerating it.
+        mask = self._mask if self._flag is None else self._flag
+        if mask is not None:
             if self.use_batchwise_mask:
                 type_check.expect(
-                    self.mask.shape[0] == x_type.shape[0],
-                    self.mask.shape[1:] == w_type.shape,
+                    mask.shape[0] == x_type.shape[0],
+                    mask.shape[1:] == w_type.shape,
                 )
             else:
-                type_check.expect(self.mask.shape == w_type.shape)
+                type_check.expect(mask.shape == w_type.shape)
 
     def forward(self, inputs):
         self.retain_inputs((0, 1))
         scale = inputs[1].dtype.type(1. / (1 - self.ratio))
         xp = cuda.get_array_module(*inputs)
 
-        if self.mask is None:
+        if self._mask is None and self._flag is None:
             if self.use_batchwise_mask:
                 mask_shape = (inputs[0].shape[0], inputs[1].shape[0],
                               inputs[1].shape[1])
             else:
                 mask_shape = (inputs[1].shape[0], inputs[1].shape[1])
-            if xp == numpy:
-                self.mask = xp.random.rand(*mask_shape) >= self.ratio
-            else:
-                self.mask = xp.random.rand(*mask_shape,
-                                           dtype=numpy.float32) >= self.ratio
-        elif isinstance(self.mask, variable.Variable):
-            self.mask = self.mask.data
+            self._flag = counter_rng.BernoulliMask(
+                xp, mask_shape, 1 - self.ratio,
+                configuration.config.recompute_dropout_mask)
+        elif isinstance(self._mask, variable.Variable):
+            self._mask = self._mask.data
 
         x = _as_mat(inputs[0])
         W = inputs[1] * scale * self.mask
@@ -99,12 +120,13 @@ class SimplifiedDropconnect(function_node.FunctionNode):
         x = _as_mat(inputs[0])
 
         W = inputs[1]
+        mask = self.mask
         if self.use_batchwise_mask:
             W = chainer.functions.broadcast_to(
-                W, self.mask.shape) * scale * self.mask
+                W, mask.shape) * scale * mask
         else:
             W = chainer.functions.broadcast_to(
-                W * scale * self.mask, (x.shape[0],) + self.mask.shape)
+                W * scale * mask, (x.shape[0],) + mask.shape)
         gy = grad_outputs[0]
 
         if 0 in indexes:
@@ -121,7 +143,7 @@ class SimplifiedDropconnect(function_node.FunctionNode):
             shape = (gy2.shape[0], gy2.shape[1], x2.shape[2])
             gy2 = chainer.functions.broadcast_to(gy2, shape)
             x2 = chainer.functions.broadcast_to(x2, shape)
-            gW = chainer.functions.sum(gy2 * x2 * self.mask, axis=0) * scale
+            gW = chainer.functions.sum(gy2 * x2 * mask, axis=0) * scale
             gW = chainer.functions.cast(gW, W.dtype)
             ret.append(gW)
 
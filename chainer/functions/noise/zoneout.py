@@ -1,9 +1,8 @@
-import numpy
-
 from chainer.backends import cuda
 from chainer import configuration
 from chainer import function_node
 from chainer.utils import argument
+from chainer.utils import counter_rng
 from chainer.utils import type_check
 
 
@@ -14,6 +13,16 @@ class Zoneout(function_node.FunctionNode):
     def __init__(self, zoneout_ratio):
         self.zoneout_ratio = zoneout_ratio
 
+    @property
+    def flag_x(self):
+        """Boolean flags of the elements taken from the input."""
+        return self._flag.array
+
+    @property
+    def flag_h(self):
+        """Boolean flags of the elements taken from the previous variable."""
+        return ~self._flag.array
+
     def check_type_forward(self, in_types):
         type_check.expect(in_types.size() == 2)
 
@@ -21,23 +30,20 @@ class Zoneout(function_node.FunctionNode):
         self.retain_inputs(())
 
         h, x = inputs
-        xp = cuda.get_array_module(*x)
-        if xp is numpy:
-            flag_x = xp.random.rand(*x.shape) >= self.zoneout_ratio
-        else:
-            flag_x = (xp.random.rand(*x.shape) >=
-                      self.zoneout_ratio)
-        self.flag_h = xp.ones_like(flag_x) ^ flag_x
-        self.flag_x = flag_x
-        return h * self.flag_h + x * self.flag_x,
+        xp = cuda.get_array_module(*inputs)
+        self._flag = counter_rng.BernoulliMask(
+            xp, x.shape, 1 - self.zoneout_ratio,
+            configuration.config.recompute_dropout_mask)
+        return xp.where(self._flag.array, x, h),
 
     def backward(self, indexes, grad_outputs):
         gy, = grad_outputs
+        flag_x = self.flag_x
         ret = []
         if 0 in indexes:
-            ret.append(gy * self.flag_h)
+            ret.append(gy * ~flag_x)
         if 1 in indexes:
-            ret.append(gy * self.flag_x)
+            ret.append(gy * flag_x)
         return ret
 
 
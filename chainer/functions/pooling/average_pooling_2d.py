@@ -1,10 +1,9 @@
-import numpy
-
 import chainer
 from chainer.backends import cuda
 from chainer.backends import intel64
 from chainer import function_node
 from chainer.functions.pooling import pooling_2d
+from chainer.functions.pooling import pooling_cpu
 from chainer.utils import conv
 
 
@@ -21,9 +20,9 @@ class AveragePooling2D(pooling_2d.Pooling2D):
         self._in_shape = x[0].shape
         self._in_dtype = x[0].dtype
 
-        col = conv.im2col_cpu(x[0], self.kh, self.kw, self.sy, self.sx,
-                              self.ph, self.pw)
-        y = col.mean(axis=(2, 3))
+        y = pooling_cpu.average_pooling_forward(
+            x[0], (self.kh, self.kw), (self.sy, self.sx), (self.ph, self.pw),
+            False)
         return y,
 
     def _forward_ideep(self, x):
@@ -118,11 +117,9 @@ class AveragePooling2DGrad(function_node.FunctionNode):
                 and intel64.inputs_all_ready(gy)):
             return self._forward_ideep(gy)
 
-        h, w = self._in_shape[2:]
-        gcol = numpy.tile(gy[0][:, :, None, None],
-                          (1, 1, self.kh, self.kw, 1, 1))
-        gx = conv.col2im_cpu(gcol, self.sy, self.sx, self.ph, self.pw, h, w)
-        gx /= self.kh * self.kw
+        gx = pooling_cpu.average_pooling_backward(
+            gy[0], self._in_shape, (self.kh, self.kw), (self.sy, self.sx),
+            (self.ph, self.pw))
         return gx,
 
     def _forward_ideep(self, gy):
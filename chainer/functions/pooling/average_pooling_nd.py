@@ -1,13 +1,13 @@
 import functools
 import operator
 
-import numpy
 import six
 
 import chainer
 from chainer.backends import cuda
 from chainer import function_node
 from chainer.functions.pooling import average_pooling_nd_kernel
+from chainer.functions.pooling import pooling_cpu
 from chainer.functions.pooling import pooling_nd
 from chainer import utils
 from chainer.utils import conv_nd
@@ -37,12 +37,8 @@ class AveragePoolingND(pooling_nd._PoolingND):
         self._in_shape = x[0].shape
         self._in_dtype = x[0].dtype
 
-        col = conv_nd.im2col_nd_cpu(
-            x[0], self.ksize, self.stride, self.pad, cover_all=self.cover_all)
-
-        # mean along (_, _, k_1, k_2, ..., k_N, _, ..., _)
-        y_axis = tuple(six.moves.range(2, 2 + len(self.ksize)))
-        y = col.mean(axis=y_axis)
+        y = pooling_cpu.average_pooling_forward(
+            x[0], self.ksize, self.stride, self.pad, self.cover_all)
         return y,
 
     def forward_gpu(self, x):
@@ -99,14 +95,8 @@ class AveragePoolingNDGrad(function_node.FunctionNode):
         self.apoolnd = apoolnd
 
     def forward_cpu(self, gy):
-        dims = self._in_shape[2:]
-        outs = gy[0].shape[2:]
-        colon = slice(None, None, None)
-        gy_index = (colon, colon) + (None,) * len(dims)
-        gcol_reps = (1, 1) + self.ksize + (1,) * len(outs)
-        gcol = numpy.tile(gy[0][gy_index], gcol_reps)
-        gx = conv_nd.col2im_nd_cpu(gcol, self.stride, self.pad, dims)
-        gx /= functools.reduce(operator.mul, self.ksize)
+        gx = pooling_cpu.average_pooling_backward(
+            gy[0], self._in_shape, self.ksize, self.stride, self.pad)
         return gx,
 
     def forward_gpu(self, gy):
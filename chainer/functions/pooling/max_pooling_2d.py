@@ -5,6 +5,7 @@ from chainer.backends import cuda
 from chainer.backends import intel64
 from chainer import function_node
 from chainer.functions.pooling import pooling_2d
+from chainer.functions.pooling import pooling_cpu
 from chainer.utils import conv
 
 
@@ -20,16 +21,9 @@ class MaxPooling2D(pooling_2d.Pooling2D):
         self._in_shape = x[0].shape
         self._in_dtype = x[0].dtype
 
-        col = conv.im2col_cpu(
-            x[0], self.kh, self.kw, self.sy, self.sx, self.ph, self.pw,
-            pval=-float('inf'), cover_all=self.cover_all)
-        n, c, kh, kw, out_h, out_w = col.shape
-        col = col.reshape(n, c, kh * kw, out_h, out_w)
-
-        # We select maximum twice, since the implementation using numpy.choose
-        # hits its bug when kh * kw >= 32.
-        self.indexes = col.argmax(axis=2)
-        y = col.max(axis=2)
+        y, self.indexes = pooling_cpu.max_pooling_forward(
+            x[0], (self.kh, self.kw), (self.sy, self.sx),
+            (self.ph, self.pw), self.cover_all)
         return y,
 
     def _forward_ideep(self, x):
@@ -144,22 +138,10 @@ class MaxPooling2DGrad(function_node.FunctionNode):
                 and intel64.inputs_all_ready(gy)):
             return self._forward_ideep(gy)
 
-        n, c, out_h, out_w = gy[0].shape
-        h, w = self._in_shape[2:]
-        kh, kw = self.kh, self.kw
-
-        gcol = numpy.zeros(
-            (n * c * out_h * out_w * kh * kw), dtype=self._in_dtype)
-
-        indexes = self.indexes.flatten()
-        indexes += numpy.arange(0, indexes.size * kh * kw, kh * kw)
-
-        gcol[indexes] = gy[0].ravel()
-        gcol = gcol.reshape(n, c, out_h, out_w, kh, kw)
-        gcol = numpy.swapaxes(gcol, 2, 4)
-        gcol = numpy.swapaxes(gcol, 3, 5)
-
-        gx = conv.col2im_cpu(gcol, self.sy, self.sx, self.ph, self.pw, h, w)
+        gx = pooling_cpu.max_pooling_backward(
+            gy[0].astype(self._in_dtype, copy=False), self.indexes,
+            self._in_shape, (self.kh, self.kw), (self.sy, self.sx),
+            (self.ph, self.pw))
         return gx,
 
     def _forward_ideep(self, gy):
@@ -251,15 +233,10 @@ class MaxPooling2DWithIndexes(function_node.FunctionNode):
             self.mpool2d = mpool2d
 
     def forward_cpu(self, x):
-        col = conv.im2col_cpu(
-            x[0], self.kh, self.kw, self.sy, self.sx, self.ph, self.pw,
-            pval=-float('inf'), cover_all=self.cover_all)
-        n, c, kh, kw, out_h, out_w = col.shape
-        col = col.reshape(n, c, kh * kw, out_h, out_w)
-        col = col.transpose(0, 1, 3, 4, 2).reshape(-1, kh * kw)
-        indexes = self.indexes.ravel()
-        col = col[numpy.arange(len(indexes)), indexes]
-        return col.reshape(n, c, out_h, out_w),
+        y = pooling_cpu.max_pooling_select(
+            x[0], self.indexes, (self.kh, self.kw), (self.sy, self.sx),
+            (self.ph, self.pw))
+        return y,
 
     def forward_gpu(self, inputs):
         if self._used_cudnn:
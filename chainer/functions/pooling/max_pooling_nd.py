@@ -1,6 +1,3 @@
-import functools
-from operator import mul
-
 import numpy
 import six
 
@@ -8,6 +5,7 @@ import chainer
 from chainer.backends import cuda
 from chainer import function_node
 from chainer.functions.pooling import max_pooling_nd_kernel
+from chainer.functions.pooling import pooling_cpu
 from chainer.functions.pooling import pooling_nd
 from chainer import utils
 from chainer.utils import conv_nd
@@ -32,21 +30,8 @@ class MaxPoolingND(pooling_nd._PoolingND):
         self._in_shape = x[0].shape
         self._in_dtype = x[0].dtype
 
-        col = conv_nd.im2col_nd_cpu(
-            x[0], self.ksize, self.stride, self.pad, pval=-float('inf'),
-            cover_all=self.cover_all)
-        n, c = col.shape[:2]
-        mid = (len(col.shape) - 2) // 2 + 2
-        ksize = col.shape[2:mid]
-        outs = col.shape[mid:]
-        # (n, c, k_1 * k_2 * ... * k_N, out_1, out_2, ..., out_N)
-        col_shape = (n, c) + (functools.reduce(mul, ksize),) + outs
-        col = col.reshape(col_shape)
-
-        # We select maximum twice, since the implementation using numpy.choose
-        # hits its bug when kh * kw >= 32.
-        self.indexes = col.argmax(axis=2)
-        y = col.max(axis=2)
+        y, self.indexes = pooling_cpu.max_pooling_forward(
+            x[0], self.ksize, self.stride, self.pad, self.cover_all)
         return y,
 
     def forward_gpu(self, x):
@@ -103,26 +88,9 @@ class MaxPoolingNDGrad(function_node.FunctionNode):
         self.mpoolnd = mpoolnd
 
     def forward_cpu(self, gy):
-        ndim = self.ndim
-        n, c = gy[0].shape[:2]
-        outs = gy[0].shape[2:]
-        dims = self._in_shape[2:]
-        prod_outs = functools.reduce(mul, outs)
-        prod_ksize = functools.reduce(mul, self.ksize)
-
-        gcol = numpy.zeros(
-            n * c * prod_outs * prod_ksize, dtype=self._in_dtype)
-
-        indexes = self.indexes.flatten()
-        indexes += numpy.arange(0, indexes.size * prod_ksize, prod_ksize)
-
-        gcol[indexes] = gy[0].ravel()
-        gcol_shape = (n, c) + outs + self.ksize
-        gcol = gcol.reshape(gcol_shape)
-        for i in six.moves.range(ndim):
-            gcol = numpy.swapaxes(gcol, 2 + i, ndim + 2 + i)
-
-        gx = conv_nd.col2im_nd_cpu(gcol, self.stride, self.pad, dims)
+        gx = pooling_cpu.max_pooling_backward(
+            gy[0].astype(self._in_dtype, copy=False), self.indexes,
+            self._in_shape, self.ksize, self.stride, self.pad)
         return gx,
 
     def forward_gpu(self, gy):
@@ -162,25 +130,9 @@ class MaxPoolingNDWithIndexes(function_node.FunctionNode):
             self.mpoolnd = mpoolnd
 
     def forward_cpu(self, x):
-        col = conv_nd.im2col_nd_cpu(
-            x[0], self.ksize, self.stride, self.pad, pval=-float('inf'),
-            cover_all=self.cover_all)
-        n, c = col.shape[:2]
-        mid = (len(col.shape) - 2) // 2 + 2
-        ksize = col.shape[2:mid]
-        outs = col.shape[mid:]
-        # (n, c, k_1 * k_2 * ... * k_N, out_1, out_2, ..., out_N)
-        ksize_total = functools.reduce(mul, ksize)
-        col_shape = (n, c) + (ksize_total,) + outs
-        col = col.reshape(col_shape)
-        # (n, c, out_1, ..., out_N, k_1 * .. * k_N)
-        col_indexes = (0, 1) + tuple(six.moves.range(3, 3 + self.ndim)) + (2,)
-        col = col.transpose(col_indexes)
-        col = col.reshape(-1, ksize_total)
-
-        indexes = self.indexes.ravel()
-        col = col[numpy.arange(len(indexes)), indexes]
-        return col.reshape((n, c) + outs),
+        y = pooling_cpu.max_pooling_select(
+            x[0], self.indexes, self.ksize, self.stride, self.pad)
+        return y,
 
     def forward_gpu(self, inputs):
         if self._used_cudnn:
@@ -0,0 +1,212 @@
+import functools
+import itertools
+import operator
+
+import numpy
+import six
+
+from chainer.utils import conv_nd
+
+
+# Number of the bytes of the output of a tile. The temporary arrays of a tile
+# fit in the cache of a core.
+_TILE_BYTES = 1 << 19
+
+
+def index_dtype(ksize):
+    """Returns the smallest dtype of the offsets in the pooling windows."""
+    size = functools.reduce(operator.mul, ksize)
+    if size <= 1 << 8:
+        return numpy.uint8
+    elif size <= 1 << 16:
+        return numpy.uint16
+    return numpy.int32
+
+
+def _out_sizes(dims, ksize, stride, pad, cover_all):
+    outs = tuple(conv_nd.get_conv_outsize(d, k, s, p, cover_all)
+                 for d, k, s, p in six.moves.zip(dims, ksize, stride, pad))
+    if len(outs) == 2:
+        # The same messages as those of conv.im2col_cpu.
+        assert outs[0] > 0, 'Height in the output should be positive.'
+        assert outs[1] > 0, 'Width in the output should be positive.'
+    assert all(out > 0 for out in outs), 'Output sizes should be positive.'
+    return outs
+
+
+def _padded_sizes(dims, ksize, stride, pad, outs):
+    # Sizes of the padded planes containing all the windows.
+    return tuple(
+        max(d + p, s * (out - 1) + k)
+        for d, k, s, p, out in six.moves.zip(dims, ksize, stride, pad, outs))
+
+
+def _pad(x, ksize, stride, pad, outs, pval):
+    # Pads the input and flattens the batch and the channel axes into planes.
+    dims = x.shape[2:]
+    padded = _padded_sizes(dims, ksize, stride, pad, outs)
+    pad_width = [(0, 0), (0, 0)] + [
+        (p, pd - d - p) for d, p, pd in six.moves.zip(dims, pad, padded)]
+    if any(lo or hi for lo, hi in pad_width):
+        x = numpy.pad(x, pad_width, mode='constant', constant_values=(pval,))
+    return x.reshape((-1,) + padded)
+
+
+def _crop(gx, in_shape, pad):
+    gx = gx[(Ellipsis,) + tuple(
+        slice(p, p + d) for d, p in six.moves.zip(in_shape[2:], pad))]
+    return numpy.ascontiguousarray(gx).reshape(in_shape)
+
+
+def _windows(ksize, stride, outs):
+    # Yields the slices of the planes selecting the elements at each offset
+    # of all the windows, in the order of the offsets of argmax.
+    for ks in itertools.product(*[six.moves.range(k) for k in ksize]):
+        yield (slice(None),) + tuple(
+            slice(k, k + s * out, s)
+            for k, s, out in six.moves.zip(ks, stride, outs))
+
+
+def _tiles(n_planes, outs, itemsize):
+    # Yields the slices of the planes of the tiles.
+    plane_bytes = functools.reduce(operator.mul, outs, itemsize)
+    tile = max(1, _TILE_BYTES // plane_bytes)
+    for i in six.moves.range(0, n_planes, tile):
+        yield slice(i, i + tile)
+
+
+class _Positions(object):
+
+    # Flat positions in the padded planes of a tile of the elements at the
+    # offsets in the windows given by the indexes.
+
+    def __init__(self, ksize, stride, outs, padded):
+        self.size = functools.reduce(operator.mul, padded)
+        self.offsets = numpy.ravel_multi_index(
+            numpy.indices(ksize).reshape(len(ksize), -1), padded)
+        self.origins = numpy.ravel_multi_index(
+            tuple(i * s for i, s in six.moves.zip(
+                numpy.indices(outs), stride)), padded)
+
+    def __call__(self, indexes):
+        planes = numpy.arange(0, len(indexes) * self.size, self.size)
+        pos = self.offsets[indexes]
+        pos += self.origins
+        pos += planes.reshape((-1,) + (1,) * self.origins.ndim)
+        return pos.ravel()
+
+
+def max_pooling_forward(x, ksize, stride, pad, cover_all):
+    """Computes max pooling over the strided windows of the input.
+
+    Instead of building the columns of all the windows, it takes the maximum
+    over the offsets in the windows one by one, tile by tile, so that the
+    temporary arrays stay small.
+
+    Returns:
+        tuple: The output and the offsets of the maximum elements in the
+        windows, whose dtype is given by :func:`index_dtype`.
+
+    """
+    n, c = x.shape[:2]
+    outs = _out_sizes(x.shape[2:], ksize, stride, pad, cover_all)
+    x = _pad(x, ksize, stride, pad, outs, -numpy.inf)
+    y = numpy.empty((n * c,) + outs, dtype=x.dtype)
+    indexes = numpy.empty((n * c,) + outs, dtype=index_dtype(ksize))
+    windows = list(_windows(ksize, stride, outs))
+
+    for tile in _tiles(n * c, outs, x.dtype.itemsize):
+        x_t = x[tile]
+        y_t = y[tile]
+        i_t = indexes[tile]
+        y_t[...] = x_t[windows[0]]
+        for window in windows[1:]:
+            numpy.maximum(y_t, x_t[window], out=y_t)
+        # The first offset of the maximum is selected as argmax does.
+        i_t.fill(0)
+        mask = numpy.empty(y_t.shape, dtype=numpy.bool_)
+        for k in six.moves.range(len(windows) - 1, -1, -1):
+            numpy.equal(x_t[windows[k]], y_t, out=mask)
+            numpy.copyto(i_t, k, where=mask, casting='unsafe')
+    return y.reshape((n, c) + outs), indexes.reshape((n, c) + outs)
+
+
+def max_pooling_backward(gy, indexes, in_shape, ksize, stride, pad):
+    """Computes the gradient of max pooling from the offsets of the maxima."""
+    n, c = gy.shape[:2]
+    outs = gy.shape[2:]
+    padded = _padded_sizes(in_shape[2:], ksize, stride, pad, outs)
+    positions = _Positions(ksize, stride, outs, padded)
+    overlap = any(s < k for k, s in six.moves.zip(ksize, stride))
+    gx = numpy.zeros((n * c,) + padded, dtype=gy.dtype)
+    gy = gy.reshape((n * c,) + outs)
+    indexes = indexes.reshape((n * c,) + outs)
+
+    for tile in _tiles(n * c, outs, gy.dtype.itemsize):
+        gx_t = gx[tile]
+        gy_t = gy[tile].ravel()
+        pos = positions(indexes[tile])
+        if overlap:
+            gx_t[...] = numpy.bincount(
+                pos, gy_t, minlength=gx_t.size).reshape(gx_t.shape)
+        else:
+            # Each element is the maximum of at most one window.
+            gx_t.reshape(-1)[pos] = gy_t
+    return _crop(gx, in_shape, pad)
+
+
+def max_pooling_select(x, indexes, ksize, stride, pad):
+    """Selects the elements of the input at the offsets of the maxima."""
+    n, c = x.shape[:2]
+    outs = indexes.shape[2:]
+    x = _pad(x, ksize, stride, pad, outs, -numpy.inf)
+    positions = _Positions(ksize, stride, outs, x.shape[1:])
+    indexes = indexes.reshape((n * c,) + outs)
+    y = numpy.empty((n * c,) + outs, dtype=x.dtype)
+
+    for tile in _tiles(n * c, outs, x.dtype.itemsize):
+        pos = positions(indexes[tile])
+        y[tile].reshape(-1)[...] = x[tile].reshape(-1)[pos]
+    return y.reshape((n, c) + outs)
+
+
+def average_pooling_forward(x, ksize, stride, pad, cover_all):
+    """Computes average pooling over the strided windows of the input.
+
+    The padded elements are counted as zeros.
+
+    """
+    n, c = x.shape[:2]
+    outs = _out_sizes(x.shape[2:], ksize, stride, pad, cover_all)
+    x = _pad(x, ksize, stride, pad, outs, 0)
+    # Half precision values are summed up in single precision as mean does.
+    dtype = numpy.promote_types(x.dtype, numpy.float32)
+    y = numpy.empty((n * c,) + outs, dtype=dtype)
+    windows = list(_windows(ksize, stride, outs))
+    coeff = dtype.type(1. / len(windows))
+
+    for tile in _tiles(n * c, outs, dtype.itemsize):
+        x_t = x[tile]
+        y_t = y[tile]
+        y_t[...] = x_t[windows[0]]
+        for window in windows[1:]:
+            y_t += x_t[window]
+        y_t *= coeff
+    return y.reshape((n, c) + outs).astype(x.dtype, copy=False)
+
+
+def average_pooling_backward(gy, in_shape, ksize, stride, pad):
+    """Computes the gradient of average pooling."""
+    n, c = gy.shape[:2]
+    outs = gy.shape[2:]
+    padded = _padded_sizes(in_shape[2:], ksize, stride, pad, outs)
+    gx = numpy.zeros((n * c,) + padded, dtype=gy.dtype)
+    windows = list(_windows(ksize, stride, outs))
+    gy = gy.reshape((n * c,) + outs) * gy.dtype.type(1. / len(windows))
+
+    for tile in _tiles(n * c, outs, gy.dtype.itemsize):
+        gx_t = gx[tile]
+        gy_t = gy[tile]
+        for window in windows:
+            gx_t[window] += gy_t
+    return _crop(gx, in_shape, pad)
@@ -0,0 +1,282 @@
+import numpy
+import six
+
+import chainer
+from chainer.backends import cuda
+from chainer import configuration
+from chainer import function_node
+from chainer import link
+from chainer.utils import argument
+from chainer import variable
+
+
+def _normalize_outputs(outs):
+    if isinstance(outs, variable.Variable):
+        return (outs,), False
+    if isinstance(outs, (tuple, list)):
+        for i, out in enumerate(outs):
+            if not isinstance(out, variable.Variable):
+                raise RuntimeError(
+                    'element {} of a returned tuple is not Variable, but is '
+                    '{}'.format(i, type(out)))
+        return tuple(outs), True
+    raise RuntimeError(
+        'A tuple of Variables or a Variable are expected, but {} is '
+        'returned.'.format(type(outs)))
+
+
+class _RandomState(object):
+
+    """Snapshot of the global random number generators.
+
+    The NumPy generator is saved before the forward computation and restored
+    temporarily on replay. CuPy does not provide a way to copy the state of
+    its generator, so a fresh generator seeded with a value drawn from the
+    current one is used instead on both the forward computation and replay.
+
+    """
+
+    def __init__(self, gpu):
+        self.numpy_state = numpy.random.get_state()
+        self.cupy_seed = None
+        if gpu:
+            rs = cuda.cupy.random.get_random_state()
+            self.cupy_seed = int(rs.interval(0x7fffffff, (1,))[0])
+
+    def _run_with_cupy_seed(self, func, *args):
+        if self.cupy_seed is None:
+            return func(*args)
+        cupy_state = cuda.cupy.random.get_random_state()
+        cuda.cupy.random.set_random_state(
+            cuda.cupy.random.RandomState(self.cupy_seed))
+        try:
+            return func(*args)
+        finally:
+            cuda.cupy.random.set_random_state(cupy_state)
+
+    def run(self, func, *args):
+        return self._run_with_cupy_seed(func, *args)
+
+    def replay(self, func, *args):
+        numpy_state = numpy.random.get_state()
+        numpy.random.set_state(self.numpy_state)
+        try:
+            return self._run_with_cupy_seed(func, *args)
+        finally:
+            numpy.random.set_state(numpy_state)
+
+
+def _snapshot_persistents(links):
+    snapshot = []
+    seen = set()
+    for root in links:
+        for l in root.links():
+            if id(l) in seen:
+                continue
+            seen.add(id(l))
+            for name in l._persistent:
+                value = getattr(l, name)
+                if isinstance(value, (numpy.ndarray, cuda.ndarray)):
+                    value = value.copy()
+                snapshot.append((l, name, value))
+    return snapshot
+
+
+def _restore_persistents(snapshot):
+    for l, name, value in snapshot:
+        current = getattr(l, name)
+        if isinstance(current, (numpy.ndarray, cuda.ndarray)) and \
+                current.shape == value.shape:
+            # Running statistics are updated in-place, so the original array
+            # object is kept.
+            current[...] = value
+        else:
+            setattr(l, name, value)
+
+
+class Checkpoint(function_node.FunctionNode):
+
+    """Function node that recomputes a segment of the graph on backprop."""
+
+    def __init__(self, func, links, params):
+        self.func = func
+        self.links = links
+        self.params = params
+
+    def _call(self, xs):
+        with configuration.using_config('train', self._train):
+            return _normalize_outputs(self.func(*xs))
+
+    def forward(self, inputs):
+        n_args = len(inputs) - len(self.params)
+        self.retain_inputs(tuple(six.moves.range(n_args)))
+        self._train = configuration.config.train
+        xp = cuda.get_array_module(*inputs)
+        self._random_state = _RandomState(xp is not numpy)
+
+        xs = [variable.Variable(x) for x in inputs[:n_args]]
+        with chainer.no_backprop_mode():
+            outs, self._is_tuple = self._random_state.run(self._call, xs)
+        return tuple([y.array for y in outs])
+
+    def backward(self, indexes, grad_outputs):
+        xs = [variable.Variable(x.array) for x in self.get_retained_inputs()]
+
+        # Recompute the segment; the running statistics updated by the second
+        # forward pass (e.g. of BatchNormalization) are rolled back.
+        persistents = _snapshot_persistents(self.links)
+        try:
+            with chainer.force_backprop_mode():
+                outs, _ = self._random_state.replay(self._call, xs)
+        finally:
+            _restore_persistents(persistents)
+
+        outs_with_grad = [(y, gy) for y, gy in six.moves.zip(
+            outs, grad_outputs) if gy is not None]
+        if not outs_with_grad:
+            return (None,) * len(indexes)
+
+        targets = xs + self.params
+        ys, gys = zip(*outs_with_grad)
+        return tuple(chainer.grad(
+            ys, [targets[i] for i in indexes], grad_outputs=gys))
+
+
+def _collect_links(func, links):
+    if links is None:
+        if isinstance(func, link.Link):
+            links = [func]
+        elif isinstance(getattr(func, '__self__', None), link.Link):
+            links = [func.__self__]
+        else:
+            links = []
+    elif isinstance(links, link.Link):
+        links = [links]
+    return list(links)
+
+
+def checkpoint(func, *xs, **kwargs):
+    """checkpoint(func, *xs, links=None)
+
+    Calls a link or function with recomputation of its activations.
+
+    This function works like :func:`~chainer.functions.forget`, i.e. it runs
+    ``func`` without storing the intermediate results and recomputes them on
+    backprop, but it additionally supports :class:`~chainer.Link` objects
+    with parameters and stochastic or stateful computations:
+
+    - The parameters of the given links are inputs of the checkpoint, so that
+      their gradients are accumulated on backprop in the usual way.
+    - The recomputation runs with the value of ``chainer.config.train`` at the
+      time of the forward computation.
+    - The state of the random number generators is restored before the
+      recomputation, so that e.g. :func:`~chainer.functions.dropout` draws
+      the same mask twice.
+    - The persistent values of the given links (e.g. the running statistics
+      of :class:`~chainer.links.BatchNormalization`) updated by the
+      recomputation are restored, so that they are updated only once per
+      iteration.
+
+    Only the inputs and outputs of ``func`` are kept in memory.
+
+    .. admonition:: Example
+
+       >>> block = L.Linear(3, 2)
+       >>> x = np.ones((5, 3), np.float32)
+       >>> y = F.checkpoint(block, x)
+       >>> y.shape
+       (5, 2)
+
+    If any parameter of the links is not initialized yet, ``func`` is called
+    without checkpointing so that the parameters are initialized.
+
+    Args:
+        func (callable): A link or a function to call. It is called with
+            :class:`~chainer.Variable` object(s) and must return a
+            :class:`~chainer.Variable` object or a tuple of them.
+        xs (~chainer.Variable): Argument variables of the function. Arrays
+            are converted to variables that require gradients.
+        links (~chainer.Link or list of ~chainer.Link): Links used in
+            ``func``. If it is ``None``, ``func`` itself is used when it is a
+            link or a bound method of a link.
+
+    Returns:
+        ~chainer.Variable: A variable ``func`` returns. If it returns a tuple,
+        the method returns a tuple too.
+
+    .. seealso:: :func:`~chainer.functions.checkpoint_sequential`
+
+    """
+    links, = argument.parse_kwargs(kwargs, ('links', None))
+    if not callable(func):
+        raise TypeError('func must be callable')
+    links = _collect_links(func, links)
+
+    xs = tuple([x if isinstance(x, variable.Variable) else
+                variable.Variable(x, requires_grad=True) for x in xs])
+
+    params = []
+    seen = set()
+    for l in links:
+        for param in l.params():
+            if id(param) in seen:
+                continue
+            seen.add(id(param))
+            if param.array is None:
+                return func(*xs)
+            params.append(param)
+
+    node = Checkpoint(func, links, params)
+    outs = node.apply(xs + tuple(params))
+    if node._is_tuple:
+        return outs
+    return outs[0]
+
+
+def checkpoint_sequential(functions, segments, x):
+    """Calls a sequence of links or functions with recomputation.
+
+    The sequence is split into ``segments`` contiguous segments, and all but
+    the last one are called through :func:`~chainer.functions.checkpoint`, so
+    that only the outputs of the segments are kept in memory during the
+    forward computation. The last segment is called directly because its
+    backprop immediately follows the forward computation.
+
+    .. admonition:: Example
+
+       Recompute the bottleneck blocks of ``res4`` of a ResNet in two
+       segments:
+
+       >>> h = F.checkpoint_sequential(
+       ...     model.res4.forward, 2, h)  # doctest: +SKIP
+
+    Args:
+        functions (list of callable): Links or functions applied in order.
+            Each of them must take one variable and return one variable.
+        segments (int): Number of segments.
+        x (~chainer.Variable): Input variable.
+
+    Returns:
+        ~chainer.Variable: Output variable of the last function.
+
+    """
+    functions = list(functions)
+    if segments < 1:
+        raise ValueError('segments must be positive')
+    size = -(-len(functions) // segments)
+
+    def run_segment(segment):
+        def f(h):
+            for func in segment:
+                h = func(h)
+            return h
+        return f
+
+    for start in six.moves.range(0, len(functions), size):
+        segment = functions[start:start + size]
+        if start + size >= len(functions):
+            x = run_segment(segment)(x)
+        else:
+            links = [f for f in segment if isinstance(f, link.Link)]
+            x = checkpoint(run_segment(segment), x, links=links)
+    return x
@@ -0,0 +1,7 @@
+# import class and function
+from chainer.graph_optimizations.inference import inference  # NOQA
+from chainer.graph_optimizations.inference import InferenceEngine  # NOQA
+from chainer.graph_optimizations.memory_planner import BackwardMemoryPlan  # NOQA
+from chainer.graph_optimizations.memory_planner import BackwardMemoryPlanner  # NOQA
+from chainer.graph_optimizations.memory_planner import plan_backward_memory  # NOQA
+from chainer.graph_optimizations.static_graph import static_graph  # NOQA
@@ -0,0 +1,465 @@
+import numpy
+import six
+
+from chainer.backends import intel64
+from chainer import configuration
+from chainer import function_node
+from chainer.functions.activation import relu
+from chainer.functions.activation import sigmoid
+from chainer.functions.activation import tanh
+from chainer.functions.math import basic_math
+from chainer.functions.math import exponential
+from chainer import utils
+from chainer import variable
+
+
+class _ElementwiseOp(object):
+
+    """CPU implementation of an element-wise function in a fused run.
+
+    :meth:`forward` writes the output to a given buffer, which may be one of
+    the input arrays. :meth:`backward` may overwrite ``gy`` if ``inplace`` is
+    ``True``.
+
+    """
+
+    n_inputs = 1
+    uses_inputs = False
+    uses_output = False
+
+    def __init__(self, func, dtype):
+        pass
+
+    def forward(self, xs, out):
+        raise NotImplementedError
+
+    def backward(self, gy, inplace, xs, y, need):
+        raise NotImplementedError
+
+
+class _Add(_ElementwiseOp):
+
+    n_inputs = 2
+
+    def forward(self, xs, out):
+        numpy.add(xs[0], xs[1], out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        return gy, gy
+
+
+class _Sub(_ElementwiseOp):
+
+    n_inputs = 2
+
+    def forward(self, xs, out):
+        numpy.subtract(xs[0], xs[1], out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        return gy, (numpy.negative(gy) if need[1] else None)
+
+
+class _Mul(_ElementwiseOp):
+
+    n_inputs = 2
+    uses_inputs = True
+
+    def forward(self, xs, out):
+        numpy.multiply(xs[0], xs[1], out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        gx0 = gx1 = None
+        if need[0]:
+            gx0 = numpy.multiply(
+                gy, xs[1], out=gy if inplace and not need[1] else None)
+        if need[1]:
+            gx1 = numpy.multiply(gy, xs[0], out=gy if inplace else None)
+        return gx0, gx1
+
+
+class _Neg(_ElementwiseOp):
+
+    def forward(self, xs, out):
+        numpy.negative(xs[0], out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        return numpy.negative(gy, out=gy if inplace else None),
+
+
+class _ConstantOp(_ElementwiseOp):
+
+    def __init__(self, func, dtype):
+        self.value = utils.force_type(dtype, func.value)
+
+
+class _AddConstant(_ConstantOp):
+
+    def forward(self, xs, out):
+        numpy.add(xs[0], self.value, out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        return gy,
+
+
+class _SubFromConstant(_ConstantOp):
+
+    def forward(self, xs, out):
+        numpy.subtract(self.value, xs[0], out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        return numpy.negative(gy, out=gy if inplace else None),
+
+
+class _MulConstant(_ConstantOp):
+
+    def forward(self, xs, out):
+        numpy.multiply(xs[0], self.value, out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        return numpy.multiply(gy, self.value, out=gy if inplace else None),
+
+
+class _ReLU(_ElementwiseOp):
+
+    uses_output = True
+
+    def forward(self, xs, out):
+        numpy.maximum(xs[0], 0, out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        return numpy.multiply(gy, y > 0, out=gy if inplace else None),
+
+
+class _Sigmoid(_ElementwiseOp):
+
+    uses_output = True
+
+    def __init__(self, func, dtype):
+        self.half = dtype.type(0.5)
+        self.one = dtype.type(1)
+
+    def forward(self, xs, out):
+        half = self.half
+        numpy.multiply(xs[0], half, out=out)
+        numpy.tanh(out, out=out)
+        numpy.multiply(out, half, out=out)
+        numpy.add(out, half, out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        gx = numpy.multiply(gy, y, out=gy if inplace else None)
+        return numpy.multiply(gx, self.one - y, out=gx),
+
+
+class _Tanh(_ElementwiseOp):
+
+    uses_output = True
+
+    def __init__(self, func, dtype):
+        self.one = dtype.type(1)
+
+    def forward(self, xs, out):
+        numpy.tanh(xs[0], out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        d = numpy.multiply(y, y)
+        numpy.subtract(self.one, d, out=d)
+        return numpy.multiply(gy, d, out=d),
+
+
+class _Exp(_ElementwiseOp):
+
+    uses_output = True
+
+    def forward(self, xs, out):
+        numpy.exp(xs[0], out=out)
+
+    def backward(self, gy, inplace, xs, y, need):
+        return numpy.multiply(gy, y, out=gy if inplace else None),
+
+
+_OPS = {
+    basic_math.Add: _Add,
+    basic_math.AddConstant: _AddConstant,
+    basic_math.Mul: _Mul,
+    basic_math.MulConstant: _MulConstant,
+    basic_math.Neg: _Neg,
+    basic_math.Sub: _Sub,
+    basic_math.SubFromConstant: _SubFromConstant,
+    exponential.Exp: _Exp,
+    relu.ReLU: _ReLU,
+    sigmoid.Sigmoid: _Sigmoid,
+    tanh.Tanh: _Tanh,
+}
+
+
+class FusedElementwise(function_node.FunctionNode):
+
+    """Function node running a sequence of element-wise functions at once.
+
+    The sequence is given as a list of ops, each of which reads some
+    *values* and writes one value. The first ``n_inputs`` values are the
+    inputs of the node, and the value written by the ``j``-th op has the
+    index ``n_inputs + j``. An intermediate value that is not used anymore is
+    overwritten by the following op instead of allocating a new array, unless
+    it is required by the fused backward computation. The backward
+    computation runs the gradient computations of the ops in the reverse
+    order, also reusing the intermediate gradient arrays.
+
+    The backward computation is not differentiable.
+
+    Users do not need to create this object directly; use the
+    ``fuse_elementwise`` option of :func:`~chainer.static_graph` instead.
+
+    Args:
+        ops (list of pairs): Each pair consists of an op and the tuple of
+            indexes of the values it reads.
+        n_inputs (int): Number of inputs.
+        output_values (tuple of ints): Indexes of the values returned as the
+            outputs.
+        requires_grad (list of bools): Whether each value requires gradient.
+
+    """
+
+    _values = None
+
+    def __init__(self, ops, n_inputs, output_values, requires_grad):
+        self.ops = ops
+        self.n_inputs = n_inputs
+        self.output_values = output_values
+        self.requires_grad = requires_grad
+
+        n_values = n_inputs + len(ops)
+        last_use = [-1] * n_values
+        used_by_backward = [False] * n_values
+        for j, (op, in_values) in enumerate(ops):
+            for v in in_values:
+                last_use[v] = j
+                if op.uses_inputs:
+                    used_by_backward[v] = True
+            if op.uses_output:
+                used_by_backward[n_inputs + j] = True
+        is_output = [False] * n_values
+        for v in output_values:
+            is_output[v] = True
+
+        def buffers_to_reuse(retain):
+            # Intermediate value whose buffer is overwritten by each op.
+            reuse = []
+            for j, (_, in_values) in enumerate(ops):
+                cand = None
+                for v in in_values:
+                    if (v >= n_inputs and not is_output[v]
+                            and last_use[v] == j
+                            and not (retain and used_by_backward[v])):
+                        cand = v
+                        break
+                reuse.append(cand)
+            return reuse
+
+        self._reuse_train = buffers_to_reuse(True)
+        self._reuse_test = buffers_to_reuse(False)
+        self._last_use = last_use
+        self._kept = [is_output[v] or used_by_backward[v]
+                      for v in six.moves.range(n_values)]
+
+    @property
+    def label(self):
+        return 'FusedElementwise({})'.format(
+            ', '.join([type(op).__name__.lstrip('_') for op, _ in self.ops]))
+
+    def forward(self, inputs):
+        retain = configuration.config.enable_backprop
+        reuse = self._reuse_train if retain else self._reuse_test
+        last_use = self._last_use
+        n_inputs = self.n_inputs
+
+        values = list(inputs) + [None] * len(self.ops)
+        for j, (op, in_values) in enumerate(self.ops):
+            xs = [values[v] for v in in_values]
+            v_reuse = reuse[j]
+            if v_reuse is None:
+                out = numpy.empty_like(xs[0])
+            else:
+                out = values[v_reuse]
+            op.forward(xs, out)
+            values[n_inputs + j] = out
+            if not retain:
+                for v in in_values:
+                    if v >= n_inputs and last_use[v] == j and \
+                            v not in self.output_values:
+                        values[v] = None
+
+        outputs = tuple([values[v] for v in self.output_values])
+        if retain:
+            self._values = [value if kept else None
+                            for value, kept in six.moves.zip(values,
+                                                             self._kept)]
+        else:
+            self._values = None
+        return outputs
+
+    def backward(self, indexes, grad_outputs):
+        values = self._values
+        if values is None:
+            raise RuntimeError(
+                'FusedElementwise.backward is called without retained arrays')
+        self._values = None
+        n_inputs = self.n_inputs
+        requires_grad = self.requires_grad
+
+        grads = [None] * len(values)
+        owned = [False] * len(values)
+
+        def accumulate(v, g, g_owned):
+            cur = grads[v]
+            if cur is None:
+                grads[v] = g
+                owned[v] = g_owned
+            elif owned[v]:
+                numpy.add(cur, g, out=cur)
+            elif g_owned:
+                numpy.add(g, cur, out=g)
+                grads[v] = g
+                owned[v] = True
+            else:
+                grads[v] = cur + g
+                owned[v] = True
+
+        for v, gy in six.moves.zip(self.output_values, grad_outputs):
+            if gy is not None:
+                accumulate(v, gy.array, False)
+
+        for j in six.moves.range(len(self.ops) - 1, -1, -1):
+            op, in_values = self.ops[j]
+            v_out = n_inputs + j
+            gy = grads[v_out]
+            if gy is None:
+                continue
+            inplace = owned[v_out]
+            grads[v_out] = None
+
+            need = [requires_grad[v] for v in in_values]
+            xs = [values[v] for v in in_values] if op.uses_inputs else None
+            y = values[v_out] if op.uses_output else None
+            gxs = op.backward(gy, inplace, xs, y, need)
+            for i, (v, gx) in enumerate(six.moves.zip(in_values, gxs)):
+                if gx is None or not need[i]:
+                    continue
+                # An array passed to several inputs or not allocated here
+                # must not be overwritten.
+                shared = any([gx is other for k, other in enumerate(gxs)
+                              if k != i and need[k]])
+                g_owned = not shared and (gx is not gy or inplace)
+                accumulate(v, gx, g_owned)
+
+        return tuple([None if grads[i] is None else
+                      variable.Variable(grads[i]) for i in indexes])
+
+
+def _is_fusable(entry, nodes):
+    op_class = _OPS.get(type(entry.func))
+    if op_class is None or op_class.n_inputs != len(entry.in_slots):
+        return False
+    out_node = nodes[entry.out_slots[0]]
+    if out_node.dtype is None or out_node.dtype.kind != 'f':
+        return False
+    for slot in entry.in_slots:
+        node = nodes[slot]
+        if node.shape != out_node.shape or node.dtype != out_node.dtype:
+            return False
+    return True
+
+
+def _make_fused_entry(run, nodes, used_outside, entry_class):
+    n_values = 0
+    value_of_slot = {}
+    in_slots = []
+    for entry in run:
+        for slot in entry.in_slots:
+            if slot not in value_of_slot:
+                value_of_slot[slot] = n_values
+                n_values += 1
+                in_slots.append(slot)
+    n_inputs = len(in_slots)
+
+    ops = []
+    out_slots = []
+    output_values = []
+    dtype = nodes[run[0].out_slots[0]].dtype
+    for entry in run:
+        in_values = tuple([value_of_slot[slot] for slot in entry.in_slots])
+        out_slot = entry.out_slots[0]
+        value_of_slot[out_slot] = n_inputs + len(ops)
+        op = _OPS[type(entry.func)](entry.func, dtype)
+        ops.append((op, in_values))
+        if out_slot in used_outside:
+            out_slots.append(out_slot)
+            output_values.append(value_of_slot[out_slot])
+
+    requires_grad = [None] * (n_inputs + len(ops))
+    for slot, v in six.iteritems(value_of_slot):
+        requires_grad[v] = nodes[slot].requires_grad
+    func = FusedElementwise(
+        ops, n_inputs, tuple(output_values), requires_grad)
+    # The input nodes are referred by FunctionNode.backward_accumulate.
+    func.inputs = tuple([nodes[slot] for slot in in_slots])
+    in_requires_grad = tuple([nodes[slot].requires_grad for slot in in_slots])
+    return entry_class(func, tuple(in_slots), tuple(out_slots),
+                       in_requires_grad)
+
+
+def fuse_elementwise(schedule, recorder):
+    """Replaces runs of element-wise functions in a schedule by fused nodes.
+
+    Each maximal run of consecutive entries of the schedule that apply
+    supported element-wise functions (arithmetic operators, ReLU, sigmoid,
+    tanh and exp) to arrays of the same shape and dtype is replaced with a
+    single :class:`FusedElementwise` entry. Only NumPy arrays are supported;
+    the schedule is not modified if any leaf array is not a
+    :class:`numpy.ndarray` or iDeep is enabled.
+
+    Args:
+        schedule (StaticSchedule): Schedule to optimize in-place.
+        recorder (_GraphRecorder): Recorder that captured the graph.
+
+    """
+    if intel64.should_use_ideep('>=auto'):
+        return
+    for _, leaf in recorder.leaves:
+        if type(leaf.array) is not numpy.ndarray:
+            return
+    nodes = recorder.nodes
+
+    entry_class = type(schedule.entries[0]) if schedule.entries else None
+    entries = schedule.entries
+    new_entries = []
+    run = []
+
+    def flush(end):
+        if len(run) >= 2:
+            run_ids = set([id(e) for e in run])
+            used_outside = set(schedule.out_slots)
+            for entry in entries[end:]:
+                used_outside.update(entry.in_slots)
+            for entry in entries[:end]:
+                if id(entry) not in run_ids:
+                    used_outside.update(entry.in_slots)
+            new_entries.append(_make_fused_entry(
+                run, nodes, used_outside, entry_class))
+        else:
+            new_entries.extend(run)
+        del run[:]
+
+    for i, entry in enumerate(entries):
+        if _is_fusable(entry, nodes):
+            if run:
+                head = nodes[run[0].out_slots[0]]
+                out = nodes[entry.out_slots[0]]
+                if head.shape != out.shape or head.dtype != out.dtype:
+                    flush(i)
+            run.append(entry)
+        else:
+            flush(i)
+            new_entries.append(entry)
+    flush(len(entries))
+    schedule.entries = new_entries
@@ -0,0 +1,258 @@
+import numpy
+import six
+
+import chainer
+from chainer.backends import cuda
+from chainer import configuration
+from chainer.graph_optimizations import elementwise_fusion
+from chainer.graph_optimizations import static_graph
+from chainer.utils import experimental
+
+
+def _root(a):
+    while isinstance(a.base, numpy.ndarray):
+        a = a.base
+    return a
+
+
+class _InferenceSchedule(object):
+
+    """Forward-only schedule of a captured graph.
+
+    In addition to the captured :class:`StaticSchedule`, it holds the slots
+    released after each entry, so that each intermediate array is freed right
+    after its last use, and the element-wise entries that may overwrite one
+    of their inputs.
+
+    """
+
+    def __init__(self, recorder, params, out_vars, out_type,
+                 fuse_elementwise):
+        schedule = static_graph.StaticSchedule(
+            recorder, params, out_vars, out_type, fuse_elementwise)
+        self.schedule = schedule
+        nodes = recorder.nodes
+
+        leaf_slots = set(six.moves.range(schedule.n_args))
+        leaf_slots.update(schedule.param_slots)
+        leaf_slots.update([slot for slot, _ in schedule.constants])
+        out_slots = set(schedule.out_slots)
+
+        last_use = {}
+        for j, entry in enumerate(schedule.entries):
+            for slot in entry.in_slots:
+                last_use[slot] = j
+
+        self.release = [[] for _ in schedule.entries]
+        for slot, j in six.iteritems(last_use):
+            if slot not in leaf_slots and slot not in out_slots:
+                self.release[j].append(slot)
+
+        # Pairs of the op and the position of the input to overwrite for the
+        # element-wise entries, or None.
+        self.inplace = []
+        for j, entry in enumerate(schedule.entries):
+            inplace = None
+            if elementwise_fusion._is_fusable(entry, nodes):
+                out_node = nodes[entry.out_slots[0]]
+                for i, slot in enumerate(entry.in_slots):
+                    if slot not in leaf_slots and slot not in out_slots and \
+                            last_use[slot] == j:
+                        op = elementwise_fusion._OPS[type(entry.func)](
+                            entry.func, out_node.dtype)
+                        inplace = op, i
+                        break
+            self.inplace.append(inplace)
+
+    def forward(self, in_data):
+        schedule = self.schedule
+        slots = schedule._init_slots(in_data)
+        # Roots of the arrays given by the users, which must not be
+        # overwritten.
+        leaf_roots = set([id(_root(x)) for x in in_data
+                          if isinstance(x, numpy.ndarray)])
+        leaf_roots.update([id(_root(x)) for _, x in schedule.constants
+                           if isinstance(x, numpy.ndarray)])
+        live = set()
+
+        for entry, release, inplace in six.moves.zip(
+                schedule.entries, self.release, self.inplace):
+            inputs = tuple([slots[i] for i in entry.in_slots])
+            if inplace is not None and self._can_overwrite(
+                    slots, live, entry.in_slots[inplace[1]], leaf_roots):
+                op, i = inplace
+                out = inputs[i]
+                op.forward(inputs, out)
+                outputs = out,
+            else:
+                func = entry.func
+                func._input_indexes_to_retain = None
+                func._output_indexes_to_retain = None
+                outputs = func.forward(inputs)
+
+            for slot in release:
+                slots[slot] = None
+                live.discard(slot)
+            for slot, y in six.moves.zip(entry.out_slots, outputs):
+                slots[slot] = y
+                live.add(slot)
+        return tuple([slots[i] for i in schedule.out_slots])
+
+    @staticmethod
+    def _can_overwrite(slots, live, slot, leaf_roots):
+        x = slots[slot]
+        if type(x) is not numpy.ndarray or not x.flags.writeable:
+            return False
+        if id(_root(x)) in leaf_roots:
+            return False
+        # The array must not be a view of another live array, or vice versa.
+        for other in live:
+            if other != slot and numpy.may_share_memory(x, slots[other]):
+                return False
+        return True
+
+
+class InferenceEngine(object):
+
+    """Callable running a link for inference without graph construction.
+
+    Users do not need to create this object directly; use
+    :func:`~chainer.inference` instead.
+
+    Args:
+        link (~chainer.Link): Link to run.
+        fuse_elementwise (bool): If ``True``, runs of element-wise functions
+            are fused (see :func:`~chainer.static_graph`).
+
+    Attributes:
+        link (~chainer.Link): Link to run.
+
+    """
+
+    def __init__(self, link, fuse_elementwise=True):
+        self.link = link
+        self._fuse_elementwise = fuse_elementwise
+        self._schedules = {}
+
+    def __call__(self, *args):
+        """Runs the link on the given arrays.
+
+        Args:
+            args: Arrays or :class:`~chainer.Variable` objects passed to the
+                link.
+
+        Returns:
+            The output array, or the tuple or list of the output arrays if
+            the link returns a tuple or list of variables.
+
+        """
+        in_data = [x.array if isinstance(x, chainer.Variable) else x
+                   for x in args]
+        key = tuple([(type(x), x.shape, x.dtype) for x in in_data])
+        schedule = self._schedules.get(key)
+        with configuration.using_config('train', False), \
+                configuration.using_config('enable_backprop', False):
+            if schedule is None:
+                return self._capture(key, in_data)
+            params = [p.array for p in schedule.schedule.params]
+            with cuda.get_device_from_array(*in_data):
+                outputs = schedule.forward(tuple(in_data + params))
+        out_type = schedule.schedule.out_type
+        if issubclass(out_type, (tuple, list)):
+            return out_type(outputs)
+        return outputs[0]
+
+    def _capture(self, key, in_data):
+        experimental('chainer.inference')
+        arg_vars = [chainer.Variable(x, requires_grad=False)
+                    for x in in_data]
+        recorder = static_graph._GraphRecorder(arg_vars)
+        chainer._thread_local.static_graph_recorder = recorder
+        try:
+            outputs = self.link(*arg_vars)
+        finally:
+            chainer._thread_local.static_graph_recorder = None
+
+        out_type = type(outputs)
+        if isinstance(outputs, (tuple, list)):
+            out_vars = tuple(outputs)
+        else:
+            out_vars = (outputs,)
+        for y in out_vars:
+            if not isinstance(y, chainer.Variable):
+                raise TypeError(
+                    'the link must return a variable or a tuple or list of '
+                    'variables: {}'.format(type(y)))
+
+        self._schedules[key] = _InferenceSchedule(
+            recorder, list(self.link.params()), out_vars, out_type,
+            self._fuse_elementwise)
+        if isinstance(outputs, (tuple, list)):
+            return out_type([y.array for y in out_vars])
+        return outputs.array
+
+    def clear(self):
+        """Discards the captured graphs.
+
+        The graphs must be captured again when the structure of the link is
+        modified, or when arrays other than the parameters (e.g. the
+        persistent values) are replaced instead of being updated in place,
+        e.g. by :meth:`~chainer.Link.to_gpu`.
+
+        """
+        self._schedules = {}
+
+
+def inference(link, fuse_elementwise=True):
+    """Creates an inference engine of a link.
+
+    The returned engine calls the link on raw arrays and returns raw arrays,
+    with ``chainer.config.train`` and ``chainer.config.enable_backprop`` set
+    to ``False``. On the first call with a given combination of input array
+    types, shapes and dtypes, the link runs as usual while the function
+    applications are recorded, as :func:`~chainer.static_graph` does. The
+    following calls with the same combination replay the recorded
+    :meth:`FunctionNode.forward` calls on the raw arrays, without creating
+    any variable or graph node, checking the types, or calling the function
+    hooks. The parameters of the link are read on every call, so the engine
+    follows the updates of the parameters.
+
+    The replay also reduces the memory consumption: each intermediate array
+    is released right after its last use, and element-wise functions
+    (arithmetic operators, :func:`~chainer.functions.relu`,
+    :func:`~chainer.functions.sigmoid`, :func:`~chainer.functions.tanh` and
+    :func:`~chainer.functions.exp`) overwrite their input array if it is not
+    used anymore and not shared with any other array. If
+    ``fuse_elementwise`` is ``True``, runs of such functions are also fused.
+    These in-place optimizations only take effect on CPU with NumPy arrays.
+
+    .. admonition:: Example
+
+       >>> model = L.Linear(3, 2)
+       >>> run = chainer.inference(model)
+       >>> x = np.ones((5, 3), np.float32)
+       >>> y = run(x)  # captures the graph
+       >>> y = run(x)  # replays it
+       >>> type(y), y.shape
+       (<class 'numpy.ndarray'>, (5, 2))
+
+    As with :func:`~chainer.static_graph`, the computation of the link must
+    be static, i.e. the sequence of functions applied must not depend on the
+    values of the inputs, and all the computation must be done through
+    :class:`~chainer.FunctionNode` applications. Any array that is neither an
+    argument nor a parameter of the link (e.g. the statistics of
+    :class:`~chainer.links.BatchNormalization`) is captured by reference;
+    call :meth:`InferenceEngine.clear` after replacing such arrays.
+
+    Args:
+        link (~chainer.Link): Link to run. It is called with the positional
+            arguments given to the engine, and must return a variable or a
+            tuple or list of variables.
+        fuse_elementwise (bool): If ``True``, runs of element-wise functions
+            in the captured graph are fused.
+
+    Returns:
+        InferenceEngine: Callable running the link.
+
+    """
+    return InferenceEngine(link, fuse_elementwise)
@@ -0,0 +1,371 @@
+import heapq
+
+import six
+
+import chainer
+from chainer import function
+
+
+def _nbytes(array):
+    return 0 if array is None else array.nbytes
+
+
+def _grad_nbytes(node):
+    if node.shape is None or node.dtype is None:
+        return 0
+    size = 1
+    for s in node.shape:
+        size *= s
+    return size * node.dtype.itemsize
+
+
+def _is_differentiable(func):
+    # Old-style functions without backward implementations give no gradient,
+    # e.g. F.accuracy.
+    if isinstance(func, function.FunctionAdapter) and \
+            func.function is not None:
+        impl = type(func.function)
+        return not all([
+            six.get_unbound_function(getattr(impl, name)) is
+            six.get_unbound_function(getattr(function.Function, name))
+            for name in ('backward', 'backward_cpu', 'backward_gpu')])
+    return True
+
+
+def _can_backprop_from(func, funcs):
+    # Returns True if backprop from outside the plan can reach the inputs of
+    # the function node, i.e., it is alive, it is not in the plan, it is
+    # differentiable and any of its outputs requiring grad is still alive.
+    if func is None or func in funcs or not _is_differentiable(func):
+        return False
+    for y_ref in func.outputs:
+        y = y_ref()
+        if y is not None and y.requires_grad:
+            return True
+    return False
+
+
+class _RetainedArray(object):
+
+    __slots__ = ('nbytes', 'nodes', 'n_users')
+
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+        self.nodes = []  # variable nodes holding the array
+        self.n_users = 0  # function nodes whose backward needs the array
+
+
+class BackwardMemoryPlan(object):
+
+    """Plan to release the arrays retained by a graph during backprop.
+
+    Function nodes keep the input and output arrays they retain (see
+    :meth:`FunctionNode.retain_inputs` and
+    :meth:`FunctionNode.retain_outputs`) until the graph is deleted, i.e.
+    usually until backprop finishes. This plan computes the last function
+    node in the backward order that uses each of these arrays, so that the
+    graph's references to it can be dropped right after the backward
+    computation of that node.
+
+    Only the arrays referenced solely by the graph are counted and released;
+    an array also held by a :class:`~chainer.Variable` object alive outside
+    the graph is kept as is. The arrays of the part of the graph that is
+    shared with another graph, i.e., whose variables are taken by function
+    nodes outside the graph that backprop can still run through, are kept as
+    well. Function nodes whose outputs are all gone and non-differentiable
+    ones such as :func:`~chainer.functions.accuracy` are not counted.
+
+    The plan also simulates the backprop to estimate its peak memory
+    consumption with and without the eager release. The estimate counts the
+    retained arrays and the gradients w.r.t. the variables in the graph, and
+    ignores temporary arrays allocated inside backward computations.
+
+    Users do not need to create this object directly; use
+    :class:`BackwardMemoryPlanner` instead.
+
+    Args:
+        outputs (list of ~chainer.Variable): Variables from which backprop
+            starts.
+
+    Attributes:
+        ~BackwardMemoryPlan.baseline_peak_bytes (int): Estimated peak memory
+            consumption of backprop without the eager release.
+        ~BackwardMemoryPlan.planned_peak_bytes (int): Estimated peak memory
+            consumption of backprop with the eager release.
+        ~BackwardMemoryPlan.released_bytes (int): Total size of the arrays
+            actually released so far.
+
+    """
+
+    def __init__(self, outputs):
+        funcs = self._collect_funcs(outputs)
+        self._shared = self._collect_shared_funcs(funcs)
+
+        arrays = {}
+        self._uses = {}
+        for func in funcs:
+            uses = []
+            for array, node in self._retained_arrays(func):
+                entry = arrays.get(id(array))
+                if entry is None:
+                    entry = arrays[id(array)] = _RetainedArray(_nbytes(array))
+                if node is not None and node not in entry.nodes:
+                    entry.nodes.append(node)
+                if entry not in uses:
+                    entry.n_users += 1
+                    uses.append(entry)
+            self._uses[func] = uses
+        for entry in arrays.values():
+            if any([node in self._open_nodes for node in entry.nodes]):
+                # The array is also retained by a function node outside the
+                # plan, which is counted as a user never done.
+                entry.n_users += 1
+
+        self.released_bytes = 0
+        self.baseline_peak_bytes, self.planned_peak_bytes = self._simulate(
+            outputs, funcs, arrays)
+
+    @property
+    def saved_bytes(self):
+        """Estimated reduction of the peak memory consumption in bytes."""
+        return self.baseline_peak_bytes - self.planned_peak_bytes
+
+    @staticmethod
+    def _collect_funcs(outputs):
+        funcs = set()
+        cands = [y.creator_node for y in outputs if y.creator_node is not None]
+        while cands:
+            func = cands.pop()
+            if func in funcs:
+                continue
+            funcs.add(func)
+            for x in func.inputs:
+                if x.requires_grad and x.creator_node is not None:
+                    cands.append(x.creator_node)
+        return funcs
+
+    def _collect_shared_funcs(self, funcs):
+        # Returns the function nodes that backprop from outside the plan can
+        # also go through, i.e., the ancestors of the variable nodes taken by
+        # live function nodes outside the plan that can backprop into them.
+        # Their arrays are not released.
+        nodes = set()
+        for func in funcs:
+            nodes.update(func.inputs)
+            for y_ref in func.outputs:
+                y = y_ref()
+                if y is not None:
+                    nodes.add(y)
+        self._open_nodes = set([
+            x for x in nodes
+            if any([_can_backprop_from(f_ref(), funcs)
+                    for f_ref in x._consumers])])
+
+        shared = set()
+        cands = [x.creator_node for x in self._open_nodes]
+        while cands:
+            func = cands.pop()
+            if func is None or func in shared or func not in funcs:
+                continue
+            shared.add(func)
+            cands.extend([x.creator_node for x in func.inputs])
+        return shared
+
+    @staticmethod
+    def _retained_arrays(func):
+        # Yields pairs of an array that is held only by the graph and the
+        # variable node holding it (or None if only the function node holds
+        # it).
+        if func._input_indexes_to_retain is not None:
+            for index in func._input_indexes_to_retain:
+                node = func.inputs[index]
+                if node.get_variable_or_none() is None and \
+                        node.data is not None:
+                    yield node.data, node
+        if func._retained_output_data is not None:
+            for index, data in zip(func._output_indexes_to_retain,
+                                   func._retained_output_data):
+                node = func.outputs[index]()
+                if node is None:
+                    yield data, None
+                elif node.get_variable_or_none() is None:
+                    yield data, node
+
+    def _simulate(self, outputs, funcs, arrays):
+        retained = sum([entry.nbytes for entry in arrays.values()])
+        n_users = {id(entry): entry.n_users for entry in arrays.values()}
+        root_nodes = set([y.node for y in outputs])
+        grads = sum([_grad_nbytes(node) for node in root_nodes])
+
+        heap = []
+        for func in funcs:
+            heapq.heappush(heap, (-func.rank, id(func), func))
+
+        has_grad = set(root_nodes)
+        baseline_peak = planned_peak = retained + grads
+        released = 0
+        while heap:
+            _, _, func = heapq.heappop(heap)
+            if not any([y() in has_grad for y in func.outputs]):
+                continue
+            for x in func.inputs:
+                if x.requires_grad and x not in has_grad:
+                    has_grad.add(x)
+                    grads += _grad_nbytes(x)
+            baseline_peak = max(baseline_peak, retained + grads)
+            planned_peak = max(planned_peak, retained - released + grads)
+
+            for y_ref in func.outputs:
+                y = y_ref()
+                if y is not None and y in has_grad and y not in root_nodes:
+                    grads -= _grad_nbytes(y)
+            if func in self._shared:
+                continue
+            for entry in self._uses[func]:
+                n_users[id(entry)] -= 1
+                if n_users[id(entry)] == 0:
+                    released += entry.nbytes
+        return baseline_peak, planned_peak
+
+    def release(self, func):
+        """Releases the arrays whose last user is the given function node.
+
+        This method must be called right after the backward computation of
+        ``func``. The retained arrays of ``func`` are not available anymore,
+        so backprop cannot run through the node again.
+
+        Args:
+            func (~chainer.FunctionNode): Function node whose backward
+                computation has just been done.
+
+        """
+        uses = self._uses.pop(func, None)
+        if uses is None or func in self._shared:
+            return
+        for entry in uses:
+            entry.n_users -= 1
+            if entry.n_users == 0:
+                for node in entry.nodes:
+                    # The shape and dtype information is kept.
+                    node._data = None
+                self.released_bytes += entry.nbytes
+        func._retained_output_data = None
+        func._retained_arrays_released = True
+
+
+class BackwardMemoryPlanner(object):
+
+    """Context manager to release retained arrays eagerly on backprop.
+
+    Within this context, :meth:`Variable.backward` and :func:`chainer.grad`
+    build a :class:`BackwardMemoryPlan` for the graph and drop the references
+    to the arrays retained by each function node for backprop as soon as the
+    last backward computation using them is done, instead of keeping all of
+    them until the whole graph is deleted. It reduces the peak memory
+    consumption of backprop of deep networks, where the gradients w.r.t. the
+    early layers are allocated while the retained activations of the late
+    layers are still alive.
+
+    .. admonition:: Example
+
+       >>> planner = chainer.graph_optimizations.BackwardMemoryPlanner()
+       >>> x = chainer.Variable(np.ones((10, 3), np.float32))
+       >>> with planner:
+       ...     loss = F.sum(F.tanh(F.tanh(x)))
+       ...     loss.backward()
+       >>> planner.report()['saved_bytes'] >= 0
+       True
+
+    The eager release is disabled when double backprop is enabled, because
+    the retained arrays can be used by the graph of the gradients. Since the
+    retained arrays are released, backprop cannot be done twice through the
+    same graph.
+
+    Attributes:
+        ~BackwardMemoryPlanner.plans (list of BackwardMemoryPlan): Plans used
+            in the context.
+
+    """
+
+    def __init__(self):
+        self.plans = []
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = getattr(
+            chainer._thread_local, 'backward_memory_planner', None)
+        chainer._thread_local.backward_memory_planner = self
+        return self
+
+    def __exit__(self, *args):
+        chainer._thread_local.backward_memory_planner = self._previous
+        self._previous = None
+
+    def plan(self, outputs):
+        """Creates a plan for backprop from the given variables.
+
+        Args:
+            outputs (list of ~chainer.Variable): Variables from which backprop
+                starts.
+
+        Returns:
+            BackwardMemoryPlan: The plan.
+
+        """
+        plan = BackwardMemoryPlan(outputs)
+        self.plans.append(plan)
+        return plan
+
+    def report(self):
+        """Returns the summary of the memory savings of the planned backprops.
+
+        Returns:
+            dict: A dictionary with the following items, where the peak
+            values are the maximum over the backprops done in the context.
+
+            - ``'n_backward'``: Number of backprops.
+            - ``'baseline_peak_bytes'``: Estimated peak memory consumption
+              without the eager release.
+            - ``'planned_peak_bytes'``: Estimated peak memory consumption with
+              the eager release.
+            - ``'saved_bytes'``: Difference of the two peak values above.
+            - ``'released_bytes'``: Total size of the released arrays.
+
+        """
+        baseline = max([p.baseline_peak_bytes for p in self.plans] or [0])
+        planned = max([p.planned_peak_bytes for p in self.plans] or [0])
+        return {
+            'n_backward': len(self.plans),
+            'baseline_peak_bytes': baseline,
+            'planned_peak_bytes': planned,
+            'saved_bytes': baseline - planned,
+            'released_bytes': sum([p.released_bytes for p in self.plans]),
+        }
+
+
+def plan_backward_memory(outputs):
+    """Estimates the peak memory consumption of backprop.
+
+    This function builds a :class:`BackwardMemoryPlan` for the graph without
+    running backprop or releasing any array, so that the memory savings of
+    :class:`BackwardMemoryPlanner` can be checked in advance.
+
+    Args:
+        outputs (~chainer.Variable or list of ~chainer.Variable): Variables
+            from which backprop starts.
+
+    Returns:
+        BackwardMemoryPlan: The plan.
+
+    """
+    if isinstance(outputs, chainer.Variable):
+        outputs = [outputs]
+    return BackwardMemoryPlan(outputs)
+
+
+def _get_plan(outputs):
+    # Called by the backprop implementations.
+    planner = getattr(chainer._thread_local, 'backward_memory_planner', None)
+    if planner is None or chainer.config.enable_backprop:
+        return None
+    return planner.plan(outputs)
@@ -0,0 +1,403 @@
+import functools
+import weakref
+
+import six
+
+import chainer
+from chainer import function_node
+from chainer.graph_optimizations import elementwise_fusion
+from chainer.utils import experimental
+from chainer import variable
+
+
+class _Dummy(object):
+    pass
+
+
+def _dead_ref():
+    # Weak reference whose target is already gone. It is used as the output
+    # reference of replayed function nodes so that
+    # ``FunctionNode.get_retained_outputs`` always builds a fresh variable
+    # from the retained output arrays of the current replay.
+    return weakref.ref(_Dummy())
+
+
+class _ScheduleEntry(object):
+
+    __slots__ = ('func', 'in_slots', 'out_slots', 'in_requires_grad')
+
+    def __init__(self, func, in_slots, out_slots, in_requires_grad):
+        self.func = func
+        self.in_slots = in_slots
+        self.out_slots = out_slots
+        self.in_requires_grad = in_requires_grad
+
+
+class _GraphRecorder(object):
+
+    """Records function applications while a static graph is captured.
+
+    Each array flowing through the graph is assigned an integer *slot*. The
+    first slots are reserved for the arguments of the decorated method,
+    followed by the parameters of the link and then by any other leaf
+    variable (treated as a constant) and by the outputs of recorded function
+    nodes.
+
+    """
+
+    def __init__(self, arg_vars):
+        self.entries = []
+        self.n_args = len(arg_vars)
+        self.slots = {}
+        self.nodes = []  # keeps recorded nodes alive during the capture
+        self.leaves = []  # list of pairs of slot and leaf variable
+        for var in arg_vars:
+            self.leaves.append((self._new_slot(var.node), var))
+
+    def _new_slot(self, node):
+        slot = len(self.slots)
+        self.slots[id(node)] = slot
+        self.nodes.append(node)
+        return slot
+
+    def _get_slot(self, var):
+        node = var.node
+        slot = self.slots.get(id(node))
+        if slot is None:
+            slot = self._new_slot(node)
+            self.leaves.append((slot, var))
+        return slot
+
+    def record(self, func, input_vars, outputs):
+        in_slots = tuple([self._get_slot(x) for x in input_vars])
+        out_slots = tuple([self._new_slot(y.node) for y in outputs])
+        in_requires_grad = tuple([x.requires_grad for x in input_vars])
+        self.entries.append(
+            _ScheduleEntry(func, in_slots, out_slots, in_requires_grad))
+
+
+class StaticSchedule(object):
+
+    """Flat forward/backward schedule of a captured computational graph.
+
+    A schedule is built from the function nodes recorded while the decorated
+    method runs once in the usual define-by-run manner. Replaying the schedule
+    directly calls :meth:`FunctionNode.forward` of each recorded node in the
+    recorded order, without creating intermediate variables, checking the
+    input types or calling function hooks. When backprop is needed, the whole
+    schedule is inserted into the computational graph as a single
+    :class:`~chainer.FunctionNode` whose backward calls
+    :meth:`FunctionNode.backward_accumulate` of the recorded nodes in the
+    reverse order, so that no topological sort is done on backprop. The
+    random numbers drawn by the recorded nodes (e.g. the masks of
+    :func:`~chainer.functions.dropout`) are drawn again on each replay.
+
+    Users do not need to create this object directly; use
+    :func:`~chainer.static_graph` instead.
+
+    Args:
+        recorder (_GraphRecorder): Recorder that captured the graph.
+        params (list of ~chainer.Parameter): Parameters of the link.
+        out_vars (tuple of ~chainer.Variable): Outputs of the captured call.
+        out_type (type): Type of the value returned by the captured call.
+        fuse_elementwise (bool): If ``True``, runs of element-wise functions
+            are fused (see :func:`~chainer.static_graph`).
+
+    """
+
+    def __init__(self, recorder, params, out_vars, out_type,
+                 fuse_elementwise=False):
+        param_slots = {id(p.node): p for p in params}
+        n_args = recorder.n_args
+
+        # Classify the leaves into parameters and constants.
+        self.params = []
+        self.param_slots = []
+        self.constants = []
+        for slot, leaf in recorder.leaves:
+            if slot < n_args:
+                continue
+            param = param_slots.get(id(leaf.node))
+            if param is not None:
+                self.params.append(param)
+                self.param_slots.append(slot)
+            else:
+                self.constants.append((slot, leaf.data))
+
+        self.n_args = n_args
+        self.n_slots = len(recorder.slots)
+        self.entries = recorder.entries
+        self.out_slots = tuple([recorder.slots[id(y.node)] for y in out_vars])
+        self.out_type = out_type
+        if fuse_elementwise:
+            elementwise_fusion.fuse_elementwise(self, recorder)
+        # Nodes drawing random numbers (e.g. dropout) keep them after the
+        # forward computation, which must be discarded on each replay.
+        self.random_funcs = [
+            entry.func for entry in self.entries
+            if hasattr(entry.func, '_reset_random_state')]
+
+    def _init_slots(self, in_data):
+        slots = [None] * self.n_slots
+        slots[:self.n_args] = in_data[:self.n_args]
+        param_slots = self.param_slots
+        for i, slot in enumerate(param_slots):
+            slots[slot] = in_data[self.n_args + i]
+        for slot, data in self.constants:
+            slots[slot] = data
+        return slots
+
+    def forward(self, in_data, retain):
+        """Runs the recorded forward computations.
+
+        Args:
+            in_data (tuple of arrays): Arrays of the arguments followed by the
+                arrays of the parameters.
+            retain (bool): If ``True``, the arrays retained by each function
+                node are attached to the node for the subsequent backward.
+
+        Returns:
+            tuple of arrays: Output arrays.
+
+        """
+        slots = self._init_slots(in_data)
+        for func in self.random_funcs:
+            func._reset_random_state()
+        for entry in self.entries:
+            func = entry.func
+            inputs = tuple([slots[i] for i in entry.in_slots])
+            func._input_indexes_to_retain = None
+            func._output_indexes_to_retain = None
+            outputs = func.forward(inputs)
+            for slot, y in six.moves.zip(entry.out_slots, outputs):
+                slots[slot] = y
+
+            if not retain:
+                continue
+            if func._input_indexes_to_retain is not None:
+                nodes = list(func.inputs)
+                for index in func._input_indexes_to_retain:
+                    # A fresh node is used so that any variable left from the
+                    # previous iteration does not hide the new array.
+                    x = variable.Variable(
+                        inputs[index],
+                        requires_grad=entry.in_requires_grad[index])
+                    node = x.node
+                    node.data = inputs[index]
+                    nodes[index] = node
+                func.inputs = tuple(nodes)
+            if func._output_indexes_to_retain is not None:
+                func._retained_output_data = tuple(
+                    [outputs[index]
+                     for index in func._output_indexes_to_retain])
+                func.outputs = tuple([_dead_ref() for _ in outputs])
+        return tuple([slots[i] for i in self.out_slots])
+
+    def backward(self, grad_outputs):
+        """Runs the recorded backward computations in the reverse order.
+
+        Args:
+            grad_outputs (tuple of ~chainer.Variable): Gradients w.r.t. the
+                outputs.
+
+        Returns:
+            list of ~chainer.Variable: Gradients w.r.t. the arguments followed
+            by the gradients w.r.t. the parameters.
+
+        """
+        grads = {}
+        for slot, gy in six.moves.zip(self.out_slots, grad_outputs):
+            if gy is None:
+                continue
+            cur = grads.get(slot)
+            grads[slot] = gy if cur is None else cur + gy
+
+        for entry in reversed(self.entries):
+            out_grad = tuple([grads.pop(slot, None)
+                              for slot in entry.out_slots])
+            if all([gy is None for gy in out_grad]):
+                continue
+
+            in_slots = entry.in_slots
+            target_input_indexes = tuple([
+                i for i, r in enumerate(entry.in_requires_grad) if r])
+            if not target_input_indexes:
+                continue
+
+            # Only the first occurrence of a duplicated input receives the
+            # current gradient (see Variable._backward_main).
+            target_slots = [in_slots[i] for i in target_input_indexes]
+            in_grad = []
+            for i, slot in enumerate(target_slots):
+                if slot in target_slots[:i]:
+                    in_grad.append(None)
+                else:
+                    in_grad.append(grads.get(slot))
+
+            func = entry.func
+            gxs = func.backward_accumulate(
+                target_input_indexes, out_grad, tuple(in_grad))
+
+            for i, gx in enumerate(gxs):
+                if gx is None:
+                    continue
+                slot = target_slots[i]
+                if slot in target_slots[:i]:
+                    cur = grads.get(slot)
+                    grads[slot] = gx if cur is None else gx + cur
+                else:
+                    grads[slot] = gx
+
+        in_slots = list(six.moves.range(self.n_args)) + self.param_slots
+        return [grads.get(slot) for slot in in_slots]
+
+
+class StaticScheduleFunction(function_node.FunctionNode):
+
+    """Function node that replays a :class:`StaticSchedule`."""
+
+    def __init__(self, schedule):
+        self.schedule = schedule
+
+    def forward(self, inputs):
+        return self.schedule.forward(
+            inputs, chainer.config.enable_backprop)
+
+    def backward(self, indexes, grad_outputs):
+        gxs = self.schedule.backward(grad_outputs)
+        return tuple([gxs[i] for i in indexes])
+
+
+def _is_capturing():
+    return getattr(chainer._thread_local, 'static_graph_recorder',
+                   None) is not None
+
+
+def static_graph(func=None, fuse_elementwise=False):
+    """static_graph(func=None, fuse_elementwise=False)
+
+    Decorator to capture and replay a static computational graph.
+
+    This decorator is applied to the ``__call__`` method (or any other method
+    taking arrays and returning variables) of a :class:`~chainer.Link`. On the
+    first call with a given combination of input shapes, dtypes, gradient
+    requirements, ``chainer.config.train`` and
+    ``chainer.config.enable_backprop``, the method runs as usual while all
+    function applications are recorded. The following calls with the same
+    combination replay the recorded schedule: each
+    :meth:`FunctionNode.forward` is called directly on the raw arrays, and
+    the whole schedule appears in the computational graph as a single
+    function node whose backward calls the recorded backward computations in
+    the reverse order. The per-iteration Python overhead of building the graph
+    (creating variables and nodes, type checking, hook lookups and the
+    topological sort on backprop) is thus removed.
+
+    .. admonition:: Example
+
+       >>> class MLP(chainer.Chain):
+       ...     def __init__(self):
+       ...         super(MLP, self).__init__()
+       ...         with self.init_scope():
+       ...             self.l1 = L.Linear(3, 4)
+       ...             self.l2 = L.Linear(4, 2)
+       ...
+       ...     @chainer.static_graph
+       ...     def __call__(self, x):
+       ...         return self.l2(F.relu(self.l1(x)))
+       >>> model = MLP()
+       >>> x = np.ones((5, 3), np.float32)
+       >>> y = model(x)  # captures the graph
+       >>> y = model(x)  # replays it
+       >>> y.shape
+       (5, 2)
+
+    The method must be *static*, i.e. the sequence of functions applied must
+    not depend on the values of the inputs, and all the computation must be
+    done through :class:`~chainer.FunctionNode` applications. Any variable
+    that is neither an argument nor a parameter of the link is treated as a
+    constant, and side effects such as :func:`chainer.report` are only done
+    at the capture. The function nodes are reused across iterations, so the
+    outputs of a call must be backpropagated (or discarded) before the next
+    call to the same link. Random numbers such as the masks of
+    :func:`~chainer.functions.dropout` and
+    :func:`~chainer.functions.simplified_dropconnect` are drawn again on each
+    replay. The backward computation of a replayed schedule is not
+    differentiable, i.e. double backprop through it is not supported.
+
+    With ``fuse_elementwise=True``, each run of consecutive element-wise
+    functions (arithmetic operators, :func:`~chainer.functions.relu`,
+    :func:`~chainer.functions.sigmoid`, :func:`~chainer.functions.tanh` and
+    :func:`~chainer.functions.exp`) on arrays of the same shape is replaced
+    with a single node that overwrites the intermediate arrays not needed
+    anymore and has a matching fused backward computation. It reduces the
+    memory traffic of memory-bound models such as LSTMs and MLPs. This
+    option takes effect only on CPU with NumPy arrays. The backward
+    computation of the fused nodes is not differentiable.
+
+    .. code-block:: python
+
+       @chainer.static_graph(fuse_elementwise=True)
+       def __call__(self, x):
+           ...
+
+    When this decorator is used in the capture of another static graph, the
+    method runs in the usual define-by-run manner so that the outer capture
+    records its function applications.
+
+    Args:
+        func (callable): Method to decorate. Its positional arguments must be
+            arrays or :class:`~chainer.Variable` objects, and it must return
+            a variable or a tuple or list of variables.
+        fuse_elementwise (bool): If ``True``, runs of element-wise functions
+            in the captured graph are fused.
+
+    Returns:
+        callable: Decorated method.
+
+    .. seealso::
+       :func:`chainer.functions.forget` for another way to reduce memory
+       consumption of the graph.
+
+    """
+    if func is None:
+        return functools.partial(
+            static_graph, fuse_elementwise=fuse_elementwise)
+
+    @functools.wraps(func)
+    def wrapper(self, *args):
+        if _is_capturing():
+            return func(self, *args)
+
+        arg_vars = [chainer.as_variable(x) for x in args]
+        # A schedule captured without backprop does not retain the arrays
+        # needed by backward.
+        key = (chainer.config.train, chainer.config.enable_backprop) + tuple([
+            (x.shape, x.dtype, x.requires_grad) for x in arg_vars])
+        schedules = self.__dict__.setdefault('_static_schedules', {})
+        schedule = schedules.get(key)
+
+        if schedule is None:
+            experimental('chainer.static_graph')
+            recorder = _GraphRecorder(arg_vars)
+            chainer._thread_local.static_graph_recorder = recorder
+            try:
+                outputs = func(self, *arg_vars)
+            finally:
+                chainer._thread_local.static_graph_recorder = None
+            out_type = type(outputs)
+            if isinstance(outputs, (tuple, list)):
+                out_vars = tuple(outputs)
+            else:
+                out_vars = (outputs,)
+            schedules[key] = StaticSchedule(
+                recorder, list(self.params()), out_vars, out_type,
+                fuse_elementwise)
+            return outputs
+
+        ret = StaticScheduleFunction(schedule).apply(
+            arg_vars + schedule.params)
+        if issubclass(schedule.out_type, (tuple, list)):
+            return schedule.out_type(ret)
+        return ret[0]
+
+    return wrapper
@@ -0,0 +1,196 @@
+from __future__ import division
+
+import numpy
+import six
+
+from chainer.dataset import iterator
+
+
+class BucketIterator(iterator.Iterator):
+
+    """Dataset iterator that makes batches of examples of similar lengths.
+
+    This iterator is for datasets of variable-length examples, e.g.
+    sequences for recurrent networks, which are padded to the longest
+    example of each batch by :func:`~chainer.dataset.concat_examples`.
+    Instead of drawing batches uniformly at random, it groups the examples
+    by their lengths and makes each batch from examples of the same group,
+    which reduces the computation and the memory spent on padding.
+
+    At the beginning of each epoch, the examples are shuffled and then
+    stably sorted by their buckets given by ``boundaries``, so that examples
+    of the same bucket are consecutive in a random order, and they are split
+    into batches which do not cross the buckets. If ``boundaries`` is
+    ``None``, the examples are sorted by their lengths instead, and each
+    batch consists of the examples of the closest lengths. The order of the
+    batches is then shuffled. Each batch has at most ``batch_size``
+    examples, and if ``max_tokens`` is given, the number of examples times
+    the maximum length in the batch is at most ``max_tokens``, so that the
+    padded batch has a bounded size; an example longer than ``max_tokens``
+    makes a batch by itself.
+
+    Unlike :class:`SerialIterator`, a batch never contains examples of two
+    epochs, so the sizes of the batches vary. :attr:`epoch_detail` is the
+    ratio of the number of examples consumed in the current epoch.
+
+    .. admonition:: Example
+
+       >>> dataset = [np.arange(n) for n in [5, 200, 6, 180, 5, 190]]
+       >>> it = chainer.iterators.BucketIterator(
+       ...     dataset, 3, shuffle=False, repeat=False)
+       >>> [[len(x) for x in batch] for batch in it]
+       [[5, 5, 6], [180, 190, 200]]
+
+    This iterator saves ``-1`` instead of ``None`` in snapshots since some
+    serializers do not support ``None``.
+
+    Args:
+        dataset: Dataset to iterate.
+        batch_size (int): Maximum number of examples within each batch. If it
+            is ``None``, ``max_tokens`` must be given.
+        key: Function that returns the length of an example, or a sequence
+            of the lengths of all the examples. The function is called for
+            all the examples on construction. :func:`len` is used by default.
+        max_tokens (int): Maximum number of tokens, i.e. the number of
+            examples times the maximum length in a batch, of each batch.
+        boundaries (list of ints): Sorted boundaries of the lengths of the
+            buckets. The ``i``-th bucket contains the examples of lengths in
+            ``[boundaries[i - 1], boundaries[i])``, and the last one contains
+            those of lengths at least ``boundaries[-1]``.
+        repeat (bool): If ``True``, it infinitely loops over the dataset.
+            Otherwise, it stops iteration at the end of the first epoch.
+        shuffle (bool): If ``True``, the examples are shuffled within the
+            buckets and the batches are shuffled at the beginning of each
+            epoch. Otherwise, the examples are sorted by the buckets and the
+            indexes, and the batches are in the order of the buckets.
+
+    """
+
+    def __init__(self, dataset, batch_size=None, key=len, max_tokens=None,
+                 boundaries=None, repeat=True, shuffle=True):
+        if batch_size is None and max_tokens is None:
+            raise ValueError('either batch_size or max_tokens must be given')
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self._repeat = repeat
+        self._shuffle = shuffle
+
+        if callable(key):
+            lengths = [key(dataset[i])
+                       for i in six.moves.range(len(dataset))]
+        else:
+            lengths = key
+        self._lengths = numpy.asarray(lengths, dtype=numpy.int64)
+        if len(self._lengths) != len(dataset):
+            raise ValueError('the number of lengths differs from the length '
+                             'of the dataset')
+        if boundaries is None:
+            self._buckets = None
+        else:
+            self._buckets = numpy.searchsorted(
+                boundaries, self._lengths, side='right')
+
+        self.reset()
+
+    def __next__(self):
+        if not self._repeat and self.epoch > 0:
+            raise StopIteration
+
+        self._previous_epoch_detail = self.epoch_detail
+
+        i = self.current_position
+        N = len(self.dataset)
+        i_end = i + 1
+        while i_end < N and not self._starts[i_end]:
+            i_end += 1
+        batch = [self.dataset[index] for index in self._order[i:i_end]]
+
+        if i_end >= N:
+            self.current_position = 0
+            self.epoch += 1
+            self.is_new_epoch = True
+            if self._repeat:
+                self._plan()
+        else:
+            self.current_position = i_end
+            self.is_new_epoch = False
+
+        return batch
+
+    next = __next__
+
+    @property
+    def epoch_detail(self):
+        return self.epoch + self.current_position / len(self.dataset)
+
+    @property
+    def previous_epoch_detail(self):
+        if self._previous_epoch_detail < 0:
+            return None
+        return self._previous_epoch_detail
+
+    def serialize(self, serializer):
+        self.current_position = serializer('current_position',
+                                           self.current_position)
+        self.epoch = serializer('epoch', self.epoch)
+        self.is_new_epoch = serializer('is_new_epoch', self.is_new_epoch)
+        serializer('order', self._order)
+        serializer('starts', self._starts)
+        self._previous_epoch_detail = serializer(
+            'previous_epoch_detail', self._previous_epoch_detail)
+
+    def reset(self):
+        self.current_position = 0
+        self.epoch = 0
+        self.is_new_epoch = False
+        # use -1 instead of None internally.
+        self._previous_epoch_detail = -1.
+        self._plan()
+
+    def _plan(self):
+        # Makes the order of the examples of the next epoch, and the flags
+        # of the positions at which the batches start.
+        N = len(self.dataset)
+        if self._shuffle:
+            order = numpy.random.permutation(N)
+        else:
+            order = numpy.arange(N)
+        if self._buckets is None:
+            buckets = self._lengths
+        else:
+            buckets = self._buckets
+        order = order[numpy.argsort(buckets[order], kind='mergesort')]
+
+        lengths = self._lengths[order]
+        if self._buckets is None:
+            # Batches may contain examples of different lengths.
+            buckets = numpy.zeros(N, dtype=numpy.int64)
+        else:
+            buckets = buckets[order]
+        batches = []
+        start = 0
+        max_length = 0
+        for i in six.moves.range(N):
+            max_length = max(max_length, lengths[i])
+            n = i - start + 1
+            if i > start and (
+                    buckets[i] != buckets[start] or
+                    (self.batch_size is not None and
+                     n > self.batch_size) or
+                    (self.max_tokens is not None and
+                     max_length * n > self.max_tokens)):
+                batches.append(order[start:i])
+                start = i
+                max_length = lengths[i]
+        if N:
+            batches.append(order[start:])
+
+        if self._shuffle:
+            batches = [batches[i]
+                       for i in numpy.random.permutation(len(batches))]
+        self._order = numpy.concatenate(batches) if batches else order
+        self._starts = numpy.zeros(N, dtype=numpy.bool_)
+        if batches:
+            sizes = [len(batch) for batch in batches[:-1]]
+            self._starts[numpy.cumsum([0] + sizes, dtype=numpy.int64)] = True
@@ -2,8 +2,11 @@ from __future__ import division
 from collections import namedtuple
 import multiprocessing
 from multiprocessing import sharedctypes
+import os
+import shutil
 import signal
 import sys
+import tempfile
 import threading
 import warnings
 
@@ -48,6 +51,17 @@ class MultiprocessIterator(iterator.Iterator):
         n_prefetch (int): Number of prefetch batches.
         shared_mem (int): The size of using shared memory per data.
             If ``None``, size is adjusted automatically.
+        zero_copy (bool): If ``True``, the worker processes write each
+            example directly into a ring of batch-shaped buffers in shared
+            memory, and the arrays in the returned batch are read-only views
+            of these buffers. :func:`~chainer.dataset.concat_examples` with
+            ``copy=False`` then returns the whole batch as views of the
+            buffers without copying.
+            The buffers are laid out by the shapes and dtypes of the arrays
+            of the examples, and reallocated automatically when examples of
+            a different layout arrive. The views are valid until the next
+            batch is retrieved from the iterator; copy them to keep them
+            longer. ``shared_mem`` is ignored in this mode.
 
     """
 
@@ -57,7 +71,8 @@ class MultiprocessIterator(iterator.Iterator):
     _thread = None
 
     def __init__(self, dataset, batch_size, repeat=True, shuffle=True,
-                 n_processes=None, n_prefetch=1, shared_mem=None):
+                 n_processes=None, n_prefetch=1, shared_mem=None,
+                 zero_copy=False):
         self.dataset = dataset
         self.batch_size = batch_size
         self.repeat = repeat
@@ -66,6 +81,7 @@ class MultiprocessIterator(iterator.Iterator):
         self.n_processes = n_processes or multiprocessing.cpu_count()
         self.n_prefetch = max(n_prefetch, 1)
         self.shared_mem = shared_mem
+        self.zero_copy = zero_copy
 
         self._comm = _Communicator(self.n_prefetch)
         self.reset()
@@ -73,7 +89,7 @@ class MultiprocessIterator(iterator.Iterator):
         self._prefetch_loop = _PrefetchLoop(
             self.dataset, self.batch_size, self.repeat, self.shuffle,
             self.n_processes, self.n_prefetch, self.shared_mem, self._comm,
-            self._interruption_testing)
+            self._interruption_testing, self.zero_copy)
         # defer launching prefetch thread until creating the worker pool,
         # not to leave a background thread in forked processes.
         self._thread = None
@@ -119,7 +135,8 @@ class MultiprocessIterator(iterator.Iterator):
     def __copy__(self):
         other = MultiprocessIterator(
             self.dataset, self.batch_size, self.repeat, self.shuffle,
-            self.n_processes, self.n_prefetch, self.shared_mem)
+            self.n_processes, self.n_prefetch, self.shared_mem,
+            self.zero_copy)
 
         other.current_position = self.current_position
         other.epoch = self.epoch
@@ -261,16 +278,20 @@ class _PrefetchLoop(object):
 
     def __init__(self, dataset, batch_size, repeat, shuffle,
                  n_processes, n_prefetch, mem_size, comm,
-                 _interruption_testing):
+                 _interruption_testing, zero_copy=False):
         self.dataset = dataset
         self.batch_size = batch_size
         self.repeat = repeat
         self.shuffle = shuffle
         self.n_processes = n_processes
-        self.mem_size = mem_size
+        self.n_prefetch = n_prefetch
+        # The per-example shared memory is not used in the zero-copy mode.
+        self.mem_size = 0 if zero_copy else mem_size
         self.comm = comm
+        self.zero_copy = zero_copy
 
         self._allocate_shared_memory()
+        self._ring = None
         self._pool = None
 
         # Use a distinct RandomState in the thread
@@ -309,6 +330,10 @@ class _PrefetchLoop(object):
                 sharedctypes.RawArray('b', self.batch_size * self.mem_size)
 
     def launch_thread(self):
+        if self.zero_copy:
+            # One batch is held by the consumer, ``n_prefetch`` batches wait
+            # in the queue and one is being written by the workers.
+            self._ring = _BatchRing(self.batch_size, self.n_prefetch + 2)
         self._pool = multiprocessing.Pool(
             processes=self.n_processes,
             initializer=_fetch_setup,
@@ -331,6 +356,8 @@ class _PrefetchLoop(object):
         finally:
             self._pool.close()
             self._pool.join()
+            if self._ring is not None:
+                self._ring.close()
 
     def _task(self):
         status, prefetch_state, reset_count = self.comm.check()
@@ -343,7 +370,15 @@ class _PrefetchLoop(object):
         if indices is None:  # stop iteration
             batch = None
         else:
-            future = self._pool.map_async(_fetch_run, enumerate(indices))
+            if self._ring is None:
+                future = self._pool.map_async(
+                    _fetch_run, enumerate(indices))
+            else:
+                slot = self._ring.next_slot()
+                spec = slot.spec
+                future = self._pool.map_async(
+                    _fetch_run_shared,
+                    [(i, index, spec) for i, index in enumerate(indices)])
             while True:
                 try:
                     data_all = future.get(_response_time)
@@ -353,7 +388,10 @@ class _PrefetchLoop(object):
                 else:
                     break
 
-            batch = [_unpack(data, self.mem_bulk) for data in data_all]
+            if self._ring is None:
+                batch = [_unpack(data, self.mem_bulk) for data in data_all]
+            else:
+                batch = slot.assemble(data_all)
 
         self.comm.put(batch, self.prefetch_state, reset_count)
         return True
@@ -407,6 +445,7 @@ class _PrefetchLoop(object):
 _fetch_dataset = None
 _fetch_mem_size = None
 _fetch_mem_bulk = None
+_fetch_shared_buffers = {}
 
 
 def _fetch_setup(dataset, mem_size, mem_bulk):
@@ -427,6 +466,32 @@ def _fetch_run(inputs):
     return data
 
 
+def _fetch_run_shared(inputs):
+    i, index, spec = inputs
+    data = _fetch_dataset[index]
+    if spec is None:
+        return False, data
+    structure, fields = spec
+    data_structure, values = _split_example(data)
+    if data_structure != structure or \
+            _example_layout(values) != tuple(f[1:] for f in fields):
+        return False, data
+
+    for k, (path, dtype, shape) in enumerate(fields):
+        if path is None:
+            continue
+        buf = _fetch_shared_buffers.get(path)
+        if buf is None:
+            # Unmap the buffers removed by reallocation.
+            for old in list(_fetch_shared_buffers):
+                if not os.path.exists(old):
+                    del _fetch_shared_buffers[old]
+            buf = _fetch_shared_buffers[path] = _open_buffer(path)
+        _batch_view(buf, dtype, shape, i + 1)[i] = values[k]
+        values[k] = None
+    return True, values
+
+
 def _report_pid(_):  # for testing
     return multiprocessing.current_process().pid
 
@@ -528,3 +593,178 @@ def _unpack(data, mem):
     elif t is _PackedNdarray:
         data = data.unpack(mem)
     return data
+
+
+def _split_example(data):
+    # Returns the structure of an example and the list of its values.
+    t = type(data)
+    if t is tuple or t is list:
+        return (t, len(data)), list(data)
+    elif t is dict:
+        keys = tuple(sorted(data, key=repr))
+        return (t, keys), [data[key] for key in keys]
+    return None, [data]
+
+
+def _merge_example(structure, values):
+    if structure is None:
+        return values[0]
+    t, keys = structure
+    if t is dict:
+        return dict(zip(keys, values))
+    return t(values)
+
+
+def _example_layout(values):
+    # Arrays are transferred through the shared buffers, and the other values
+    # are sent back by pickle.
+    return tuple((v.dtype.str, v.shape) if type(v) is numpy.ndarray
+                 else (None, None) for v in values)
+
+
+def _open_buffer(path):
+    return numpy.asarray(numpy.memmap(path, numpy.uint8, 'r+'))
+
+
+def _batch_view(buf, dtype, shape, n):
+    dtype = numpy.dtype(dtype)
+    size = n * dtype.itemsize
+    for s in shape:
+        size *= s
+    return buf[:size].view(dtype).reshape((n,) + shape)
+
+
+class _BatchRing(object):
+
+    """Ring of batch-shaped buffers shared with the worker processes.
+
+    The buffers are files on a memory file system (or the temporary directory
+    if it is not available) mapped to the memory of all processes, so that
+    they can be reallocated without restarting the workers.
+
+    """
+
+    def __init__(self, batch_size, n_slots):
+        self.batch_size = batch_size
+        shm = '/dev/shm'
+        self.directory = tempfile.mkdtemp(
+            prefix='chainer-', dir=shm if os.path.isdir(shm) else None)
+        self.layout = None
+        self._n_files = 0
+        self._slots = [_BatchSlot(self) for _ in six.moves.range(n_slots)]
+        self._next = 0
+
+    def next_slot(self):
+        slot = self._slots[self._next]
+        self._next = (self._next + 1) % len(self._slots)
+        slot.prepare(self.layout)
+        return slot
+
+    def new_file(self, nbytes):
+        path = os.path.join(self.directory, str(self._n_files))
+        self._n_files += 1
+        with open(path, 'wb') as f:
+            f.truncate(max(nbytes, 1))
+        return path
+
+    def close(self):
+        # The mapped memory is kept alive until all the views are deleted.
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class _BatchSlot(object):
+
+    def __init__(self, ring):
+        self.ring = ring
+        self.layout = None
+        self.spec = None
+        self._buffers = []  # pairs of a file path and a mapped array
+        self._views = []
+
+    def prepare(self, layout):
+        if layout == self.layout:
+            return
+        self.layout = layout
+        if layout is None:
+            self.spec = None
+            return
+
+        structure, fields = layout
+        batch_size = self.ring.batch_size
+        unused = sorted(self._buffers, key=lambda b: len(b[1]))
+        self._buffers = []
+        self._views = []
+        spec = []
+        for dtype, shape in fields:
+            if dtype is None:
+                self._views.append(None)
+                spec.append((None, None, None))
+                continue
+            nbytes = numpy.dtype(dtype).itemsize * batch_size
+            for s in shape:
+                nbytes *= s
+            # Reuse the largest unused buffer if it is large enough,
+            # otherwise grow it.
+            if unused and len(unused[-1][1]) >= nbytes:
+                path, buf = unused.pop()
+            else:
+                path = self.ring.new_file(nbytes)
+                buf = _open_buffer(path)
+            self._buffers.append((path, buf))
+            self._views.append(_batch_view(buf, dtype, shape, batch_size))
+            spec.append((path, dtype, shape))
+        for path, _ in unused:
+            os.remove(path)
+        self.spec = structure, tuple(spec)
+
+    def assemble(self, data_all):
+        if all([written for written, _ in data_all]):
+            return self._make_batch([values for _, values in data_all])
+
+        # Some examples do not fit the buffers. Lay out the slot again by
+        # the examples of this batch if they all have the same layout.
+        examples = []
+        layouts = set()
+        for i, (written, data) in enumerate(data_all):
+            if written:
+                structure = self.layout[0]
+                values = [v if view is None else view[i].copy()
+                          for v, view in zip(data, self._views)]
+            else:
+                structure, values = _split_example(data)
+            examples.append((structure, values))
+            layouts.add((structure, _example_layout(values)))
+        if len(layouts) != 1:
+            return [_merge_example(structure, values)
+                    for structure, values in examples]
+        layout, = layouts
+        if all([dtype is None for dtype, _ in layout[1]]):
+            # There are no arrays to share.
+            return [_merge_example(structure, values)
+                    for structure, values in examples]
+
+        self.ring.layout = layout
+        self.prepare(layout)
+        batch = []
+        for i, (_, values) in enumerate(examples):
+            for k, view in enumerate(self._views):
+                if view is not None:
+                    view[i] = values[k]
+                    values[k] = None
+            batch.append(values)
+        return self._make_batch(batch)
+
+    def _make_batch(self, values_all):
+        structure = self.layout[0]
+        views = []
+        for view in self._views:
+            if view is not None:
+                view = view[:len(values_all)].view()
+                view.flags.writeable = False
+            views.append(view)
+        batch = []
+        for i, values in enumerate(values_all):
+            values = [v if view is None else view[i]
+                      for v, view in zip(values, views)]
+            batch.append(_merge_example(structure, values))
+        return batch
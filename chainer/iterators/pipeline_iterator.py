@@ -0,0 +1,405 @@
+from __future__ import division
+import collections
+import functools
+import multiprocessing
+from multiprocessing import pool
+import pickle
+import signal
+import threading
+
+import numpy
+import six
+
+from chainer.dataset import iterator
+
+
+_response_time = 0.5
+
+
+class PipelineStage(object):
+
+    """Stage of :class:`PipelineIterator`.
+
+    A stage applies a function to each example with its own pool of worker
+    threads or processes. Examples are passed to the next stage as soon as
+    they are processed, so the stages run concurrently with different
+    degrees of parallelism.
+
+    Args:
+        func (callable): Function applied to each example. The first stage
+            of a pipeline receives the examples retrieved from the dataset.
+            If it is ``None``, the examples are passed through as is, which
+            is useful to retrieve the examples from the dataset in a
+            dedicated stage.
+        n_workers (int): Number of workers of the stage.
+        worker_type (str): ``'thread'`` or ``'process'``. Thread workers
+            suit functions releasing the GIL (e.g. most image decoders and
+            NumPy routines), while process workers suit functions running
+            Python code. With process workers, ``func`` (and the dataset for
+            the first stage) is sent to the worker processes as in
+            :class:`MultiprocessIterator`, and the examples are pickled to
+            be passed between the processes.
+        queue_size (int): Maximum number of examples being processed by the
+            stage at the same time. Further examples wait for the stage in
+            the queue of the iterator, which gives back-pressure to the
+            previous stages. It is twice the number of workers by default.
+
+    """
+
+    def __init__(self, func=None, n_workers=1, worker_type='thread',
+                 queue_size=None):
+        if worker_type not in ('thread', 'process'):
+            raise ValueError(
+                'worker_type must be either \'thread\' or \'process\': '
+                '{}'.format(worker_type))
+        if n_workers < 1:
+            raise ValueError('n_workers must be positive')
+        self.func = func
+        self.n_workers = n_workers
+        self.worker_type = worker_type
+        self.queue_size = queue_size or 2 * n_workers
+
+
+class PipelineIterator(iterator.Iterator):
+
+    """Dataset iterator that loads examples through a pipeline of stages.
+
+    This is an implementation of :class:`~chainer.dataset.Iterator` that
+    retrieves each example from the dataset and passes it through a sequence
+    of :class:`PipelineStage` objects, e.g. decoding, augmentation and
+    normalization of images, each of which runs on its own pool of worker
+    threads or processes. Unlike :class:`MultiprocessIterator` and
+    :class:`MultithreadIterator`, which parallelize whole ``dataset[i]``
+    calls, it lets each step of the preprocessing scale independently.
+
+    The batches are assembled in the order of the indexes regardless of the
+    order in which the workers finish, so the iteration is deterministic in
+    the same way as :class:`SerialIterator`. The examples for the next
+    ``n_prefetch`` batches are processed in the background while the current
+    batch is used.
+
+    An error raised by a stage function, or on passing its result between
+    the processes, is raised by :meth:`next` of the batch containing the
+    example; the next call retries from that batch.
+
+    The state of the iterator is the position of the consumed batches, so a
+    serialized iterator resumes from the batch next to the last one returned
+    before serialization; the examples prefetched at that time are processed
+    again.
+
+    .. admonition:: Example
+
+       >>> def decode(path):
+       ...     return np.zeros((3, 4, 4), np.float32)  # read an image
+       >>> def augment(image):
+       ...     return image[:, ::-1]
+       >>> it = chainer.iterators.PipelineIterator(
+       ...     ['a.jpg', 'b.jpg', 'c.jpg'], 2, stages=[
+       ...         chainer.iterators.PipelineStage(decode, n_workers=2),
+       ...         chainer.iterators.PipelineStage(augment)])
+       >>> batch = it.next()
+       >>> len(batch)
+       2
+       >>> it.finalize()
+
+    This iterator saves ``-1`` instead of ``None`` in snapshots since some
+    serializers do not support ``None``.
+
+    Args:
+        dataset (~chainer.dataset.Dataset): Dataset to iterate.
+        batch_size (int): Number of examples within each batch.
+        stages (list of PipelineStage): Stages applied to each example in
+            this order. The first stage also retrieves the example from the
+            dataset. If it is empty, the examples are retrieved by a single
+            worker thread.
+        repeat (bool): If ``True``, it infinitely loops over the dataset.
+            Otherwise, it stops iteration at the end of the first epoch.
+        shuffle (bool): If ``True``, the order of examples is shuffled at the
+            beginning of each epoch. Otherwise, examples are extracted in the
+            order of indexes.
+        n_prefetch (int): Number of prefetch batches.
+
+    """
+
+    def __init__(self, dataset, batch_size, stages=(), repeat=True,
+                 shuffle=True, n_prefetch=1):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.stages = list(stages) or [PipelineStage()]
+        self._repeat = repeat
+        self._shuffle = shuffle
+        self.n_prefetch = max(n_prefetch, 0)
+
+        self._pipeline = None
+        self._batches = collections.deque()
+        self.reset()
+
+    def reset(self):
+        self.current_position = 0
+        self.epoch = 0
+        self.is_new_epoch = False
+        # use -1 instead of None internally.
+        self._previous_epoch_detail = -1.
+        if self._shuffle:
+            self._order = numpy.random.permutation(len(self.dataset))
+        else:
+            self._order = None
+        self._restart()
+
+    def __del__(self):
+        self.finalize()
+
+    def finalize(self):
+        pipeline = self._pipeline
+        self._pipeline = None
+        self._batches = collections.deque()
+        if pipeline is not None:
+            pipeline.terminate()
+
+    def __next__(self):
+        if self._pipeline is None:
+            self._pipeline = _Pipeline(self.dataset, self.stages)
+        self._schedule()
+        if not self._batches:
+            raise StopIteration
+
+        batch = self._batches.popleft()
+        try:
+            examples = self._pipeline.wait(batch)
+        except Exception:
+            # Retry from the failed batch on the next call.
+            self._restart()
+            raise
+
+        self._previous_epoch_detail = self.epoch_detail
+        (self.current_position, self.epoch, self.is_new_epoch,
+         self._order) = batch.state
+        self._schedule()  # prefetch for the next iterations
+        return examples
+
+    next = __next__
+
+    @property
+    def epoch_detail(self):
+        return self.epoch + self.current_position / len(self.dataset)
+
+    @property
+    def previous_epoch_detail(self):
+        if self._previous_epoch_detail < 0:
+            return None
+        return self._previous_epoch_detail
+
+    def serialize(self, serializer):
+        self.current_position = serializer('current_position',
+                                           self.current_position)
+        self.epoch = serializer('epoch', self.epoch)
+        self.is_new_epoch = serializer('is_new_epoch', self.is_new_epoch)
+        if self._order is not None:
+            serializer('order', self._order)
+        self._previous_epoch_detail = serializer(
+            'previous_epoch_detail', self._previous_epoch_detail)
+        self._restart()
+
+    def _restart(self):
+        # Discards the prefetched batches and schedules the batches again
+        # from the current position.
+        self._batches = collections.deque()
+        if self._pipeline is not None:
+            self._pipeline.discard()
+        self._schedule_state = (self.current_position, self.epoch,
+                                self._order)
+
+    def _schedule(self):
+        n = len(self.dataset)
+        while len(self._batches) <= self.n_prefetch:
+            i, epoch, order = self._schedule_state
+            if not self._repeat and epoch > 0:
+                return
+
+            indices = []
+            is_new_epoch = False
+            for _ in six.moves.range(self.batch_size):
+                indices.append(i if order is None else order[i])
+                i += 1
+                if i >= n:
+                    epoch += 1
+                    is_new_epoch = True
+                    i = 0
+                    if not self._repeat:
+                        break
+                    if order is not None:
+                        # The order of the scheduled batches must be kept
+                        # for the serialization until they are consumed.
+                        order = order.copy()
+                        numpy.random.shuffle(order)
+
+            batch = _Batch(indices, (i, epoch, is_new_epoch, order))
+            self._schedule_state = (i, epoch, order)
+            self._batches.append(batch)
+            self._pipeline.submit(batch)
+
+
+class _Batch(object):
+
+    def __init__(self, indices, state):
+        self.indices = indices
+        self.state = state
+        self.examples = [None] * len(indices)
+        self.n_done = 0
+        self.error = None
+
+    @property
+    def ready(self):
+        return self.error is not None or self.n_done == len(self.indices)
+
+
+def _apply(func, dataset, value):
+    # Returns the pair of a flag of success and the result or the error, so
+    # that the errors are raised in the main thread.
+    try:
+        if dataset is not None:
+            value = dataset[value]
+        if func is not None:
+            value = func(value)
+        return True, value
+    except Exception as e:
+        return False, e
+
+
+# Process workers use the globals set by the initializer to avoid sending the
+# function and the dataset with every task (see MultiprocessIterator).
+_stage_func = None
+_stage_dataset = None
+
+
+def _process_setup(func, dataset):
+    global _stage_func, _stage_dataset
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _stage_func = func
+    _stage_dataset = dataset
+
+
+def _process_run(value):
+    # The result is pickled here, so that an unpicklable result or error is
+    # reported to the main process instead of breaking the pool.
+    result = _apply(_stage_func, _stage_dataset, value)
+    try:
+        return pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        return pickle.dumps((False, RuntimeError(
+            'failed to send the result of a pipeline stage: {}'.format(e))))
+
+
+def _process_unpack(result):
+    try:
+        return pickle.loads(result)
+    except Exception as e:
+        return False, e
+
+
+class _Stage(object):
+
+    def __init__(self, stage, dataset):
+        self.queue_size = stage.queue_size
+        self.waiting = collections.deque()
+        self.n_running = 0
+        if stage.worker_type == 'process':
+            self.pool = multiprocessing.Pool(
+                stage.n_workers, initializer=_process_setup,
+                initargs=(stage.func, dataset))
+            self.run = _process_run
+            self.unpack = _process_unpack
+        else:
+            self.pool = pool.ThreadPool(stage.n_workers)
+            self.run = functools.partial(_apply, stage.func, dataset)
+            self.unpack = None
+
+
+class _Pipeline(object):
+
+    def __init__(self, dataset, stages):
+        # Process pools are created first not to fork the worker threads.
+        order = sorted(six.moves.range(len(stages)),
+                       key=lambda k: stages[k].worker_type != 'process')
+        created = {}
+        for k in order:
+            created[k] = _Stage(stages[k], dataset if k == 0 else None)
+        self.stages = [created[k] for k in six.moves.range(len(stages))]
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        # Incremented on discarding the scheduled batches; results of the
+        # tasks submitted before that are ignored.
+        self._generation = 0
+
+    def submit(self, batch):
+        with self._lock:
+            for i, index in enumerate(batch.indices):
+                self._push(0, (self._generation, batch, i, index))
+
+    def wait(self, batch):
+        with self._lock:
+            while not batch.ready:
+                self._cond.wait(_response_time)
+        if batch.error is not None:
+            raise batch.error
+        return batch.examples
+
+    def discard(self):
+        with self._lock:
+            self._generation += 1
+            for stage in self.stages:
+                stage.waiting.clear()
+
+    def terminate(self):
+        for stage in self.stages:
+            stage.pool.terminate()
+
+    def _push(self, k, task):
+        # Must be called with the lock.
+        stage = self.stages[k]
+        if stage.n_running >= stage.queue_size:
+            stage.waiting.append(task)
+            return
+        stage.n_running += 1
+        generation, batch, i, value = task
+        kwargs = {}
+        if not six.PY2:
+            # Errors raised by the pool itself, e.g. on sending the task.
+            kwargs['error_callback'] = functools.partial(
+                self._failed, k, generation, batch, i)
+        stage.pool.apply_async(
+            stage.run, (value,),
+            callback=functools.partial(self._done, k, generation, batch, i),
+            **kwargs)
+
+    def _failed(self, k, generation, batch, i, error):
+        self._finish(k, generation, batch, i, (False, error))
+
+    def _done(self, k, generation, batch, i, result):
+        unpack = self.stages[k].unpack
+        if unpack is not None:
+            result = unpack(result)
+        self._finish(k, generation, batch, i, result)
+
+    def _finish(self, k, generation, batch, i, result):
+        # Called from the result handler thread of the pool.
+        with self._lock:
+            stage = self.stages[k]
+            stage.n_running -= 1
+            if stage.waiting:
+                self._push(k, stage.waiting.popleft())
+            if generation != self._generation:
+                return
+
+            success, value = result
+            if not success:
+                batch.error = value
+                self._cond.notify_all()
+            elif k + 1 < len(self.stages):
+                self._push(k + 1, (generation, batch, i, value))
+            else:
+                batch.examples[i] = value
+                batch.n_done += 1
+                if batch.ready:
+                    self._cond.notify_all()
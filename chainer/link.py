@@ -35,6 +35,122 @@ def _ensure_shape_dtype(value):
         return value
 
 
+class _FlatBuffer(object):
+
+    def __init__(self, params):
+        first = params[0].data
+        xp = cuda.get_array_module(first)
+        size = sum([p.size for p in params])
+        with cuda.get_device_from_array(first):
+            self.data = xp.empty(size, dtype=first.dtype)
+            self.grad = xp.zeros(size, dtype=first.dtype)
+        self.dtype = self.data.dtype
+        self.params = params
+        self.data_views = []
+        self.grad_views = []
+        offset = 0
+        for param in params:
+            end = offset + param.size
+            data_view = self.data[offset:end].reshape(param.shape)
+            grad_view = self.grad[offset:end].reshape(param.shape)
+            data_view[...] = param.data
+            if param.grad is not None:
+                grad_view[...] = param.grad
+            param.data = data_view
+            param.grad = grad_view
+            self.data_views.append(data_view)
+            self.grad_views.append(grad_view)
+            offset = end
+
+
+class FlatParams(object):
+
+    """Contiguous buffers backing all parameters of a link hierarchy.
+
+    This object packs the data and gradient arrays of all parameters under a
+    link into one contiguous data buffer and one contiguous gradient buffer
+    per data type and device, and replaces the arrays of the parameters by
+    views into them. Code that processes all parameters at once (e.g.
+    :class:`~chainer.optimizer.GradientClipping` or allreduce of gradients)
+    can then work on a few large arrays instead of many small ones. Since the
+    parameters still hold ordinary arrays, all the other features (e.g.
+    update rules and serializers, which copy values in place) work as before.
+
+    Backprop does not accumulate gradients in place, so a gradient computed
+    by :meth:`~chainer.Variable.backward` is a new array that is not in the
+    buffer. :meth:`sync_grads` copies such arrays back into the buffer, and
+    :class:`~chainer.GradientMethod` calls it before the update. If the data
+    array of a parameter is replaced (e.g. by :meth:`Link.to_gpu`), the
+    buffers are rebuilt from the current arrays on the next synchronization.
+
+    The parameters are packed in the order of their sorted paths.
+
+    Users do not need to create this object directly; use
+    :meth:`Link.flatten_params` instead.
+
+    Args:
+        link (Link): Root of the link hierarchy.
+
+    Attributes:
+        ~FlatParams.buffers: List of buffers. Each buffer has ``data`` and
+            ``grad`` attributes, which are the one-dimensional data and
+            gradient arrays, and a ``params`` attribute, which is the list of
+            parameters packed into it.
+
+    """
+
+    def __init__(self, link):
+        self._link = link
+        self.buffers = []
+        self.pack()
+
+    def pack(self):
+        """Packs the current arrays of the parameters into new buffers."""
+        groups = collections.OrderedDict()
+        for path, param in sorted(self._link.namedparams()):
+            data = param.data
+            if data is None:
+                raise RuntimeError(
+                    'cannot flatten the uninitialized parameter {}'.format(
+                        path))
+            key = (data.dtype, int(cuda.get_device_from_array(data)))
+            groups.setdefault(key, []).append(param)
+        self.buffers = [_FlatBuffer(params)
+                        for params in six.itervalues(groups)]
+
+    @property
+    def packed(self):
+        """``True`` if all parameters refer to the data buffers."""
+        for buf in self.buffers:
+            for param, view in six.moves.zip(buf.params, buf.data_views):
+                if param.data is not view:
+                    return False
+        return True
+
+    def sync_grads(self):
+        """Copies the gradients of the parameters into the gradient buffers.
+
+        The gradient array of each parameter is replaced by the view into the
+        gradient buffer. The region of a parameter whose gradient is ``None``
+        is filled by zero. The sparse gradient of a parameter (see
+        :attr:`~chainer.Parameter.sparse_grad`) is added to the view.
+
+        """
+        if not self.packed:
+            self.pack()
+        for buf in self.buffers:
+            for param, view in six.moves.zip(buf.params, buf.grad_views):
+                grad = param.grad
+                if grad is not view:
+                    with cuda.get_device_from_array(view):
+                        if grad is None:
+                            view.fill(0)
+                        else:
+                            view[...] = grad
+                    param.grad = view
+                param.densify_grad()
+
+
 class Link(object):
 
     """Building block of model definitions.
@@ -128,6 +244,8 @@ class Link(object):
 
     """
 
+    _flat_params = None
+
     def __init__(self, **params):
         self._params = set()
         self._persistent = set()
@@ -318,6 +436,7 @@ Assign a Parameter object directly to an attribute within a \
         ret = copy.copy(self)
         ret._params = set(self._params)
         ret._persistent = set(self._persistent)
+        ret._flat_params = None
         ret.name = None
         d = ret.__dict__
         for name in ret._params:
@@ -482,6 +601,33 @@ Assign a Parameter object directly to an attribute within a \
         for name in self._params:
             dst[name].copydata(src[name])
 
+    @property
+    def flat_params(self):
+        """:class:`FlatParams` packing the parameters, or ``None``.
+
+        It is set by :meth:`flatten_params`.
+
+        """
+        return self._flat_params
+
+    def flatten_params(self):
+        """Backs all parameters under the hierarchy by contiguous buffers.
+
+        The data and gradient arrays of all parameters under this link are
+        copied into one contiguous buffer per data type and device, and the
+        parameters are made to refer to views into the buffers. See
+        :class:`FlatParams` for details.
+
+        All parameters must be initialized before calling this method.
+
+        Returns:
+            FlatParams: The object managing the buffers. It is also available
+            as :attr:`flat_params`.
+
+        """
+        self._flat_params = FlatParams(self)
+        return self._flat_params
+
     def cleargrads(self):
         """Clears all gradient arrays.
 
@@ -20,6 +20,9 @@ class NegativeSampling(link.Link):
         counts (int list): Number of each identifiers.
         sample_size (int): Number of negative samples.
         power (float): Power factor :math:`\\alpha`.
+        sparse_grad (bool): If ``True``, the gradient w.r.t. ``W`` is given as
+            its sparse gradient containing only the rows of the samples (see
+            :func:`~chainer.functions.negative_sampling`).
 
     .. seealso:: :func:`~chainer.functions.negative_sampling` for more detail.
 
@@ -28,10 +31,14 @@ class NegativeSampling(link.Link):
 
     """
 
-    def __init__(self, in_size, counts, sample_size, power=0.75):
+    sparse_grad = False
+
+    def __init__(self, in_size, counts, sample_size, power=0.75,
+                 sparse_grad=False):
         super(NegativeSampling, self).__init__()
         vocab_size = len(counts)
         self.sample_size = sample_size
+        self.sparse_grad = sparse_grad
         power = numpy.float32(power)
         p = numpy.array(counts, power.dtype)
         numpy.power(p, power, p)
@@ -65,4 +72,4 @@ class NegativeSampling(link.Link):
         """
         return negative_sampling.negative_sampling(
             x, t, self.W, self.sampler.sample, self.sample_size,
-            reduce=reduce)
+            reduce=reduce, sparse_grad=self.sparse_grad)
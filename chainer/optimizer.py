@@ -125,9 +125,26 @@ class UpdateRule(object):
             :meth:`update` method does not update the parameter.
         hyperparam (Hyperparameter): Hyperparameter of the update rule.
         ~UpdateRule.t (int): Number of updates made by this update rule.
+        ~UpdateRule.elementwise (bool): ``True`` if :meth:`update_core` and
+            :meth:`init_state` treat every element of the parameter
+            independently with the same hyperparameters. Such update rules
+            can be applied to concatenated parameters by the fused update of
+            :class:`GradientMethod` (see
+            :meth:`GradientMethod.use_fused_update`). It is ``False`` by
+            default.
+        ~UpdateRule.supports_sparse_grad (bool): ``True`` if
+            :meth:`update_core_sparse` is implemented. Such an update rule
+            updates a parameter whose gradient is only given in rows as
+            :attr:`~chainer.Parameter.sparse_grad` lazily, i.e., only the
+            rows of the gradient and of the state are updated. It is
+            ``False`` by default, in which case the sparse gradient is made
+            dense before the update.
 
     """
 
+    elementwise = False
+    supports_sparse_grad = False
+
     def __init__(self, parent_hyperparam=None):
         self._pre_update_hooks = collections.OrderedDict()
         self._post_update_hooks = collections.OrderedDict()
@@ -207,6 +224,7 @@ class UpdateRule(object):
 
         self.t += 1
 
+        sparse = self._prepare_sparse_grad(param)
         if self._use_fp32_update and param.dtype == numpy.float16:
             if self._fp32_param is None:
                 self._fp32_param = variable.Variable(
@@ -231,13 +249,39 @@ class UpdateRule(object):
             if param.data is not None:
                 self._prepare(param)
             if param._loss_scale is not None:
-                param.grad /= param._loss_scale
+                if sparse:
+                    param.sparse_grad.values /= param._loss_scale
+                else:
+                    param.grad /= param._loss_scale
             for hook in six.itervalues(self._pre_update_hooks):
                 hook(self, param)
-            self.update_core(param)
+            if sparse:
+                with cuda.get_device_from_array(param.data):
+                    self.update_core_sparse(param)
+            else:
+                self.update_core(param)
             for hook in six.itervalues(self._post_update_hooks):
                 hook(self, param)
 
+    def _prepare_sparse_grad(self, param):
+        # Returns True if the parameter is updated lazily by its sparse
+        # gradient. Otherwise, the sparse gradient is made dense.
+        sparse_grad = getattr(param, 'sparse_grad', None)
+        if sparse_grad is None:
+            return False
+        hooks = list(six.itervalues(self._pre_update_hooks)) + list(
+            six.itervalues(self._post_update_hooks))
+        if (self.supports_sparse_grad and param.grad is None and
+                isinstance(param.data, (numpy.ndarray, cuda.ndarray)) and
+                not (self._use_fp32_update and
+                     param.dtype == numpy.float16) and
+                all(getattr(hook, 'supports_sparse_grad', False)
+                    for hook in hooks)):
+            param.sparse_grad = sparse_grad.coalesce()
+            return True
+        param.densify_grad()
+        return False
+
     def update_core(self, param):
         """Updates the parameter.
 
@@ -276,6 +320,20 @@ class UpdateRule(object):
         """
         raise NotImplementedError
 
+    def update_core_sparse(self, param):
+        """Updates the rows of the parameter given by its sparse gradient.
+
+        Implementation of UpdateRule whose :attr:`supports_sparse_grad` is
+        ``True`` should override this method. The gradient is given as
+        :attr:`~chainer.Parameter.sparse_grad` whose rows are unique, and
+        :attr:`~chainer.Variable.grad` is ``None``.
+
+        Args:
+            param (~chainer.Parameter): Parameter to be updated.
+
+        """
+        raise NotImplementedError
+
     def init_state(self, param):
         """Initializes the state.
 
@@ -539,11 +597,15 @@ class Optimizer(object):
 
     def _call_hook(self, hook):
         if getattr(hook, 'call_for_each_param', False):
-            for param in self.target.params():
-                hook(param.update_rule, param)
+            for rule, param in self._iter_rules_and_params(hook):
+                hook(rule, param)
         else:
             hook(self)
 
+    def _iter_rules_and_params(self, hook):
+        for param in self.target.params():
+            yield param.update_rule, param
+
     def serialize(self, serializer):
         """Serializes or deserializes the optimizer.
 
@@ -603,6 +665,9 @@ class GradientMethod(Optimizer):
         super(GradientMethod, self).__init__()
         self.hyperparam = Hyperparameter()
         self._use_fp32_update = False
+        self._use_fused_update = False
+        self._fused_runs = None
+        self._fused_states = {}
 
     def setup(self, link):
         super(GradientMethod, self).setup(link)
@@ -616,13 +681,22 @@ class GradientMethod(Optimizer):
         """Reallocate gradients cleared by :meth:`~chainer.Variable.cleargrad`.
 
         This method allocates arrays for all gradients which have :obj:`None`.
+        If the parameters of the target link are packed by
+        :meth:`~chainer.Link.flatten_params`, it instead synchronizes the
+        gradients with the gradient buffers (see
+        :meth:`~chainer.link.FlatParams.sync_grads`).
         This method is called before and after every optimizer hook.
         If an inheriting optimizer does not require this allocation,
         the optimizer can override this method with a blank function.
 
         """
+        flat = self.target.flat_params
+        if flat is not None:
+            flat.sync_grads()
+            return
         for name, param in self.target.namedparams(False):
-            if param.grad is None:
+            # Parameters with sparse gradients are left to the update rules.
+            if param.grad is None and param.sparse_grad is None:
                 with cuda.get_device_from_array(param.data):
                     xp = cuda.get_array_module(param.data)
                     param.grad = xp.zeros_like(param.data)
@@ -636,6 +710,9 @@ class GradientMethod(Optimizer):
         else:
             hooks = self._post_update_hooks
         for hook in six.itervalues(hooks):
+            if not getattr(hook, 'supports_sparse_grad', False):
+                for param in self.target.params(False):
+                    param.densify_grad()
             self._call_hook(hook)
             self.reallocate_cleared_grads()
 
@@ -666,15 +743,24 @@ class GradientMethod(Optimizer):
 
         self.reallocate_cleared_grads()
 
-        self.call_hooks('pre')
+        if self._use_fused_update:
+            self._fused_runs = self._make_fused_runs()
+        try:
+            self.call_hooks('pre')
 
-        self.t += 1
-        for param in self.target.params():
-            param.update()
+            self.t += 1
+            if self._fused_runs is None:
+                for param in self.target.params():
+                    param.update()
+            else:
+                for run in self._fused_runs:
+                    run.update()
 
-        self.reallocate_cleared_grads()
+            self.reallocate_cleared_grads()
 
-        self.call_hooks('post')
+            self.call_hooks('post')
+        finally:
+            self._fused_runs = None
 
     def use_cleargrads(self, use=True):
         """Enables or disables use of :func:`~chainer.Link.cleargrads` in `update`.
@@ -720,6 +806,193 @@ class GradientMethod(Optimizer):
             for param in link.params():
                 param.update_rule.use_fp32_update()
 
+    def use_fused_update(self, flag=True):
+        """Enables the fused update of parameters.
+
+        In the fused update, the parameters of the target link are packed into
+        contiguous buffers by :meth:`~chainer.Link.flatten_params` (if not
+        packed yet), and each run of consecutive parameters in a buffer whose
+        update rules share the type, the hyperparameters, the hook functions
+        and the update count is updated at once. The update rule and its hook
+        functions are applied to the concatenated data, gradient and state
+        arrays of the run, so the number of array operations per update
+        depends on the number of such runs instead of the number of
+        parameters. The state arrays of the update rules are made views into
+        contiguous state buffers for this purpose.
+
+        Only update rules and hook functions whose ``elementwise`` attribute
+        is ``True`` are fused (e.g.
+        :class:`~chainer.optimizers.MomentumSGD`,
+        :class:`~chainer.optimizers.Adam`,
+        :class:`~chainer.optimizers.RMSprop`, :class:`WeightDecay`,
+        :class:`Lasso` and :class:`GradientHardClipping`). The other
+        parameters are updated one by one as usual.
+
+        Args:
+            flag (bool): If ``True``, the fused update is enabled.
+
+        """
+        self._use_fused_update = flag
+
+    def _iter_rules_and_params(self, hook):
+        runs = self._fused_runs
+        if runs is None or not getattr(hook, 'elementwise', False):
+            for item in super(GradientMethod, self)._iter_rules_and_params(
+                    hook):
+                yield item
+            return
+        for run in runs:
+            for item in run.rules_and_params():
+                yield item
+
+    def _make_fused_runs(self):
+        flat = self.target.flat_params
+        if flat is None:
+            flat = self.target.flatten_params()
+        else:
+            flat.sync_grads()
+
+        runs = []
+        states = {}
+        for buf in flat.buffers:
+            key = None
+            first = 0
+            for i, param in enumerate(buf.params):
+                next_key = _fusion_key(param)
+                if next_key is None or next_key != key:
+                    if i > first:
+                        runs.append(_FusedRun(buf, first, i, key is not None))
+                    key = next_key
+                    first = i
+            runs.append(_FusedRun(
+                buf, first, len(buf.params), key is not None))
+            states[buf] = self._fused_states.get(buf, {})
+        # States of the buffers discarded by re-packing are released here
+        self._fused_states = states
+
+        for run in runs:
+            if run.fused:
+                run.pack_states(states[run.buffer])
+        return runs
+
+
+def _fusion_key(param):
+    # Returns the key to group parameters updated by a fused update, or
+    # ``None`` if the parameter cannot be fused.
+    rule = param.update_rule
+    if rule is None or not rule.enabled or not rule.elementwise:
+        return None
+    if rule._use_fp32_update and param.dtype == numpy.float16:
+        return None
+    pre_hooks = tuple(six.iteritems(rule._pre_update_hooks))
+    post_hooks = tuple(six.iteritems(rule._post_update_hooks))
+    for _, hook in pre_hooks + post_hooks:
+        if not getattr(hook, 'elementwise', False):
+            return None
+    # Rules are grouped by the parent hyperparameter and their own entries
+    # instead of the whole dictionary, which is expensive to build.
+    hyperparam = rule.hyperparam.__dict__
+    if len(hyperparam) > 1:
+        own = tuple(sorted([(k, v) for k, v in six.iteritems(hyperparam)
+                            if k != '_parent']))
+    else:
+        own = ()
+    key = (type(rule), hyperparam['_parent'], own, rule.t,
+           param._loss_scale, pre_hooks, post_hooks)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+class _FusedRun(object):
+
+    """Run of consecutive parameters in a buffer of a flat link."""
+
+    def __init__(self, buf, first, last, fused):
+        self.buffer = buf
+        self.first = first
+        self.params = buf.params[first:last]
+        self.fused = fused and last - first > 1
+        if not self.fused:
+            return
+
+        sizes = [p.size for p in buf.params]
+        self.start = sum(sizes[:first])
+        self.end = self.start + sum(sizes[first:last])
+        self.param = variable.Variable(buf.data[self.start:self.end])
+        self.param.grad = buf.grad[self.start:self.end]
+        self.param._loss_scale = self.params[0]._loss_scale
+        # The fused rule shares the hyperparameter and the hooks with the
+        # rule of the first parameter, while it has its own state and count.
+        self.rule = copy.copy(self.params[0].update_rule)
+        self.rule._state = {}
+
+    def rules_and_params(self):
+        if self.fused:
+            yield self.rule, self.param
+        else:
+            for param in self.params:
+                yield param.update_rule, param
+
+    def pack_states(self, states):
+        """Makes the states of the rules views into the state buffers.
+
+        Args:
+            states (dict): Dictionary that maps each state name to a pair of
+                the state buffer of the whole parameter buffer and the list of
+                views into it corresponding to the parameters.
+
+        """
+        buf = self.buffer
+        rules = [param.update_rule for param in self.params]
+        for param, rule in six.moves.zip(self.params, rules):
+            if rule.state is None:
+                rule._prepare(param)
+
+        for name in rules[0].state:
+            if name not in states:
+                with cuda.get_device_from_array(buf.data):
+                    xp = cuda.get_array_module(buf.data)
+                    flat_state = xp.zeros_like(buf.data)
+                views = []
+                offset = 0
+                for param in buf.params:
+                    end = offset + param.size
+                    views.append(flat_state[offset:end].reshape(param.shape))
+                    offset = end
+                states[name] = flat_state, views
+            flat_state, views = states[name]
+
+            for i, rule in enumerate(rules):
+                view = views[self.first + i]
+                value = rule.state[name]
+                if value is not view:
+                    with cuda.get_device_from_array(view):
+                        view[...] = value
+                    rule.state[name] = view
+            self.rule._state[name] = flat_state[self.start:self.end]
+
+    def update(self):
+        if not self.fused:
+            for param in self.params:
+                param.update()
+            return
+
+        for param in self.params:
+            param.update_rule.t += 1
+        rule = self.rule
+        rule.t = self.params[0].update_rule.t
+        param = self.param
+        if param._loss_scale is not None:
+            param.grad /= param._loss_scale
+        for hook in six.itervalues(rule._pre_update_hooks):
+            hook(rule, param)
+        rule.update_core(param)
+        for hook in six.itervalues(rule._post_update_hooks):
+            hook(rule, param)
+
 
 class HyperparameterProxy(object):
 
@@ -766,17 +1039,32 @@ class WeightDecay(object):
     .. versionadded:: 4.0.0
        The *timing* parameter.
 
+    It also adds the scaled rows of the parameter to the sparse gradient of
+    a parameter updated lazily (see
+    :attr:`~chainer.UpdateRule.supports_sparse_grad`), so that only the rows
+    in the gradient decay.
+
     """
     name = 'WeightDecay'
     call_for_each_param = True
     timing = 'pre'
+    elementwise = True
+    supports_sparse_grad = True
 
     def __init__(self, rate):
         self.rate = rate
 
     def __call__(self, rule, param):
         p, g = param.data, param.grad
-        if p is None or g is None:
+        if p is None:
+            return
+        if g is None:
+            sparse_grad = getattr(param, 'sparse_grad', None)
+            if sparse_grad is not None:
+                sparse_grad = sparse_grad.coalesce()
+                with cuda.get_device_from_array(p):
+                    sparse_grad.values += self.rate * p[sparse_grad.rows]
+                param.sparse_grad = sparse_grad
             return
         with cuda.get_device_from_array(p) as dev:
             if int(dev) == -1:
@@ -809,6 +1097,7 @@ class Lasso(object):
     name = 'Lasso'
     call_for_each_param = True
     timing = 'pre'
+    elementwise = True
 
     def __init__(self, rate):
         self.rate = rate
@@ -832,7 +1121,8 @@ class GradientClipping(object):
     """Optimizer hook function for gradient clipping.
 
     This hook function scales all gradient arrays to fit to the defined L2 norm
-    threshold.
+    threshold. The sparse gradients of parameters (see
+    :attr:`~chainer.Parameter.sparse_grad`) are also taken into account.
 
     Args:
         threshold (float): L2 norm threshold.
@@ -851,17 +1141,30 @@ class GradientClipping(object):
     """
     name = 'GradientClipping'
     timing = 'pre'
+    supports_sparse_grad = True
 
     def __init__(self, threshold):
         self.threshold = threshold
 
     def __call__(self, opt):
-        norm = numpy.sqrt(_sum_sqnorm(
-            [p.grad for p in opt.target.params(False)]))
+        flat = opt.target.flat_params
+        if flat is None:
+            grads = []
+            for p in opt.target.params(False):
+                if p.sparse_grad is not None:
+                    if p.grad is None:
+                        p.sparse_grad = p.sparse_grad.coalesce()
+                        grads.append(p.sparse_grad.values)
+                        continue
+                    p.densify_grad()
+                grads.append(p.grad)
+        else:
+            flat.sync_grads()
+            grads = [buf.grad for buf in flat.buffers]
+        norm = numpy.sqrt(_sum_sqnorm(grads))
         rate = self.threshold / norm
         if rate < 1:
-            for param in opt.target.params(False):
-                grad = param.grad
+            for grad in grads:
                 with cuda.get_device_from_array(grad):
                     grad *= rate
 
@@ -955,6 +1258,7 @@ class GradientHardClipping(object):
     name = 'GradientHardClipping'
     call_for_each_param = True
     timing = 'pre'
+    elementwise = True
 
     def __init__(self, lower_bound, upper_bound):
         self.lower_bound = lower_bound
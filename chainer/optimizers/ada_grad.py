@@ -24,6 +24,8 @@ class AdaGradRule(optimizer.UpdateRule):
 
     """
 
+    supports_sparse_grad = True
+
     def __init__(self, parent_hyperparam=None, lr=None, eps=None):
         super(AdaGradRule, self).__init__(
             parent_hyperparam or _default_hyperparam)
@@ -61,6 +63,16 @@ class AdaGradRule(optimizer.UpdateRule):
             'adagrad')(grad, self.hyperparam.lr, self.hyperparam.eps,
                        param.data, self.state['h'])
 
+    def update_core_sparse(self, param):
+        grad = param.sparse_grad
+        rows, g = grad.rows, grad.values
+        xp = cuda.get_array_module(g)
+        h = self.state['h'][rows]
+        h += g * g
+        self.state['h'][rows] = h
+        param.data[rows] -= self.hyperparam.lr * g / (
+            xp.sqrt(h) + self.hyperparam.eps)
+
 
 class AdaGrad(optimizer.GradientMethod):
 
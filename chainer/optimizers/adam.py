@@ -47,6 +47,10 @@ class AdamRule(optimizer.UpdateRule):
     See :class:`~chainer.optimizers.Adam` for the default values
     of the hyperparameters.
 
+    A sparse gradient updates the moments and the parameter only in its rows
+    as the lazy variant of Adam does, so the moments of the other rows do not
+    decay and the weight decay is not applied to them at the update.
+
     Args:
         parent_hyperparam (~chainer.optimizer.Hyperparameter): Hyperparameter
             that provides the default values.
@@ -60,6 +64,9 @@ class AdamRule(optimizer.UpdateRule):
 
     """
 
+    elementwise = True
+    supports_sparse_grad = True
+
     def __init__(self, parent_hyperparam=None,
                  alpha=None, beta1=None, beta2=None, eps=None,
                  eta=None, weight_decay_rate=None, amsgrad=None):
@@ -151,6 +158,34 @@ class AdamRule(optimizer.UpdateRule):
                         hp.eta, hp.weight_decay_rate,
                         param.data, self.state['m'], self.state['v'])
 
+    def update_core_sparse(self, param):
+        grad = param.sparse_grad
+        rows, g = grad.rows, grad.values
+        xp = cuda.get_array_module(g)
+        hp = self.hyperparam
+        eps = g.dtype.type(hp.eps)
+        if hp.eps != 0 and eps == 0:
+            raise ValueError(
+                'eps of Adam optimizer is too small for {} ({})'.format(
+                    g.dtype.name, hp.eps))
+        m = self.state['m'][rows]
+        v = self.state['v'][rows]
+
+        m += (1 - hp.beta1) * (g - m)
+        v += (1 - hp.beta2) * (g * g - v)
+        self.state['m'][rows] = m
+        self.state['v'][rows] = v
+
+        if hp.amsgrad:
+            vhat = xp.maximum(self.state['vhat'][rows], v)
+            self.state['vhat'][rows] = vhat
+        else:
+            vhat = v
+        p = param.data[rows]
+        p -= hp.eta * (self.lr * m / (xp.sqrt(vhat) + hp.eps) +
+                       hp.weight_decay_rate * p)
+        param.data[rows] = p
+
     @property
     def lr(self):
         return _learning_rate(self.hyperparam, self.t)
@@ -15,6 +15,9 @@ class MomentumSGDRule(optimizer.UpdateRule):
     See :class:`~chainer.optimizers.MomentumSGD` for the default values of the
     hyperparameters.
 
+    A sparse gradient updates the velocity and the parameter only in its rows,
+    so the velocity of the other rows does not decay at the update.
+
     Args:
         parent_hyperparam (~chainer.optimizer.Hyperparameter): Hyperparameter
             that provides the default values.
@@ -23,6 +26,9 @@ class MomentumSGDRule(optimizer.UpdateRule):
 
     """
 
+    elementwise = True
+    supports_sparse_grad = True
+
     def __init__(self, parent_hyperparam=None, lr=None, momentum=None):
         super(MomentumSGDRule, self).__init__(
             parent_hyperparam or _default_hyperparam)
@@ -68,6 +74,15 @@ class MomentumSGDRule(optimizer.UpdateRule):
                 grad, self.hyperparam.lr, self.hyperparam.momentum,
                 param.data, self.state['v'])
 
+    def update_core_sparse(self, param):
+        grad = param.sparse_grad
+        rows = grad.rows
+        v = self.state['v'][rows]
+        v *= self.hyperparam.momentum
+        v -= self.hyperparam.lr * grad.values
+        self.state['v'][rows] = v
+        param.data[rows] += v
+
 
 class MomentumSGD(optimizer.GradientMethod):
 
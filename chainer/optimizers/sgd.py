@@ -21,6 +21,9 @@ class SGDRule(optimizer.UpdateRule):
 
     """
 
+    elementwise = True
+    supports_sparse_grad = True
+
     def __init__(self, parent_hyperparam=None, lr=None):
         super(SGDRule, self).__init__(
             parent_hyperparam or _default_hyperparam)
@@ -44,6 +47,10 @@ class SGDRule(optimizer.UpdateRule):
                          'param -= lr * grad',
                          'sgd')(grad, self.hyperparam.lr, param.data)
 
+    def update_core_sparse(self, param):
+        grad = param.sparse_grad
+        param.data[grad.rows] -= self.hyperparam.lr * grad.values
+
 
 class SGD(optimizer.GradientMethod):
 
@@ -19,6 +19,12 @@ def _copy_variable(value):
     return value
 
 
+def _to_array(value):
+    if isinstance(value, variable.Variable):
+        return value.array
+    return value
+
+
 class Reporter(object):
 
     """Object to which observed values are reported.
@@ -142,7 +148,9 @@ class Reporter(object):
            variable is copied without preserving the computational graph and
            the new variable object purged from the graph is stored to the
            observer. This behavior can be changed by setting
-           ``chainer.config.keep_graph_on_report`` to ``True``.
+           ``chainer.config.keep_graph_on_report`` to ``True``. If
+           ``chainer.config.report_as_array`` is ``True``, the data array of
+           the variable is stored instead of the copy.
 
         Args:
             values (dict): Dictionary of observed values.
@@ -151,7 +159,9 @@ class Reporter(object):
                 name of the observed value.
 
         """
-        if not configuration.config.keep_graph_on_report:
+        if configuration.config.report_as_array:
+            values = {k: _to_array(v) for k, v in six.iteritems(values)}
+        elif not configuration.config.keep_graph_on_report:
             values = {k: _copy_variable(v) for k, v in six.iteritems(values)}
 
         if observer is not None:
@@ -386,3 +396,290 @@ class DictSummary(object):
             for index, name in enumerate(names):
                 self._summaries[name].serialize(
                     serializer['_summaries'][str(index)])
+
+
+_STATISTICS = ('mean', 'std', 'min', 'max')
+
+
+def _check_statistic(name):
+    if name in _STATISTICS:
+        return
+    if name.startswith('p'):
+        try:
+            q = float(name[1:])
+        except ValueError:
+            pass
+        else:
+            if 0 <= q <= 100:
+                return
+    raise ValueError('unknown statistic: {}'.format(name))
+
+
+class BufferedSummary(object):
+
+    """Summarization of a sequence of scalars buffered on the device.
+
+    Unlike :class:`Summary`, which updates the sums of the values and their
+    squares on every :meth:`add`, this summary just writes each value to a
+    preallocated ring buffer on the device of the value, so adding a value
+    costs a single copy on the device and never synchronizes with the host.
+    Each time the buffer is full, the values are reduced into partial
+    statistics on the device, and the buffer is reused for the following
+    values. The statistics are computed only when they are requested by
+    :meth:`compute`.
+
+    The percentiles are computed from the latest ``capacity`` values in the
+    buffer, while the other statistics are computed from all the values.
+
+    Args:
+        capacity (int): Number of values in the buffer.
+
+    """
+
+    def __init__(self, capacity=1024):
+        if capacity < 1:
+            raise ValueError('capacity must be positive')
+        self.capacity = capacity
+        self._buffer = None
+        self._pos = 0
+        self._wrapped = False
+        # Partial statistics of the values reduced from the buffer.
+        self._partial = None
+        self._n = 0
+
+    def add(self, value):
+        """Adds a scalar value.
+
+        Args:
+            value: Scalar value to accumulate. It is either a NumPy scalar, a
+                zero-dimensional array (on CPU or GPU), or a variable of a
+                zero-dimensional array.
+
+        """
+        value = _to_array(value)
+        buf = self._buffer
+        with _get_device(value):
+            if buf is None:
+                xp = cuda.get_array_module(value)
+                dtype = numpy.dtype(getattr(value, 'dtype', type(value)))
+                if dtype.kind != 'f':
+                    dtype = numpy.dtype(numpy.float64)
+                buf = xp.empty(self.capacity, dtype)
+                self._buffer = buf
+            elif self._pos == self.capacity:
+                self._partial = self._reduce(buf, self._partial)
+                self._pos = 0
+                self._wrapped = True
+            buf[self._pos] = value
+        self._pos += 1
+        self._n += 1
+
+    @staticmethod
+    def _reduce(values, partial):
+        # Returns the sum, the sum of squares, the min and the max of the
+        # values and the partial statistics as 0-dimensional arrays.
+        xp = cuda.get_array_module(values)
+        stats = xp.stack([values.sum(), (values * values).sum(),
+                          values.min(), values.max()])
+        if partial is not None:
+            stats = xp.stack([stats[0] + partial[0], stats[1] + partial[1],
+                              xp.minimum(stats[2], partial[2]),
+                              xp.maximum(stats[3], partial[3])])
+        return stats
+
+    def _totals(self):
+        # Returns the sum, the sum of squares, the min and the max of all
+        # the values on the host.
+        buf = self._buffer
+        partial = self._partial
+        if buf is not None and self._pos > 0:
+            with _get_device(buf):
+                partial = self._reduce(buf[:self._pos], partial)
+        if partial is None:
+            return 0., 0., numpy.nan, numpy.nan
+        return tuple([float(x) for x in cuda.to_cpu(partial)])
+
+    def compute(self, statistics=('mean',)):
+        """Computes the statistics.
+
+        Args:
+            statistics (tuple of str): Names of the statistics. Each name is
+                one of ``'mean'``, ``'std'``, ``'min'``, ``'max'`` and
+                ``'p<q>'`` for the ``q``-th percentile (e.g. ``'p50'`` for
+                the median).
+
+        Returns:
+            dict: Dictionary from the names to the values of the statistics.
+
+        """
+        for name in statistics:
+            _check_statistic(name)
+        x, x2, min_value, max_value = self._totals()
+        n = self._n
+        mean = x / n if n else numpy.nan
+        result = {}
+        window = None
+        for name in statistics:
+            if name == 'mean':
+                result[name] = mean
+            elif name == 'std':
+                var = x2 / n - mean * mean if n else numpy.nan
+                result[name] = numpy.sqrt(max(var, 0.))
+            elif name == 'min':
+                result[name] = min_value
+            elif name == 'max':
+                result[name] = max_value
+            else:
+                if window is None:
+                    window = self._window()
+                if len(window) == 0:
+                    result[name] = numpy.nan
+                else:
+                    result[name] = float(
+                        numpy.percentile(window, float(name[1:])))
+        return result
+
+    def _window(self):
+        buf = self._buffer
+        if buf is None:
+            return numpy.empty(0)
+        if not self._wrapped:
+            buf = buf[:self._pos]
+        return cuda.to_cpu(buf)
+
+    def compute_mean(self):
+        """Computes the mean."""
+        return self.compute(('mean',))['mean']
+
+    def make_statistics(self):
+        """Computes and returns the mean and standard deviation values.
+
+        Returns:
+            tuple: Mean and standard deviation values.
+
+        """
+        stats = self.compute(('mean', 'std'))
+        return stats['mean'], stats['std']
+
+    def serialize(self, serializer):
+        # The format is compatible with Summary; the buffer is not saved.
+        if isinstance(serializer, serializer_module.Serializer):
+            x, x2, min_value, max_value = self._totals()
+            serializer('_x', x)
+            serializer('_x2', x2)
+            serializer('_n', self._n)
+            serializer('_min', min_value)
+            serializer('_max', max_value)
+            return
+
+        try:
+            x = float(serializer('_x', 0.))
+            x2 = float(serializer('_x2', 0.))
+            self._n = int(serializer('_n', 0))
+        except KeyError:
+            warnings.warn('The previous statistics are not saved.')
+            return
+        try:
+            min_value = float(serializer('_min', 0.))
+            max_value = float(serializer('_max', 0.))
+        except KeyError:
+            min_value = max_value = numpy.nan
+        self._partial = numpy.array([x, x2, min_value, max_value])
+        if self._n == 0:
+            self._partial = None
+        self._buffer = None
+        self._pos = 0
+        self._wrapped = False
+
+
+class BufferedDictSummary(object):
+
+    """Summarization of a sequence of dictionaries buffered on the devices.
+
+    This is a variant of :class:`DictSummary` using :class:`BufferedSummary`
+    for each entry, so adding the observations of an iteration never
+    synchronizes with the devices, and the statistics are computed only when
+    they are requested. It is used by
+    :class:`~chainer.training.extensions.LogReport`.
+
+    The serialization format is compatible with :class:`DictSummary`.
+
+    Args:
+        capacity (int): Number of values in the buffer of each entry.
+
+    """
+
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self._summaries = {}
+
+    def add(self, d):
+        """Adds a dictionary of scalars.
+
+        Args:
+            d (dict): Dictionary of scalars to accumulate. Only elements of
+               scalars, zero-dimensional arrays, and variables of
+               zero-dimensional arrays are accumulated.
+
+        """
+        summaries = self._summaries
+        for k, v in six.iteritems(d):
+            if isinstance(v, variable.Variable):
+                v = v.array
+            if numpy.isscalar(v) or getattr(v, 'ndim', -1) == 0:
+                summary = summaries.get(k)
+                if summary is None:
+                    summary = BufferedSummary(self.capacity)
+                    summaries[k] = summary
+                summary.add(v)
+
+    def compute(self, statistics=('mean',)):
+        """Computes the statistics of all the entries.
+
+        For an entry of name ``'key'``, the mean is stored with the name
+        ``'key'`` and the other statistics are stored with the names
+        ``'key.<statistic>'``, e.g. ``'key.std'`` and ``'key.p99'``.
+
+        Args:
+            statistics (tuple of str): Names of the statistics (see
+                :meth:`BufferedSummary.compute`).
+
+        Returns:
+            dict: Dictionary of the statistics of all the entries.
+
+        """
+        result = {}
+        for key, summary in six.iteritems(self._summaries):
+            for name, value in six.iteritems(summary.compute(statistics)):
+                if name == 'mean':
+                    result[key] = value
+                else:
+                    result[key + '.' + name] = value
+        return result
+
+    def compute_mean(self):
+        """Creates a dictionary of mean values."""
+        return self.compute(('mean',))
+
+    def make_statistics(self):
+        """Creates a dictionary of mean and standard deviation values."""
+        return self.compute(('mean', 'std'))
+
+    def serialize(self, serializer):
+        if isinstance(serializer, serializer_module.Serializer):
+            names = list(self._summaries.keys())
+            serializer('_names', json.dumps(names))
+            for index, name in enumerate(names):
+                self._summaries[name].serialize(
+                    serializer['_summaries'][str(index)])
+        else:
+            self._summaries.clear()
+            try:
+                names = json.loads(serializer('_names', ''))
+            except KeyError:
+                warnings.warn('The names of statistics are not saved.')
+                return
+            for index, name in enumerate(names):
+                summary = BufferedSummary(self.capacity)
+                summary.serialize(serializer['_summaries'][str(index)])
+                self._summaries[name] = summary
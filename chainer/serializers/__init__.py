@@ -1,12 +1,19 @@
 from chainer.serializers import hdf5  # NOQA
+from chainer.serializers import memmap  # NOQA
 from chainer.serializers import npz  # NOQA
+from chainer.serializers import sharded  # NOQA
 
 
 from chainer.serializers.hdf5 import HDF5Deserializer  # NOQA
 from chainer.serializers.hdf5 import HDF5Serializer  # NOQA
 from chainer.serializers.hdf5 import load_hdf5  # NOQA
 from chainer.serializers.hdf5 import save_hdf5  # NOQA
+from chainer.serializers.memmap import load_memmap  # NOQA
+from chainer.serializers.memmap import MemmapDeserializer  # NOQA
+from chainer.serializers.memmap import save_memmap  # NOQA
 from chainer.serializers.npz import DictionarySerializer  # NOQA
 from chainer.serializers.npz import load_npz  # NOQA
 from chainer.serializers.npz import NpzDeserializer  # NOQA
 from chainer.serializers.npz import save_npz  # NOQA
+from chainer.serializers.sharded import load_sharded_npz  # NOQA
+from chainer.serializers.sharded import save_sharded_npz  # NOQA
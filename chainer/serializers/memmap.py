@@ -0,0 +1,230 @@
+import json
+import struct
+
+import numpy
+import six
+
+from chainer.backends import cuda
+from chainer import link
+from chainer import serializer
+from chainer.serializers import npz
+
+
+_MAGIC = b'CHMEMMAP'
+_HEADER_SIZE = struct.Struct('<Q')
+_FORMAT_VERSION = 1
+# Arrays are aligned to the cache lines, which also satisfies the alignment
+# of any dtype.
+_ALIGNMENT = 64
+
+
+def _align(position):
+    return position + -position % _ALIGNMENT
+
+
+def save_memmap(file, obj):
+    """Saves an object to the file in the memory-mappable format.
+
+    The arrays of the object are written uncompressed and aligned, so that
+    :func:`~chainer.serializers.load_memmap` can map them into memory without
+    reading or copying them. The file consists of a JSON header describing
+    the dtype, the shape and the offset of each array, followed by the raw
+    data of the arrays.
+
+    Args:
+        file (str or file-like): Target file to write to.
+        obj: Object to be serialized. It must support serialization protocol.
+
+    .. seealso::
+        :func:`chainer.serializers.load_memmap`
+
+    """
+    if isinstance(file, six.string_types):
+        with open(file, 'wb') as f:
+            save_memmap(f, obj)
+        return
+
+    s = npz.DictionarySerializer()
+    s.save(obj)
+
+    arrays = {}
+    entries = {}
+    for key, value in six.iteritems(s.target):
+        if value.dtype.hasobject:
+            if value.shape == () and value[()] is None:
+                entries[key] = None
+                continue
+            raise ValueError(
+                'arrays of objects cannot be saved: {}'.format(key))
+        arrays[key] = numpy.ascontiguousarray(value)
+
+    # The offsets depend on the size of the header, which depends on the
+    # offsets; the layout is recomputed until the header fits in front of
+    # the data. The offsets only grow, so it terminates.
+    keys = sorted(arrays)
+    prefix_size = len(_MAGIC) + _HEADER_SIZE.size
+    data_start = _align(prefix_size)
+    while True:
+        position = data_start
+        for key in keys:
+            position = _align(position)
+            entries[key] = {'dtype': arrays[key].dtype.str,
+                            'shape': list(arrays[key].shape),
+                            'offset': position}
+            position += arrays[key].nbytes
+        header = json.dumps(
+            {'version': _FORMAT_VERSION, 'arrays': entries}).encode('utf-8')
+        if prefix_size + len(header) <= data_start:
+            break
+        data_start = _align(prefix_size + len(header))
+
+    file.write(_MAGIC)
+    file.write(_HEADER_SIZE.pack(len(header)))
+    file.write(header)
+    position = prefix_size + len(header)
+    for key in keys:
+        offset = entries[key]['offset']
+        # The header or the previous array must not overlap this array.
+        assert position <= offset
+        file.write(b'\x00' * (offset - position))
+        position = offset
+        array = arrays[key]
+        if array.size:
+            file.write(array.reshape(-1).view(numpy.uint8).data)
+        position += array.nbytes
+
+
+def _open_memmap(path):
+    buf = numpy.asarray(numpy.memmap(path, numpy.uint8, 'r'))
+    prefix_size = len(_MAGIC) + _HEADER_SIZE.size
+    if len(buf) < prefix_size or buf[:len(_MAGIC)].tobytes() != _MAGIC:
+        raise ValueError('{} is not a memmap file'.format(path))
+    header_size, = _HEADER_SIZE.unpack(
+        buf[len(_MAGIC):prefix_size].tobytes())
+    header = json.loads(
+        buf[prefix_size:prefix_size + header_size].tobytes().decode('utf-8'))
+    if header.get('version') != _FORMAT_VERSION:
+        raise ValueError(
+            'unsupported memmap file version: {}'.format(
+                header.get('version')))
+
+    arrays = {}
+    for key, entry in six.iteritems(header['arrays']):
+        if entry is None:
+            arrays[key] = None
+            continue
+        dtype = numpy.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        size = dtype.itemsize * int(numpy.prod(shape, dtype=numpy.int64))
+        offset = entry['offset']
+        arrays[key] = buf[offset:offset + size].view(dtype).reshape(shape)
+    return arrays
+
+
+def _same_memory(a, b):
+    return (a.__array_interface__['data'][0] ==
+            b.__array_interface__['data'][0] and
+            a.shape == b.shape and a.strides == b.strides and
+            a.dtype == b.dtype)
+
+
+class MemmapDeserializer(serializer.Deserializer):
+
+    """Deserializer for the memory-mappable format.
+
+    This deserializer reads the file written by
+    :func:`~chainer.serializers.save_memmap`. The arrays are read-only views
+    of the file mapped by :class:`numpy.memmap`. They are copied into the
+    existing arrays of the object, and returned as they are when the object
+    does not have the arrays yet (e.g. uninitialized parameters).
+
+    Args:
+        file (str or dict): Path of the file, or the dictionary of the arrays
+            of the file mapped by another deserializer.
+        path: The base path that the deserialization starts from.
+        strict (bool): If ``True``, the deserializer raises an error when an
+            expected value is not found in the given file. Otherwise,
+            it ignores the value and skip deserialization.
+
+    """
+
+    def __init__(self, file, path='', strict=True):
+        if isinstance(file, six.string_types):
+            file = _open_memmap(file)
+        self.arrays = file
+        self.path = path
+        self.strict = strict
+
+    def __getitem__(self, key):
+        key = key.strip('/')
+        return MemmapDeserializer(
+            self.arrays, self.path + key + '/', strict=self.strict)
+
+    def __call__(self, key, value):
+        key = self.path + key.lstrip('/')
+        if not self.strict and key not in self.arrays:
+            return value
+
+        dataset = self.arrays[key]
+        if dataset is None:
+            return None
+
+        if value is None:
+            return dataset
+        elif isinstance(value, numpy.ndarray):
+            if not _same_memory(value, dataset):
+                numpy.copyto(value, dataset)
+        elif isinstance(value, cuda.ndarray):
+            value.set(numpy.asarray(dataset))
+        else:
+            value = type(value)(numpy.asarray(dataset))
+        return value
+
+
+def load_memmap(file, obj, path='', strict=True):
+    """Loads an object from the file in the memory-mappable format.
+
+    If the object is a :class:`~chainer.Link`, the data of its parameters on
+    the CPU are replaced with read-only views of the file mapped by
+    :class:`numpy.memmap` instead of being copied. The file is read lazily by
+    the operating system on access, and the physical pages are shared by all
+    the processes mapping the same file, e.g. the worker processes of an
+    inference server, so a large model is loaded almost instantly and kept in
+    the memory only once. The other values (e.g. the persistent values and
+    the parameters on GPUs) are copied as :func:`~chainer.serializers.load_npz`
+    does.
+
+    Since the mapped parameters are read-only, the link loaded by this
+    function cannot be trained in place; use
+    :func:`~chainer.serializers.load_npz` or copy the parameters to train it.
+    The file must not be modified while it is mapped.
+
+    Args:
+        file (str): Path of the file written by
+            :func:`~chainer.serializers.save_memmap`.
+        obj: Object to be deserialized. It must support serialization
+            protocol.
+        path (str): The path in the hierarchy of the serialized data under
+            which the data is to be loaded. The default behavior (blank) will
+            load all data under the root path.
+        strict (bool): If ``True``, the deserializer raises an error when an
+            expected value is not found in the given file. Otherwise,
+            it ignores the value and skip deserialization.
+
+    .. seealso::
+        :func:`chainer.serializers.save_memmap`
+
+    """
+    d = MemmapDeserializer(file, path=path, strict=strict)
+    if isinstance(obj, link.Link):
+        for name, param in obj.namedparams():
+            array = d.arrays.get(path + name.lstrip('/'))
+            if array is None:
+                # Missing values are handled by the deserializer.
+                continue
+            data = param.data
+            if data is None or (isinstance(data, numpy.ndarray) and
+                                data.shape == array.shape and
+                                data.dtype == array.dtype):
+                param.data = array
+    d.load(obj)
@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+from multiprocessing import pool
+import tempfile
+import zlib
+
+import numpy
+import six
+
+from chainer.serializers import npz
+
+
+_INDEX_NAME = 'index.json'
+_FORMAT_VERSION = 1
+
+# os.rename does not overwrite an existing file on Windows, while
+# os.replace (not available on Python 2) does.
+_replace = getattr(os, 'replace', os.rename)
+
+
+def _hash_array(array):
+    h = hashlib.sha1()
+    h.update('{}{}'.format(array.dtype.str, array.shape).encode('utf-8'))
+    if array.dtype.hasobject:
+        h.update(repr(array.tolist()).encode('utf-8'))
+    else:
+        # hashlib releases the GIL for large inputs, so arrays are hashed
+        # in parallel by the threads.
+        array = numpy.ascontiguousarray(array).reshape(-1)
+        h.update(array.view(numpy.uint8))
+    return h.hexdigest()
+
+
+def _shard_of(key, n_shards):
+    # The assignment depends only on the key so that the shards of unchanged
+    # arrays are kept across checkpoints.
+    return zlib.crc32(key.encode('utf-8')) % n_shards
+
+
+def _run_parallel(func, args, n_threads):
+    if n_threads == 1 or len(args) <= 1:
+        return [func(arg) for arg in args]
+    p = pool.ThreadPool(n_threads)
+    try:
+        return p.map(func, args)
+    finally:
+        p.close()
+        p.join()
+
+
+def _write_atomic(path, write):
+    fd, tmppath = tempfile.mkstemp(
+        prefix='tmp' + os.path.basename(path), dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+    except Exception:
+        os.remove(tmppath)
+        raise
+    _replace(tmppath, path)
+
+
+def save_sharded_npz(directory, obj, n_shards=8, compression=False,
+                     n_threads=None):
+    """Saves an object to a directory of NPZ shards.
+
+    This function serializes the object with
+    :class:`~chainer.serializers.DictionarySerializer` and distributes the
+    arrays over ``n_shards`` NPZ files, which are written in parallel
+    threads. An index file ``index.json`` in the directory maps each key to
+    its shard.
+
+    The checkpoint is incremental: each shard file is named after the hash
+    of its content, and a shard is written only if the directory does not
+    have the file of the same content yet. If the same directory is used for
+    successive checkpoints, the shards of unchanged arrays (e.g. frozen
+    parameters, or models that are not updated between the checkpoints) are
+    not written again. The index file is replaced atomically after all the
+    shards are written, and then the shards not referenced by the new index
+    are removed, so the directory holds a complete checkpoint at any time.
+
+    Args:
+        directory (str): Directory to save the checkpoint to. It is created
+            if it does not exist.
+        obj: Object to be serialized. It must support serialization protocol.
+        n_shards (int): Number of shards. Keys are assigned to the shards by
+            their hash values. Changing it from the previous checkpoint makes
+            all the shards written again.
+        compression (bool): If ``True``, compression in the shard files is
+            enabled.
+        n_threads (int): Number of threads to hash and write the shards. The
+            number of shards is used by default.
+
+    Returns:
+        list of str: Names of the shard files written by this call.
+
+    .. seealso::
+        :func:`chainer.serializers.load_sharded_npz`
+
+    """
+    if n_shards < 1:
+        raise ValueError('n_shards must be positive')
+    n_threads = n_threads or n_shards
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    s = npz.DictionarySerializer()
+    s.save(obj)
+    target = s.target
+
+    keys = sorted(target)
+    shards = [[] for _ in six.moves.range(n_shards)]
+    for key in keys:
+        shards[_shard_of(key, n_shards)].append(key)
+    hashes = dict(zip(keys, _run_parallel(
+        lambda key: _hash_array(target[key]), keys, n_threads)))
+
+    names = []
+    for i, shard in enumerate(shards):
+        h = hashlib.sha1()
+        for key in shard:
+            h.update('{}:{};'.format(key, hashes[key]).encode('utf-8'))
+        names.append('shard_{:05d}_{}.npz'.format(i, h.hexdigest()[:20]))
+
+    def write(i):
+        path = os.path.join(directory, names[i])
+        if os.path.exists(path):
+            return None
+        arrays = {key: target[key] for key in shards[i]}
+        savez = numpy.savez_compressed if compression else numpy.savez
+        _write_atomic(path, lambda f: savez(f, **arrays))
+        return names[i]
+
+    written = _run_parallel(write, list(six.moves.range(n_shards)), n_threads)
+
+    index = {
+        'version': _FORMAT_VERSION,
+        'shards': names,
+        'keys': {key: _shard_of(key, n_shards) for key in keys},
+        'hashes': hashes,
+    }
+    _write_atomic(os.path.join(directory, _INDEX_NAME),
+                  lambda f: f.write(json.dumps(index).encode('utf-8')))
+
+    # Remove the shards of the previous checkpoints.
+    for name in os.listdir(directory):
+        if name.startswith('shard_') and name.endswith('.npz') and \
+                name not in names:
+            os.remove(os.path.join(directory, name))
+    return [name for name in written if name is not None]
+
+
+class _ShardedNpz(object):
+
+    # Read-only mapping from the keys to the arrays of a sharded checkpoint,
+    # which opens the shard files on demand.
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, _INDEX_NAME)) as f:
+            index = json.load(f)
+        if index.get('version') != _FORMAT_VERSION:
+            raise ValueError(
+                'unsupported checkpoint version: {}'.format(
+                    index.get('version')))
+        self._directory = directory
+        self._names = index['shards']
+        self._keys = index['keys']
+        self._files = {}
+        self._cache = {}
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, key):
+        if key in self._cache:
+            return self._cache.pop(key)
+        return self._open(self._keys[key])[key]
+
+    def _open(self, shard):
+        f = self._files.get(shard)
+        if f is None:
+            f = numpy.load(os.path.join(self._directory, self._names[shard]))
+            self._files[shard] = f
+        return f
+
+    def prefetch(self, prefix, n_threads):
+        # Reads the arrays under the prefix in parallel. Each thread reads a
+        # distinct shard, since an NpzFile is not thread-safe.
+        shards = {}
+        for key, shard in six.iteritems(self._keys):
+            if key.startswith(prefix):
+                shards.setdefault(shard, []).append(key)
+        for shard in shards:
+            self._open(shard)
+
+        def read(item):
+            shard, keys = item
+            f = self._files[shard]
+            return [(key, f[key]) for key in keys]
+
+        for arrays in _run_parallel(read, list(shards.items()), n_threads):
+            self._cache.update(arrays)
+
+    def close(self):
+        for f in six.itervalues(self._files):
+            f.close()
+        self._files = {}
+        self._cache = {}
+
+
+def load_sharded_npz(directory, obj, path='', strict=True, n_threads=None):
+    """Loads an object from a directory of NPZ shards.
+
+    This function reads a checkpoint written by
+    :func:`~chainer.serializers.save_sharded_npz`. Only the shards holding
+    the arrays under ``path`` are opened, and they are read in parallel
+    threads, so a part of a large checkpoint (e.g. the model in a snapshot of
+    the trainer) can be loaded quickly.
+
+    Args:
+        directory (str): Directory of the checkpoint.
+        obj: Object to be deserialized. It must support serialization
+            protocol.
+        path (str): The path in the hierarchy of the serialized data under
+            which the data is to be loaded. The default behavior (blank) will
+            load all data under the root path.
+        strict (bool): If ``True``, the deserializer raises an error when an
+            expected value is not found in the checkpoint. Otherwise, it
+            ignores the value and skip deserialization.
+        n_threads (int): Number of threads to read the shards. The number of
+            shards is used by default.
+
+    .. seealso::
+        :func:`chainer.serializers.save_sharded_npz`
+
+    """
+    archive = _ShardedNpz(directory)
+    try:
+        archive.prefetch(path, n_threads or len(archive._names))
+        d = npz.NpzDeserializer(archive, path=path, strict=strict)
+        d.load(obj)
+    finally:
+        archive.close()
@@ -0,0 +1,236 @@
+import collections
+import threading
+import time
+
+import six
+
+from chainer import configuration
+from chainer.dataset import convert
+from chainer import function
+from chainer import variable
+
+
+class Future(object):
+
+    """Result of a request submitted to :class:`DynamicBatcher`.
+
+    Users do not need to create this object directly; it is returned by
+    :meth:`DynamicBatcher.submit`.
+
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._result = None
+        self._error = None
+
+    def done(self):
+        """Returns ``True`` if the result or the error is available."""
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """Waits for the result and returns it.
+
+        If the prediction of the batch containing the request failed, the
+        error is raised.
+
+        Args:
+            timeout (float): Maximum time in seconds to wait. If it is
+                ``None``, it waits infinitely.
+
+        Returns:
+            The output of the prediction for the example of the request.
+
+        """
+        if not self._event.wait(timeout):
+            raise RuntimeError('the result is not available within the '
+                               'timeout')
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def _set_result(self, result):
+        self._result = result
+        self._event.set()
+
+    def _set_error(self, error):
+        self._error = error
+        self._event.set()
+
+
+def _to_array(y):
+    if isinstance(y, variable.Variable):
+        return y.array
+    return y
+
+
+def _scatter(outputs, n):
+    # Splits the outputs of a batch into those of the examples.
+    if isinstance(outputs, tuple):
+        ys = [_to_array(y) for y in outputs]
+        return [tuple([y[i] for y in ys]) for i in six.moves.range(n)]
+    elif isinstance(outputs, dict):
+        ys = {k: _to_array(y) for k, y in six.iteritems(outputs)}
+        return [{k: y[i] for k, y in six.iteritems(ys)}
+                for i in six.moves.range(n)]
+    else:
+        y = _to_array(outputs)
+        return [y[i] for i in six.moves.range(n)]
+
+
+class DynamicBatcher(object):
+
+    """Request batcher coalescing concurrent predictions into batches.
+
+    This object serves predictions of a model to concurrent callers, e.g.
+    the threads of an RPC server handling a request each. Each request
+    submits a single example, which is put into a thread-safe queue. A
+    worker thread takes the requests from the queue and builds a batch of up
+    to ``max_batch_size`` examples with the converter: it waits for more
+    requests until the batch is full or ``max_latency`` seconds have passed
+    since the arrival of the oldest request in the batch. The batch is
+    passed to the prediction function in test mode without backprop, and the
+    outputs are split along the first axis and returned to the requests.
+
+    Batching the requests reduces the per-example overhead and improves the
+    utilization of the device when the requests arrive concurrently, while
+    ``max_latency`` bounds the time a request waits for others.
+
+    .. admonition:: Example
+
+       >>> model = L.Linear(3, 2)
+       >>> with chainer.serving.DynamicBatcher(model) as batcher:
+       ...     future = batcher.submit(np.ones(3, np.float32))
+       ...     y = future.result()
+       >>> y.shape
+       (2,)
+
+    Args:
+        predict (callable): Prediction function, e.g. a
+            :class:`~chainer.Link` or the engine returned by
+            :func:`~chainer.inference`. It is called with the arrays built by
+            the converter in the same way as the evaluation function of
+            :class:`~chainer.training.extensions.Evaluator`: a tuple is
+            expanded into positional arguments and a dictionary into keyword
+            arguments. It must return an array or a variable, or a tuple or
+            dictionary of them, whose first axes correspond to the examples.
+        max_batch_size (int): Maximum number of examples in a batch.
+        max_latency (float): Maximum time in seconds to wait for more
+            requests to fill a batch.
+        converter: Converter function to build input arrays.
+            :func:`~chainer.dataset.concat_examples` is used by default.
+        device: Device to which the batches are sent. Negative value
+            indicates the host memory (CPU).
+        padding: Padding value passed to the converter, which is used to
+            batch examples of different shapes.
+
+    Attributes:
+        n_batches (int): Number of batches processed.
+        n_examples (int): Number of examples processed.
+
+    """
+
+    def __init__(self, predict, max_batch_size=32, max_latency=0.005,
+                 converter=convert.concat_examples, device=None,
+                 padding=None):
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size must be positive')
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.converter = converter
+        self.device = device
+        self.padding = padding
+        self.n_batches = 0
+        self.n_examples = 0
+
+        self._queue = collections.deque()
+        self._cond = threading.Condition(threading.Lock())
+        self._closed = False
+        self._worker = threading.Thread(target=self._run)
+        self._worker.daemon = True
+        self._worker.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def submit(self, example):
+        """Submits a request.
+
+        Args:
+            example: An example in the same format as the examples given to
+                the converter.
+
+        Returns:
+            Future: Future of the output for the example.
+
+        """
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('the batcher is already closed')
+            self._queue.append((time.time(), example, future))
+            self._cond.notify()
+        return future
+
+    def __call__(self, example):
+        """Submits a request and waits for the result."""
+        return self.submit(example).result()
+
+    def close(self):
+        """Stops the worker after processing the submitted requests."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._worker.join()
+
+    def _next_batch(self):
+        # Waits for the requests to build a batch. Returns None on closing.
+        with self._cond:
+            while not self._queue:
+                if self._closed:
+                    return None
+                self._cond.wait()
+            deadline = self._queue[0][0] + self.max_latency
+            while len(self._queue) < self.max_batch_size and \
+                    not self._closed:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                self._cond.wait(timeout)
+            n = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in six.moves.range(n)]
+
+    def _run(self):
+        while True:
+            requests = self._next_batch()
+            if requests is None:
+                break
+            futures = [future for _, _, future in requests]
+            try:
+                results = self._predict([example for _, example, _
+                                         in requests])
+            except Exception as e:
+                for future in futures:
+                    future._set_error(e)
+                continue
+            for future, result in six.moves.zip(futures, results):
+                future._set_result(result)
+
+    def _predict(self, examples):
+        # The configuration is thread-local, so it is set in the worker.
+        with configuration.using_config('train', False), \
+                function.no_backprop_mode():
+            in_arrays = self.converter(examples, self.device, self.padding)
+            if isinstance(in_arrays, tuple):
+                outputs = self.predict(*in_arrays)
+            elif isinstance(in_arrays, dict):
+                outputs = self.predict(**in_arrays)
+            else:
+                outputs = self.predict(in_arrays)
+        self.n_batches += 1
+        self.n_examples += len(examples)
+        return _scatter(outputs, len(examples))
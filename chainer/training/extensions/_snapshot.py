@@ -1,12 +1,9 @@
-import os
-import shutil
-import tempfile
-
 from chainer.serializers import npz
 from chainer.training import extension
+from chainer.training.extensions import snapshot_writers
 
 
-def snapshot_object(target, filename, savefun=npz.save_npz):
+def snapshot_object(target, filename, savefun=npz.save_npz, writer=None):
     """Returns a trainer extension to take snapshots of a given object.
 
     This extension serializes the given object and saves it to the output
@@ -29,20 +26,30 @@ def snapshot_object(target, filename, savefun=npz.save_npz):
             ``'snapshot_10000'`` at the 10,000th iteration.
         savefun: Function to save the object. It takes two arguments: the
             output file path and the object to serialize.
+        writer: Snapshot writer object which saves the object, e.g.
+            :class:`~chainer.training.extensions.snapshot_writers.\
+ThreadQueueWriter` to save it in the background. If it is ``None``,
+            :class:`~chainer.training.extensions.snapshot_writers.\
+SimpleWriter` with ``savefun`` is used. ``savefun`` is ignored if a writer
+            is given.
 
     Returns:
         An extension function.
 
     """
-    @extension.make_extension(trigger=(1, 'epoch'), priority=-100)
+    if writer is None:
+        writer = snapshot_writers.SimpleWriter(savefun)
+
+    @extension.make_extension(trigger=(1, 'epoch'), priority=-100,
+                              finalizer=writer.finalize)
     def snapshot_object(trainer):
-        _snapshot_object(trainer, target, filename.format(trainer), savefun)
+        _snapshot_object(trainer, target, filename.format(trainer), writer)
 
     return snapshot_object
 
 
 def snapshot(savefun=npz.save_npz,
-             filename='snapshot_iter_{.updater.iteration}'):
+             filename='snapshot_iter_{.updater.iteration}', writer=None):
     """Returns a trainer extension to take snapshots of the trainer.
 
     This extension serializes the trainer object and saves it to the output
@@ -63,30 +70,44 @@ def snapshot(savefun=npz.save_npz,
        right before the renaming, the temporary file might be left in the
        output directory.
 
+    Saving a large model, in particular with compression, can stall the
+    training loop. A writer that saves in the background, e.g.
+    :class:`~chainer.training.extensions.snapshot_writers.ThreadQueueWriter`
+    or :class:`~chainer.training.extensions.snapshot_writers.\
+ProcessQueueWriter`, can be given to avoid it; the state of the trainer is
+    copied on the host in the training loop, and the copy is saved while the
+    training continues. The pending snapshots are written on the finalization
+    of the trainer.
+
+    .. admonition:: Example
+
+       >>> writer = extensions.snapshot_writers.ThreadQueueWriter(
+       ...     n_retains=3)
+       >>> ext = extensions.snapshot(writer=writer)
+
     Args:
         savefun: Function to save the trainer. It takes two arguments: the
             output file path and the trainer object.
         filename (str): Name of the file into which the trainer is serialized.
             It can be a format string, where the trainer object is passed to
             the :meth:`str.format` method.
+        writer: Snapshot writer object which saves the trainer. If it is
+            ``None``, :class:`~chainer.training.extensions.snapshot_writers.\
+SimpleWriter` with ``savefun`` is used. ``savefun`` is ignored if a writer
+            is given.
 
     """
-    @extension.make_extension(trigger=(1, 'epoch'), priority=-100)
+    if writer is None:
+        writer = snapshot_writers.SimpleWriter(savefun)
+
+    @extension.make_extension(trigger=(1, 'epoch'), priority=-100,
+                              finalizer=writer.finalize)
     def snapshot(trainer):
-        _snapshot_object(trainer, trainer, filename.format(trainer), savefun)
+        _snapshot_object(trainer, trainer, filename.format(trainer), writer)
 
     return snapshot
 
 
-def _snapshot_object(trainer, target, filename, savefun):
+def _snapshot_object(trainer, target, filename, writer):
     fn = filename.format(trainer)
-    prefix = 'tmp' + fn
-    fd, tmppath = tempfile.mkstemp(prefix=prefix, dir=trainer.out)
-    try:
-        savefun(tmppath, target)
-    except Exception:
-        os.close(fd)
-        os.remove(tmppath)
-        raise
-    os.close(fd)
-    shutil.move(tmppath, os.path.join(trainer.out, fn))
+    writer(fn, trainer.out, target)
@@ -1,14 +1,22 @@
 import copy
+from multiprocessing import pool
+import os
 
+import numpy
 import six
 
+from chainer.backends import cuda
 from chainer import configuration
 from chainer.dataset import convert
 from chainer.dataset import iterator as iterator_module
+from chainer.datasets import sub_dataset
 from chainer import function
+from chainer.iterators import serial_iterator
 from chainer import link
 from chainer import reporter as reporter_module
 from chainer.training import extension
+from chainer import utils
+from chainer import variable
 
 
 class Evaluator(extension.Extension):
@@ -60,12 +68,27 @@ class Evaluator(extension.Extension):
             object is passed at each call.
         eval_func: Evaluation function called at each iteration. The target
             link to evaluate as a callable is used by default.
+        prefetch (bool): If ``True``, the next batch is retrieved from the
+            iterator and converted in a background thread while the current
+            batch is evaluated.
+        n_processes (int): If it is given, the validation dataset is split
+            into this number of shards, which are evaluated in parallel by
+            forked processes holding replicas of the current targets, and the
+            results of the shards are merged. The main iterator must have the
+            ``dataset`` and ``batch_size`` attributes (e.g.
+            :class:`~chainer.iterators.SerialIterator`); the examples are
+            iterated in the order of the indexes without shuffling, and the
+            batches are split as the iterator splits the dataset without
+            shuffling. It is only supported on the CPU and on platforms
+            supporting :func:`os.fork`.
 
     Attributes:
         converter: Converter function.
         device: Device to which the training data is sent.
         eval_hook: Function to prepare for each evaluation process.
         eval_func: Evaluation function called at each iteration.
+        prefetch (bool): Whether the next batch is prefetched.
+        n_processes (int): Number of processes to evaluate in parallel.
 
     """
     trigger = 1, 'epoch'
@@ -75,7 +98,18 @@ class Evaluator(extension.Extension):
     name = None
 
     def __init__(self, iterator, target, converter=convert.concat_examples,
-                 device=None, eval_hook=None, eval_func=None):
+                 device=None, eval_hook=None, eval_func=None, prefetch=False,
+                 n_processes=None):
+        if n_processes is not None:
+            if n_processes < 1:
+                raise ValueError('n_processes must be positive')
+            if device is not None and device >= 0:
+                raise ValueError(
+                    'parallel evaluation is not supported on GPU')
+            if not hasattr(os, 'fork'):
+                raise ValueError(
+                    'parallel evaluation requires os.fork')
+
         if isinstance(iterator, iterator_module.Iterator):
             iterator = {'main': iterator}
         self._iterators = iterator
@@ -88,6 +122,8 @@ class Evaluator(extension.Extension):
         self.device = device
         self.eval_hook = eval_hook
         self.eval_func = eval_func
+        self.prefetch = prefetch
+        self.n_processes = n_processes
 
     def get_iterator(self, name):
         """Returns the iterator of the given name."""
@@ -124,7 +160,15 @@ class Evaluator(extension.Extension):
             reported by the evaluation function.
 
         """
-        # set up a reporter
+        reporter = self._make_reporter()
+        with reporter:
+            with configuration.using_config('train', False):
+                result = self.evaluate()
+
+        reporter_module.report(result)
+        return result
+
+    def _make_reporter(self):
         reporter = reporter_module.Reporter()
         if self.name is not None:
             prefix = self.name + '/'
@@ -134,20 +178,17 @@ class Evaluator(extension.Extension):
             reporter.add_observer(prefix + name, target)
             reporter.add_observers(prefix + name,
                                    target.namedlinks(skipself=True))
-
-        with reporter:
-            with configuration.using_config('train', False):
-                result = self.evaluate()
-
-        reporter_module.report(result)
-        return result
+        return reporter
 
     def evaluate(self):
         """Evaluates the model and returns a result dictionary.
 
         This method runs the evaluation loop over the validation dataset. It
-        accumulates the reported values to :class:`~chainer.DictSummary` and
-        returns a dictionary whose values are means computed by the summary.
+        accumulates the reported scalar values of the batches and returns a
+        dictionary of their means, as :class:`~chainer.DictSummary` computes.
+        The values are stored in preallocated arrays on the device they are
+        reported on, and the means are computed at the end of the loop, so
+        the values on GPU are not transferred to the host for each batch.
 
         Users can override this method to customize the evaluation routine.
 
@@ -170,29 +211,101 @@ class Evaluator(extension.Extension):
         if self.eval_hook:
             self.eval_hook(self)
 
+        if self.n_processes is not None:
+            return self._evaluate_parallel(iterator, eval_func)
+
         if hasattr(iterator, 'reset'):
             iterator.reset()
             it = iterator
         else:
             it = copy.copy(iterator)
 
-        summary = reporter_module.DictSummary()
-
-        for batch in it:
-            observation = {}
-            with reporter_module.report_scope(observation):
-                in_arrays = self.converter(batch, self.device)
-                with function.no_backprop_mode():
-                    if isinstance(in_arrays, tuple):
-                        eval_func(*in_arrays)
-                    elif isinstance(in_arrays, dict):
-                        eval_func(**in_arrays)
-                    else:
-                        eval_func(in_arrays)
-
-            summary.add(observation)
-
-        return summary.compute_mean()
+        return self._run(it, eval_func).compute_mean()
+
+    def _run(self, it, eval_func):
+        accumulator = _Accumulator()
+        # A single observation dictionary is reused for all the batches.
+        observation = {}
+        with reporter_module.report_scope(observation), \
+                function.no_backprop_mode():
+            for in_arrays in self._iterate(it):
+                if isinstance(in_arrays, tuple):
+                    eval_func(*in_arrays)
+                elif isinstance(in_arrays, dict):
+                    eval_func(**in_arrays)
+                else:
+                    eval_func(in_arrays)
+                accumulator.add(observation)
+                observation.clear()
+        return accumulator
+
+    def _iterate(self, it):
+        # Yields the converted batches; the next batch is prepared in a
+        # background thread if prefetch is enabled.
+        def fetch():
+            try:
+                batch = next(it)
+            except StopIteration:
+                return _end
+            return self.converter(batch, self.device)
+
+        if not self.prefetch:
+            while True:
+                in_arrays = fetch()
+                if in_arrays is _end:
+                    return
+                yield in_arrays
+
+        p = pool.ThreadPool(1)
+        try:
+            result = p.apply_async(fetch)
+            while True:
+                in_arrays = result.get()
+                if in_arrays is _end:
+                    return
+                result = p.apply_async(fetch)
+                yield in_arrays
+        finally:
+            # The iterator must not be used by the thread after returning.
+            p.close()
+            p.join()
+
+    def _evaluate_parallel(self, iterator, eval_func):
+        global _parallel_state
+
+        dataset = getattr(iterator, 'dataset', None)
+        batch_size = getattr(iterator, 'batch_size', None)
+        if dataset is None or batch_size is None:
+            raise ValueError(
+                'the iterator must have dataset and batch_size attributes '
+                'for parallel evaluation')
+
+        # The dataset is split at the boundaries of the batches.
+        n_batches = -(-len(dataset) // batch_size)
+        n = min(self.n_processes, n_batches)
+        bounds = [min(len(dataset), (n_batches * i // n) * batch_size)
+                  for i in six.moves.range(n + 1)]
+        shards = [sub_dataset.SubDataset(dataset, bounds[i], bounds[i + 1])
+                  for i in six.moves.range(n)]
+
+        # The workers are forked with the state, so that the targets and the
+        # datasets are not pickled. The fork start method is used explicitly
+        # because other start methods do not inherit the state.
+        _parallel_state = self, eval_func, shards, batch_size
+        try:
+            p = utils._get_fork_context().Pool(n)
+            try:
+                results = p.map(_evaluate_shard, six.moves.range(n))
+            finally:
+                p.close()
+                p.join()
+        finally:
+            _parallel_state = None
+
+        accumulator = _Accumulator()
+        for sums in results:
+            accumulator.merge(sums)
+        return accumulator.compute_mean()
 
     def finalize(self):
         """Finalizes the evaluator object.
@@ -204,3 +317,75 @@ class Evaluator(extension.Extension):
         """
         for iterator in six.itervalues(self._iterators):
             iterator.finalize()
+
+
+_end = object()
+
+
+class _Accumulator(object):
+
+    # Accumulates the scalar observations of the batches into growing arrays
+    # on the devices of the values.
+
+    def __init__(self):
+        self._buffers = {}
+        self._sizes = {}
+        self._sums = {}
+
+    def add(self, observation):
+        for key, value in six.iteritems(observation):
+            if isinstance(value, variable.Variable):
+                value = value.array
+            if not (numpy.isscalar(value) or getattr(value, 'ndim', -1) == 0):
+                continue
+
+            buf = self._buffers.get(key)
+            size = self._sizes.get(key, 0)
+            with cuda.get_device_from_array(value, buf):
+                if buf is None:
+                    xp = cuda.get_array_module(value)
+                    dtype = numpy.dtype(getattr(value, 'dtype', type(value)))
+                    if dtype.kind != 'f':
+                        dtype = numpy.float64
+                    buf = xp.empty(16, dtype)
+                elif size == len(buf):
+                    buf = cuda.get_array_module(buf).concatenate((buf, buf))
+                buf[size] = value
+            self._buffers[key] = buf
+            self._sizes[key] = size + 1
+
+    def merge(self, sums):
+        for key, (total, n) in six.iteritems(sums):
+            old_total, old_n = self._sums.get(key, (0, 0))
+            self._sums[key] = old_total + total, old_n + n
+
+    def compute_sums(self):
+        sums = dict(self._sums)
+        for key, buf in six.iteritems(self._buffers):
+            size = self._sizes[key]
+            with cuda.get_device_from_array(buf):
+                total = float(buf[:size].sum())
+            old_total, old_n = sums.get(key, (0, 0))
+            sums[key] = old_total + total, old_n + size
+        return sums
+
+    def compute_mean(self):
+        result = {}
+        for key, buf in six.iteritems(self._buffers):
+            with cuda.get_device_from_array(buf):
+                result[key] = buf[:self._sizes[key]].mean()
+        for key, (total, n) in six.iteritems(self._sums):
+            result[key] = total / n
+        return result
+
+
+_parallel_state = None
+
+
+def _evaluate_shard(i):
+    evaluator, eval_func, shards, batch_size = _parallel_state
+    it = serial_iterator.SerialIterator(
+        shards[i], batch_size, repeat=False, shuffle=False)
+    with evaluator._make_reporter():
+        with configuration.using_config('train', False):
+            return evaluator._run(it, eval_func).compute_sums()
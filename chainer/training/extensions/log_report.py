@@ -1,3 +1,4 @@
+import collections
 import json
 import os
 import shutil
@@ -17,8 +18,11 @@ class LogReport(extension.Extension):
     """Trainer extension to output the accumulated results to a log file.
 
     This extension accumulates the observations of the trainer to
-    :class:`~chainer.DictSummary` at a regular interval specified by a supplied
-    trigger, and writes them into a log file in JSON format.
+    :class:`~chainer.BufferedDictSummary` at a regular interval specified by a
+    supplied trigger, and writes them into a log file in JSON format. The
+    observed values are kept on their devices until the output, so the
+    accumulation does not synchronize the host with the devices on every
+    iteration.
 
     There are two triggers to handle this extension. One is the trigger to
     invoke this extension, which is used to handle the timing of accumulating
@@ -52,16 +56,66 @@ class LogReport(extension.Extension):
             formatting. For example, users can use '{iteration}' to separate
             the log files for different iterations. If the log name is None, it
             does not output the log to any file.
+        format (str): Format of the log file. If it is ``'json'``
+            (default), the whole list of the result dictionaries is written
+            to the log file as a JSON array at every output, replacing the
+            previous file. If it is ``'json-lines'``, each result dictionary
+            is appended to the log file as a line of JSON, so the cost of an
+            output does not grow with the length of the log. An existing
+            file is truncated before the first record is appended; on
+            resuming from a snapshot, only the records appended after the
+            snapshot are removed.
+        fsync_interval (int): Number of records after which the log file is
+            synchronized to the disk with :func:`os.fsync` in the
+            ``'json-lines'`` format. Each record is flushed to the operating
+            system regardless of this value. If it is ``0``, the file is not
+            synchronized explicitly.
+        max_history (int): Maximum number of the result dictionaries kept in
+            the memory. If it is ``None`` (default), all of them are kept.
+            Otherwise, :attr:`log` keeps only the latest ``max_history``
+            records, while its length and indexes still count all the
+            records, so that :class:`PrintReport` works as usual. It
+            requires the ``'json-lines'`` format unless ``log_name`` is
+            ``None``.
+        statistics (tuple of strs): Names of the statistics of each value to
+            output (see :meth:`BufferedSummary.compute
+            <chainer.BufferedSummary.compute>`). The mean is output with the
+            key of the value, and the other statistics are output with the
+            keys suffixed by ``'.'`` and their names, e.g. ``'main/loss.std'``
+            and ``'main/loss.p99'``. Only the mean is output by default.
 
     """
 
     def __init__(self, keys=None, trigger=(1, 'epoch'), postprocess=None,
-                 log_name='log'):
+                 log_name='log', format='json', fsync_interval=10,
+                 max_history=None, statistics=('mean',)):
+        if format not in ('json', 'json-lines'):
+            raise ValueError(
+                'format must be either \'json\' or \'json-lines\': '
+                '{}'.format(format))
+        if max_history is not None and format == 'json' and \
+                log_name is not None:
+            raise ValueError(
+                'max_history requires the \'json-lines\' format to write '
+                'the log file')
         self._keys = keys
         self._trigger = trigger_module.get_trigger(trigger)
         self._postprocess = postprocess
         self._log_name = log_name
-        self._log = []
+        self._format = format
+        self._fsync_interval = fsync_interval
+        self._max_history = max_history
+        self._statistics = tuple(statistics)
+        self._log = self._make_log([])
+        # The file to which the last record was appended in the json-lines
+        # format and its size after that. The file is truncated to the size
+        # before the first record is appended, so that the records of the
+        # previous run (or those written after the snapshot on resuming)
+        # are removed.
+        self._log_file = None
+        self._log_file_size = 0
+        self._truncate = True
+        self._n_unsynced = 0
 
         self._init_summary()
 
@@ -78,7 +132,7 @@ class LogReport(extension.Extension):
 
         if self._trigger(trainer):
             # output the result
-            stats = self._summary.compute_mean()
+            stats = self._summary.compute(self._statistics)
             stats_cpu = {}
             for name, value in six.iteritems(stats):
                 stats_cpu[name] = float(value)  # copy to CPU
@@ -96,19 +150,48 @@ class LogReport(extension.Extension):
             # write to the log file
             if self._log_name is not None:
                 log_name = self._log_name.format(**stats_cpu)
-                fd, path = tempfile.mkstemp(prefix=log_name, dir=trainer.out)
-                with os.fdopen(fd, 'w') as f:
-                    json.dump(self._log, f, indent=4)
+                if self._format == 'json-lines':
+                    self._append(trainer.out, log_name, stats_cpu)
+                else:
+                    fd, path = tempfile.mkstemp(
+                        prefix=log_name, dir=trainer.out)
+                    with os.fdopen(fd, 'w') as f:
+                        json.dump(self._log, f, indent=4)
 
-                new_path = os.path.join(trainer.out, log_name)
-                shutil.move(path, new_path)
+                    new_path = os.path.join(trainer.out, log_name)
+                    shutil.move(path, new_path)
 
             # reset the summary for the next output
             self._init_summary()
 
+    def _append(self, out, log_name, record):
+        path = os.path.join(out, log_name)
+        if self._truncate:
+            self._truncate = False
+            log_file = self._log_file or path
+            if os.path.exists(log_file):
+                with open(log_file, 'r+') as f:
+                    f.truncate(self._log_file_size)
+
+        with open(path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            self._n_unsynced += 1
+            if 0 < self._fsync_interval <= self._n_unsynced:
+                os.fsync(f.fileno())
+                self._n_unsynced = 0
+            self._log_file = path
+            self._log_file_size = f.tell()
+
     @property
     def log(self):
-        """The current list of observation dictionaries."""
+        """The current list of observation dictionaries.
+
+        If ``max_history`` is given, it is a sequence which keeps only the
+        latest records; its length is the number of all the records, and
+        accessing a removed record raises :class:`IndexError`.
+
+        """
         return self._log
 
     def serialize(self, serializer):
@@ -123,11 +206,61 @@ class LogReport(extension.Extension):
         # Note that this serialization may lose some information of small
         # numerical differences.
         if isinstance(serializer, serializer_module.Serializer):
-            log = json.dumps(self._log)
+            log = json.dumps(list(self._log))
             serializer('_log', log)
+            serializer('_n_records', len(self._log))
+            serializer('_log_file', self._log_file or '')
+            serializer('_log_file_size', self._log_file_size)
         else:
-            log = serializer('_log', '')
-            self._log = json.loads(log)
+            log = json.loads(serializer('_log', ''))
+            try:
+                n_records = serializer('_n_records', 0)
+                self._log_file = serializer('_log_file', '') or None
+                self._log_file_size = serializer('_log_file_size', 0)
+                self._truncate = True
+            except KeyError:
+                # snapshots of older versions
+                n_records = len(log)
+            self._log = self._make_log(log, int(n_records))
+
+    def _make_log(self, records, n_records=None):
+        if self._max_history is None:
+            return records
+        return _BoundedLog(self._max_history, records, n_records)
 
     def _init_summary(self):
-        self._summary = reporter.DictSummary()
+        self._summary = reporter.BufferedDictSummary()
+
+
+class _BoundedLog(object):
+
+    # Sequence of the latest records indexed by the positions in the whole
+    # log.
+
+    def __init__(self, maxlen, records=(), n_records=None):
+        self._records = collections.deque(records, maxlen)
+        if n_records is None:
+            n_records = len(records)
+        self._n_records = max(n_records, len(self._records))
+
+    def append(self, record):
+        self._records.append(record)
+        self._n_records += 1
+
+    def __len__(self):
+        return self._n_records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in six.moves.range(*index.indices(len(self)))
+                    if i >= self._n_records - len(self._records)]
+        if index < 0:
+            index += self._n_records
+        first = self._n_records - len(self._records)
+        if not first <= index < self._n_records:
+            raise IndexError(
+                'the record {} is not kept in the log'.format(index))
+        return self._records[index - first]
@@ -33,8 +33,8 @@ class PlotReport(extension.Extension):
     """Trainer extension to output plots.
 
     This extension accumulates the observations of the trainer to
-    :class:`~chainer.DictSummary` at a regular interval specified by a supplied
-    trigger, and plot a graph with using them.
+    :class:`~chainer.BufferedDictSummary` at a regular interval specified by a
+    supplied trigger, and plot a graph with using them.
 
     There are two triggers to handle this extension. One is the trigger to
     invoke this extension, which is used to handle the timing of accumulating
@@ -181,4 +181,4 @@ class PlotReport(extension.Extension):
                 serializer('_plot_{}'.format(self._file_name), ''))
 
     def _init_summary(self):
-        self._summary = reporter.DictSummary()
+        self._summary = reporter.BufferedDictSummary()
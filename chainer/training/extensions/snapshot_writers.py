@@ -0,0 +1,349 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy
+import six
+from six.moves import queue
+
+from chainer.serializers import npz
+
+
+class _SerializedState(object):
+
+    """Copy of the state of an object taken by :class:`DictionarySerializer`.
+
+    It supports the serialization protocol, so that the state can be saved by
+    the same functions as the original object (e.g.
+    :func:`~chainer.serializers.save_npz`) after the object is modified.
+
+    """
+
+    def __init__(self, target):
+        s = npz.DictionarySerializer()
+        s.save(target)
+        # Copy the arrays on the host, since the serializer does not copy the
+        # NumPy arrays that are updated in place by the training loop.
+        self.target = {key: numpy.array(value, copy=True)
+                       for key, value in six.iteritems(s.target)}
+
+    def serialize(self, serializer):
+        for key, value in six.iteritems(self.target):
+            s = serializer
+            path = key.split('/')
+            for name in path[:-1]:
+                s = s[name]
+            s(path[-1], value)
+
+
+def _save(filename, outdir, target, savefun):
+    # Writes to a temporary file first and renames it, so that an incomplete
+    # file is never left with the target name.
+    prefix = 'tmp' + filename
+    fd, tmppath = tempfile.mkstemp(prefix=prefix, dir=outdir)
+    try:
+        savefun(tmppath, target)
+    except Exception:
+        os.close(fd)
+        os.remove(tmppath)
+        raise
+    os.close(fd)
+    path = os.path.join(outdir, filename)
+    shutil.move(tmppath, path)
+    return path
+
+
+class Writer(object):
+
+    """Base class of snapshot writers.
+
+    A snapshot writer is called by the snapshot extensions (see
+    :func:`~chainer.training.extensions.snapshot`) to save the target object
+    to a file in the output directory. The file is
+    first written to a temporary file and then renamed to the target name,
+    so that an incomplete file is never left with the name.
+
+    Args:
+        savefun: Function to save the object. It takes two arguments: the
+            output file path and the object to serialize.
+        n_retains (int): Number of the latest snapshots kept by the writer.
+            The older files written by the writer are removed. If it is
+            ``None``, all the files are kept.
+
+    """
+
+    def __init__(self, savefun=npz.save_npz, n_retains=None):
+        if n_retains is not None and n_retains < 1:
+            raise ValueError('n_retains must be positive')
+        self._savefun = savefun
+        self._n_retains = n_retains
+        self._written = []
+
+    def __call__(self, filename, outdir, target):
+        """Saves the target object.
+
+        Args:
+            filename (str): Name of the file.
+            outdir (str): Output directory.
+            target: Object to serialize.
+
+        """
+        raise NotImplementedError
+
+    def finalize(self):
+        """Waits for the pending writes to finish."""
+        pass
+
+    def save(self, filename, outdir, target):
+        path = _save(filename, outdir, target, self._savefun)
+        self._retain(path)
+
+    def _retain(self, path):
+        if path in self._written:
+            self._written.remove(path)
+        self._written.append(path)
+        if self._n_retains is None:
+            return
+        while len(self._written) > self._n_retains:
+            old = self._written.pop(0)
+            if os.path.exists(old):
+                os.remove(old)
+
+
+class SimpleWriter(Writer):
+
+    """Snapshot writer that saves the object in the training loop.
+
+    This is the default writer of the snapshot extensions.
+
+    Args:
+        savefun: Function to save the object.
+        n_retains (int): Number of the latest snapshots to keep.
+
+    """
+
+    def __call__(self, filename, outdir, target):
+        self.save(filename, outdir, target)
+
+
+class _AsyncWriter(Writer):
+
+    # The state of the target is copied on the host in the training loop, and
+    # the copy is saved in the background.
+
+    def _snapshot(self, target):
+        return _SerializedState(target)
+
+
+class StandardWriter(_AsyncWriter):
+
+    """Base class of snapshot writers using a worker per snapshot.
+
+    The writer copies the state of the target object on the host in the
+    training loop, and saves it with a new worker. Before starting a new
+    worker, it waits for the previous one to finish, so at most one
+    snapshot is being written at a time.
+
+    Args:
+        savefun: Function to save the object.
+        n_retains (int): Number of the latest snapshots to keep.
+
+    """
+
+    def __init__(self, savefun=npz.save_npz, n_retains=None):
+        super(StandardWriter, self).__init__(savefun, n_retains)
+        self._worker = None
+        self._path = None
+
+    def create_worker(self, filename, outdir, target):
+        """Creates a worker that saves the state.
+
+        Args:
+            filename (str): Name of the file.
+            outdir (str): Output directory.
+            target: Copy of the state of the object to save.
+
+        Returns:
+            A :class:`threading.Thread` or :class:`multiprocessing.Process`
+            object which is not started yet.
+
+        """
+        raise NotImplementedError
+
+    def __call__(self, filename, outdir, target):
+        self.finalize()
+        state = self._snapshot(target)
+        self._worker = self.create_worker(filename, outdir, state)
+        self._path = os.path.join(outdir, filename)
+        self._worker.start()
+
+    def finalize(self):
+        worker = self._worker
+        if worker is None:
+            return
+        self._worker = None
+        worker.join()
+        self._check_worker(worker)
+        self._retain(self._path)
+
+    def _check_worker(self, worker):
+        pass
+
+
+class ThreadWriter(StandardWriter):
+
+    """Snapshot writer that saves the object in a background thread.
+
+    Args:
+        savefun: Function to save the object.
+        n_retains (int): Number of the latest snapshots to keep.
+
+    """
+
+    _error = None
+
+    def create_worker(self, filename, outdir, target):
+        return threading.Thread(
+            target=self._run, args=(filename, outdir, target))
+
+    def _run(self, filename, outdir, target):
+        self._error = None
+        try:
+            _save(filename, outdir, target, self._savefun)
+        except Exception as e:
+            self._error = e
+
+    def _check_worker(self, worker):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+
+class ProcessWriter(StandardWriter):
+
+    """Snapshot writer that saves the object in a background process.
+
+    The copy of the state is sent to the process by :mod:`multiprocessing`,
+    so the compression does not compete with the training loop for the GIL.
+
+    Args:
+        savefun: Function to save the object. It must be picklable if the
+            processes are not forked.
+        n_retains (int): Number of the latest snapshots to keep.
+
+    """
+
+    def create_worker(self, filename, outdir, target):
+        return multiprocessing.Process(
+            target=_save, args=(filename, outdir, target, self._savefun))
+
+    def _check_worker(self, worker):
+        if worker.exitcode != 0:
+            raise RuntimeError(
+                'snapshot writer process exited with code {}'.format(
+                    worker.exitcode))
+
+
+class QueueWriter(_AsyncWriter):
+
+    """Base class of snapshot writers using a queue and a consumer.
+
+    The writer copies the state of the target object on the host in the
+    training loop, and puts it into a bounded queue, from which a single
+    consumer saves the states in order. If the queue is full, the training
+    loop waits for the consumer.
+
+    Args:
+        savefun: Function to save the object.
+        n_retains (int): Number of the latest snapshots to keep.
+        maxsize (int): Maximum number of the states in the queue.
+
+    """
+
+    def __init__(self, savefun=npz.save_npz, n_retains=None, maxsize=2):
+        super(QueueWriter, self).__init__(savefun, n_retains)
+        self._queue = self.create_queue(maxsize)
+        self._errors = self.create_queue(0)
+        self._consumer = self.create_consumer(self._queue, self._errors)
+        self._consumer.daemon = True
+        self._consumer.start()
+        self._finalized = False
+
+    def create_queue(self, maxsize):
+        """Creates a queue of the given size."""
+        raise NotImplementedError
+
+    def create_consumer(self, q, errors):
+        """Creates a consumer that runs :meth:`consume` with the queues."""
+        raise NotImplementedError
+
+    def __call__(self, filename, outdir, target):
+        if self._finalized:
+            raise RuntimeError('the writer is already finalized')
+        self._raise_error()
+        self._queue.put((filename, outdir, self._snapshot(target)))
+
+    def consume(self, q, errors):
+        while True:
+            task = q.get()
+            if task is None:
+                break
+            filename, outdir, target = task
+            try:
+                self.save(filename, outdir, target)
+            except Exception as e:
+                errors.put(e)
+
+    def finalize(self):
+        if self._finalized:
+            return
+        self._finalized = True
+        self._queue.put(None)
+        self._consumer.join()
+        self._raise_error()
+
+    def _raise_error(self):
+        try:
+            error = self._errors.get_nowait()
+        except queue.Empty:
+            return
+        raise error
+
+
+class ThreadQueueWriter(QueueWriter):
+
+    """Snapshot writer that saves the objects in a background thread.
+
+    Args:
+        savefun: Function to save the object.
+        n_retains (int): Number of the latest snapshots to keep.
+        maxsize (int): Maximum number of the states waiting to be saved.
+
+    """
+
+    def create_queue(self, maxsize):
+        return queue.Queue(maxsize)
+
+    def create_consumer(self, q, errors):
+        return threading.Thread(target=self.consume, args=(q, errors))
+
+
+class ProcessQueueWriter(QueueWriter):
+
+    """Snapshot writer that saves the objects in a background process.
+
+    Args:
+        savefun: Function to save the object. It must be picklable if the
+            processes are not forked.
+        n_retains (int): Number of the latest snapshots to keep.
+        maxsize (int): Maximum number of the states waiting to be saved.
+
+    """
+
+    def create_queue(self, maxsize):
+        return multiprocessing.Queue(maxsize)
+
+    def create_consumer(self, q, errors):
+        return multiprocessing.Process(target=self.consume, args=(q, errors))
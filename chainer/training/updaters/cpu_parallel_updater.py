@@ -0,0 +1,298 @@
+import multiprocessing
+from multiprocessing import sharedctypes
+import os
+import traceback
+
+import numpy
+import six
+
+from chainer.dataset import convert
+from chainer import function
+from chainer.training.updaters import standard_updater
+from chainer import utils
+
+
+class _SharedLayout(object):
+
+    # Flat shared-memory buffers of the parameters and the gradients of a
+    # link. The parameters of each dtype are packed into a flat array, and
+    # the gradients into an array of shape ``(n_replicas, size)``, whose
+    # rows are the gradients of the replicas.
+
+    def __init__(self, link, n_replicas):
+        self.n_replicas = n_replicas
+        sizes = {}
+        self.entries = []
+        for name, param in sorted(link.namedparams()):
+            dtype = param.dtype
+            offset = sizes.get(dtype, 0)
+            self.entries.append((name, dtype, offset, param.shape))
+            sizes[dtype] = offset + param.size
+
+        self.params = {}
+        self.grads = {}
+        for dtype, size in six.iteritems(sizes):
+            self.params[dtype] = _shared_array((size,), dtype)
+            self.grads[dtype] = _shared_array((n_replicas, size), dtype)
+
+    def bind_params(self, link):
+        # Replaces the parameter arrays with the views of the shared buffer.
+        params = dict(link.namedparams())
+        for name, dtype, offset, shape in self.entries:
+            param = params[name]
+            view = self._view(self.params[dtype], offset, shape)
+            view[...] = param.array
+            param.array = view
+
+    def store_grads(self, link, replica, scale):
+        # Copies the gradients of the link to the row of the replica, scaled
+        # by the given factor.
+        # Sparse gradients (see Parameter.sparse_grad) are made dense, as
+        # the gradients are reduced in the dense buffers.
+        params = dict(link.namedparams())
+        for name, dtype, offset, shape in self.entries:
+            view = self._view(self.grads[dtype][replica], offset, shape)
+            param = params[name]
+            param.densify_grad()
+            grad = param.grad
+            if grad is None:
+                view.fill(0)
+            else:
+                numpy.multiply(grad, scale, out=view, casting='unsafe')
+
+    def load_grads(self, link):
+        # Sets the reduced gradients, i.e. the views of the first row, to
+        # the link.
+        params = dict(link.namedparams())
+        for name, dtype, offset, shape in self.entries:
+            params[name].grad = self._view(self.grads[dtype][0], offset, shape)
+
+    def reduce(self, replica):
+        # Sums up the chunk of the gradients assigned to the replica into
+        # the first row.
+        n = self.n_replicas
+        for grads in six.itervalues(self.grads):
+            size = grads.shape[1]
+            begin = size * replica // n
+            end = size * (replica + 1) // n
+            chunk = grads[0, begin:end]
+            for i in six.moves.range(1, n):
+                chunk += grads[i, begin:end]
+
+    @staticmethod
+    def _view(array, offset, shape):
+        size = int(numpy.prod(shape, dtype=numpy.int64))
+        return array[offset:offset + size].reshape(shape)
+
+
+def _shared_array(shape, dtype):
+    dtype = numpy.dtype(dtype)
+    size = int(numpy.prod(shape, dtype=numpy.int64))
+    # RawArray is allocated in a shared memory map inherited by the forked
+    # workers.
+    raw = sharedctypes.RawArray('b', max(size * dtype.itemsize, 1))
+    array = numpy.frombuffer(raw, dtype=numpy.int8)
+    return array[:size * dtype.itemsize].view(dtype).reshape(shape)
+
+
+def _calc_loss(loss_func, in_arrays):
+    with function.force_backprop_mode():
+        if isinstance(in_arrays, tuple):
+            return loss_func(*in_arrays)
+        elif isinstance(in_arrays, dict):
+            return loss_func(**in_arrays)
+        else:
+            return loss_func(in_arrays)
+
+
+def _run_worker(master, replica, pipe):
+    while True:
+        job, data = pipe.recv()
+        if job == 'finalize':
+            break
+        try:
+            if job == 'update':
+                batch, scale = data
+                master._compute_grads(batch, replica, scale)
+            elif job == 'reduce':
+                master._layout.reduce(replica)
+        except Exception:
+            pipe.send(('error', traceback.format_exc()))
+        else:
+            pipe.send(('done', None))
+
+
+class CPUParallelUpdater(standard_updater.StandardUpdater):
+
+    """Implementation of a data-parallel CPU Updater.
+
+    This is an implementation of :class:`Updater` that uses multiple
+    processes on a multi-core CPU. It behaves similarly to
+    :class:`~chainer.training.updaters.StandardUpdater`, and it is based on
+    synchronous data-parallel SGD: each batch is split equally between the
+    replicas of the model, the gradients of the replicas are computed in
+    parallel, and the parameters are updated once with the averaged
+    gradients.
+
+    On the first update, the parameters of the model are moved to a buffer
+    in shared memory, and ``n_processes - 1`` worker processes are forked,
+    each of which holds a replica of the model sharing the same parameter
+    arrays. Each replica also has its own gradient buffer in shared memory.
+    After the backward computation, the gradients of the replicas are summed
+    in parallel: each process reduces a contiguous chunk of the gradient
+    buffers, so that the reduction costs as much as that of a ring
+    allreduce and no array is sent through pipes. The optimizer then updates
+    the shared parameters in place in the main process, which makes them
+    visible to all the replicas without broadcasting them.
+
+    The gradient of each replica is weighted by the ratio of the size of its
+    sub-batch to the size of the batch, so that the update is equivalent to
+    that of :class:`~chainer.training.updaters.StandardUpdater` if the loss
+    is the mean over the examples of the batch.
+
+    Since the updater uses the same iterator and optimizer as
+    :class:`~chainer.training.updaters.StandardUpdater`, it is serialized in
+    the same format. It does not transfer the values collected by
+    :class:`Reporter` in the worker processes, so only the values reported
+    by the replica in the main process are available. The sparse gradients
+    of the parameters (see :attr:`chainer.Parameter.sparse_grad`) are made
+    dense to be reduced, so the parameters are updated densely.
+
+    .. note::
+       The worker processes are always forked regardless of the default
+       start method of :mod:`multiprocessing`, so this updater requires a
+       platform supporting :func:`os.fork`. The model must be on the CPU.
+       Since all
+       the processes run BLAS routines concurrently, limiting the number of
+       threads of BLAS in each process (e.g. by ``OMP_NUM_THREADS``) usually
+       improves the performance.
+
+    Args:
+        iterator: Dataset iterator for the training dataset. It can also be a
+            dictionary that maps strings to iterators.
+            If this is just an iterator, then the
+            iterator is registered by the name ``'main'``.
+        optimizer: Optimizer to update parameters. It can also be a dictionary
+            that maps strings to optimizers.
+            If this is just an optimizer, then the optimizer is
+            registered by the name ``'main'``. Only the ``'main'`` optimizer
+            is updated in parallel.
+        converter: Converter function to build input arrays. Each sub-batch
+            of the batch extracted by the main iterator is passed to this
+            function. :func:`~chainer.dataset.concat_examples` is used by
+            default.
+        n_processes (int): Number of processes, including the main process,
+            that compute the gradients. The number of CPUs is used by default.
+        loss_func: Loss function. The target link of the main optimizer is used
+            by default.
+        loss_scale (float): Loss scaling factor (see
+            :class:`~chainer.training.updaters.StandardUpdater`).
+
+    """
+
+    def __init__(self, iterator, optimizer, converter=convert.concat_examples,
+                 n_processes=None, loss_func=None, loss_scale=None):
+        super(CPUParallelUpdater, self).__init__(
+            iterator=iterator,
+            optimizer=optimizer,
+            converter=converter,
+            loss_func=loss_func,
+            loss_scale=loss_scale,
+        )
+        if n_processes is None:
+            n_processes = multiprocessing.cpu_count()
+        if n_processes < 1:
+            raise ValueError('n_processes must be positive')
+        if n_processes > 1 and not hasattr(os, 'fork'):
+            raise RuntimeError(
+                'CPUParallelUpdater requires os.fork to run multiple '
+                'processes')
+        self._n_processes = n_processes
+        self._layout = None
+        self._pipes = []
+        self._workers = []
+
+    def update_core(self):
+        batch = self.get_iterator('main').next()
+        n = self._n_processes
+        batches = [batch[i::n] for i in six.moves.range(n)]
+        scales = [len(b) / float(len(batch)) for b in batches]
+
+        if self._layout is None:
+            # The main replica runs first to initialize the parameters
+            # before they are moved to the shared memory.
+            self._compute_grads(batches[0], None, scales[0])
+            self._setup()
+            self._send_jobs('update', list(zip(batches[1:], scales[1:])))
+            self._layout.store_grads(self._model, 0, scales[0])
+        else:
+            self._send_jobs('update', list(zip(batches[1:], scales[1:])))
+            self._compute_grads(batches[0], 0, scales[0])
+        self._wait()
+
+        self._send_jobs('reduce', [None] * (n - 1))
+        self._layout.reduce(0)
+        self._wait()
+
+        self._layout.load_grads(self._model)
+        self.get_optimizer('main').update()
+
+    @property
+    def _model(self):
+        return self.get_optimizer('main').target
+
+    def _compute_grads(self, batch, replica, scale):
+        model = self._model
+        model.cleargrads()
+        if batch:
+            in_arrays = self.converter(batch)
+            loss = _calc_loss(self.loss_func or model, in_arrays)
+            loss.backward(loss_scale=self.loss_scale)
+            del loss
+        if replica is not None:
+            self._layout.store_grads(model, replica, scale)
+
+    def _setup(self):
+        model = self._model
+        for param in model.params():
+            if not isinstance(param.array, numpy.ndarray):
+                raise RuntimeError(
+                    'CPUParallelUpdater requires the parameters on the CPU')
+        self._layout = _SharedLayout(model, self._n_processes)
+        self._layout.bind_params(model)
+
+        # The workers must be forked to share the memory of the parameters
+        # and to inherit the updater without pickling it.
+        context = utils._get_fork_context()
+        for i in six.moves.range(1, self._n_processes):
+            pipe, worker_end = context.Pipe()
+            worker = context.Process(
+                target=_run_worker, args=(self, i, worker_end))
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+            self._pipes.append(pipe)
+
+    def _send_jobs(self, job, data):
+        for pipe, d in six.moves.zip(self._pipes, data):
+            pipe.send((job, d))
+
+    def _wait(self):
+        errors = []
+        for pipe in self._pipes:
+            status, message = pipe.recv()
+            if status == 'error':
+                errors.append(message)
+        if errors:
+            raise RuntimeError(
+                'an error occurred in a worker process:\n' + errors[0])
+
+    def finalize(self):
+        super(CPUParallelUpdater, self).finalize()
+        self._send_jobs('finalize', [None] * len(self._pipes))
+        for worker in self._workers:
+            worker.join()
+        self._pipes = []
+        self._workers = []
+        # The workers are forked again if the training is continued.
+        self._layout = None
@@ -1,5 +1,9 @@
+import multiprocessing
+
 import numpy
 
+from chainer.utils import counter_rng  # NOQA
+from chainer.utils import sparse_rows  # NOQA
 from chainer.utils import walker_alias  # NOQA
 
 
@@ -7,6 +11,7 @@ from chainer.utils import walker_alias  # NOQA
 from chainer.utils.conv import get_conv_outsize  # NOQA
 from chainer.utils.conv import get_deconv_outsize  # NOQA
 from chainer.utils.experimental import experimental  # NOQA
+from chainer.utils.sparse_rows import SparseRows  # NOQA
 from chainer.utils.walker_alias import WalkerAlias  # NOQA
 
 
@@ -34,3 +39,12 @@ def force_type(dtype, value):
         return value.astype(dtype, copy=False)
     else:
         return value
+
+
+def _get_fork_context():
+    # Returns the multiprocessing context that forks the child processes, for
+    # the ones inheriting the state of the parent instead of pickling it.
+    if hasattr(multiprocessing, 'get_context'):
+        return multiprocessing.get_context('fork')
+    # Python 2 always forks the child processes on POSIX.
+    return multiprocessing
@@ -0,0 +1,132 @@
+import functools
+import operator
+
+import numpy
+import six
+
+
+# Constants of SplitMix64.
+_GAMMA = numpy.uint64(0x9E3779B97F4A7C15)
+_MIX1 = numpy.uint64(0xBF58476D1CE4E5B9)
+_MIX2 = numpy.uint64(0x94D049BB133111EB)
+_SHIFTS = tuple(numpy.uint64(s) for s in (30, 27, 31, 11))
+
+
+def new_key():
+    """Draws a new key of the counter-based generator.
+
+    The key is drawn from :mod:`numpy.random`, so that the random numbers
+    depend only on the seed of NumPy regardless of the device.
+
+    Returns:
+        numpy.uint64: A random key.
+
+    """
+    return numpy.random.randint(
+        numpy.iinfo(numpy.uint64).max, dtype=numpy.uint64)
+
+
+# Number of the elements generated at once on CPU, so that the temporary
+# arrays fit in the cache.
+_CPU_BLOCK = 1 << 16
+
+
+def _mix(xp, key, start, stop):
+    # SplitMix64 of the counters in [start, stop).
+    z = xp.arange(start + 1, stop + 1, dtype=numpy.uint64)
+    z *= _GAMMA
+    z += numpy.uint64(key)
+    z ^= z >> _SHIFTS[0]
+    z *= _MIX1
+    z ^= z >> _SHIFTS[1]
+    z *= _MIX2
+    z ^= z >> _SHIFTS[2]
+    return z
+
+
+def random_bits(xp, key, shape):
+    """Generates random 64-bit integers from a key.
+
+    This is a counter-based generator: the ``i``-th element is the SplitMix64
+    hash of ``key + (i + 1) * gamma``, and it depends only on the key and the
+    index. Hence the same array is generated on CPU and GPU, and an array
+    can be regenerated from the key at any time instead of being stored.
+
+    Args:
+        xp (module): :mod:`numpy` or :mod:`cupy`.
+        key (int): Key of the generator.
+        shape (tuple of ints): Shape of the array.
+
+    Returns:
+        numpy.ndarray or cupy.ndarray: An array of ``uint64`` random
+        integers.
+
+    """
+    size = functools.reduce(operator.mul, shape, 1)
+    return _mix(xp, key, 0, size).reshape(shape)
+
+
+def bernoulli(xp, key, shape, p):
+    """Generates a random boolean array from a key.
+
+    Args:
+        xp (module): :mod:`numpy` or :mod:`cupy`.
+        key (int): Key of the generator.
+        shape (tuple of ints): Shape of the array.
+        p (float): Probability of ``True``.
+
+    Returns:
+        numpy.ndarray or cupy.ndarray: A boolean array whose elements are
+        ``True`` with probability ``p``, generated from the integers of
+        :func:`random_bits`.
+
+    """
+    # The upper 53 bits are compared as numpy.random.rand uses them.
+    threshold = numpy.uint64(int(p * (1 << 53)))
+    size = functools.reduce(operator.mul, shape, 1)
+    block = _CPU_BLOCK if xp is numpy else max(size, 1)
+    out = xp.empty(size, dtype=numpy.bool_)
+    for start in six.moves.range(0, size, block):
+        stop = min(start + block, size)
+        z = _mix(xp, key, start, stop)
+        z >>= _SHIFTS[3]
+        xp.less(z, threshold, out=out[start:stop])
+    return out.reshape(shape)
+
+
+class BernoulliMask(object):
+
+    """Random boolean mask that can be regenerated from its key.
+
+    The mask is generated by :func:`bernoulli` on the first access to
+    :attr:`array`. It is kept for the later accesses unless ``recompute`` is
+    ``True``, in which case only the key is kept and the mask is regenerated
+    on each access, trading the computation for the memory.
+
+    Args:
+        xp (module): :mod:`numpy` or :mod:`cupy`.
+        shape (tuple of ints): Shape of the mask.
+        p (float): Probability of ``True``.
+        recompute (bool): If ``True``, the mask is not stored.
+        key (int): Key of the generator. If it is ``None``, a new key is drawn
+            by :func:`new_key`.
+
+    """
+
+    def __init__(self, xp, shape, p, recompute=False, key=None):
+        self.xp = xp
+        self.shape = tuple(shape)
+        self.p = p
+        self.recompute = recompute
+        self.key = new_key() if key is None else key
+        self._array = None
+
+    @property
+    def array(self):
+        """The boolean mask."""
+        array = self._array
+        if array is None:
+            array = bernoulli(self.xp, self.key, self.shape, self.p)
+            if not self.recompute:
+                self._array = array
+        return array
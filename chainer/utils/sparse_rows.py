@@ -0,0 +1,172 @@
+import contextlib
+import threading
+
+import numpy
+
+import chainer
+from chainer.backends import cuda
+from chainer import configuration
+
+
+_thread_local = threading.local()
+
+
+class SparseRows(object):
+
+    """Array whose nonzero elements are in a few rows.
+
+    It represents the gradient w.r.t. a parameter of which only a few rows
+    are used by the forward computation, e.g., the embedding matrix of
+    :func:`~chainer.functions.embed_id`. The dense array is the sum of
+    ``values[i]`` put in the ``rows[i]``-th row for each ``i``; a row can
+    appear more than once.
+
+    Args:
+        rows (numpy.ndarray or cupy.ndarray): 1-D integer array of the
+            indices of the rows.
+        values (numpy.ndarray or cupy.ndarray): Values of the rows, whose
+            shape is ``(len(rows),) + shape[1:]``.
+        shape (tuple of ints): Shape of the dense array.
+        coalesced (bool): ``True`` if ``rows`` are sorted and unique.
+
+    Attributes:
+        rows (numpy.ndarray or cupy.ndarray): Indices of the rows.
+        values (numpy.ndarray or cupy.ndarray): Values of the rows.
+        shape (tuple of ints): Shape of the dense array.
+        coalesced (bool): ``True`` if ``rows`` are sorted and unique.
+
+    """
+
+    def __init__(self, rows, values, shape, coalesced=False):
+        self.rows = rows
+        self.values = values
+        self.shape = tuple(shape)
+        self.coalesced = coalesced
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    def __add__(self, other):
+        if self.shape != other.shape:
+            raise ValueError(
+                'shape mismatch: {} != {}'.format(self.shape, other.shape))
+        xp = cuda.get_array_module(self.values)
+        return SparseRows(
+            xp.concatenate((self.rows, other.rows)),
+            xp.concatenate((self.values, other.values)), self.shape)
+
+    def coalesce(self):
+        """Returns the equivalent array whose rows are sorted and unique.
+
+        The values of the same row are summed up. It returns ``self`` if it is
+        already coalesced.
+
+        """
+        if self.coalesced:
+            return self
+        xp = cuda.get_array_module(self.values)
+        order = xp.argsort(self.rows)
+        rows = self.rows[order]
+        values = self.values[order]
+        if len(rows) == 0:
+            return SparseRows(rows, values, self.shape, True)
+
+        first = xp.empty(len(rows), dtype=numpy.bool_)
+        first[0] = True
+        xp.not_equal(rows[1:], rows[:-1], out=first[1:])
+        if xp is numpy:
+            values = numpy.add.reduceat(values, first.nonzero()[0], axis=0)
+        else:
+            segments = xp.cumsum(first) - 1
+            shape = (int(segments[-1]) + 1,) + values.shape[1:]
+            sums = xp.zeros(shape, dtype=values.dtype)
+            width = values[0].size
+            cuda.elementwise(
+                'T value, S segment, int32 width', 'raw T sums',
+                'atomicAdd(&sums[segment * width + i % width], value)',
+                'sparse_rows_coalesce')(
+                    values.reshape(len(rows), width), segments[:, None],
+                    width, sums)
+            values = sums
+        return SparseRows(rows[first], values, self.shape, True)
+
+    def add_to(self, array):
+        """Adds the values of the rows to a dense array in place."""
+        grad = self.coalesce()
+        array[grad.rows] += grad.values
+
+    def to_dense(self):
+        """Returns the dense array."""
+        xp = cuda.get_array_module(self.values)
+        with cuda.get_device_from_array(self.values):
+            array = xp.zeros(self.shape, dtype=self.dtype)
+            self.add_to(array)
+        return array
+
+
+@contextlib.contextmanager
+def sparse_grad_scope(enabled, loss_scale=None):
+    """Enables or disables sparse gradients in the backprop of the scope.
+
+    :meth:`chainer.Variable.backward` enables them, as it accumulates the
+    gradients into the parameters, while :func:`chainer.grad` disables them
+    to return all the gradients it computes.
+
+    Args:
+        enabled (bool): ``True`` if functions may give sparse gradients.
+        loss_scale (float): Loss scaling factor of the backprop. It is
+            recorded in the parameters given sparse gradients (see
+            :meth:`chainer.Parameter.add_sparse_grad`).
+
+    """
+    default = (getattr(_thread_local, 'enabled', False),
+               getattr(_thread_local, 'loss_scale', None))
+    _thread_local.enabled = enabled
+    _thread_local.loss_scale = loss_scale
+    try:
+        yield
+    finally:
+        _thread_local.enabled, _thread_local.loss_scale = default
+
+
+def get_loss_scale():
+    """Returns the loss scaling factor of the current backprop.
+
+    Returns:
+        float: The factor given to :func:`sparse_grad_scope`, or ``None`` if
+        the loss is not scaled.
+
+    """
+    return getattr(_thread_local, 'loss_scale', None)
+
+
+def get_sparse_grad_target(func, index):
+    """Returns the parameter to which a function gives a sparse gradient.
+
+    A function whose gradient w.r.t. an input is nonzero only in a few rows
+    can give it to the input by :meth:`chainer.Parameter.add_sparse_grad`
+    instead of returning a dense gradient from its backward method. It is
+    possible only if the backprop is run by :meth:`chainer.Variable.backward`
+    (see :func:`sparse_grad_scope`), the input is a
+    :class:`~chainer.Parameter`, which is a leaf of the computational graph,
+    and the gradient is not differentiated again, i.e.,
+    ``chainer.config.enable_backprop`` is ``False`` during the backward
+    computation.
+
+    Args:
+        func (~chainer.FunctionNode): The function.
+        index (int): Index of the input.
+
+    Returns:
+        ~chainer.Parameter: The parameter, or ``None`` if the function should
+        return a dense gradient.
+
+    """
+    if (configuration.config.enable_backprop or
+            not getattr(_thread_local, 'enabled', False)):
+        return None
+    param = func.inputs[index].get_variable_or_none()
+    if isinstance(param, chainer.Parameter):
+        return param
+    return None
@@ -14,6 +14,7 @@ from chainer.backends import intel64
 from chainer import initializers
 from chainer.initializers import constant
 from chainer.utils import argument
+from chainer.utils import sparse_rows
 
 
 def _check_grad_type(func, x, gx):
@@ -155,6 +156,9 @@ class VariableNode(object):
     _creator_node = None
     _data = None
     _rank = 0
+    # Weak references to the function nodes that have taken this node as an
+    # input
+    _consumers = ()
     # Name of the Function is assigned if this variable is a gradient generated
     # by an old-style Function
     _old_style_grad_generator = None
@@ -932,7 +936,8 @@ Actual: {0}'''.format(type(data))
                 parameters are divided by the factor just before the parameters
                 are to be updated.
         """
-        with chainer.using_config('enable_backprop', enable_double_backprop):
+        with chainer.using_config('enable_backprop', enable_double_backprop), \
+                sparse_rows.sparse_grad_scope(True, loss_scale):
             self._backward_main(retain_grad, loss_scale)
 
     def _backward_main(self, retain_grad, loss_scale):
@@ -981,6 +986,8 @@ Actual: {0}'''.format(type(data))
 
         add_cand(self.creator_node)
 
+        plan = chainer.graph_optimizations.memory_planner._get_plan([self])
+
         def get_grad(node):
             if node is None:
                 return None
@@ -1004,6 +1011,8 @@ Actual: {0}'''.format(type(data))
                 i for i, x in enumerate(inputs) if x.requires_grad
             ])
             if not target_input_indexes:
+                if plan is not None:
+                    plan.release(func)
                 continue
             outputs = [y() for y in func.outputs]  # access via weak ref
 
@@ -1067,6 +1076,9 @@ Actual: {0}'''.format(type(data))
             assert len(gxs) == len(in_grad)
             for hook in hooks:
                 hook.backward_postprocess(func, in_data, out_grad_data)
+            del in_data
+            if plan is not None:
+                plan.release(func)
 
             if is_debug:
                 for gx in gxs:
@@ -1269,10 +1281,16 @@ class Parameter(Variable):
         update_rule: :class:`~chainer.optimizer.UpdateRule` instance that
             updates this variable as a parameter. This argument is set to
             :attr:`update_rule`.
+        sparse_grad (~chainer.utils.SparseRows): Gradient given by functions
+            in rows by :meth:`add_sparse_grad` instead of backprop, e.g.,
+            :func:`~chainer.functions.embed_id` with ``sparse_grad=True``.
+            The gradient of the parameter is the sum of :attr:`grad` and
+            this gradient. It is ``None`` if no such gradient is given.
 
     """
 
     initializer = None
+    sparse_grad = None
     _grad_initializer = None
     _initial_device = None
 
@@ -1330,15 +1348,51 @@ class Parameter(Variable):
 
     def cleargrad(self):
         super(Parameter, self).cleargrad()
+        self.sparse_grad = None
         if self.data is None:
             self._grad_initializer = None
 
     def zerograd(self):
         super(Parameter, self).zerograd()
+        self.sparse_grad = None
         if self.data is None:
             dtype = getattr(self.initializer, 'dtype', None)
             self._grad_initializer = initializers.Zero(dtype)
 
+    def add_sparse_grad(self, grad):
+        """Accumulates a gradient given in rows.
+
+        The loss scaling factor of the current backprop is recorded as well
+        as for the dense gradient, so that the update rule divides the
+        gradient by it.
+
+        Args:
+            grad (~chainer.utils.SparseRows): Gradient to be added to
+                :attr:`sparse_grad`.
+
+        """
+        self._loss_scale = sparse_rows.get_loss_scale()
+        if self.sparse_grad is None:
+            self.sparse_grad = grad
+        else:
+            self.sparse_grad += grad
+
+    def densify_grad(self):
+        """Adds :attr:`sparse_grad` to the gradient array and clears it.
+
+        The gradient array is allocated if it is ``None``.
+
+        """
+        sparse_grad = self.sparse_grad
+        if sparse_grad is None:
+            return
+        self.sparse_grad = None
+        with cuda.get_device_from_array(self.data):
+            if self.grad is None:
+                self.grad = sparse_grad.to_dense()
+            else:
+                sparse_grad.add_to(self.grad)
+
     def initialize(self, shape):
         """Initializes the uninitialized variable.
 
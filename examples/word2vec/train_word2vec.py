@@ -23,12 +23,13 @@ from chainer.training import extensions
 class ContinuousBoW(chainer.Chain):
     """Definition of Continuous Bag of Words Model"""
 
-    def __init__(self, n_vocab, n_units, loss_func):
+    def __init__(self, n_vocab, n_units, loss_func, sparse_grad=False):
         super(ContinuousBoW, self).__init__()
 
         with self.init_scope():
             self.embed = L.EmbedID(
-                n_vocab, n_units, initialW=I.Uniform(1. / n_units))
+                n_vocab, n_units, initialW=I.Uniform(1. / n_units),
+                sparse_grad=sparse_grad)
             self.loss_func = loss_func
 
     def __call__(self, x, contexts):
@@ -42,12 +43,13 @@ class ContinuousBoW(chainer.Chain):
 class SkipGram(chainer.Chain):
     """Definition of Skip-gram Model"""
 
-    def __init__(self, n_vocab, n_units, loss_func):
+    def __init__(self, n_vocab, n_units, loss_func, sparse_grad=False):
         super(SkipGram, self).__init__()
 
         with self.init_scope():
             self.embed = L.EmbedID(
-                n_vocab, n_units, initialW=I.Uniform(1. / n_units))
+                n_vocab, n_units, initialW=I.Uniform(1. / n_units),
+                sparse_grad=sparse_grad)
             self.loss_func = loss_func
 
     def __call__(self, x, contexts):
@@ -170,6 +172,9 @@ def main():
                         help='output model type ("hsm": hierarchical softmax, '
                         '"ns": negative sampling, "original": '
                         'no approximation)')
+    parser.add_argument('--sparse-grad', action='store_true',
+                        help='update only the rows of the embeddings used '
+                        'in each minibatch (lazy update)')
     parser.add_argument('--out', default='result',
                         help='Directory to output the result')
     parser.add_argument('--test', dest='test', action='store_true')
@@ -187,6 +192,7 @@ def main():
     print('# epoch: {}'.format(args.epoch))
     print('Training model: {}'.format(args.model))
     print('Output type: {}'.format(args.out_type))
+    print('Sparse gradient: {}'.format(args.sparse_grad))
     print('')
 
     if args.gpu >= 0:
@@ -215,7 +221,8 @@ def main():
         loss_func.W.data[...] = 0
     elif args.out_type == 'ns':
         cs = [counts[w] for w in range(len(counts))]
-        loss_func = L.NegativeSampling(args.unit, cs, args.negative_size)
+        loss_func = L.NegativeSampling(args.unit, cs, args.negative_size,
+                                       sparse_grad=args.sparse_grad)
         loss_func.W.data[...] = 0
     elif args.out_type == 'original':
         loss_func = SoftmaxCrossEntropyLoss(args.unit, n_vocab)
@@ -224,9 +231,9 @@ def main():
 
     # Choose the model
     if args.model == 'skipgram':
-        model = SkipGram(n_vocab, args.unit, loss_func)
+        model = SkipGram(n_vocab, args.unit, loss_func, args.sparse_grad)
     elif args.model == 'cbow':
-        model = ContinuousBoW(n_vocab, args.unit, loss_func)
+        model = ContinuousBoW(n_vocab, args.unit, loss_func, args.sparse_grad)
     else:
         raise Exception('Unknown model type: {}'.format(args.model))
 
@@ -148,6 +148,7 @@ setup(
               'chainer.functions.theano',
               'chainer.functions.util',
               'chainer.function_hooks',
+              'chainer.graph_optimizations',
               'chainer.iterators',
               'chainer.initializers',
               'chainer.links',
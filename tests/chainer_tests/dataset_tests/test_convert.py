@@ -102,6 +102,48 @@ class TestConcatExamples(unittest.TestCase):
         self.check_concat_dicts(dicts, cuda.Device().id)
 
 
+class TestConcatExamplesView(unittest.TestCase):
+
+    def setUp(self):
+        self.batch = numpy.random.uniform(size=(5, 2, 3))
+        self.batch.flags.writeable = False
+
+    def test_read_only_rows(self):
+        arrays = [self.batch[i] for i in range(1, 4)]
+        array = dataset.concat_examples(arrays, copy=False)
+        self.assertTrue(numpy.shares_memory(array, self.batch))
+        self.assertFalse(array.flags.writeable)
+        numpy.testing.assert_array_equal(array, self.batch[1:4])
+
+    def test_copy(self):
+        # A new writable array is returned by default.
+        arrays = [self.batch[i] for i in range(1, 4)]
+        array = dataset.concat_examples(arrays)
+        self.assertFalse(numpy.shares_memory(array, self.batch))
+        self.assertTrue(array.flags.writeable)
+        numpy.testing.assert_array_equal(array, self.batch[1:4])
+
+    def test_not_consecutive(self):
+        arrays = [self.batch[i] for i in (0, 2, 3)]
+        array = dataset.concat_examples(arrays, copy=False)
+        self.assertFalse(numpy.shares_memory(array, self.batch))
+        numpy.testing.assert_array_equal(array, self.batch[[0, 2, 3]])
+
+    def test_writeable_rows(self):
+        batch = self.batch.copy()
+        arrays = [batch[i] for i in range(3)]
+        array = dataset.concat_examples(arrays, copy=False)
+        self.assertFalse(numpy.shares_memory(array, batch))
+        numpy.testing.assert_array_equal(array, batch[:3])
+
+    def test_different_buffers(self):
+        other = self.batch.copy()
+        other.flags.writeable = False
+        arrays = [self.batch[0], other[1]]
+        array = dataset.concat_examples(arrays, copy=False)
+        numpy.testing.assert_array_equal(array, [self.batch[0], other[1]])
+
+
 class TestConcatExamplesWithPadding(unittest.TestCase):
 
     def check_concat_arrays_padding(self, xp):
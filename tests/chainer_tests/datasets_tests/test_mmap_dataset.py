@@ -0,0 +1,132 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from chainer import datasets
+from chainer import iterators
+from chainer import testing
+
+
+@testing.parameterize(*testing.product({
+    'variable_length': [False, True],
+    'is_tuple': [False, True],
+}))
+class TestMmapDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'dataset.mmap')
+        self.examples = []
+        for i in range(10):
+            length = i % 4 + 1 if self.variable_length else 3
+            x = numpy.random.uniform(size=(length, 2)).astype(numpy.float32)
+            if self.is_tuple:
+                self.examples.append((x, numpy.int32(i), numpy.float64(i)))
+            else:
+                self.examples.append(x)
+        with datasets.MmapDatasetWriter(self.path) as writer:
+            writer.extend(self.examples)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def check_example(self, actual, expect):
+        if self.is_tuple:
+            self.assertIsInstance(actual, tuple)
+            self.assertEqual(len(actual), 3)
+            for a, e in zip(actual, expect):
+                self.assertEqual(a.dtype, e.dtype)
+                numpy.testing.assert_array_equal(a, e)
+            self.assertIsInstance(actual[1], numpy.int32)
+        else:
+            self.assertEqual(actual.dtype, expect.dtype)
+            numpy.testing.assert_array_equal(actual, expect)
+
+    def test_get_example(self):
+        dataset = datasets.MmapDataset(self.path)
+        self.assertEqual(len(dataset), 10)
+        for i in range(10):
+            self.check_example(dataset[i], self.examples[i])
+        self.check_example(dataset[-1], self.examples[-1])
+
+        x = dataset[3][0] if self.is_tuple else dataset[3]
+        self.assertFalse(x.flags.writeable)
+        self.assertTrue(x.flags.aligned)
+
+    def test_slice(self):
+        dataset = datasets.MmapDataset(self.path)
+        for actual, expect in zip(dataset[2:8:3], self.examples[2:8:3]):
+            self.check_example(actual, expect)
+
+    def test_overrun(self):
+        dataset = datasets.MmapDataset(self.path)
+        with self.assertRaises(IndexError):
+            dataset[10]
+
+    def test_pickle(self):
+        dataset = pickle.loads(pickle.dumps(datasets.MmapDataset(self.path)))
+        self.check_example(dataset[5], self.examples[5])
+
+    def test_split_dataset_random(self):
+        dataset = datasets.MmapDataset(self.path)
+        train, test = datasets.split_dataset_random(dataset, 7, seed=0)
+        order = numpy.random.RandomState(0).permutation(10)
+        for i in range(3):
+            self.check_example(test[i], self.examples[order[7 + i]])
+
+    def test_iterators(self):
+        dataset = datasets.MmapDataset(self.path)
+        for it in (
+                iterators.SerialIterator(dataset, 3, repeat=False,
+                                         shuffle=False),
+                iterators.MultithreadIterator(dataset, 3, repeat=False,
+                                              shuffle=False),
+                iterators.MultiprocessIterator(dataset, 3, repeat=False,
+                                               shuffle=False, n_processes=2)):
+            actual = sum([it.next() for _ in range(4)], [])
+            for a, e in zip(actual, self.examples):
+                self.check_example(a, e)
+            it.finalize()
+
+
+class TestMmapDatasetWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'dataset.mmap')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_different_dtype(self):
+        writer = datasets.MmapDatasetWriter(self.path)
+        writer.write((numpy.zeros(3, numpy.float32), 0))
+        with self.assertRaises(ValueError):
+            writer.write((numpy.zeros(3, numpy.float64), 0))
+        writer.close()
+
+    def test_object_array(self):
+        writer = datasets.MmapDatasetWriter(self.path)
+        with self.assertRaises(ValueError):
+            writer.write(numpy.array([None]))
+
+    def test_empty(self):
+        writer = datasets.MmapDatasetWriter(self.path)
+        with self.assertRaises(ValueError):
+            writer.close()
+
+    def test_not_closed(self):
+        writer = datasets.MmapDatasetWriter(self.path)
+        writer.write(numpy.zeros(3))
+        writer._file.flush()
+        with self.assertRaises(ValueError):
+            datasets.MmapDataset(self.path)
+        writer.close()
+        datasets.MmapDataset(self.path)
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,169 @@
+import json
+import sys
+import unittest
+
+import numpy
+import six
+
+import chainer
+from chainer import function_hooks
+from chainer import functions
+from chainer import links
+from chainer import testing
+
+
+class MLP(chainer.Chain):
+
+    def __init__(self):
+        super(MLP, self).__init__()
+        with self.init_scope():
+            self.l1 = links.Linear(3, 4)
+            self.l2 = links.Linear(4, 2)
+
+    def __call__(self, x):
+        return self.l2(functions.relu(self.l1(x)))
+
+
+class TestFunctionProfileHook(unittest.TestCase):
+
+    def setUp(self):
+        self.model = MLP()
+        self.hook = function_hooks.FunctionProfileHook(link=self.model)
+        self.x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+
+    def run_model(self):
+        with self.hook:
+            y = self.model(self.x)
+            functions.sum(y).backward()
+
+    def test_name(self):
+        self.assertEqual(self.hook.name, 'FunctionProfileHook')
+
+    def test_records(self):
+        self.run_model()
+        records = [r for r in self.hook.records if r['depth'] == 0]
+        forward = [r for r in records if r['phase'] == 'forward']
+        backward = [r for r in records if r['phase'] == 'backward']
+        self.assertEqual([r['name'] for r in forward],
+                         ['LinearFunction', 'ReLU', 'LinearFunction', 'Sum'])
+        self.assertEqual([r['link'] for r in forward],
+                         ['/l1', '/', '/l2', None])
+        self.assertEqual(len(backward), 4)
+
+        nested = [r for r in self.hook.records if r['depth'] > 0]
+        self.assertIn('LinearGradData', [r['name'] for r in nested])
+        for r in nested:
+            self.assertEqual(r['phase'], 'forward')
+
+        l1 = forward[0]
+        self.assertEqual(l1['input_shapes'], [(5, 3), (4, 3), (4,)])
+        self.assertEqual(l1['output_shapes'], [(5, 4)])
+        self.assertEqual(l1['flops'], 2 * 5 * 3 * 4 + 5 * 4)
+        self.assertEqual(l1['bytes'], 4 * (15 + 12 + 4 + 20))
+        self.assertIsNone(l1['memory'])
+        self.assertGreaterEqual(l1['time'], 0)
+        self.assertIn('test_function_profile.py', l1['call_site'])
+
+        l1_backward, = [r for r in backward if r['link'] == '/l1']
+        self.assertEqual(l1_backward['flops'], 2 * l1['flops'])
+        self.assertEqual(l1_backward['output_shapes'], [(5, 4)])
+
+    def test_summary(self):
+        self.run_model()
+        rows = self.hook.summary(group_by='name', sort_by='occurrence')
+        self.assertEqual(rows[0]['name'], 'LinearFunction')
+        self.assertEqual(rows[0]['occurrence'], 4)
+        row = rows[0]
+        self.assertAlmostEqual(
+            row['time'], row['forward_time'] + row['backward_time'])
+        self.assertEqual(
+            sum([row['time'] for row in rows]), self.hook.total_time())
+
+        rows = self.hook.summary(group_by=('link', 'phase'))
+        self.assertEqual(len(rows), 8)
+
+    def test_print_report(self):
+        self.run_model()
+        f = six.StringIO()
+        self.hook.print_report(file=f, n_rows=2)
+        lines = f.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('Link', lines[0])
+        self.assertIn('FLOPs', lines[0])
+
+    def test_chrome_trace(self):
+        self.run_model()
+        f = six.StringIO()
+        self.hook.export_chrome_trace(f)
+        trace = json.loads(f.getvalue())
+        events = trace['traceEvents']
+        self.assertEqual(len(events), len(self.hook.records))
+        for event in events:
+            self.assertEqual(event['ph'], 'X')
+            self.assertGreaterEqual(event['dur'], 0)
+        self.assertEqual(events[0]['args']['link'], '/l1')
+
+    def test_without_link(self):
+        hook = function_hooks.FunctionProfileHook()
+        with hook:
+            self.model(self.x)
+        self.assertEqual([r['link'] for r in hook.records],
+                         ['Linear', 'MLP', 'Linear'])
+
+    def test_no_backprop(self):
+        with chainer.no_backprop_mode(), self.hook:
+            self.model(self.x)
+        l1 = self.hook.records[0]
+        self.assertEqual(l1['output_shapes'], [(5, 4)])
+        self.assertEqual(l1['flops'], 2 * 5 * 3 * 4 + 5 * 4)
+
+    def test_call_site_from_subclass(self):
+        # The frames of the hook itself are not call sites.
+        class Hook(function_hooks.FunctionProfileHook):
+
+            def forward_preprocess(self, function, in_data):
+                super(Hook, self).forward_preprocess(function, in_data)
+
+        hook = Hook(link=self.model)
+        with hook:
+            self.model(self.x)
+        for record in hook.records:
+            self.assertIn('(__call__)', record['call_site'])
+        self.assertEqual([r['link'] for r in hook.records],
+                         ['/l1', '/', '/l2'])
+
+    def test_direct_call(self):
+        f = functions.math.exponential.Exp()
+        self.hook.forward_preprocess(f, (self.x,))
+        self.hook.forward_postprocess(f, (self.x,))
+        record, = self.hook.records
+        self.assertEqual(record['name'], 'Exp')
+        self.assertIn('(test_direct_call)', record['call_site'])
+        self.assertEqual(record['output_shapes'], [])
+
+    def test_register_flop_counter(self):
+        function_hooks.register_flop_counter(
+            'Sum', lambda f, in_shapes, out_shapes: 42)
+        try:
+            self.run_model()
+        finally:
+            del function_hooks.function_profile._flop_counters['Sum']
+        sum_forward, = [r for r in self.hook.records
+                        if r['name'] == 'Sum' and r['depth'] == 0
+                        and r['phase'] == 'forward']
+        self.assertEqual(sum_forward['flops'], 42)
+
+
+@unittest.skipIf(sys.version_info < (3, 4), 'tracemalloc is not available')
+class TestFunctionProfileHookMemory(unittest.TestCase):
+
+    def test_trace_memory(self):
+        hook = function_hooks.FunctionProfileHook(trace_memory=True)
+        x = numpy.ones((100, 100), numpy.float32)
+        with hook:
+            functions.exp(x)
+        record, = hook.records
+        self.assertGreaterEqual(record['memory'], x.nbytes)
+
+
+testing.run_module(__name__, __file__)
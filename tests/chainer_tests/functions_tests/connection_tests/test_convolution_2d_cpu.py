@@ -0,0 +1,267 @@
+import unittest
+
+import mock
+import numpy
+
+import chainer
+from chainer import functions
+from chainer.functions.connection import convolution_2d_cpu
+from chainer import gradient_check
+from chainer import testing
+from chainer.utils import conv
+
+
+def _params(in_size, ksize, stride, pad, dilate, cover_all):
+    h, w = in_size
+    out_h = conv.get_conv_outsize(h, ksize, stride, pad, cover_all, dilate)
+    out_w = conv.get_conv_outsize(w, ksize, stride, pad, cover_all, dilate)
+    return convolution_2d_cpu.ConvolutionParams(
+        stride, stride, pad, pad, dilate, dilate, cover_all, out_h, out_w)
+
+
+@testing.parameterize(*testing.product({
+    'shape': [
+        # (in_size, ksize, stride, pad, dilate)
+        ((7, 9), 3, 1, 1, 1),
+        ((6, 5), 3, 1, 2, 1),
+        ((8, 8), 3, 2, 1, 1),
+        ((5, 7), 3, 1, 0, 2),
+        ((7, 9), 1, 1, 0, 1),
+        ((7, 9), 1, 2, 0, 1),
+        ((10, 11), 5, 1, 2, 1),
+        ((9, 8), 7, 1, 3, 1),
+    ],
+    'cover_all': [True, False],
+    'x_dtype': [numpy.float16, numpy.float32, numpy.float64],
+    'W_dtype': [numpy.float16, numpy.float32],
+}))
+class TestConvolution2DCPU(unittest.TestCase):
+
+    def setUp(self):
+        in_size, self.ksize, stride, pad, dilate = self.shape
+        k = self.ksize
+        self.params = _params(
+            in_size, k, stride, pad, dilate, self.cover_all)
+        self.x = numpy.random.uniform(
+            -1, 1, (2, 3) + in_size).astype(self.x_dtype)
+        self.W = numpy.random.uniform(
+            -1, 1, (4, 3, k, k)).astype(self.W_dtype)
+        out_size = self.params.out_h, self.params.out_w
+        self.gy = numpy.random.uniform(
+            -1, 1, (2, 4) + out_size).astype(self.x_dtype)
+        if self.x_dtype == numpy.float16 or self.W_dtype == numpy.float16:
+            self.tol = {'atol': 5e-2, 'rtol': 5e-2}
+        else:
+            self.tol = {'atol': 1e-4, 'rtol': 1e-4}
+
+    def check(self, op, a, b, params, expect):
+        names = []
+        for name, func, applicable, _ in convolution_2d_cpu._algorithms[op]:
+            if applicable(a, b, params):
+                names.append(name)
+                y = func(a, b, params)
+                self.assertEqual(y.dtype, expect.dtype)
+                testing.assert_allclose(y, expect, **self.tol)
+        return names
+
+    def test_forward(self):
+        # im2col is the reference.
+        col = conv.im2col_cpu(
+            self.x, self.ksize, self.ksize, self.params.sy, self.params.sx,
+            self.params.ph, self.params.pw, cover_all=self.cover_all,
+            dy=self.params.dy, dx=self.params.dx)
+        # The references are computed in double precision because einsum
+        # of half precision arrays overflows.
+        expect = numpy.einsum(
+            'nckluv,ockl->nouv', col.astype(numpy.float64),
+            self.W.astype(numpy.float64)).astype(self.x_dtype)
+        names = self.check('forward', self.x, self.W, self.params, expect)
+        self.assertIn('im2col', names)
+
+    def test_backward_data(self):
+        # The gradient of the forward by the transposed GEMM and col2im.
+        p = self.params
+        gcol = numpy.einsum(
+            'nouv,ockl->nckluv', self.gy.astype(numpy.float64),
+            self.W.astype(numpy.float64)).astype(self.x_dtype)
+        expect = conv.col2im_cpu(
+            gcol, p.sy, p.sx, p.ph, p.pw, self.x.shape[2], self.x.shape[3],
+            dy=p.dy, dx=p.dx)
+        params = p._replace(out_h=self.x.shape[2], out_w=self.x.shape[3])
+        names = self.check(
+            'backward_data', self.gy, self.W, params, expect)
+        self.assertIn('col2im', names)
+
+    def test_grad_w(self):
+        p = self.params
+        col = conv.im2col_cpu(
+            self.x, self.ksize, self.ksize, p.sy, p.sx, p.ph, p.pw,
+            cover_all=self.cover_all, dy=p.dy, dx=p.dx)
+        expect = numpy.einsum(
+            'nouv,nckluv->ockl', self.gy.astype(numpy.float64),
+            col.astype(numpy.float64))
+        gW = convolution_2d_cpu.convolution_grad_w(
+            self.x, self.gy, (self.ksize, self.ksize), p)
+        testing.assert_allclose(gW, expect, **self.tol)
+
+
+class TestApplicability(unittest.TestCase):
+
+    def names(self, op, a, b, params):
+        return [name for name, _, applicable, _
+                in convolution_2d_cpu._algorithms[op]
+                if applicable(a, b, params)]
+
+    def test_forward(self):
+        x = numpy.empty((1, 1, 8, 8), dtype=numpy.float32)
+        self.assertEqual(
+            self.names('forward', x, numpy.empty((1, 1, 3, 3)),
+                       _params((8, 8), 3, 1, 1, 1, False)),
+            ['im2col', 'winograd'])
+        self.assertEqual(
+            self.names('forward', x, numpy.empty((1, 1, 3, 3)),
+                       _params((8, 8), 3, 2, 1, 1, False)),
+            ['im2col'])
+        self.assertEqual(
+            self.names('forward', x, numpy.empty((1, 1, 1, 1)),
+                       _params((8, 8), 1, 2, 0, 1, False)),
+            ['gemm_1x1', 'im2col'])
+        # The extra output of cover_all is not a GEMM of the input.
+        self.assertEqual(
+            self.names('forward', x, numpy.empty((1, 1, 1, 1)),
+                       _params((8, 8), 1, 3, 0, 1, True)),
+            ['im2col'])
+        self.assertEqual(
+            self.names('forward', x, numpy.empty((1, 1, 5, 5)),
+                       _params((8, 8), 5, 1, 2, 1, False)),
+            ['im2col', 'fft'])
+
+    def test_backward_data(self):
+        gy = numpy.empty((1, 1, 8, 8), dtype=numpy.float32)
+        W = numpy.empty((1, 1, 3, 3))
+        params = convolution_2d_cpu.ConvolutionParams(
+            1, 1, 1, 1, 1, 1, False, 8, 8)
+        self.assertEqual(self.names('backward_data', gy, W, params),
+                         ['col2im', 'winograd'])
+        # Larger outputs than the convolution of stride 1 can make.
+        params = params._replace(out_h=9)
+        self.assertEqual(self.names('backward_data', gy, W, params),
+                         ['col2im'])
+
+    def test_backward_data_1x1(self):
+        gy = numpy.empty((1, 1, 4, 4), dtype=numpy.float32)
+        W = numpy.empty((1, 1, 1, 1))
+        params = convolution_2d_cpu.ConvolutionParams(
+            2, 2, 0, 0, 1, 1, False, 8, 8)
+        self.assertEqual(self.names('backward_data', gy, W, params),
+                         ['gemm_1x1', 'col2im'])
+        # The last input row does not fall on the output.
+        params = params._replace(out_h=6)
+        self.assertEqual(self.names('backward_data', gy, W, params),
+                         ['col2im'])
+
+
+@testing.parameterize(
+    # The extra output of cover_all is dropped by the gradient.
+    {'func': 'convolution_2d', 'in_shape': (2, 3, 6, 6), 'stride': 2,
+     'kwargs': {'cover_all': True}},
+    # The output is smaller than the stride grid of the input.
+    {'func': 'deconvolution_2d', 'in_shape': (1, 3, 4, 4), 'stride': 3,
+     'kwargs': {'outsize': (8, 8)}},
+)
+class TestConvolution2D1x1Edge(unittest.TestCase):
+
+    def setUp(self):
+        self.x = numpy.random.uniform(
+            -1, 1, self.in_shape).astype(numpy.float32)
+        self.W = numpy.random.uniform(-1, 1, (3, 3, 1, 1)).astype(
+            numpy.float32)
+
+    def f(self, x, W):
+        return getattr(functions, self.func)(
+            x, W, stride=self.stride, **self.kwargs)
+
+    def test_backward(self):
+        y = self.f(self.x, self.W)
+        gy = numpy.random.uniform(-1, 1, y.shape).astype(numpy.float32)
+        with chainer.using_config('use_ideep', 'never'):
+            gradient_check.check_backward(
+                self.f, (self.x, self.W), gy, dtype=numpy.float64,
+                atol=1e-3, rtol=1e-3)
+
+
+class TestAutotune(unittest.TestCase):
+
+    def setUp(self):
+        self.x = numpy.random.uniform(
+            -1, 1, (2, 3, 8, 8)).astype(numpy.float32)
+        self.W = numpy.random.uniform(
+            -1, 1, (4, 3, 3, 3)).astype(numpy.float32)
+        self.params = _params((8, 8), 3, 1, 1, 1, False)
+        self.patch = mock.patch.object(
+            convolution_2d_cpu, '_tuned_algorithms', {})
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_default(self):
+        with chainer.using_config('autotune', False):
+            self.assertEqual(
+                convolution_2d_cpu.get_algorithm(
+                    'forward', self.x, self.W, self.params), 'im2col')
+            convolution_2d_cpu.convolution_forward(
+                self.x, self.W, self.params)
+        self.assertEqual(convolution_2d_cpu._tuned_algorithms, {})
+
+    def test_autotune(self):
+        with chainer.using_config('autotune', True):
+            self.assertIsNone(convolution_2d_cpu.get_algorithm(
+                'forward', self.x, self.W, self.params))
+            y = convolution_2d_cpu.convolution_forward(
+                self.x, self.W, self.params)
+            name = convolution_2d_cpu.get_algorithm(
+                'forward', self.x, self.W, self.params)
+            self.assertIn(name, ('im2col', 'winograd'))
+
+            # The tuned algorithm is used from then on.
+            convolution_2d_cpu._tuned_algorithms[
+                convolution_2d_cpu._key(
+                    'forward', self.x, self.W, self.params)] = 'winograd'
+            with mock.patch.object(
+                    convolution_2d_cpu, '_conv_im2col') as m:
+                y2 = convolution_2d_cpu.convolution_forward(
+                    self.x, self.W, self.params)
+            m.assert_not_called()
+        testing.assert_allclose(y2, y, atol=1e-5, rtol=1e-5)
+        self.assertEqual(len(convolution_2d_cpu._tuned_algorithms), 1)
+
+    def test_convolution_2d(self):
+        # Both the convolution and its gradients are autotuned.
+        x = chainer.Variable(self.x)
+        W = chainer.Variable(self.W)
+        with chainer.using_config('use_ideep', 'never'):
+            y_expect = functions.convolution_2d(x, W, pad=1)
+            with chainer.using_config('autotune', True):
+                y = functions.convolution_2d(x, W, pad=1)
+        testing.assert_allclose(y.array, y_expect.array, atol=1e-5, rtol=1e-5)
+        self.assertEqual(
+            sorted(key[0] for key in convolution_2d_cpu._tuned_algorithms),
+            ['forward'])
+
+        def f(x, W):
+            return functions.convolution_2d(x, W, pad=1)
+
+        gy = numpy.random.uniform(-1, 1, y.shape).astype(numpy.float32)
+        with chainer.using_config('use_ideep', 'never'), \
+                chainer.using_config('autotune', True):
+            gradient_check.check_backward(
+                f, (self.x, self.W), gy, dtype=numpy.float64,
+                atol=1e-3, rtol=1e-3)
+        self.assertEqual(
+            sorted(set(key[0] for key in
+                       convolution_2d_cpu._tuned_algorithms)),
+            ['backward_data', 'forward'])
+
+
+testing.run_module(__name__, __file__)
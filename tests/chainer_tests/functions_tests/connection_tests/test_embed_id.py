@@ -128,4 +128,90 @@ class TestEmbedIdGrad(unittest.TestCase):
             cuda.to_gpu(self.x), cuda.to_gpu(self.gy), cuda.to_gpu(self.ggW))
 
 
+@testing.parameterize(
+    {'x_data': [0, 1, 0], 'ignore_label': None},
+    {'x_data': [[0, 1, 0], [1, 0, 1]], 'ignore_label': None},
+    {'x_data': [[0, 1, -1], [-1, 0, 1]], 'ignore_label': -1},
+)
+class TestEmbedIDSparseGrad(unittest.TestCase):
+
+    def setUp(self):
+        self.x = numpy.array(self.x_data, dtype='i')
+        self.W = numpy.random.uniform(-1, 1, (3, 2)).astype('f')
+        self.gy = numpy.random.uniform(
+            -1, 1, self.x.shape + (2,)).astype('f')
+
+    def backward(self, x_data, W, sparse_grad, enable_double_backprop=False):
+        y = chainer.functions.embed_id(
+            x_data, W, self.ignore_label, sparse_grad=sparse_grad)
+        y.grad = cuda.get_array_module(x_data).asarray(self.gy)
+        y.backward(enable_double_backprop=enable_double_backprop)
+
+    def check_sparse_grad(self, x_data, W_data):
+        W = chainer.Parameter(W_data)
+        self.backward(x_data, W, False)
+        expect = cuda.to_cpu(W.grad)
+
+        W.cleargrad()
+        self.backward(x_data, W, True)
+        self.assertIsNone(W.grad)
+        self.assertIsInstance(W.sparse_grad, chainer.utils.SparseRows)
+        testing.assert_allclose(W.sparse_grad.to_dense(), expect)
+
+        # Sparse gradients are accumulated.
+        self.backward(x_data, W, True)
+        testing.assert_allclose(W.sparse_grad.to_dense(), expect * 2)
+        W.densify_grad()
+        self.assertIsNone(W.sparse_grad)
+        testing.assert_allclose(W.grad, expect * 2)
+
+    def test_sparse_grad_cpu(self):
+        self.check_sparse_grad(self.x, self.W)
+
+    @attr.gpu
+    def test_sparse_grad_gpu(self):
+        self.check_sparse_grad(cuda.to_gpu(self.x), cuda.to_gpu(self.W))
+
+    def test_double_backprop(self):
+        # The gradient is dense if it can be differentiated again.
+        W = chainer.Parameter(self.W)
+        self.backward(self.x, W, True, enable_double_backprop=True)
+        self.assertIsNone(W.sparse_grad)
+        self.assertIsNotNone(W.grad)
+
+    def test_grad(self):
+        # chainer.grad returns the dense gradient.
+        W = chainer.Parameter(self.W)
+        self.backward(self.x, W, False)
+        y = chainer.functions.embed_id(
+            self.x, W, self.ignore_label, sparse_grad=True)
+        gW, = chainer.grad([y], [W], grad_outputs=[self.gy])
+        self.assertIsNone(W.sparse_grad)
+        testing.assert_allclose(gW.array, W.grad)
+
+    def update_with_loss_scale(self, sparse_grad):
+        link = chainer.Link()
+        with link.init_scope():
+            link.W = chainer.Parameter(self.W.copy())
+        optimizer = chainer.optimizers.SGD()
+        optimizer.setup(link)
+        y = chainer.functions.embed_id(
+            self.x, link.W, self.ignore_label, sparse_grad=sparse_grad)
+        chainer.functions.sum(y * self.gy).backward(loss_scale=128)
+        optimizer.update()
+        return link.W.array
+
+    def test_loss_scale(self):
+        # The sparse gradient is divided by the loss scale on update.
+        testing.assert_allclose(
+            self.update_with_loss_scale(True),
+            self.update_with_loss_scale(False))
+
+    def test_variable(self):
+        # Only parameters can have sparse gradients.
+        W = chainer.Variable(self.W)
+        self.backward(self.x, W, True)
+        self.assertIsNotNone(W.grad)
+
+
 testing.run_module(__name__, __file__)
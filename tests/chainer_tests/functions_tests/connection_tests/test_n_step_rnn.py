@@ -471,4 +471,182 @@ class TestNStepBiRNN(unittest.TestCase):
         self.check_call_cudnn_backward('auto')
 
 
+_n_step_funcs = {
+    'rnn_tanh': functions.n_step_rnn,
+    'rnn_relu': functions.n_step_rnn,
+    'gru': functions.n_step_gru,
+    'lstm': functions.n_step_lstm,
+}
+
+_n_step_bi_funcs = {
+    'rnn_tanh': functions.n_step_birnn,
+    'rnn_relu': functions.n_step_birnn,
+    'gru': functions.n_step_bigru,
+    'lstm': functions.n_step_bilstm,
+}
+
+
+@testing.parameterize(*testing.product({
+    'rnn_mode': ['rnn_tanh', 'rnn_relu', 'gru', 'lstm'],
+    'use_bi_direction': [False, True],
+    'dtype': [numpy.float32, numpy.float64],
+}))
+class TestNStepRNNCPU(unittest.TestCase):
+
+    batches = [4, 4, 2, 1]
+    in_size = 3
+    out_size = 2
+    n_layers = 2
+
+    def setUp(self):
+        n_dir = 2 if self.use_bi_direction else 1
+        n_W = {'rnn_tanh': 2, 'rnn_relu': 2, 'gru': 6,
+               'lstm': 8}[self.rnn_mode]
+        self.n_W = n_W
+        h_shape = (self.n_layers * n_dir, self.batches[0], self.out_size)
+        self.hx = _shaped_random(h_shape, self.dtype)
+        self.cx = _shaped_random(h_shape, self.dtype)
+        self.xs = [_shaped_random((b, self.in_size), self.dtype)
+                   for b in self.batches]
+        self.ws = []
+        self.bs = []
+        for layer in range(self.n_layers):
+            for di in range(n_dir):
+                weights = []
+                biases = []
+                for j in range(n_W):
+                    if j >= n_W // 2:
+                        w_in = self.out_size
+                    elif layer == 0:
+                        w_in = self.in_size
+                    else:
+                        w_in = self.out_size * n_dir
+                    weights.append(_shaped_random(
+                        (self.out_size, w_in), self.dtype))
+                    biases.append(_shaped_random(
+                        (self.out_size,), self.dtype))
+                self.ws.append(weights)
+                self.bs.append(biases)
+
+        self.dhy = _shaped_random(h_shape, self.dtype)
+        self.dcy = _shaped_random(h_shape, self.dtype)
+        self.dys = [_shaped_random((b, self.out_size * n_dir), self.dtype)
+                    for b in self.batches]
+
+    def call(self, hx, cx, ws, bs, xs, dropout=0.):
+        if self.use_bi_direction:
+            func = _n_step_bi_funcs[self.rnn_mode]
+        else:
+            func = _n_step_funcs[self.rnn_mode]
+        if self.rnn_mode == 'lstm':
+            return func(self.n_layers, dropout, hx, cx, ws, bs, xs)
+        if self.rnn_mode.startswith('rnn'):
+            hy, ys = func(self.n_layers, dropout, hx, ws, bs, xs,
+                          activation=self.rnn_mode[4:])
+        else:
+            hy, ys = func(self.n_layers, dropout, hx, ws, bs, xs)
+        return hy, None, ys
+
+    def call_graph(self, hx, cx, ws, bs, xs):
+        # Reference implementation building the graph of each step.
+        if self.rnn_mode == 'lstm':
+            f = chainer.functions.connection.n_step_lstm._lstm
+        elif self.rnn_mode == 'gru':
+            f = chainer.functions.connection.n_step_gru._gru
+        else:
+            activation = getattr(functions, self.rnn_mode[4:])
+
+            def f(x, h, c, w, b):
+                return activation(functions.linear(x, w[0], b[0]) +
+                                  functions.linear(h, w[1], b[1])), None
+        if self.rnn_mode != 'lstm':
+            cx = None
+        return chainer.functions.connection.n_step_rnn.n_step_rnn_impl(
+            f, self.n_layers, 0., hx, cx, ws, bs, xs, self.use_bi_direction)
+
+    def test_forward(self):
+        hy, cy, ys = self.call(self.hx, self.cx, self.ws, self.bs, self.xs)
+        e_hy, e_cy, e_ys = self.call_graph(
+            self.hx, self.cx, self.ws, self.bs, self.xs)
+        self.assertEqual(len(ys), len(e_ys))
+        testing.assert_allclose(hy.array, e_hy.array)
+        if self.rnn_mode == 'lstm':
+            testing.assert_allclose(cy.array, e_cy.array)
+        for y, e_y in zip(ys, e_ys):
+            testing.assert_allclose(y.array, e_y.array)
+
+    def test_no_graph_per_step(self):
+        hy, cy, ys = self.call(self.hx, self.cx, self.ws, self.bs, self.xs)
+        self.assertIsInstance(
+            hy.creator, chainer.functions.connection.n_step_rnn.NStepRNNCPU)
+        self.assertIs(ys[0].creator, hy.creator)
+
+    def check_backward(self, dropout, double=False):
+        use_cell = self.rnn_mode == 'lstm'
+        n_cells = len(self.ws)
+        n_params = n_cells * self.n_W
+        args = tuple(
+            [self.hx] + ([self.cx] if use_cell else []) +
+            sum(self.ws, []) + sum(self.bs, []) + self.xs)
+        grads = tuple(
+            [self.dhy] + ([self.dcy] if use_cell else []) + self.dys)
+
+        def f(*inputs):
+            # Uses the same dropout masks in all the calls.
+            numpy.random.seed(0)
+            if use_cell:
+                (hx, cx), inputs = _split(inputs, 2)
+            else:
+                (hx,), inputs = _split(inputs, 1)
+                cx = None
+            ws, inputs = _split(inputs, n_params)
+            bs, xs = _split(inputs, n_params)
+            ws = [ws[i:i + self.n_W] for i in range(0, n_params, self.n_W)]
+            bs = [bs[i:i + self.n_W] for i in range(0, n_params, self.n_W)]
+            hy, cy, ys = self.call(hx, cx, ws, bs, xs, dropout)
+            if use_cell:
+                return (hy, cy) + tuple(ys)
+            return (hy,) + tuple(ys)
+
+        if self.dtype == numpy.float64:
+            options = {'eps': 1e-4, 'rtol': 1e-4, 'atol': 1e-4}
+        else:
+            options = {'eps': 1e-2, 'rtol': 1e-2, 'atol': 1e-2}
+        with chainer.using_config('train', dropout > 0):
+            if double:
+                grad_grads = tuple(
+                    [_shaped_random(x.shape, self.dtype) for x in args])
+                # The gradients are checked in double precision with a small
+                # step, which rarely crosses the kinks of ReLU.
+                options = {'eps': 1e-4, 'rtol': 1e-4, 'atol': 1e-4}
+                gradient_check.check_double_backward(
+                    f, args, grads, grad_grads, dtype=numpy.float64,
+                    **options)
+            else:
+                gradient_check.check_backward(
+                    f, args, grads, dtype=numpy.float64, **options)
+
+    def test_backward(self):
+        self.check_backward(0.)
+
+    def test_backward_dropout(self):
+        self.check_backward(0.5)
+
+    def test_double_backward(self):
+        # The graph of each step is built when the gradients are
+        # differentiated again.
+        self.check_backward(0., double=True)
+
+    def test_double_backward_dropout(self):
+        self.check_backward(0.5, double=True)
+
+    def test_dropout_inference(self):
+        with chainer.using_config('train', False):
+            hy, cy, ys = self.call(
+                self.hx, self.cx, self.ws, self.bs, self.xs, 0.5)
+        e_hy, e_cy, e_ys = self.call_graph(
+            self.hx, self.cx, self.ws, self.bs, self.xs)
+        testing.assert_allclose(hy.array, e_hy.array)
+
+
 testing.run_module(__name__, __file__)
@@ -138,6 +138,58 @@ class TestNegativeSamplingFunction(unittest.TestCase):
             make_sampler(cuda.cupy, self.label_size))
 
 
+@testing.parameterize(*testing.product({
+    't': [[0, 2], [-1, 1, 2]],
+    'reduce': ['sum', 'no'],
+}))
+class TestNegativeSamplingSparseGrad(unittest.TestCase):
+
+    in_size = 3
+    sample_size = 2
+    label_size = 5
+
+    def setUp(self):
+        batch = len(self.t)
+        self.x = numpy.random.uniform(
+            -1, 1, (batch, self.in_size)).astype(numpy.float32)
+        self.t = numpy.array(self.t).astype(numpy.int32)
+        self.w = numpy.random.uniform(
+            -1, 1, (self.label_size, self.in_size)).astype(numpy.float32)
+        g_shape = self.t.shape if self.reduce == 'no' else ()
+        self.gy = numpy.random.uniform(-1, 1, g_shape).astype(numpy.float32)
+
+    def backward(self, x, t_data, w, sampler, sparse_grad):
+        y = functions.negative_sampling(
+            x, t_data, w, sampler, self.sample_size, reduce=self.reduce,
+            sparse_grad=sparse_grad)
+        y.grad = cuda.get_array_module(t_data).asarray(self.gy)
+        y.backward()
+
+    def check_sparse_grad(self, x_data, t_data, w_data, sampler):
+        x = chainer.Variable(x_data)
+        w = chainer.Parameter(w_data)
+        self.backward(x, t_data, w, sampler, False)
+        gx_expect = cuda.to_cpu(x.grad)
+        gw_expect = cuda.to_cpu(w.grad)
+
+        x.cleargrad()
+        w.cleargrad()
+        self.backward(x, t_data, w, sampler, True)
+        self.assertIsNone(w.grad)
+        testing.assert_allclose(x.grad, gx_expect)
+        testing.assert_allclose(w.sparse_grad.to_dense(), gw_expect)
+
+    def test_sparse_grad_cpu(self):
+        self.check_sparse_grad(
+            self.x, self.t, self.w, make_sampler(numpy, self.label_size))
+
+    @attr.gpu
+    def test_sparse_grad_gpu(self):
+        self.check_sparse_grad(
+            cuda.to_gpu(self.x), cuda.to_gpu(self.t), cuda.to_gpu(self.w),
+            make_sampler(cuda.cupy, self.label_size))
+
+
 class TestNegativeSamplingInvalidReductionOption(unittest.TestCase):
 
     def setUp(self):
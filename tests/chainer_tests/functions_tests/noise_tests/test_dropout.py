@@ -1,12 +1,15 @@
 import unittest
 
+import mock
 import numpy
 
+import chainer
 from chainer.backends import cuda
 from chainer import functions
 from chainer import gradient_check
 from chainer import testing
 from chainer.testing import backend
+from chainer.utils import counter_rng
 
 
 @testing.parameterize(
@@ -129,4 +132,52 @@ class TestDropout(unittest.TestCase):
         self.check_immutable(self.inputs, backend_config)
 
 
+@testing.parameterize(*testing.product({
+    'recompute': [True, False],
+}))
+class TestDropoutMask(unittest.TestCase):
+
+    def setUp(self):
+        self.x = numpy.random.uniform(-1, 1, (3, 4)).astype(numpy.float32)
+        self.gy = numpy.random.uniform(-1, 1, (3, 4)).astype(numpy.float32)
+        self.key = counter_rng.new_key()
+
+    def forward_backward(self):
+        x = chainer.Variable(self.x)
+        with mock.patch('chainer.utils.counter_rng.new_key',
+                        return_value=self.key):
+            y = functions.dropout(x, 0.5)
+        y.grad = self.gy
+        y.backward()
+        return y, x.grad
+
+    def test_recompute(self):
+        with chainer.using_config('recompute_dropout_mask', self.recompute):
+            y, gx = self.forward_backward()
+        flag = counter_rng.bernoulli(numpy, self.key, self.x.shape, 0.5)
+        testing.assert_allclose(y.array, self.x * flag * 2)
+        testing.assert_allclose(gx, self.gy * flag * 2)
+
+        # Only the boolean flags or the key is kept.
+        dropout = y.creator
+        self.assertEqual(dropout._flag._array is None, self.recompute)
+        self.assertEqual(dropout.mask.dtype, numpy.float32)
+        testing.assert_allclose(dropout.mask, flag * 2)
+
+    def test_reuse_mask(self):
+        y, _ = self.forward_backward()
+        mask = y.creator.mask
+
+        # A mask set explicitly is used in both forward and backward.
+        dropout = functions.noise.dropout.Dropout(0.5)
+        dropout.mask = mask
+        x = chainer.Variable(self.x)
+        y2, = dropout.apply((x,))
+        y2.grad = self.gy
+        y2.backward()
+        self.assertIs(dropout.mask, mask)
+        testing.assert_allclose(y2.array, y.array)
+        testing.assert_allclose(x.grad, self.gy * mask)
+
+
 testing.run_module(__name__, __file__)
@@ -1,5 +1,6 @@
 import unittest
 
+import mock
 import numpy
 
 import chainer
@@ -8,6 +9,7 @@ from chainer import functions
 from chainer import gradient_check
 from chainer import testing
 from chainer.testing import attr
+from chainer.utils import counter_rng
 
 
 @testing.parameterize(*testing.product({
@@ -172,4 +174,43 @@ class TestSimplifiedDropconnect(unittest.TestCase):
             cuda.to_gpu(self.ggW), None)
 
 
+@testing.parameterize(*testing.product({
+    'recompute': [True, False],
+    'use_batchwise_mask': [True, False],
+}))
+class TestSimplifiedDropconnectMask(unittest.TestCase):
+
+    def test_recompute(self):
+        x = chainer.Variable(
+            numpy.random.uniform(-1, 1, (4, 3)).astype(numpy.float32))
+        W = chainer.Variable(
+            numpy.random.uniform(-1, 1, (2, 3)).astype(numpy.float32))
+        gy = numpy.random.uniform(-1, 1, (4, 2)).astype(numpy.float32)
+        key = counter_rng.new_key()
+        with chainer.using_config('recompute_dropout_mask', self.recompute), \
+                mock.patch('chainer.utils.counter_rng.new_key',
+                           return_value=key):
+            y = functions.simplified_dropconnect(
+                x, W, ratio=0.5, use_batchwise_mask=self.use_batchwise_mask)
+            y.grad = gy
+            y.backward()
+
+        if self.use_batchwise_mask:
+            shape = (4, 2, 3)
+        else:
+            shape = (2, 3)
+        mask = counter_rng.bernoulli(numpy, key, shape, 0.5)
+        self.assertEqual(y.creator._flag._array is None, self.recompute)
+        numpy.testing.assert_array_equal(y.creator.mask, mask)
+
+        W_masked = numpy.broadcast_to(W.array * mask * 2, (4, 2, 3))
+        testing.assert_allclose(
+            y.array, numpy.einsum('ijk,ik->ij', W_masked, x.array))
+        testing.assert_allclose(
+            x.grad, numpy.einsum('ij,ijk->ik', gy, W_masked))
+        testing.assert_allclose(
+            W.grad, numpy.einsum('ij,ik,ijk->jk', gy, x.array,
+                                 numpy.broadcast_to(mask, (4, 2, 3))) * 2)
+
+
 testing.run_module(__name__, __file__)
@@ -9,6 +9,7 @@ from chainer import functions
 from chainer import gradient_check
 from chainer import testing
 from chainer.testing import attr
+from chainer.utils import counter_rng
 
 
 def _zoneout(h, x, creator):
@@ -62,18 +63,16 @@ class TestZoneout(unittest.TestCase):
 
     def check_double_backward(
             self, h_data, x_data, y_grad, h_grad_grad, x_grad_grad):
-        xp = cuda.get_array_module(h_data)
-        flag_x = xp.random.rand(*x_data.shape)
+        key = counter_rng.new_key()
 
         def f(h, x):
             # As forward computation is executed multiple times in
-            # check_double_backward, use a fixed flag.
-            xp_str = 'numpy' if xp is numpy else 'cupy'
+            # check_double_backward, use a fixed key of the flag.
             with mock.patch(
-                    '{}.random.rand'.format(xp_str),
-                    return_value=flag_x) as mock_rand:
+                    'chainer.utils.counter_rng.new_key',
+                    return_value=key) as mock_new_key:
                 y = functions.zoneout(h, x, self.ratio)
-                mock_rand.assert_called_once_with(*x.shape)
+                mock_new_key.assert_called_once_with()
             return y * y
 
         gradient_check.check_double_backward(
@@ -109,4 +108,30 @@ class TestZoneout(unittest.TestCase):
             cuda.to_gpu(self.ggx))
 
 
+@testing.parameterize(*testing.product({
+    'recompute': [True, False],
+}))
+class TestZoneoutMask(unittest.TestCase):
+
+    def test_recompute(self):
+        h = chainer.Variable(
+            numpy.random.uniform(-1, 1, (3, 4)).astype(numpy.float32))
+        x = chainer.Variable(
+            numpy.random.uniform(-1, 1, (3, 4)).astype(numpy.float32))
+        gy = numpy.random.uniform(-1, 1, (3, 4)).astype(numpy.float32)
+        key = counter_rng.new_key()
+        with chainer.using_config('recompute_dropout_mask', self.recompute), \
+                mock.patch('chainer.utils.counter_rng.new_key',
+                           return_value=key):
+            y = functions.zoneout(h, x, 0.5)
+            y.grad = gy
+            y.backward()
+
+        flag = counter_rng.bernoulli(numpy, key, (3, 4), 0.5)
+        testing.assert_allclose(y.array, numpy.where(flag, x.array, h.array))
+        testing.assert_allclose(h.grad, gy * ~flag)
+        testing.assert_allclose(x.grad, gy * flag)
+        self.assertEqual(y.creator._flag._array is None, self.recompute)
+
+
 testing.run_module(__name__, __file__)
@@ -0,0 +1,133 @@
+import functools
+import operator
+import unittest
+
+import mock
+import numpy
+import six
+
+from chainer.functions.pooling import pooling_cpu
+from chainer import testing
+from chainer.utils import conv_nd
+
+
+def _im2col(x, ksize, stride, pad, pval, cover_all):
+    col = conv_nd.im2col_nd_cpu(
+        x, ksize, stride, pad, pval=pval, cover_all=cover_all)
+    n, c = col.shape[:2]
+    outs = col.shape[2 + len(ksize):]
+    return col.reshape((n, c, -1) + outs)
+
+
+@testing.parameterize(*testing.product({
+    'params': [
+        # (dims, ksize, stride, pad)
+        ((7, 9), (3, 3), (2, 2), (1, 1)),
+        ((6, 8), (2, 2), (2, 2), (0, 0)),
+        ((5, 6), (2, 3), (1, 2), (0, 1)),
+        ((7,), (3,), (1,), (1,)),
+        ((5, 6, 4), (2, 2, 3), (2, 1, 2), (1, 0, 1)),
+    ],
+    'cover_all': [True, False],
+    'dtype': [numpy.float16, numpy.float32, numpy.float64],
+    'tile_bytes': [1, pooling_cpu._TILE_BYTES],
+}))
+class TestPoolingCPU(unittest.TestCase):
+
+    def setUp(self):
+        self.dims, self.ksize, self.stride, self.pad = self.params
+        # Distinct values make the maxima unique.
+        shape = (2, 3) + self.dims
+        size = functools.reduce(operator.mul, shape)
+        x = numpy.random.permutation(size).reshape(shape)
+        self.x = (2. * x / size - 1).astype(self.dtype)
+        self.patch = mock.patch.object(
+            pooling_cpu, '_TILE_BYTES', self.tile_bytes)
+        self.patch.start()
+
+    def tearDown(self):
+        self.patch.stop()
+
+    def test_max_pooling(self):
+        col = _im2col(self.x, self.ksize, self.stride, self.pad,
+                      -float('inf'), self.cover_all)
+        y, indexes = pooling_cpu.max_pooling_forward(
+            self.x, self.ksize, self.stride, self.pad, self.cover_all)
+        self.assertEqual(y.dtype, self.dtype)
+        self.assertEqual(indexes.dtype, numpy.uint8)
+        numpy.testing.assert_array_equal(y, col.max(axis=2))
+        numpy.testing.assert_array_equal(indexes, col.argmax(axis=2))
+
+        y_select = pooling_cpu.max_pooling_select(
+            self.x, indexes, self.ksize, self.stride, self.pad)
+        numpy.testing.assert_array_equal(y_select, y)
+
+    def test_max_pooling_backward(self):
+        y, indexes = pooling_cpu.max_pooling_forward(
+            self.x, self.ksize, self.stride, self.pad, self.cover_all)
+        gy = numpy.random.uniform(-1, 1, y.shape).astype(self.dtype)
+        gx = pooling_cpu.max_pooling_backward(
+            gy, indexes, self.x.shape, self.ksize, self.stride, self.pad)
+        self.assertEqual(gx.shape, self.x.shape)
+        self.assertEqual(gx.dtype, self.dtype)
+
+        # Scatters the gradients in the padded input one by one.
+        ndim = len(self.dims)
+        pad_width = [(0, 0), (0, 0)] + [
+            (p, s * out + k) for k, s, p, out in six.moves.zip(
+                self.ksize, self.stride, self.pad, y.shape[2:])]
+        expect = numpy.pad(numpy.zeros(self.x.shape), pad_width, 'constant')
+        for i in numpy.ndindex(*y.shape):
+            offset = numpy.unravel_index(indexes[i], self.ksize)
+            pos = tuple(j * s + k for j, s, k in six.moves.zip(
+                i[2:], self.stride, offset))
+            expect[i[:2] + pos] += gy[i]
+        expect = expect[(Ellipsis,) + tuple(
+            slice(p, p + d) for p, d in six.moves.zip(self.pad, self.dims))]
+        self.assertEqual(expect.ndim, ndim + 2)
+        numpy.testing.assert_allclose(gx, expect, atol=1e-3, rtol=1e-3)
+
+    def test_average_pooling(self):
+        col = _im2col(self.x, self.ksize, self.stride, self.pad, 0,
+                      self.cover_all)
+        y = pooling_cpu.average_pooling_forward(
+            self.x, self.ksize, self.stride, self.pad, self.cover_all)
+        self.assertEqual(y.dtype, self.dtype)
+        numpy.testing.assert_allclose(
+            y, col.mean(axis=2), atol=1e-3, rtol=1e-3)
+
+    def test_average_pooling_backward(self):
+        y = pooling_cpu.average_pooling_forward(
+            self.x, self.ksize, self.stride, self.pad, self.cover_all)
+        gy = numpy.random.uniform(-1, 1, y.shape).astype(self.dtype)
+        gx = pooling_cpu.average_pooling_backward(
+            gy, self.x.shape, self.ksize, self.stride, self.pad)
+        self.assertEqual(gx.dtype, self.dtype)
+
+        ndim = len(self.dims)
+        gcol = numpy.tile(
+            gy[(slice(None), slice(None)) + (None,) * ndim],
+            (1, 1) + self.ksize + (1,) * ndim)
+        gcol /= functools.reduce(operator.mul, self.ksize)
+        expect = conv_nd.col2im_nd_cpu(gcol, self.stride, self.pad, self.dims)
+        numpy.testing.assert_allclose(gx, expect, atol=1e-3, rtol=1e-3)
+
+
+class TestIndexDtype(unittest.TestCase):
+
+    def test_index_dtype(self):
+        self.assertEqual(pooling_cpu.index_dtype((16, 16)), numpy.uint8)
+        self.assertEqual(pooling_cpu.index_dtype((16, 17)), numpy.uint16)
+        self.assertEqual(pooling_cpu.index_dtype((256, 256)), numpy.uint16)
+        self.assertEqual(pooling_cpu.index_dtype((256, 257)), numpy.int32)
+
+    def test_large_window(self):
+        x = numpy.random.uniform(-1, 1, (1, 2, 20, 20)).astype(numpy.float32)
+        y, indexes = pooling_cpu.max_pooling_forward(
+            x, (20, 20), (1, 1), (0, 0), False)
+        self.assertEqual(indexes.dtype, numpy.uint16)
+        numpy.testing.assert_array_equal(
+            indexes.ravel(), x.reshape(2, -1).argmax(axis=1))
+
+
+testing.run_module(__name__, __file__)
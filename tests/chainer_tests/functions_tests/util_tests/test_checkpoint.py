@@ -0,0 +1,154 @@
+import unittest
+
+import numpy
+import six
+
+import chainer
+from chainer import functions
+from chainer import links
+from chainer import testing
+
+
+class Block(chainer.Chain):
+
+    def __init__(self, dropout):
+        super(Block, self).__init__()
+        self.dropout = dropout
+        with self.init_scope():
+            self.l = links.Linear(4, 4)
+            self.bn = links.BatchNormalization(4)
+
+    def __call__(self, x):
+        h = functions.relu(self.bn(self.l(x)))
+        if self.dropout:
+            h = functions.dropout(h, 0.5)
+        return h
+
+
+@testing.parameterize(*testing.product({
+    'dropout': [False, True],
+    'train': [True, False],
+}))
+class TestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Block(self.dropout)
+        self.ref = Block(self.dropout)
+        self.ref.copyparams(self.model)
+        self.model.cleargrads()
+        self.ref.cleargrads()
+        self.x = numpy.random.uniform(-1, 1, (5, 4)).astype(numpy.float32)
+        self.gy = numpy.random.uniform(-1, 1, (5, 4)).astype(numpy.float32)
+
+    def check(self, call):
+        x = chainer.Variable(self.x)
+        x_ref = chainer.Variable(self.x)
+        with chainer.using_config('train', self.train):
+            numpy.random.seed(0)
+            y = call(x)
+            numpy.random.seed(0)
+            y_ref = self.ref(x_ref)
+        testing.assert_allclose(y.array, y_ref.array)
+
+        y.grad = self.gy
+        y_ref.grad = self.gy
+        # Backprop under a different mode must not change the recomputation.
+        with chainer.using_config('train', not self.train):
+            y.backward()
+        y_ref.backward()
+
+        testing.assert_allclose(x.grad, x_ref.grad)
+        for p, p_ref in zip(self.model.params(), self.ref.params()):
+            testing.assert_allclose(p.grad, p_ref.grad)
+        testing.assert_allclose(self.model.bn.avg_mean, self.ref.bn.avg_mean)
+        testing.assert_allclose(self.model.bn.avg_var, self.ref.bn.avg_var)
+
+    def test_link(self):
+        self.check(lambda x: functions.checkpoint(self.model, x))
+
+    def test_bound_method(self):
+        self.check(lambda x: functions.checkpoint(self.model.__call__, x))
+
+    def test_function_with_links(self):
+        self.check(lambda x: functions.checkpoint(
+            lambda h: self.model(h), x, links=self.model))
+
+    def test_single_node(self):
+        y = functions.checkpoint(self.model, self.x)
+        self.assertIsInstance(y.creator, functions.Checkpoint)
+
+
+class TestCheckpointTuple(unittest.TestCase):
+
+    def test_tuple_outputs(self):
+        l = links.Linear(3, 2)
+        l.cleargrads()
+        x = chainer.Variable(
+            numpy.random.uniform(-1, 1, (4, 3)).astype(numpy.float32))
+
+        def f(x):
+            h = l(x)
+            return h * 2, functions.sum(h)
+
+        a, b = functions.checkpoint(f, x, links=l)
+        functions.sum(b).backward()
+        gW = l.W.grad.copy()
+        gx = x.grad.copy()
+
+        l.cleargrads()
+        x.cleargrad()
+        a_ref, b_ref = f(x)
+        testing.assert_allclose(a.array, a_ref.array)
+        functions.sum(b_ref).backward()
+        testing.assert_allclose(gW, l.W.grad)
+        testing.assert_allclose(gx, x.grad)
+
+    def test_uninitialized_params(self):
+        l = links.Linear(None, 2)
+        y = functions.checkpoint(l, numpy.ones((4, 3), numpy.float32))
+        self.assertIsNotNone(l.W.array)
+        self.assertNotIsInstance(y.creator, functions.Checkpoint)
+
+    def test_not_callable(self):
+        with self.assertRaises(TypeError):
+            functions.checkpoint(1)
+
+    def test_invalid_output(self):
+        with six.assertRaisesRegex(self, RuntimeError, 'int'):
+            functions.checkpoint(lambda: 1)
+
+
+@testing.parameterize(*testing.product({
+    'segments': [1, 2, 3, 5],
+}))
+class TestCheckpointSequential(unittest.TestCase):
+
+    def test_sequential(self):
+        model = chainer.ChainList(*[Block(False) for _ in range(5)])
+        ref = chainer.ChainList(*[Block(False) for _ in range(5)])
+        ref.copyparams(model)
+        model.cleargrads()
+        ref.cleargrads()
+        x_data = numpy.random.uniform(-1, 1, (5, 4)).astype(numpy.float32)
+
+        x = chainer.Variable(x_data)
+        y = functions.checkpoint_sequential(list(model), self.segments, x)
+        h = chainer.Variable(x_data)
+        for l in ref:
+            h = l(h)
+        testing.assert_allclose(y.array, h.array)
+
+        functions.sum(y).backward()
+        functions.sum(h).backward()
+        for p, p_ref in zip(model.params(), ref.params()):
+            testing.assert_allclose(p.grad, p_ref.grad)
+        for l, l_ref in zip(model, ref):
+            testing.assert_allclose(l.bn.avg_mean, l_ref.bn.avg_mean)
+            testing.assert_allclose(l.bn.avg_var, l_ref.bn.avg_var)
+
+    def test_invalid_segments(self):
+        with self.assertRaises(ValueError):
+            functions.checkpoint_sequential([], 0, None)
+
+
+testing.run_module(__name__, __file__)
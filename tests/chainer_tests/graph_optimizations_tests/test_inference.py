@@ -0,0 +1,135 @@
+import unittest
+
+import mock
+import numpy
+
+import chainer
+from chainer import functions
+from chainer import links
+from chainer import testing
+
+
+class Model(chainer.Chain):
+
+    def __init__(self):
+        super(Model, self).__init__()
+        with self.init_scope():
+            self.l1 = links.Linear(3, 4)
+            self.bn = links.BatchNormalization(4)
+            self.l2 = links.Linear(4, 2)
+
+    def __call__(self, x):
+        h = functions.relu(self.bn(self.l1(x)))
+        h = functions.dropout(h)
+        return functions.sigmoid(self.l2(h * h + h))
+
+
+class TupleModel(Model):
+
+    def __call__(self, x, y):
+        h = self.l1(x)
+        v = functions.reshape(h, (-1,))
+        return functions.relu(h), v + y
+
+
+class IdentityModel(chainer.Link):
+
+    def __call__(self, x):
+        return functions.relu(x)
+
+
+@testing.parameterize(*testing.product({
+    'fuse_elementwise': [False, True],
+}))
+class TestInference(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Model()
+        self.model.bn.avg_mean[...] = numpy.random.uniform(-1, 1, 4)
+        self.model.bn.avg_var[...] = numpy.random.uniform(0.5, 1, 4)
+        self.run = chainer.inference(
+            self.model, fuse_elementwise=self.fuse_elementwise)
+
+    def expect(self, model, *args):
+        with chainer.using_config('train', False), \
+                chainer.no_backprop_mode():
+            return model(*args)
+
+    def test_forward(self):
+        for n in (5, 5, 2, 5):
+            x = numpy.random.uniform(-1, 1, (n, 3)).astype(numpy.float32)
+            y = self.run(x)
+            self.assertIs(type(y), numpy.ndarray)
+            testing.assert_allclose(y, self.expect(self.model, x).array)
+
+    def test_variable_input(self):
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        self.run(x)
+        y = self.run(chainer.Variable(x))
+        testing.assert_allclose(y, self.expect(self.model, x).array)
+
+    def test_no_graph_on_replay(self):
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        self.run(x)
+        with mock.patch.object(chainer.FunctionNode, 'apply',
+                               side_effect=AssertionError), \
+                mock.patch.object(chainer.variable.VariableNode, '__init__',
+                                  side_effect=AssertionError):
+            self.run(x)
+
+    def test_param_update(self):
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        self.run(x)
+        self.model.l2.W.array *= 2
+        testing.assert_allclose(
+            self.run(x), self.expect(self.model, x).array)
+        self.model.l2.W.array = self.model.l2.W.array * 2
+        testing.assert_allclose(
+            self.run(x), self.expect(self.model, x).array)
+
+    def test_tuple_output(self):
+        model = TupleModel()
+        run = chainer.inference(model, self.fuse_elementwise)
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        y = numpy.random.uniform(-1, 1, (20,)).astype(numpy.float32)
+        for _ in range(2):
+            h, v = run(x, y)
+            h_expect, v_expect = self.expect(model, x, y)
+            # v is computed from the array overwritten by ReLU if it were
+            # done in place.
+            testing.assert_allclose(h, h_expect.array)
+            testing.assert_allclose(v, v_expect.array)
+
+    def test_input_not_overwritten(self):
+        run = chainer.inference(IdentityModel(), self.fuse_elementwise)
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        x_copy = x.copy()
+        for _ in range(2):
+            y = run(x)
+            numpy.testing.assert_array_equal(x, x_copy)
+            numpy.testing.assert_array_equal(y, numpy.maximum(x, 0))
+
+    def test_clear(self):
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        self.run(x)
+        self.model.bn.avg_mean = self.model.bn.avg_mean + 1
+        self.run.clear()
+        testing.assert_allclose(
+            self.run(x), self.expect(self.model, x).array)
+
+
+class InvalidModel(chainer.Link):
+
+    def __call__(self, x):
+        return x.array
+
+
+class TestInferenceInvalid(unittest.TestCase):
+
+    def test_invalid_output(self):
+        run = chainer.inference(InvalidModel())
+        with self.assertRaises(TypeError):
+            run(numpy.ones((2, 3), numpy.float32))
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,172 @@
+import unittest
+
+import numpy
+
+import chainer
+from chainer import functions
+from chainer import graph_optimizations
+from chainer import links
+from chainer import testing
+
+
+class DeepMLP(chainer.ChainList):
+
+    def __init__(self, n_layers):
+        super(DeepMLP, self).__init__(
+            *[links.Linear(8, 8) for _ in range(n_layers)])
+
+    def __call__(self, x):
+        h = x
+        for link in self:
+            h = functions.tanh(link(h))
+        return functions.sum(h * h)
+
+
+class DeepPredictor(chainer.ChainList):
+
+    def __init__(self, n_layers):
+        super(DeepPredictor, self).__init__(
+            *[links.Linear(8, 8) for _ in range(n_layers)])
+
+    def __call__(self, x):
+        h = x
+        for link in self:
+            h = functions.tanh(link(h))
+        return h
+
+
+@testing.parameterize(*testing.product({
+    'n_layers': [1, 4],
+    'use_grad': [False, True],
+}))
+class TestBackwardMemoryPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.model = DeepMLP(self.n_layers)
+        self.x = numpy.random.uniform(-1, 1, (5, 8)).astype(numpy.float32)
+
+    def backward(self, x):
+        loss = self.model(x)
+        if self.use_grad:
+            params = list(self.model.params())
+            return chainer.grad([loss], [x] + params)
+        self.model.cleargrads()
+        x.cleargrad()
+        loss.backward()
+        return [x.grad_var] + [p.grad_var for p in self.model.params()]
+
+    def test_gradients(self):
+        expect = self.backward(chainer.Variable(self.x))
+        with graph_optimizations.BackwardMemoryPlanner() as planner:
+            actual = self.backward(chainer.Variable(self.x))
+        for e, a in zip(expect, actual):
+            testing.assert_allclose(e.array, a.array)
+
+        report = planner.report()
+        self.assertEqual(report['n_backward'], 1)
+        self.assertGreater(report['released_bytes'], 0)
+        self.assertGreaterEqual(report['saved_bytes'], 0)
+        self.assertEqual(
+            report['saved_bytes'],
+            report['baseline_peak_bytes'] - report['planned_peak_bytes'])
+
+    def test_backward_twice(self):
+        x = chainer.Variable(self.x)
+        loss = self.model(x)
+        with graph_optimizations.BackwardMemoryPlanner():
+            loss.backward()
+        with self.assertRaises(RuntimeError):
+            loss.backward()
+
+    def test_double_backprop_is_not_planned(self):
+        x = chainer.Variable(self.x)
+        loss = self.model(x)
+        with graph_optimizations.BackwardMemoryPlanner() as planner:
+            loss.backward(enable_double_backprop=True)
+        self.assertEqual(planner.report()['n_backward'], 0)
+        # The graph is kept intact.
+        loss.backward()
+
+
+class TestPlanBackwardMemory(unittest.TestCase):
+
+    def test_saved_bytes(self):
+        # Each array is 400 bytes.
+        x = chainer.Variable(numpy.ones((10, 10), numpy.float32))
+        ws = [chainer.Variable(numpy.ones((10, 10), numpy.float32))
+              for _ in range(3)]
+        h = x
+        for w in ws:
+            h = functions.tanh(h + w)
+        loss = functions.sum(h)
+        del h
+
+        plan = graph_optimizations.plan_backward_memory(loss)
+        # Without the plan, the three retained outputs of tanh are alive
+        # until the gradients w.r.t. all the leaves are computed. With the
+        # plan, they are released while the leaf gradients are accumulated.
+        self.assertEqual(plan.baseline_peak_bytes, 400 * 3 + 400 * 5 + 4)
+        self.assertEqual(plan.planned_peak_bytes, 400 * 5 + 4)
+        self.assertEqual(plan.saved_bytes, 400 * 3)
+        self.assertEqual(plan.released_bytes, 0)
+
+    def test_live_variable_is_not_released(self):
+        x = chainer.Variable(numpy.ones((10, 10), numpy.float32))
+        h = functions.tanh(x)
+        loss = functions.sum(functions.tanh(h))
+        with graph_optimizations.BackwardMemoryPlanner():
+            loss.backward()
+        self.assertIsNotNone(h.node.data)
+        self.assertIsNotNone(x.grad)
+
+    def test_shared_input_is_not_released(self):
+        x = chainer.Variable(
+            numpy.random.uniform(-1, 1, (10, 10)).astype(numpy.float32))
+        h = functions.tanh(x)
+        y1 = functions.sum(functions.sin(h))
+        y2 = functions.sum(functions.cos(h))
+        del h
+        y1.backward()
+        y2.backward()
+        expect = x.grad.copy()
+
+        x.cleargrad()
+        with graph_optimizations.BackwardMemoryPlanner() as planner:
+            y1.backward()
+        # The arrays retained by tanh and used by cos are kept for the
+        # backprop from y2.
+        y2.backward()
+        testing.assert_allclose(x.grad, expect)
+        self.assertEqual(planner.report()['released_bytes'], 0)
+
+    def test_dead_consumer(self):
+        x = chainer.Variable(
+            numpy.random.uniform(-1, 1, (10, 10)).astype(numpy.float32))
+        h = functions.tanh(x)
+        y1 = functions.sum(functions.sin(h))
+        y2 = functions.sum(functions.cos(h))
+        del h, y2
+        # The graph of y2 is gone, so the arrays are released.
+        with graph_optimizations.BackwardMemoryPlanner() as planner:
+            y1.backward()
+        self.assertGreater(planner.report()['released_bytes'], 0)
+
+    def check_classifier(self, compute_accuracy):
+        model = links.Classifier(DeepPredictor(3))
+        model.compute_accuracy = compute_accuracy
+        x = numpy.random.uniform(-1, 1, (5, 8)).astype(numpy.float32)
+        t = numpy.random.randint(0, 3, (5,)).astype(numpy.int32)
+        loss = model(x, t)
+        with graph_optimizations.BackwardMemoryPlanner() as planner:
+            loss.backward()
+        return planner.report()['released_bytes']
+
+    def test_classifier(self):
+        # The accuracy is not differentiable, so the arrays of the graph
+        # taken by it are released as well.
+        released = self.check_classifier(True)
+        self.assertGreater(released, 0)
+        self.assertEqual(released, self.check_classifier(False))
+
+
+testing.run_module(__name__, __file__)
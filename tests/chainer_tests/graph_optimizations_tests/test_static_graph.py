@@ -0,0 +1,286 @@
+import unittest
+
+import numpy
+
+import chainer
+from chainer import functions
+from chainer.graph_optimizations.elementwise_fusion import FusedElementwise
+from chainer.graph_optimizations.static_graph import StaticScheduleFunction
+from chainer import links
+from chainer import testing
+
+
+class MLP(chainer.Chain):
+
+    def __init__(self):
+        super(MLP, self).__init__()
+        with self.init_scope():
+            self.l1 = links.Linear(3, 4)
+            self.l2 = links.Linear(4, 2)
+
+    def forward(self, x):
+        h = functions.relu(self.l1(x))
+        return self.l2(h * h + h)
+
+
+class StaticMLP(MLP):
+
+    @chainer.static_graph
+    def __call__(self, x):
+        return self.forward(x)
+
+
+class TupleMLP(MLP):
+
+    @chainer.static_graph
+    def __call__(self, x, y):
+        h = self.forward(x)
+        return h, functions.tanh(h) + y
+
+
+@testing.parameterize(*testing.product({
+    'n_iters': [1, 3],
+}))
+class TestStaticGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.model = StaticMLP()
+        self.ref = MLP()
+        self.ref.copyparams(self.model)
+
+    def check_iteration(self, x):
+        y = self.model(x)
+        y_ref = self.ref.forward(x)
+        testing.assert_allclose(y.data, y_ref.data)
+
+        self.model.cleargrads()
+        self.ref.cleargrads()
+        functions.sum(y * y).backward()
+        functions.sum(y_ref * y_ref).backward()
+        for p, p_ref in zip(self.model.params(), self.ref.params()):
+            testing.assert_allclose(p.grad, p_ref.grad)
+
+    def test_forward_backward(self):
+        with testing.assert_warns(FutureWarning):
+            for _ in range(self.n_iters):
+                x = numpy.random.uniform(
+                    -1, 1, (5, 3)).astype(numpy.float32)
+                self.check_iteration(x)
+                for p, p_ref in zip(self.model.params(), self.ref.params()):
+                    p.data -= 0.1 * p.grad
+                    p_ref.data -= 0.1 * p_ref.grad
+
+    def test_input_grad(self):
+        with testing.assert_warns(FutureWarning):
+            for _ in range(self.n_iters):
+                x_data = numpy.random.uniform(
+                    -1, 1, (5, 3)).astype(numpy.float32)
+                x = chainer.Variable(x_data)
+                x_ref = chainer.Variable(x_data)
+                y = self.model(x)
+                functions.sum(y).backward()
+                functions.sum(self.ref.forward(x_ref)).backward()
+                testing.assert_allclose(x.grad, x_ref.grad)
+
+    def test_no_backprop_mode(self):
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        with testing.assert_warns(FutureWarning):
+            for _ in range(self.n_iters):
+                with chainer.no_backprop_mode():
+                    y = self.model(x)
+                self.assertIsNone(y.creator)
+                testing.assert_allclose(y.data, self.ref.forward(x).data)
+
+
+class TestStaticGraphSchedules(unittest.TestCase):
+
+    def test_schedule_per_shape(self):
+        model = StaticMLP()
+        with testing.assert_warns(FutureWarning):
+            model(numpy.zeros((5, 3), numpy.float32))
+            model(numpy.zeros((5, 3), numpy.float32))
+            model(numpy.zeros((2, 3), numpy.float32))
+            with chainer.using_config('train', False):
+                model(numpy.zeros((2, 3), numpy.float32))
+        self.assertEqual(len(model._static_schedules), 3)
+
+    def test_schedule_per_backprop_mode(self):
+        model = StaticMLP()
+        ref = MLP()
+        ref.copyparams(model)
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        with testing.assert_warns(FutureWarning):
+            with chainer.no_backprop_mode():
+                model(x)
+                model(x)
+            model(x)
+            y = model(x)
+        self.assertEqual(len(model._static_schedules), 2)
+        functions.sum(y).backward()
+        functions.sum(ref.forward(x)).backward()
+        for p, p_ref in zip(model.params(), ref.params()):
+            testing.assert_allclose(p.grad, p_ref.grad)
+
+    def test_replay_is_single_node(self):
+        model = StaticMLP()
+        x = numpy.zeros((5, 3), numpy.float32)
+        with testing.assert_warns(FutureWarning):
+            model(x)
+            y = model(x)
+        self.assertIsInstance(y.creator, StaticScheduleFunction)
+
+    def test_tuple_outputs(self):
+        model = TupleMLP()
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        y = numpy.random.uniform(-1, 1, (5, 2)).astype(numpy.float32)
+        with testing.assert_warns(FutureWarning):
+            expect = model(x, y)
+            actual = model(x, y)
+        self.assertIsInstance(actual, tuple)
+        self.assertEqual(len(actual), 2)
+        for e, a in zip(expect, actual):
+            testing.assert_allclose(e.data, a.data)
+
+    def test_nested_capture(self):
+        class Outer(chainer.Chain):
+
+            def __init__(self):
+                super(Outer, self).__init__()
+                with self.init_scope():
+                    self.inner = StaticMLP()
+
+            @chainer.static_graph
+            def __call__(self, x):
+                return functions.sigmoid(self.inner(x))
+
+        model = Outer()
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        with testing.assert_warns(FutureWarning):
+            expect = model(x)
+            actual = model(x)
+        self.assertFalse(hasattr(model.inner, '_static_schedules'))
+        testing.assert_allclose(expect.data, actual.data)
+
+
+class DropoutMLP(MLP):
+
+    @chainer.static_graph
+    def __call__(self, x):
+        return functions.dropout(self.l1(x), 0.5)
+
+
+class DropconnectMLP(chainer.Chain):
+
+    def __init__(self):
+        super(DropconnectMLP, self).__init__()
+        with self.init_scope():
+            self.l1 = links.SimplifiedDropconnect(3, 4, 0.5)
+
+    @chainer.static_graph
+    def __call__(self, x):
+        return self.l1(x)
+
+
+@testing.parameterize(
+    {'model': DropoutMLP},
+    {'model': DropconnectMLP},
+)
+class TestStaticGraphRandom(unittest.TestCase):
+
+    def test_new_mask_per_replay(self):
+        model = self.model()
+        x = numpy.random.uniform(1, 2, (20, 3)).astype(numpy.float32)
+        with testing.assert_warns(FutureWarning):
+            ys = []
+            for _ in range(3):
+                y = model(x)
+                functions.sum(y).backward()
+                ys.append(y.array)
+        # The masks of the capture and the replays are different.
+        self.assertFalse(numpy.array_equal(ys[0], ys[1]))
+        self.assertFalse(numpy.array_equal(ys[1], ys[2]))
+
+
+class GateMLP(chainer.Chain):
+
+    def __init__(self):
+        super(GateMLP, self).__init__()
+        with self.init_scope():
+            self.l1 = links.Linear(3, 8)
+            self.l2 = links.Linear(2, 2)
+
+    def forward(self, x, c):
+        a, i, f, o = functions.split_axis(self.l1(x), 4, 1)
+        c = functions.tanh(a) * functions.sigmoid(i) + \
+            functions.sigmoid(f) * c
+        h = functions.relu(o) * functions.tanh(c)
+        # ``c`` is used both in the second run and by a non-element-wise
+        # function, and the second run contains constants.
+        y = functions.exp(-self.l2(h) * 0.5 + 1) - (2 - c) * h
+        return y, c
+
+
+class FusedGateMLP(GateMLP):
+
+    @chainer.static_graph(fuse_elementwise=True)
+    def __call__(self, x, c):
+        return self.forward(x, c)
+
+
+@testing.parameterize(*testing.product({
+    'n_iters': [1, 3],
+}))
+class TestStaticGraphElementwiseFusion(unittest.TestCase):
+
+    def setUp(self):
+        self.model = FusedGateMLP()
+        self.ref = GateMLP()
+        self.ref.copyparams(self.model)
+
+    def test_forward_backward(self):
+        with testing.assert_warns(FutureWarning):
+            for _ in range(self.n_iters):
+                x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+                c_data = numpy.random.uniform(
+                    -1, 1, (5, 2)).astype(numpy.float32)
+                c = chainer.Variable(c_data)
+                c_ref = chainer.Variable(c_data)
+
+                y, c_new = self.model(x, c)
+                y_ref, c_new_ref = self.ref.forward(x, c_ref)
+                testing.assert_allclose(y.array, y_ref.array)
+                testing.assert_allclose(c_new.array, c_new_ref.array)
+
+                self.model.cleargrads()
+                self.ref.cleargrads()
+                functions.sum(y * y + c_new).backward()
+                functions.sum(y_ref * y_ref + c_new_ref).backward()
+                testing.assert_allclose(c.grad, c_ref.grad)
+                for p, p_ref in zip(self.model.params(), self.ref.params()):
+                    testing.assert_allclose(p.grad, p_ref.grad)
+
+    def test_no_backprop_mode(self):
+        x = numpy.random.uniform(-1, 1, (5, 3)).astype(numpy.float32)
+        c = numpy.random.uniform(-1, 1, (5, 2)).astype(numpy.float32)
+        with testing.assert_warns(FutureWarning):
+            for _ in range(self.n_iters):
+                with chainer.no_backprop_mode():
+                    y, c_new = self.model(x, c)
+                y_ref, c_new_ref = self.ref.forward(x, c)
+                testing.assert_allclose(y.array, y_ref.array)
+                testing.assert_allclose(c_new.array, c_new_ref.array)
+
+    def test_fused_entries(self):
+        x = numpy.zeros((5, 3), numpy.float32)
+        c = numpy.zeros((5, 2), numpy.float32)
+        with testing.assert_warns(FutureWarning):
+            self.model(x, c)
+        schedule, = self.model._static_schedules.values()
+        fused = [entry.func for entry in schedule.entries
+                 if isinstance(entry.func, FusedElementwise)]
+        self.assertEqual(len(fused), 2)
+        self.assertEqual(len(fused[0].ops), 9)
+        self.assertEqual(len(fused[1].ops), 7)
+
+
+testing.run_module(__name__, __file__)
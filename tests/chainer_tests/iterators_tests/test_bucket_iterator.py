@@ -0,0 +1,163 @@
+from __future__ import division
+import unittest
+
+import numpy
+
+from chainer import iterators
+from chainer import serializer
+from chainer import testing
+
+
+class DummySerializer(serializer.Serializer):
+
+    def __init__(self, target):
+        super(DummySerializer, self).__init__()
+        self.target = target
+
+    def __getitem__(self, key):
+        raise NotImplementedError
+
+    def __call__(self, key, value):
+        self.target[key] = value
+        return self.target[key]
+
+
+class DummyDeserializer(serializer.Deserializer):
+
+    def __init__(self, target):
+        super(DummyDeserializer, self).__init__()
+        self.target = target
+
+    def __getitem__(self, key):
+        raise NotImplementedError
+
+    def __call__(self, key, value):
+        if value is None:
+            value = self.target[key]
+        elif isinstance(value, numpy.ndarray):
+            numpy.copyto(value, self.target[key])
+        else:
+            value = type(value)(numpy.asarray(self.target[key]))
+        return value
+
+
+def _make_dataset(n=50):
+    lengths = numpy.random.randint(1, 40, n)
+    return [numpy.full(length, i) for i, length in enumerate(lengths)]
+
+
+@testing.parameterize(*testing.product({
+    'shuffle': [False, True],
+    'batch_size': [None, 4],
+    'max_tokens': [None, 60],
+    'boundaries': [None, [10, 20, 30]],
+}))
+class TestBucketIterator(unittest.TestCase):
+
+    def setUp(self):
+        if self.batch_size is None and self.max_tokens is None:
+            self.batch_size = 3
+        self.dataset = _make_dataset()
+
+    def make_iterator(self, repeat=True):
+        return iterators.BucketIterator(
+            self.dataset, self.batch_size, max_tokens=self.max_tokens,
+            boundaries=self.boundaries, repeat=repeat, shuffle=self.shuffle)
+
+    def bucket(self, x):
+        if self.boundaries is None:
+            return 0
+        return numpy.searchsorted(self.boundaries, len(x), side='right')
+
+    def check_batch(self, batch):
+        self.assertIsInstance(batch, list)
+        if self.batch_size is not None:
+            self.assertLessEqual(len(batch), self.batch_size)
+        max_length = max([len(x) for x in batch])
+        if self.max_tokens is not None and len(batch) > 1:
+            self.assertLessEqual(max_length * len(batch), self.max_tokens)
+        self.assertEqual(len(set([self.bucket(x) for x in batch])), 1)
+
+    def test_iterator_repeat(self):
+        it = self.make_iterator()
+        for epoch in range(3):
+            seen = []
+            while True:
+                self.assertAlmostEqual(
+                    it.epoch_detail, epoch + len(seen) / len(self.dataset))
+                batch = it.next()
+                self.check_batch(batch)
+                seen.extend([int(x[0]) for x in batch])
+                if it.is_new_epoch:
+                    break
+            self.assertEqual(it.epoch, epoch + 1)
+            self.assertEqual(sorted(seen), list(range(len(self.dataset))))
+
+    def test_iterator_not_repeat(self):
+        it = self.make_iterator(repeat=False)
+        seen = []
+        for batch in it:
+            self.check_batch(batch)
+            seen.extend([int(x[0]) for x in batch])
+        self.assertEqual(sorted(seen), list(range(len(self.dataset))))
+        self.assertRaises(StopIteration, it.next)
+
+    def test_padding_reduced(self):
+        if self.boundaries is not None:
+            return
+        it = self.make_iterator(repeat=False)
+        padded = sum([max([len(x) for x in batch]) * len(batch)
+                      for batch in it])
+        total = sum([len(x) for x in self.dataset])
+        # Sorted by lengths, each batch is padded to a close length.
+        self.assertLess(padded, total * 1.5)
+
+    def test_iterator_serialize(self):
+        it = self.make_iterator()
+        batches = [it.next() for _ in range(3)]
+        target = {}
+        it.serialize(DummySerializer(target))
+        expect = [it.next() for _ in range(5)]
+
+        it = self.make_iterator()
+        it.serialize(DummyDeserializer(target))
+        self.assertAlmostEqual(
+            it.previous_epoch_detail,
+            sum([len(b) for b in batches[:2]]) / len(self.dataset))
+        actual = [it.next() for _ in range(5)]
+        for b1, b2 in zip(expect, actual):
+            self.assertEqual(len(b1), len(b2))
+            for x1, x2 in zip(b1, b2):
+                numpy.testing.assert_array_equal(x1, x2)
+
+
+class TestBucketIteratorKey(unittest.TestCase):
+
+    def test_key_function(self):
+        dataset = [(numpy.arange(n), 0) for n in [3, 1, 2, 1]]
+        it = iterators.BucketIterator(
+            dataset, 2, key=lambda x: len(x[0]), shuffle=False, repeat=False)
+        self.assertEqual([[len(x[0]) for x in batch] for batch in it],
+                         [[1, 1], [2, 3]])
+
+    def test_key_lengths(self):
+        dataset = ['a', 'b', 'c', 'd']
+        it = iterators.BucketIterator(
+            dataset, 2, key=[4, 1, 3, 2], shuffle=False, repeat=False)
+        self.assertEqual(list(it), [['b', 'd'], ['c', 'a']])
+
+    def test_long_example(self):
+        dataset = [numpy.arange(n) for n in [10, 2, 2]]
+        it = iterators.BucketIterator(
+            dataset, max_tokens=4, shuffle=False, repeat=False)
+        self.assertEqual([[len(x) for x in batch] for batch in it],
+                         [[2, 2], [10]])
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            iterators.BucketIterator([[1]], None)
+        with self.assertRaises(ValueError):
+            iterators.BucketIterator([[1]], 1, key=[1, 2])
+
+
+testing.run_module(__name__, __file__)
@@ -13,6 +13,7 @@ import unittest
 import numpy
 import six
 
+from chainer import dataset as dataset_module
 from chainer import iterators
 from chainer import serializer
 from chainer import testing
@@ -302,6 +303,79 @@ class TestMultiprocessIterator(unittest.TestCase):
         self.assertRaises(NotImplementedError, it.reset)
 
 
+@testing.parameterize(*testing.product({
+    'n_prefetch': [1, 2],
+}))
+class TestMultiprocessIteratorZeroCopy(unittest.TestCase):
+
+    def setUp(self):
+        self.options = {'n_processes': 2,
+                        'n_prefetch': self.n_prefetch,
+                        'shuffle': False,
+                        'zero_copy': True}
+
+    def test_concat_examples_without_copy(self):
+        dataset = [(numpy.full((2, 3), i, numpy.float32), i)
+                   for i in range(6)]
+        it = iterators.MultiprocessIterator(dataset, 3, **self.options)
+        for i in range(4):
+            batch = it.next()
+            x, t = dataset_module.concat_examples(batch, copy=False)
+            self.assertFalse(x.flags.writeable)
+            self.assertTrue(numpy.shares_memory(x, batch[0][0]))
+            self.assertTrue(numpy.shares_memory(x, batch[-1][0]))
+            expect = numpy.arange(3) + 3 * (i % 2)
+            numpy.testing.assert_array_equal(t, expect)
+            numpy.testing.assert_array_equal(
+                x, numpy.broadcast_to(expect[:, None, None], (3, 2, 3)))
+        it.finalize()
+
+    def test_dict_type(self):
+        dataset = [{'x': numpy.full((4,), i), 'y': numpy.int32(i)}
+                   for i in range(4)]
+        it = iterators.MultiprocessIterator(dataset, 2, **self.options)
+        for i in range(4):
+            batch = dataset_module.concat_examples(it.next())
+            expect = numpy.arange(2) + 2 * (i % 2)
+            numpy.testing.assert_array_equal(batch['y'], expect)
+            numpy.testing.assert_array_equal(batch['x'][:, 0], expect)
+        it.finalize()
+
+    def test_grow(self):
+        # The shape of the examples grows every four examples.
+        dataset = [numpy.full((i // 4 + 1,), i, numpy.float64)
+                   for i in range(12)]
+        it = iterators.MultiprocessIterator(dataset, 2, **self.options)
+        for i in range(12):
+            x = dataset_module.concat_examples(it.next())
+            j = 2 * i % 12
+            self.assertEqual(x.shape, (2, j // 4 + 1))
+            numpy.testing.assert_array_equal(x[:, 0], [j, j + 1])
+        it.finalize()
+
+    def test_different_shapes_in_batch(self):
+        dataset = [numpy.zeros((i + 1,)) for i in range(4)]
+        it = iterators.MultiprocessIterator(dataset, 2, **self.options)
+        for i in range(4):
+            batch = it.next()
+            self.assertEqual([len(x) for x in batch],
+                             [1 + 2 * (i % 2), 2 + 2 * (i % 2)])
+            x = dataset_module.concat_examples(batch, padding=-1)
+            self.assertEqual(x.shape, (2, 2 + 2 * (i % 2)))
+        it.finalize()
+
+    def test_not_repeat(self):
+        dataset = [numpy.full((3,), i) for i in range(5)]
+        it = iterators.MultiprocessIterator(
+            dataset, 2, repeat=False, **self.options)
+        values = []
+        for _ in range(3):
+            values.extend(dataset_module.concat_examples(it.next())[:, 0])
+        self.assertEqual(values, list(range(5)))
+        self.assertRaises(StopIteration, it.next)
+        it.finalize()
+
+
 @testing.parameterize(*testing.product({
     'n_prefetch': [1, 2],
     'shared_mem': [None, 1000000],
@@ -453,6 +527,7 @@ import os
 import random
 import sys
 import time
+from chainer import dataset as dataset_module
 from chainer import iterators
 
 # Using `multiprocessing` on Windows Python 2.7 requires
@@ -0,0 +1,233 @@
+from __future__ import division
+import threading
+import time
+import unittest
+
+import numpy
+
+from chainer import iterators
+from chainer import serializer
+from chainer import testing
+
+
+class DummySerializer(serializer.Serializer):
+
+    def __init__(self, target):
+        super(DummySerializer, self).__init__()
+        self.target = target
+
+    def __getitem__(self, key):
+        raise NotImplementedError
+
+    def __call__(self, key, value):
+        self.target[key] = value
+        return self.target[key]
+
+
+class DummyDeserializer(serializer.Deserializer):
+
+    def __init__(self, target):
+        super(DummyDeserializer, self).__init__()
+        self.target = target
+
+    def __getitem__(self, key):
+        raise NotImplementedError
+
+    def __call__(self, key, value):
+        if value is None:
+            value = self.target[key]
+        elif isinstance(value, numpy.ndarray):
+            numpy.copyto(value, self.target[key])
+        else:
+            value = type(value)(numpy.asarray(self.target[key]))
+        return value
+
+
+def _square(x):
+    return x * x
+
+
+def _add_one(x):
+    # Finishes in an order different from the indexes.
+    time.sleep(0.01 * (x % 3))
+    return x + 1
+
+
+def _fail(x):
+    if x == 3:
+        raise ValueError('invalid example')
+    return x
+
+
+class _UnpicklableError(Exception):
+
+    def __init__(self, x, y):
+        # Unpickling calls __init__ with only the message.
+        super(_UnpicklableError, self).__init__('{} {}'.format(x, y))
+
+
+def _fail_unpicklable(x):
+    if x == 3:
+        raise _UnpicklableError(x, x)
+    return x
+
+
+def _return_unpicklable(x):
+    if x == 3:
+        return threading.Lock()
+    return x
+
+
+@testing.parameterize(*testing.product({
+    'worker_type': ['thread', 'process'],
+    'n_prefetch': [0, 2],
+}))
+class TestPipelineIterator(unittest.TestCase):
+
+    def setUp(self):
+        self.stages = [
+            iterators.PipelineStage(
+                _square, n_workers=2, worker_type=self.worker_type),
+            iterators.PipelineStage(_add_one, n_workers=3, queue_size=2),
+        ]
+        self.options = {'stages': self.stages, 'n_prefetch': self.n_prefetch}
+
+    def test_iterator_repeat(self):
+        dataset = [1, 2, 3, 4, 5, 6]
+        it = iterators.PipelineIterator(
+            dataset, 4, shuffle=False, **self.options)
+        self.assertIsNone(it.previous_epoch_detail)
+        self.assertEqual(it.next(), [2, 5, 10, 17])
+        self.assertFalse(it.is_new_epoch)
+        self.assertAlmostEqual(it.epoch_detail, 4 / 6)
+        self.assertAlmostEqual(it.previous_epoch_detail, 0 / 6)
+        self.assertEqual(it.next(), [26, 37, 2, 5])
+        self.assertTrue(it.is_new_epoch)
+        self.assertEqual(it.epoch, 1)
+        self.assertAlmostEqual(it.epoch_detail, 8 / 6)
+        self.assertEqual(it.next(), [10, 17, 26, 37])
+        self.assertAlmostEqual(it.epoch_detail, 12 / 6)
+        it.finalize()
+
+    def test_iterator_shuffle(self):
+        dataset = list(range(10))
+        it = iterators.PipelineIterator(dataset, 3, **self.options)
+        out = sum([it.next() for _ in range(7)], [])
+        expect = sorted([i * i + 1 for i in dataset])
+        self.assertEqual(sorted(out[:10]), expect)
+        self.assertEqual(sorted(out[10:20]), expect)
+        self.assertNotEqual(out[:10], out[10:20])
+        it.finalize()
+
+    def test_iterator_not_repeat(self):
+        dataset = [1, 2, 3, 4, 5]
+        it = iterators.PipelineIterator(
+            dataset, 2, repeat=False, shuffle=False, **self.options)
+        self.assertEqual(it.next(), [2, 5])
+        self.assertEqual(it.next(), [10, 17])
+        self.assertEqual(it.next(), [26])
+        self.assertTrue(it.is_new_epoch)
+        for _ in range(2):
+            self.assertRaises(StopIteration, it.next)
+        it.reset()
+        self.assertEqual(it.next(), [2, 5])
+        it.finalize()
+
+    def test_reset_middle(self):
+        dataset = list(range(8))
+        it = iterators.PipelineIterator(
+            dataset, 3, repeat=False, **self.options)
+        for _ in range(3):
+            it.next()
+            it.reset()
+            out = sum([it.next() for _ in range(3)], [])
+            self.assertEqual(sorted(out), [i * i + 1 for i in dataset])
+            self.assertRaises(StopIteration, it.next)
+            it.reset()
+        it.finalize()
+
+    def test_error(self):
+        dataset = [1, 2, 3, 4]
+        stages = [iterators.PipelineStage(
+            _fail, n_workers=2, worker_type=self.worker_type)]
+        it = iterators.PipelineIterator(
+            dataset, 2, stages=stages, shuffle=False,
+            n_prefetch=self.n_prefetch)
+        self.assertEqual(it.next(), [1, 2])
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                it.next()
+            self.assertAlmostEqual(it.epoch_detail, 2 / 4)
+        it.finalize()
+
+
+@testing.parameterize(
+    {'func': _fail_unpicklable, 'error': Exception},
+    {'func': _return_unpicklable, 'error': RuntimeError},
+)
+class TestPipelineIteratorProcessError(unittest.TestCase):
+
+    def test_error(self):
+        # The errors of sending the results between the processes are also
+        # raised in the main process.
+        dataset = [1, 2, 3, 4]
+        stages = [iterators.PipelineStage(
+            self.func, n_workers=2, worker_type='process')]
+        it = iterators.PipelineIterator(
+            dataset, 2, stages=stages, shuffle=False)
+        self.assertEqual(it.next(), [1, 2])
+        for _ in range(2):
+            with self.assertRaises(self.error):
+                it.next()
+        it.finalize()
+
+
+class TestPipelineIteratorDefaultStage(unittest.TestCase):
+
+    def test_no_stages(self):
+        dataset = [(i, numpy.full((3,), i)) for i in range(4)]
+        it = iterators.PipelineIterator(dataset, 4, shuffle=False)
+        batch = it.next()
+        self.assertEqual([x[0] for x in batch], [0, 1, 2, 3])
+        it.finalize()
+
+    def test_invalid_worker_type(self):
+        with self.assertRaises(ValueError):
+            iterators.PipelineStage(_square, worker_type='fiber')
+
+
+@testing.parameterize(*testing.product({
+    'shuffle': [False, True],
+}))
+class TestPipelineIteratorSerialize(unittest.TestCase):
+
+    def test_iterator_serialize(self):
+        dataset = list(range(10))
+        stages = [iterators.PipelineStage(_add_one, n_workers=2)]
+        numpy.random.seed(0)
+        it = iterators.PipelineIterator(
+            dataset, 4, stages=stages, shuffle=self.shuffle, n_prefetch=2)
+        # The last batch ends at the end of the second epoch.
+        expect = [it.next() for _ in range(5)]
+        it.finalize()
+
+        numpy.random.seed(0)
+        it = iterators.PipelineIterator(
+            dataset, 4, stages=stages, shuffle=self.shuffle, n_prefetch=2)
+        actual = [it.next() for _ in range(3)]
+        target = {}
+        it.serialize(DummySerializer(target))
+        it.finalize()
+
+        it = iterators.PipelineIterator(
+            dataset, 4, stages=stages, shuffle=self.shuffle, n_prefetch=2)
+        it.serialize(DummyDeserializer(target))
+        self.assertAlmostEqual(it.epoch_detail, 12 / 10)
+        self.assertAlmostEqual(it.previous_epoch_detail, 8 / 10)
+        self.assertTrue(it.is_new_epoch)
+        actual += [it.next() for _ in range(2)]
+        it.finalize()
+        self.assertEqual(actual, expect)
+
+
+testing.run_module(__name__, __file__)
@@ -134,4 +134,121 @@ class TestOptimizerHooks(unittest.TestCase):
         self.assertNotEqual(h_pre.value, h_post.value)
 
 
+class FusedTestChain(chainer.Chain):
+
+    def __init__(self):
+        super(FusedTestChain, self).__init__()
+        with self.init_scope():
+            self.l1 = chainer.links.Linear(3, 4)
+            self.l2 = chainer.links.Linear(4, 2)
+            self.w = chainer.Parameter(
+                np.random.uniform(-1, 1, (2,)).astype(np.float32))
+
+    def __call__(self, x):
+        h = chainer.functions.tanh(self.l1(x))
+        y = self.l2(h) * chainer.functions.broadcast_to(self.w, (len(x), 2))
+        return chainer.functions.sum(y ** 2)
+
+
+@testing.parameterize(*testing.product({
+    'impl': [
+        optimizers.Adam,
+        optimizers.MomentumSGD,
+        optimizers.RMSprop,
+        optimizers.SGD,
+        optimizers.AdaGrad,
+    ],
+    'hook': [None, 'weight_decay', 'lasso', 'hard_clipping'],
+}))
+class TestFusedUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.target = FusedTestChain()
+        self.target_ref = FusedTestChain()
+        self.target_ref.copyparams(self.target)
+        self.x = np.random.uniform(-1, 1, (5, 3)).astype(np.float32)
+
+    def create(self, target):
+        opt = self.impl()
+        opt.setup(target)
+        if self.hook == 'weight_decay':
+            opt.add_hook(chainer.optimizer.WeightDecay(0.1))
+        elif self.hook == 'lasso':
+            opt.add_hook(chainer.optimizer.Lasso(0.1))
+        elif self.hook == 'hard_clipping':
+            opt.add_hook(chainer.optimizer.GradientHardClipping(-0.1, 0.1))
+        return opt
+
+    def test_fused_update(self):
+        opt = self.create(self.target)
+        opt.use_fused_update()
+        opt_ref = self.create(self.target_ref)
+        # Different hyperparameters are not fused with the others
+        self.target.w.update_rule.hyperparam.eps = 1e-4
+        self.target_ref.w.update_rule.hyperparam.eps = 1e-4
+
+        for _ in range(3):
+            opt.update(self.target, self.x)
+            opt_ref.update(self.target_ref, self.x)
+            for p, p_ref in zip(self.target.params(),
+                                self.target_ref.params()):
+                testing.assert_allclose(p.data, p_ref.data)
+                self.assertEqual(p.update_rule.t, p_ref.update_rule.t)
+                for name in p_ref.update_rule.state:
+                    testing.assert_allclose(p.update_rule.state[name],
+                                            p_ref.update_rule.state[name])
+        self.assertIsNotNone(self.target.flat_params)
+
+
+@testing.parameterize(*testing.product_dict(
+    [{'impl': optimizers.AdaGrad, 'kwargs': {}},
+     {'impl': optimizers.Adam, 'kwargs': {}},
+     {'impl': optimizers.Adam, 'kwargs': {'amsgrad': True}},
+     {'impl': optimizers.MomentumSGD, 'kwargs': {}},
+     {'impl': optimizers.SGD, 'kwargs': {}}],
+    [{'hook': None}, {'hook': 'weight_decay'}],
+))
+class TestSparseUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.target = chainer.Link()
+        self.target_ref = chainer.Link()
+        self.w = np.random.uniform(-1, 1, (6, 3)).astype(np.float32)
+        self.rows = np.array([4, 1, 4], dtype=np.int32)
+        with self.target.init_scope():
+            self.target.w = chainer.Parameter(self.w.copy())
+        # The lazy update is the dense update of the rows in the gradient.
+        with self.target_ref.init_scope():
+            self.target_ref.w = chainer.Parameter(self.w[[1, 4]])
+
+    def create(self, target):
+        opt = self.impl(**self.kwargs)
+        opt.setup(target)
+        if self.hook == 'weight_decay':
+            opt.add_hook(chainer.optimizer.WeightDecay(0.1))
+        return opt
+
+    def test_sparse_update(self):
+        opt = self.create(self.target)
+        opt_ref = self.create(self.target_ref)
+        w = self.target.w
+        w_ref = self.target_ref.w
+        for _ in range(3):
+            values = np.random.uniform(-1, 1, (3, 3)).astype(np.float32)
+            w.cleargrad()
+            w.add_sparse_grad(
+                chainer.utils.SparseRows(self.rows, values, (6, 3)))
+            w_ref.grad = np.stack((values[1], values[0] + values[2]))
+            opt.update()
+            opt_ref.update()
+
+            self.assertIsNone(w.grad)
+            testing.assert_allclose(w.data[[1, 4]], w_ref.data)
+            testing.assert_allclose(
+                w.data[[0, 2, 3, 5]], self.w[[0, 2, 3, 5]], atol=0, rtol=0)
+            for name, state in six.iteritems(w.update_rule.state):
+                testing.assert_allclose(
+                    state[[1, 4]], w_ref.update_rule.state[name])
+
+
 testing.run_module(__name__, __file__)
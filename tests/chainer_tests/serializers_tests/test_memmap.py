@@ -0,0 +1,187 @@
+import io
+import os
+import tempfile
+import unittest
+
+import numpy
+
+import chainer
+from chainer import links
+from chainer import optimizers
+from chainer import serializers
+from chainer import testing
+
+
+class Model(chainer.Chain):
+
+    def __init__(self, n_in=3):
+        super(Model, self).__init__()
+        with self.init_scope():
+            self.l1 = links.Linear(n_in, 4)
+            self.bn = links.BatchNormalization(4)
+
+    def __call__(self, x):
+        return self.bn(self.l1(x))
+
+
+class TestMemmap(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.model = Model()
+        self.model.bn.avg_mean[...] = numpy.random.uniform(size=4)
+        serializers.save_memmap(self.path, self.model)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def check_params(self, model):
+        for (_, p), (_, q) in zip(sorted(self.model.namedparams()),
+                                  sorted(model.namedparams())):
+            numpy.testing.assert_array_equal(p.array, q.array)
+        numpy.testing.assert_array_equal(
+            model.bn.avg_mean, self.model.bn.avg_mean)
+
+    def test_load(self):
+        model = Model()
+        serializers.load_memmap(self.path, model)
+        self.check_params(model)
+        for _, param in model.namedparams():
+            self.assertFalse(param.array.flags.writeable)
+        # Persistent values are copied.
+        self.assertTrue(model.bn.avg_mean.flags.writeable)
+
+    def test_load_uninitialized(self):
+        model = Model(None)
+        serializers.load_memmap(self.path, model)
+        self.check_params(model)
+        self.assertFalse(model.l1.W.array.flags.writeable)
+
+    def test_forward(self):
+        model = Model()
+        serializers.load_memmap(self.path, model)
+        x = numpy.random.uniform(size=(2, 3)).astype(numpy.float32)
+        with chainer.using_config('train', False):
+            numpy.testing.assert_array_equal(
+                model(x).array, self.model(x).array)
+
+    def test_load_different_dtype(self):
+        l1 = links.Linear(3, 4)
+        l1.W.array = l1.W.array.astype(numpy.float64)
+        serializers.load_memmap(self.path, l1, path='l1/')
+        self.assertEqual(l1.W.dtype, numpy.float64)
+        self.assertTrue(l1.W.array.flags.writeable)
+        numpy.testing.assert_array_equal(l1.W.array, self.model.l1.W.array)
+        self.assertFalse(l1.b.array.flags.writeable)
+
+    def test_load_path(self):
+        l1 = links.Linear(3, 4)
+        serializers.load_memmap(self.path, l1, path='l1/')
+        numpy.testing.assert_array_equal(l1.W.array, self.model.l1.W.array)
+
+    def test_strict(self):
+        serializers.save_memmap(self.path, self.model.l1)
+        with self.assertRaises(KeyError):
+            serializers.load_memmap(self.path, Model())
+        serializers.load_memmap(self.path, Model(), strict=False)
+
+    def test_file_object(self):
+        with open(self.path, 'wb') as f:
+            serializers.save_memmap(f, self.model)
+        model = Model()
+        serializers.load_memmap(self.path, model)
+        self.check_params(model)
+
+    def test_invalid_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'invalid file')
+        with self.assertRaises(ValueError):
+            serializers.load_memmap(self.path, Model())
+
+
+class TestMemmapAlignment(unittest.TestCase):
+
+    def test_alignment(self):
+        f = io.BytesIO()
+        target = {
+            'a': numpy.arange(3, dtype=numpy.int8),
+            'b': numpy.arange(5, dtype=numpy.float64),
+            'c': numpy.zeros((0, 2), dtype=numpy.float32),
+            'd': numpy.asarray(1.5),
+        }
+        serializers.save_memmap(f, _Dict(target))
+        fd, path = tempfile.mkstemp()
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                out.write(f.getvalue())
+            d = serializers.MemmapDeserializer(path)
+            for key, value in target.items():
+                array = d.arrays[key]
+                self.assertEqual(array.ctypes.data % 64, 0)
+                self.assertEqual(array.dtype, value.dtype)
+                numpy.testing.assert_array_equal(array, value)
+        finally:
+            os.remove(path)
+
+    def test_many_params(self):
+        # The offsets in the header have more digits than the size of the
+        # data alone, which makes the header longer.
+        for size in (15, 16):
+            model = chainer.ChainList(*[
+                links.Bias(shape=(size,)) for _ in range(150)])
+            for param in model.params():
+                param.array[...] = numpy.random.uniform(size=size)
+            fd, path = tempfile.mkstemp()
+            os.close(fd)
+            try:
+                serializers.save_memmap(path, model)
+                loaded = chainer.ChainList(*[
+                    links.Bias(shape=(size,)) for _ in range(150)])
+                serializers.load_memmap(path, loaded)
+                for p, q in zip(model.params(), loaded.params()):
+                    numpy.testing.assert_array_equal(p.array, q.array)
+                    self.assertEqual(q.array.ctypes.data % 64, 0)
+                del loaded
+            finally:
+                os.remove(path)
+
+
+class _Dict(object):
+
+    def __init__(self, target):
+        self.target = target
+
+    def serialize(self, serializer):
+        for key, value in self.target.items():
+            serializer(key, value)
+
+
+class TestMemmapOptimizer(unittest.TestCase):
+
+    def test_optimizer(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            model = Model()
+            optimizer = optimizers.Adam()
+            optimizer.setup(model)
+            model.cleargrads()
+            for p in model.params():
+                p.grad = numpy.ones_like(p.array)
+            optimizer.update()
+            serializers.save_memmap(path, optimizer)
+
+            model2 = Model()
+            optimizer2 = optimizers.Adam()
+            optimizer2.setup(model2)
+            serializers.load_memmap(path, optimizer2)
+            self.assertEqual(optimizer2.t, 1)
+            numpy.testing.assert_array_equal(
+                model2.l1.W.update_rule.state['m'],
+                model.l1.W.update_rule.state['m'])
+        finally:
+            os.remove(path)
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,121 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import chainer
+from chainer import links
+from chainer import optimizers
+from chainer import serializers
+from chainer import testing
+
+
+class Model(chainer.Chain):
+
+    def __init__(self):
+        super(Model, self).__init__()
+        with self.init_scope():
+            self.l1 = links.Linear(3, 4)
+            self.l2 = links.Linear(4, 2)
+            self.bn = links.BatchNormalization(2)
+
+
+def _shard_files(directory):
+    return sorted([name for name in os.listdir(directory)
+                   if name.startswith('shard_')])
+
+
+@testing.parameterize(*testing.product({
+    'n_shards': [1, 3],
+    'compression': [False, True],
+}))
+class TestShardedNpz(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.model = Model()
+        self.model.bn.avg_mean[...] = numpy.random.uniform(size=2)
+        self.optimizer = optimizers.Adam()
+        self.optimizer.setup(self.model)
+        self.model.cleargrads()
+        for p in self.model.params():
+            p.grad = numpy.ones_like(p.array)
+        self.optimizer.update()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def save(self, obj):
+        return serializers.save_sharded_npz(
+            self.dir, obj, n_shards=self.n_shards,
+            compression=self.compression)
+
+    def test_save_and_load(self):
+        written = self.save(self.model)
+        self.assertEqual(sorted(written), _shard_files(self.dir))
+        self.assertEqual(len(written), self.n_shards)
+
+        model = Model()
+        serializers.load_sharded_npz(self.dir, model)
+        for (name, p), (_, q) in zip(sorted(self.model.namedparams()),
+                                     sorted(model.namedparams())):
+            numpy.testing.assert_array_equal(p.array, q.array)
+        numpy.testing.assert_array_equal(
+            model.bn.avg_mean, self.model.bn.avg_mean)
+
+    def test_optimizer(self):
+        self.save(self.optimizer)
+        model = Model()
+        optimizer = optimizers.Adam()
+        optimizer.setup(model)
+        serializers.load_sharded_npz(self.dir, optimizer)
+        self.assertEqual(optimizer.t, 1)
+        numpy.testing.assert_array_equal(
+            optimizer.target.l1.W.update_rule.state['m'],
+            self.optimizer.target.l1.W.update_rule.state['m'])
+
+    def test_incremental(self):
+        self.save(self.model)
+        before = _shard_files(self.dir)
+        self.assertEqual(self.save(self.model), [])
+        self.assertEqual(_shard_files(self.dir), before)
+
+        self.model.l2.b.array[...] = 7
+        written = self.save(self.model)
+        self.assertEqual(len(written), 1)
+        after = _shard_files(self.dir)
+        self.assertEqual(len(after), self.n_shards)
+        self.assertEqual(len(set(before) - set(after)), 1)
+
+        model = Model()
+        serializers.load_sharded_npz(self.dir, model)
+        numpy.testing.assert_array_equal(model.l2.b.array, 7)
+
+    def test_load_path(self):
+        root = chainer.Chain()
+        with root.init_scope():
+            root.model = self.model
+        self.save(root)
+
+        l2 = links.Linear(4, 2)
+        serializers.load_sharded_npz(self.dir, l2, path='model/l2/')
+        numpy.testing.assert_array_equal(l2.W.array, self.model.l2.W.array)
+
+    def test_strict(self):
+        self.save(self.model.l1)
+        with self.assertRaises(KeyError):
+            serializers.load_sharded_npz(self.dir, Model())
+        model = Model()
+        serializers.load_sharded_npz(self.dir, model, strict=False)
+
+
+class TestShardedNpzInvalid(unittest.TestCase):
+
+    def test_invalid_n_shards(self):
+        with self.assertRaises(ValueError):
+            serializers.save_sharded_npz(tempfile.mkdtemp(), Model(), 0)
+
+
+testing.run_module(__name__, __file__)
@@ -1103,6 +1103,75 @@ class TestChainList(unittest.TestCase):
         mocks['1'].assert_called_with('x', l2.x.data)
 
 
+class TestFlatParams(unittest.TestCase):
+
+    def setUp(self):
+        self.link = chainer.Chain()
+        with self.link.init_scope():
+            self.link.l1 = chainer.Link()
+            self.link.l2 = chainer.Link()
+        with self.link.l1.init_scope():
+            self.link.l1.x = chainer.Parameter(
+                numpy.arange(6, dtype='f').reshape(2, 3))
+            self.link.l1.y = chainer.Parameter(
+                numpy.arange(2, dtype='d'))
+        with self.link.l2.init_scope():
+            self.link.l2.x = chainer.Parameter(
+                numpy.arange(4, dtype='f'))
+        self.link.l1.x.grad = numpy.ones((2, 3), dtype='f')
+
+    def test_flatten_params(self):
+        flat = self.link.flatten_params()
+        self.assertIs(self.link.flat_params, flat)
+        self.assertEqual(len(flat.buffers), 2)
+        buf_f, buf_d = flat.buffers
+        self.assertEqual(buf_f.dtype, numpy.float32)
+        self.assertEqual(buf_d.dtype, numpy.float64)
+
+        # Packed in the order of the sorted paths
+        numpy.testing.assert_array_equal(
+            buf_f.data, [0, 1, 2, 3, 4, 5, 0, 1, 2, 3])
+        numpy.testing.assert_array_equal(
+            buf_f.grad, [1, 1, 1, 1, 1, 1, 0, 0, 0, 0])
+        numpy.testing.assert_array_equal(buf_d.data, [0, 1])
+        self.assertTrue(flat.packed)
+
+        # Parameters refer to the buffers
+        self.link.l2.x.data[0] = 10
+        self.assertEqual(buf_f.data[6], 10)
+        buf_f.grad[:] = 2
+        numpy.testing.assert_array_equal(self.link.l1.x.grad, 2)
+
+    def test_uninitialized(self):
+        with self.link.l2.init_scope():
+            self.link.l2.z = chainer.Parameter()
+        with self.assertRaises(RuntimeError):
+            self.link.flatten_params()
+
+    def test_sync_grads(self):
+        flat = self.link.flatten_params()
+        buf_f = flat.buffers[0]
+        self.link.l1.x.grad = numpy.full((2, 3), 3, dtype='f')
+        self.link.l2.x.cleargrad()
+        flat.sync_grads()
+        numpy.testing.assert_array_equal(
+            buf_f.grad, [3, 3, 3, 3, 3, 3, 0, 0, 0, 0])
+        self.assertIs(self.link.l1.x.grad, buf_f.grad_views[0])
+        self.assertIs(self.link.l2.x.grad, buf_f.grad_views[1])
+
+    def test_repack_replaced_data(self):
+        flat = self.link.flatten_params()
+        self.link.l2.x.data = numpy.full(4, 7, dtype='f')
+        self.assertFalse(flat.packed)
+        flat.sync_grads()
+        self.assertTrue(flat.packed)
+        numpy.testing.assert_array_equal(flat.buffers[0].data[6:], 7)
+
+    def test_copy(self):
+        self.link.flatten_params()
+        self.assertIsNone(self.link.copy().flat_params)
+
+
 @attr.ideep
 class TestIntel64(unittest.TestCase):
 
@@ -488,6 +488,160 @@ class TestGradientHardClipping(unittest.TestCase):
         # here, the test has passed.
 
 
+@testing.parameterize(*testing.product({
+    'flatten': [False, True],
+}))
+class TestGradientClipping(unittest.TestCase):
+
+    def setUp(self):
+        self.target = chainer.ChainList(
+            SimpleLink(np.arange(6, dtype=np.float32).reshape(2, 3),
+                       np.arange(3, -3, -1, dtype=np.float32).reshape(2, 3)),
+            SimpleLink(np.arange(3, dtype=np.float32),
+                       np.arange(3, dtype=np.float32)))
+        if self.flatten:
+            self.target.flatten_params()
+
+    def check_clipping(self, threshold):
+        grads = [p.grad.copy() for p in self.target.params()]
+        norm = np.sqrt(sum([float((g * g).sum()) for g in grads]))
+        rate = min(1, threshold / norm)
+        expects = [p.data - g * rate
+                   for p, g in zip(self.target.params(), grads)]
+
+        opt = optimizers.SGD(lr=1)
+        opt.setup(self.target)
+        opt.add_hook(optimizer.GradientClipping(threshold))
+        opt.update()
+
+        for p, expect in zip(self.target.params(), expects):
+            testing.assert_allclose(expect, p.data)
+
+    def test_clipping(self):
+        self.check_clipping(1.)
+
+    def test_no_clipping(self):
+        self.check_clipping(100.)
+
+
+class TestSparseGrad(unittest.TestCase):
+
+    def setUp(self):
+        self.w = np.arange(12, dtype=np.float32).reshape(4, 3)
+        self.target = chainer.ChainList(
+            SimpleLink(self.w.copy(), None),
+            SimpleLink(np.arange(3, dtype=np.float32),
+                       np.ones(3, dtype=np.float32)))
+        self.param = self.target[0].param
+        self.rows = np.array([2, 0, 2], dtype=np.int32)
+        self.values = np.arange(9, dtype=np.float32).reshape(3, 3) - 4
+        self.g = np.zeros((4, 3), dtype=np.float32)
+        np.add.at(self.g, self.rows, self.values)
+        self.param.add_sparse_grad(
+            chainer.utils.SparseRows(self.rows, self.values, (4, 3)))
+
+    def test_lazy_update(self):
+        opt = optimizers.SGD(lr=1)
+        opt.setup(self.target)
+        opt.update()
+        testing.assert_allclose(self.param.data, self.w - self.g)
+        self.assertIsNone(self.param.grad)
+        self.assertTrue(self.param.sparse_grad.coalesced)
+
+    def test_weight_decay(self):
+        decay = 0.2
+        expect = self.w - self.g
+        expect[[0, 2]] -= decay * self.w[[0, 2]]
+
+        opt = optimizers.SGD(lr=1)
+        opt.setup(self.target)
+        opt.add_hook(optimizer.WeightDecay(decay))
+        opt.update()
+        testing.assert_allclose(self.param.data, expect)
+
+    def test_unsupported_hook(self):
+        decay = 0.2
+        expect = self.w - self.g - decay * np.sign(self.w)
+
+        opt = optimizers.SGD(lr=1)
+        opt.setup(self.target)
+        opt.add_hook(optimizer.Lasso(decay))
+        opt.update()
+        testing.assert_allclose(self.param.data, expect)
+        self.assertIsNone(self.param.sparse_grad)
+
+    def test_unsupported_update_rule(self):
+        expect = SimpleLink(self.w.copy(), self.g)
+        opt = optimizers.RMSprop()
+        opt.setup(expect)
+        opt.update()
+
+        opt = optimizers.RMSprop()
+        opt.setup(self.target)
+        opt.update()
+        testing.assert_allclose(self.param.data, expect.param.data)
+        self.assertIsNone(self.param.sparse_grad)
+
+    def test_gradient_clipping(self):
+        threshold = 1.
+        g1 = self.target[1].param.grad.copy()
+        norm = np.sqrt(float((self.g * self.g).sum() + (g1 * g1).sum()))
+        rate = threshold / norm
+        w1 = self.target[1].param.data - g1 * rate
+
+        opt = optimizers.SGD(lr=1)
+        opt.setup(self.target)
+        opt.add_hook(optimizer.GradientClipping(threshold))
+        opt.update()
+        testing.assert_allclose(self.param.data, self.w - self.g * rate)
+        testing.assert_allclose(self.target[1].param.data, w1)
+        self.assertIsNone(self.param.grad)
+
+    def test_loss_scale(self):
+        self.param._loss_scale = 4.
+        opt = optimizers.SGD(lr=1)
+        opt.setup(self.target)
+        opt.update()
+        testing.assert_allclose(self.param.data, self.w - self.g / 4)
+
+    def test_flat_params(self):
+        flat = self.target.flatten_params()
+        opt = optimizers.SGD(lr=1)
+        opt.setup(self.target)
+        opt.update()
+        testing.assert_allclose(self.param.data, self.w - self.g)
+        self.assertIsNone(self.param.sparse_grad)
+        self.assertIs(self.param.grad, flat.buffers[0].grad_views[0])
+
+    def test_cleargrad(self):
+        self.param.cleargrad()
+        self.assertIsNone(self.param.sparse_grad)
+
+
+class TestGradientMethodFlatParams(unittest.TestCase):
+
+    def setUp(self):
+        self.target = chainer.ChainList(
+            SimpleLink(np.arange(3).astype(np.float32),
+                       np.arange(3).astype(np.float32)),
+            SimpleLink(np.arange(2).astype(np.float32),
+                       np.arange(2).astype(np.float32)))
+        self.flat = self.target.flatten_params()
+
+    def test_update_with_new_grads(self):
+        opt = optimizers.SGD(lr=1)
+        opt.setup(self.target)
+        self.target[0].param.grad = np.ones(3, np.float32)
+        self.target[1].param.cleargrad()
+        opt.update()
+
+        buf, = self.flat.buffers
+        np.testing.assert_array_equal(buf.grad, [1, 1, 1, 0, 0])
+        np.testing.assert_array_equal(buf.data, [-1, 0, 1, 0, 1])
+        self.assertIs(self.target[0].param.grad, buf.grad_views[0])
+        self.assertIs(self.target[1].param.data, buf.data_views[1])
+
+
 class TestGradientMethod(unittest.TestCase):
 
     def setUp(self):
@@ -120,6 +120,18 @@ class TestKeepGraphOnReportFlag(unittest.TestCase):
         self.assertIsNone(reporter.observation['y'].creator)
 
 
+class TestReportAsArrayFlag(unittest.TestCase):
+
+    def test_report_as_array(self):
+        x = chainer.Variable(numpy.array([1], numpy.float32))
+        y, = functions.Sigmoid().apply((x,))
+        reporter = chainer.Reporter()
+        with chainer.using_config('report_as_array', True):
+            reporter.report({'y': y, 'z': 1.})
+        self.assertIs(reporter.observation['y'], y.array)
+        self.assertEqual(reporter.observation['z'], 1.)
+
+
 class TestReport(unittest.TestCase):
 
     def test_report_without_reporter(self):
@@ -424,4 +436,138 @@ class TestDictSummary(unittest.TestCase):
         })
 
 
+@testing.parameterize(*testing.product({
+    'capacity': [1, 3, 100],
+    'dtype': [numpy.float32, numpy.float64],
+}))
+class TestBufferedSummary(unittest.TestCase):
+
+    def setUp(self):
+        self.summary = chainer.reporter.BufferedSummary(self.capacity)
+        self.data = numpy.random.uniform(-1, 1, 10).astype(self.dtype)
+
+    def check(self, summary, data):
+        stats = summary.compute(('mean', 'std', 'min', 'max', 'p50', 'p90'))
+        testing.assert_allclose(stats['mean'], data.mean(), rtol=1e-5)
+        testing.assert_allclose(stats['std'], data.std(), rtol=1e-4)
+        testing.assert_allclose(stats['min'], data.min())
+        testing.assert_allclose(stats['max'], data.max())
+        # The percentiles are computed from the latest values.
+        window = data[-self.capacity:]
+        testing.assert_allclose(stats['p50'], numpy.percentile(window, 50))
+        testing.assert_allclose(stats['p90'], numpy.percentile(window, 90))
+
+        testing.assert_allclose(
+            summary.compute_mean(), data.mean(), rtol=1e-5)
+        mean, std = summary.make_statistics()
+        testing.assert_allclose(mean, data.mean(), rtol=1e-5)
+        testing.assert_allclose(std, data.std(), rtol=1e-4)
+
+    def test_numpy(self):
+        for x in self.data:
+            self.summary.add(numpy.array(x))
+        self.check(self.summary, self.data)
+
+    def test_variable(self):
+        for x in self.data:
+            self.summary.add(chainer.Variable(numpy.array(x)))
+        self.check(self.summary, self.data)
+
+    @attr.gpu
+    def test_cupy(self):
+        for x in self.data:
+            self.summary.add(cuda.cupy.array(x))
+        self.check(self.summary, self.data)
+
+    def test_serialize(self):
+        for x in self.data[:5]:
+            self.summary.add(numpy.array(x))
+
+        summary = chainer.reporter.BufferedSummary(self.capacity)
+        testing.save_and_load_npz(self.summary, summary)
+        for x in self.data[5:]:
+            summary.add(numpy.array(x))
+
+        stats = summary.compute(('mean', 'std', 'min', 'max'))
+        testing.assert_allclose(stats['mean'], self.data.mean(), rtol=1e-5)
+        testing.assert_allclose(stats['std'], self.data.std(), rtol=1e-4)
+        testing.assert_allclose(stats['min'], self.data.min())
+        testing.assert_allclose(stats['max'], self.data.max())
+
+
+class TestBufferedSummaryInvalid(unittest.TestCase):
+
+    def test_empty(self):
+        summary = chainer.reporter.BufferedSummary()
+        stats = summary.compute(('mean', 'min', 'p50'))
+        for value in stats.values():
+            self.assertTrue(numpy.isnan(value))
+
+    def test_int(self):
+        summary = chainer.reporter.BufferedSummary()
+        summary.add(1)
+        summary.add(2)
+        self.assertEqual(summary.compute_mean(), 1.5)
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            chainer.reporter.BufferedSummary(0)
+
+    def test_invalid_statistic(self):
+        summary = chainer.reporter.BufferedSummary()
+        summary.add(1.)
+        for name in ('median', 'p101', 'pxx'):
+            with self.assertRaises(ValueError):
+                summary.compute((name,))
+
+    def test_serialize_summary_compat(self):
+        summary = chainer.reporter.Summary()
+        summary.add(1.)
+        summary.add(2.)
+
+        buffered = chainer.reporter.BufferedSummary()
+        testing.save_and_load_npz(summary, buffered)
+        buffered.add(3.)
+        mean, std = buffered.make_statistics()
+        testing.assert_allclose(mean, 2.)
+        testing.assert_allclose(std, numpy.sqrt(2. / 3.))
+
+        testing.save_and_load_npz(buffered, summary)
+        mean, std = summary.make_statistics()
+        testing.assert_allclose(mean, 2.)
+        testing.assert_allclose(std, numpy.sqrt(2. / 3.))
+
+
+class TestBufferedDictSummary(TestDictSummary):
+
+    def setUp(self):
+        self.summary = chainer.reporter.BufferedDictSummary(capacity=3)
+
+    def test_compute(self):
+        self.summary.add({'a': 3., 'b': numpy.array(1, 'f'),
+                          'c': numpy.zeros(2, 'f')})
+        self.summary.add({'a': 1., 'b': chainer.Variable(
+            numpy.array(5, 'f'))})
+        stats = self.summary.compute(('mean', 'max', 'p50'))
+        self.assertEqual(
+            set(stats.keys()),
+            {'a', 'a.max', 'a.p50', 'b', 'b.max', 'b.p50'})
+        testing.assert_allclose(stats['a'], 2.)
+        testing.assert_allclose(stats['a.max'], 3.)
+        testing.assert_allclose(stats['b.p50'], 3.)
+
+    def test_serialize_dict_summary_compat(self):
+        summary = chainer.reporter.DictSummary()
+        summary.add({'a': 3., 'b': 1.})
+        summary.add({'a': 1., 'b': 5.})
+        testing.save_and_load_npz(summary, self.summary)
+        self.summary.add({'a': 2., 'b': 6.})
+        testing.save_and_load_npz(self.summary, summary)
+
+        self.check(summary, {
+            'a': (3., 1., 2.),
+            'b': (1., 5., 6.),
+        })
+
+
 testing.run_module(__name__, __file__)
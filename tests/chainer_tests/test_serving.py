@@ -0,0 +1,143 @@
+import threading
+import time
+import unittest
+
+import numpy
+
+import chainer
+from chainer import links
+from chainer import serving
+from chainer import testing
+
+
+class Model(chainer.Chain):
+
+    def __init__(self):
+        super(Model, self).__init__()
+        with self.init_scope():
+            self.l1 = links.Linear(3, 2)
+        self.batch_sizes = []
+
+    def __call__(self, x):
+        assert not chainer.config.train
+        assert not chainer.config.enable_backprop
+        self.batch_sizes.append(len(x))
+        return self.l1(x)
+
+
+class TupleModel(chainer.Link):
+
+    def __call__(self, x, y):
+        return x.sum(axis=1), {'y': y}['y'] * 2
+
+
+class FailingModel(chainer.Link):
+
+    def __call__(self, x):
+        raise ValueError('failed')
+
+
+def _run_load(batcher, examples, n_clients):
+    # In-process load generator; each client thread sends its requests one
+    # by one and records the latency of each request.
+    results = [None] * len(examples)
+    latencies = []
+    lock = threading.Lock()
+
+    def client(k):
+        for i in range(k, len(examples), n_clients):
+            start = time.time()
+            results[i] = batcher(examples[i])
+            with lock:
+                latencies.append(time.time() - start)
+
+    start = time.time()
+    threads = [threading.Thread(target=client, args=(k,))
+               for k in range(n_clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - start
+    stats = {
+        'p50': numpy.percentile(latencies, 50),
+        'p99': numpy.percentile(latencies, 99),
+        'throughput': len(examples) / elapsed,
+    }
+    return results, stats
+
+
+@testing.parameterize(*testing.product({
+    'max_batch_size': [1, 8],
+    'n_clients': [1, 16],
+}))
+class TestDynamicBatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Model()
+        self.examples = [numpy.random.uniform(-1, 1, 3).astype(numpy.float32)
+                         for _ in range(200)]
+
+    def test_load(self):
+        with serving.DynamicBatcher(
+                self.model, max_batch_size=self.max_batch_size,
+                max_latency=0.01) as batcher:
+            results, stats = _run_load(batcher, self.examples,
+                                       self.n_clients)
+
+        for x, y in zip(self.examples, results):
+            expect = self.model.l1(x[None]).array[0]
+            testing.assert_allclose(y, expect)
+        self.assertEqual(batcher.n_examples, len(self.examples))
+        self.assertEqual(sum(self.model.batch_sizes), len(self.examples))
+        self.assertLessEqual(max(self.model.batch_sizes), self.max_batch_size)
+        if self.max_batch_size > 1 and self.n_clients > 1:
+            # Concurrent requests are coalesced.
+            self.assertLess(batcher.n_batches, len(self.examples))
+        self.assertLessEqual(stats['p50'], stats['p99'])
+        self.assertGreater(stats['throughput'], 0)
+
+
+class TestDynamicBatcherOutputs(unittest.TestCase):
+
+    def test_tuple(self):
+        with serving.DynamicBatcher(TupleModel()) as batcher:
+            futures = [batcher.submit((numpy.full(3, i, numpy.float32),
+                                       numpy.int32(i)))
+                       for i in range(4)]
+            for i, future in enumerate(futures):
+                x_sum, y = future.result()
+                self.assertEqual(x_sum, 3 * i)
+                self.assertEqual(y, 2 * i)
+
+    def test_padding(self):
+        def predict(x):
+            return x.sum(axis=1)
+
+        with serving.DynamicBatcher(
+                predict, max_latency=0.05, padding=0) as batcher:
+            futures = [batcher.submit(numpy.ones(n, numpy.float32))
+                       for n in (1, 3, 2)]
+            self.assertEqual([f.result() for f in futures], [1, 3, 2])
+
+    def test_error(self):
+        with serving.DynamicBatcher(FailingModel()) as batcher:
+            future = batcher.submit(numpy.ones(3, numpy.float32))
+            with self.assertRaises(ValueError):
+                future.result()
+            self.assertTrue(future.done())
+
+    def test_closed(self):
+        batcher = serving.DynamicBatcher(Model())
+        future = batcher.submit(numpy.ones(3, numpy.float32))
+        batcher.close()
+        self.assertTrue(future.done())
+        with self.assertRaises(RuntimeError):
+            batcher.submit(numpy.ones(3, numpy.float32))
+
+    def test_invalid_batch_size(self):
+        with self.assertRaises(ValueError):
+            serving.DynamicBatcher(Model(), max_batch_size=0)
+
+
+testing.run_module(__name__, __file__)
@@ -1,5 +1,7 @@
+import sys
 import unittest
 
+import mock
 import numpy
 
 import chainer
@@ -222,4 +224,79 @@ class TestEvaluatorWithEvalFunc(unittest.TestCase):
                 self.target.args[i], self.batches[i])
 
 
+class ReportingModel(chainer.Chain):
+
+    def __call__(self, x):
+        chainer.report({'loss': x.sum(), 'count': len(x),
+                        'vector': x.sum(axis=0)}, self)
+
+
+@testing.parameterize(*testing.product({
+    'prefetch': [False, True],
+    'n_processes': [None, 1, 3],
+    'n_data': [12, 13],
+}))
+class TestEvaluatorModes(unittest.TestCase):
+
+    def setUp(self):
+        self.data = numpy.random.uniform(
+            -1, 1, (self.n_data, 3)).astype('f')
+        self.batch_size = 4
+        self.target = ReportingModel()
+
+    def make_evaluator(self, prefetch, n_processes):
+        iterator = chainer.iterators.SerialIterator(
+            self.data, self.batch_size, repeat=False, shuffle=False)
+        return extensions.Evaluator(
+            iterator, self.target, prefetch=prefetch,
+            n_processes=n_processes)
+
+    def test_evaluate(self):
+        evaluator = self.make_evaluator(self.prefetch, self.n_processes)
+        mean = evaluator()
+
+        batches = [self.data[i:i + self.batch_size]
+                   for i in range(0, self.n_data, self.batch_size)]
+        self.assertEqual(sorted(mean.keys()), ['main/count', 'main/loss'])
+        self.assertAlmostEqual(
+            mean['main/loss'], numpy.mean([b.sum() for b in batches]),
+            places=4)
+        self.assertAlmostEqual(
+            mean['main/count'], numpy.mean([len(b) for b in batches]))
+
+        # The evaluator can be called repeatedly.
+        mean2 = evaluator()
+        self.assertAlmostEqual(mean['main/loss'], mean2['main/loss'],
+                               places=4)
+
+    def test_same_as_default(self):
+        expect = self.make_evaluator(False, None)()
+        mean = self.make_evaluator(self.prefetch, self.n_processes)()
+        for key in expect:
+            self.assertAlmostEqual(mean[key], expect[key], places=4)
+
+    @unittest.skipIf(sys.version_info < (3, 4), 'get_context is not available')
+    def test_fork_context(self):
+        # The workers are forked regardless of the default start method.
+        expect = self.make_evaluator(False, None)()
+        with mock.patch('multiprocessing.Pool', side_effect=AssertionError):
+            mean = self.make_evaluator(self.prefetch, self.n_processes)()
+        for key in expect:
+            self.assertAlmostEqual(mean[key], expect[key], places=4)
+
+
+class TestEvaluatorModesInvalid(unittest.TestCase):
+
+    def test_invalid_n_processes(self):
+        iterator = chainer.iterators.SerialIterator([1, 2], 1)
+        with self.assertRaises(ValueError):
+            extensions.Evaluator(iterator, ReportingModel(), n_processes=0)
+
+    def test_parallel_without_dataset(self):
+        evaluator = extensions.Evaluator(
+            DummyIterator([]), ReportingModel(), n_processes=2)
+        with self.assertRaises(ValueError):
+            evaluator()
+
+
 testing.run_module(__name__, __file__)
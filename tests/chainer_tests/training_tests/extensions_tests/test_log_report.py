@@ -0,0 +1,128 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+import six
+
+from chainer import serializers
+from chainer import testing
+from chainer.training import extensions
+
+
+def _run(trainer, log_report, n_iterations):
+    for _ in range(n_iterations):
+        trainer.updater.update()
+        trainer.observation = {'loss': float(trainer.updater.iteration)}
+        log_report(trainer)
+
+
+@testing.parameterize(
+    {'format': 'json', 'max_history': None},
+    {'format': 'json-lines', 'max_history': None},
+    {'format': 'json-lines', 'max_history': 2},
+)
+class TestLogReport(unittest.TestCase):
+
+    def setUp(self):
+        self.out = tempfile.mkdtemp()
+        self.trainer = testing.get_trainer_with_mock_updater(
+            stop_trigger=(20, 'iteration'))
+        self.trainer.out = self.out
+        self.trainer._done = True
+        self.trainer._final_elapsed_time = 0.
+        self.options = {'trigger': (1, 'iteration'), 'format': self.format,
+                        'max_history': self.max_history}
+
+    def tearDown(self):
+        shutil.rmtree(self.out)
+
+    def read_log(self):
+        with open(os.path.join(self.out, 'log')) as f:
+            if self.format == 'json':
+                return json.load(f)
+            return [json.loads(line) for line in f]
+
+    def test_log(self):
+        log_report = extensions.LogReport(**self.options)
+        _run(self.trainer, log_report, 5)
+
+        log = self.read_log()
+        self.assertEqual([r['iteration'] for r in log], [1, 2, 3, 4, 5])
+        self.assertEqual([r['loss'] for r in log], [1, 2, 3, 4, 5])
+
+        self.assertEqual(len(log_report.log), 5)
+        self.assertEqual(log_report.log[-1]['iteration'], 5)
+        self.assertEqual(log_report.log[4], log[4])
+        if self.max_history is None:
+            self.assertEqual(log_report.log, log)
+        else:
+            self.assertEqual(list(log_report.log), log[3:])
+            with self.assertRaises(IndexError):
+                log_report.log[2]
+
+    def test_print_report(self):
+        log_report = extensions.LogReport(**self.options)
+        out = six.StringIO()
+        print_report = extensions.PrintReport(
+            ['iteration', 'loss'], log_report=log_report, out=out)
+        for _ in range(4):
+            self.trainer.updater.update()
+            self.trainer.observation = {'loss': 1.}
+            print_report(self.trainer)
+        self.assertEqual(len(out.getvalue().splitlines()), 5)
+
+    def test_resume(self):
+        log_report = extensions.LogReport(**self.options)
+        _run(self.trainer, log_report, 3)
+        snapshot = os.path.join(self.out, 'snapshot')
+        serializers.save_npz(snapshot, log_report)
+        # These records are lost by resuming from the snapshot.
+        _run(self.trainer, log_report, 2)
+
+        log_report = extensions.LogReport(**self.options)
+        serializers.load_npz(snapshot, log_report)
+        self.assertEqual(len(log_report.log), 3)
+        self.trainer.updater.iteration = 3
+        _run(self.trainer, log_report, 2)
+
+        log = self.read_log()
+        self.assertEqual([r['iteration'] for r in log], [1, 2, 3, 4, 5])
+        self.assertEqual(len(log_report.log), 5)
+
+    def test_new_run(self):
+        with open(os.path.join(self.out, 'log'), 'w') as f:
+            f.write('old log\n')
+        log_report = extensions.LogReport(**self.options)
+        _run(self.trainer, log_report, 1)
+        self.assertEqual(len(self.read_log()), 1)
+
+    def test_statistics(self):
+        self.options['trigger'] = (4, 'iteration')
+        log_report = extensions.LogReport(
+            statistics=('mean', 'std', 'max', 'p50'), **self.options)
+        _run(self.trainer, log_report, 8)
+
+        log = self.read_log()
+        self.assertEqual(len(log), 2)
+        self.assertEqual(log[1]['loss'], 6.5)
+        self.assertAlmostEqual(log[1]['loss.std'], numpy.sqrt(1.25))
+        self.assertEqual(log[1]['loss.max'], 8.)
+        self.assertEqual(log[1]['loss.p50'], 6.5)
+
+
+class TestLogReportInvalidOptions(unittest.TestCase):
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            extensions.LogReport(format='yaml')
+
+    def test_max_history_with_json(self):
+        with self.assertRaises(ValueError):
+            extensions.LogReport(max_history=10)
+        extensions.LogReport(max_history=10, log_name=None)
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+import chainer
+from chainer import serializers
+from chainer import testing
+from chainer.training import extensions
+from chainer.training.extensions import snapshot_writers
+
+
+class Target(chainer.Link):
+
+    def __init__(self):
+        super(Target, self).__init__()
+        with self.init_scope():
+            self.w = chainer.Parameter(numpy.zeros((2, 3), numpy.float32))
+        self.add_persistent('count', 0)
+
+
+def _failing_savefun(path, target):
+    raise ValueError('failed to save')
+
+
+@testing.parameterize(*testing.product({
+    'writer_class': [
+        snapshot_writers.SimpleWriter,
+        snapshot_writers.ThreadWriter,
+        snapshot_writers.ProcessWriter,
+        snapshot_writers.ThreadQueueWriter,
+        snapshot_writers.ProcessQueueWriter,
+    ],
+}))
+class TestSnapshotWriters(unittest.TestCase):
+
+    def setUp(self):
+        self.out = tempfile.mkdtemp()
+        self.target = Target()
+
+    def tearDown(self):
+        shutil.rmtree(self.out)
+
+    def load(self, filename):
+        target = Target()
+        serializers.load_npz(os.path.join(self.out, filename), target)
+        return target
+
+    def test_save(self):
+        writer = self.writer_class()
+        for i in range(3):
+            self.target.w.array[...] = i
+            self.target.count = i
+            writer('snapshot_{}'.format(i), self.out, self.target)
+            # The state at the call is saved even if the target is modified
+            # before the write.
+            self.target.w.array[...] = -1
+        writer.finalize()
+
+        self.assertEqual(sorted(os.listdir(self.out)),
+                         ['snapshot_0', 'snapshot_1', 'snapshot_2'])
+        for i in range(3):
+            target = self.load('snapshot_{}'.format(i))
+            numpy.testing.assert_array_equal(target.w.array, i)
+            self.assertEqual(target.count, i)
+
+    def test_n_retains(self):
+        writer = self.writer_class(n_retains=2)
+        for i in range(4):
+            writer('snapshot_{}'.format(i), self.out, self.target)
+        writer.finalize()
+        self.assertEqual(sorted(os.listdir(self.out)),
+                         ['snapshot_2', 'snapshot_3'])
+
+    def test_error(self):
+        writer = self.writer_class(savefun=_failing_savefun)
+        with self.assertRaises(Exception):
+            writer('snapshot', self.out, self.target)
+            writer.finalize()
+        self.assertEqual(os.listdir(self.out), [])
+
+
+class TestSnapshotWithWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.out = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.out)
+
+    def test_snapshot_object(self):
+        target = Target()
+        writer = snapshot_writers.ThreadQueueWriter()
+        snapshot = extensions.snapshot_object(
+            target, 'target_{.updater.iteration}', writer=writer)
+        self.assertIs(snapshot.finalize.__self__, writer)
+
+        trainer = testing.get_trainer_with_mock_updater()
+        trainer.out = self.out
+        trainer.updater.iteration = 5
+        snapshot(trainer)
+        snapshot.finalize()
+        self.assertEqual(os.listdir(self.out), ['target_5'])
+
+    def test_invalid_n_retains(self):
+        with self.assertRaises(ValueError):
+            snapshot_writers.ThreadWriter(n_retains=0)
+
+
+testing.run_module(__name__, __file__)
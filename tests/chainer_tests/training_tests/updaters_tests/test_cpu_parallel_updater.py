@@ -0,0 +1,254 @@
+import copy
+import multiprocessing
+import os
+import sys
+import unittest
+
+import mock
+import numpy
+
+import chainer
+from chainer import functions as F
+from chainer import iterators
+from chainer import links as L
+from chainer import optimizers
+from chainer import serializers
+from chainer import testing
+from chainer import training
+
+
+class Model(chainer.Chain):
+
+    def __init__(self):
+        super(Model, self).__init__()
+        with self.init_scope():
+            self.l1 = L.Linear(None, 4)
+            self.l2 = L.Linear(4, 3)
+
+    def __call__(self, x, t):
+        loss = F.softmax_cross_entropy(self.l2(F.tanh(self.l1(x))), t)
+        chainer.report({'loss': loss}, self)
+        return loss
+
+
+class FailingModel(chainer.Chain):
+
+    # Fails only in the worker processes.
+
+    def __init__(self):
+        super(FailingModel, self).__init__()
+        self.pid = os.getpid()
+        with self.init_scope():
+            self.fc = L.Linear(5, 3)
+
+    def __call__(self, x, t):
+        if os.getpid() != self.pid:
+            raise ValueError('failure')
+        return F.softmax_cross_entropy(self.fc(x), t)
+
+
+def _make_dataset():
+    x = numpy.random.uniform(-1, 1, (14, 5)).astype(numpy.float32)
+    t = numpy.random.randint(0, 3, 14).astype(numpy.int32)
+    return chainer.datasets.TupleDataset(x, t)
+
+
+@testing.parameterize(*testing.product({
+    'n_processes': [1, 2, 3],
+    'optimizer': ['SGD', 'Adam'],
+}))
+class TestCPUParallelUpdater(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = _make_dataset()
+        model = Model()
+        # Initializes the parameters to compare the models.
+        x, t = chainer.dataset.concat_examples(self.dataset[:1])
+        model(x, t)
+        self.model = model
+        self.expected = copy.deepcopy(model)
+
+    def make_updater(self, updater_class, model, **kwargs):
+        optimizer = getattr(optimizers, self.optimizer)()
+        optimizer.setup(model)
+        iterator = iterators.SerialIterator(
+            self.dataset, 7, shuffle=False)
+        return updater_class(iterator, optimizer, **kwargs)
+
+    def check_params(self, model, expected):
+        for (name, p), (_, q) in zip(sorted(model.namedparams()),
+                                     sorted(expected.namedparams())):
+            numpy.testing.assert_allclose(
+                p.array, q.array, rtol=1e-5, atol=1e-6, err_msg=name)
+
+    def test_update(self):
+        updater = self.make_updater(
+            training.updaters.CPUParallelUpdater, self.model,
+            n_processes=self.n_processes)
+        expected = self.make_updater(
+            training.updaters.StandardUpdater, self.expected)
+        try:
+            for _ in range(5):
+                updater.update()
+                expected.update()
+                self.check_params(self.model, self.expected)
+        finally:
+            updater.finalize()
+        self.assertEqual(updater.iteration, 5)
+        self.assertEqual(updater.epoch, 2)
+
+    def test_serialize(self):
+        updater = self.make_updater(
+            training.updaters.CPUParallelUpdater, self.model,
+            n_processes=self.n_processes)
+        try:
+            updater.update()
+            updater.update()
+            serializer = serializers.DictionarySerializer()
+            serializer.save(updater)
+            # Copies the arrays since the serializer keeps the references.
+            target = copy.deepcopy(serializer.target)
+        finally:
+            updater.finalize()
+
+        expected = self.make_updater(
+            training.updaters.StandardUpdater, self.expected)
+        serializers.NpzDeserializer(copy.deepcopy(target)).load(expected)
+        self.assertEqual(expected.iteration, 2)
+        self.check_params(self.model, self.expected)
+
+        # The updater can be resumed after loading the snapshot.
+        updater = self.make_updater(
+            training.updaters.CPUParallelUpdater, self.model,
+            n_processes=self.n_processes)
+        serializers.NpzDeserializer(target).load(updater)
+        try:
+            updater.update()
+            expected.update()
+            self.check_params(self.model, self.expected)
+        finally:
+            updater.finalize()
+
+
+class EmbedModel(chainer.Chain):
+
+    def __init__(self, sparse_grad):
+        super(EmbedModel, self).__init__()
+        with self.init_scope():
+            self.embed = L.EmbedID(10, 4, sparse_grad=sparse_grad)
+            self.fc = L.Linear(4, 3)
+
+    def __call__(self, x, t):
+        return F.softmax_cross_entropy(self.fc(self.embed(x)), t)
+
+
+@testing.parameterize(*testing.product({
+    'optimizer': ['SGD', 'Adam'],
+}))
+class TestCPUParallelUpdaterSparseGrad(unittest.TestCase):
+
+    def setUp(self):
+        x = numpy.random.randint(0, 10, 14).astype(numpy.int32)
+        t = numpy.random.randint(0, 3, 14).astype(numpy.int32)
+        self.dataset = chainer.datasets.TupleDataset(x, t)
+
+    def make_updater(self, updater_class, model, **kwargs):
+        optimizer = getattr(optimizers, self.optimizer)()
+        optimizer.setup(model)
+        iterator = iterators.SerialIterator(
+            self.dataset, 7, shuffle=False)
+        return updater_class(iterator, optimizer, **kwargs)
+
+    def test_update(self):
+        # The sparse gradients of all the replicas are reduced, and the
+        # parameters are updated as the dense gradients are.
+        model = EmbedModel(True)
+        expected = EmbedModel(False)
+        expected.copyparams(model)
+        updater = self.make_updater(
+            training.updaters.CPUParallelUpdater, model, n_processes=2)
+        expected_updater = self.make_updater(
+            training.updaters.StandardUpdater, expected)
+        try:
+            for _ in range(3):
+                updater.update()
+                expected_updater.update()
+                for (name, p), (_, q) in zip(
+                        sorted(model.namedparams()),
+                        sorted(expected.namedparams())):
+                    numpy.testing.assert_allclose(
+                        p.array, q.array, rtol=1e-5, atol=1e-6,
+                        err_msg=name)
+                    self.assertIsNone(p.sparse_grad)
+        finally:
+            updater.finalize()
+
+
+class TestCPUParallelUpdaterUninitialized(unittest.TestCase):
+
+    def test_update(self):
+        model = Model()
+        optimizer = optimizers.SGD()
+        optimizer.setup(model)
+        iterator = iterators.SerialIterator(_make_dataset(), 4)
+        updater = training.updaters.CPUParallelUpdater(
+            iterator, optimizer, n_processes=2)
+        try:
+            updater.update()
+            updater.update()
+        finally:
+            updater.finalize()
+        self.assertEqual(model.l1.W.shape, (4, 5))
+
+
+class TestCPUParallelUpdaterError(unittest.TestCase):
+
+    def test_worker_error(self):
+        optimizer = optimizers.SGD()
+        optimizer.setup(FailingModel())
+        iterator = iterators.SerialIterator(_make_dataset(), 4)
+        updater = training.updaters.CPUParallelUpdater(
+            iterator, optimizer, n_processes=2)
+        try:
+            with self.assertRaises(RuntimeError):
+                updater.update()
+        finally:
+            updater.finalize()
+
+    @unittest.skipIf(sys.version_info < (3, 4), 'get_context is not available')
+    def test_fork_context(self):
+        # The workers are forked regardless of the default start method.
+        optimizer = optimizers.SGD()
+        optimizer.setup(Model())
+        iterator = iterators.SerialIterator(_make_dataset(), 4)
+        updater = training.updaters.CPUParallelUpdater(
+            iterator, optimizer, n_processes=2)
+        try:
+            updater.update()
+            for worker in updater._workers:
+                self.assertIsInstance(
+                    worker, multiprocessing.context.ForkProcess)
+        finally:
+            updater.finalize()
+
+    def test_without_fork(self):
+        optimizer = optimizers.SGD()
+        optimizer.setup(Model())
+        iterator = iterators.SerialIterator(_make_dataset(), 4)
+        with mock.patch(
+                'chainer.training.updaters.cpu_parallel_updater.os') as m:
+            del m.fork
+            with self.assertRaises(RuntimeError):
+                training.updaters.CPUParallelUpdater(
+                    iterator, optimizer, n_processes=2)
+
+    def test_invalid_n_processes(self):
+        optimizer = optimizers.SGD()
+        optimizer.setup(Model())
+        iterator = iterators.SerialIterator(_make_dataset(), 4)
+        with self.assertRaises(ValueError):
+            training.updaters.CPUParallelUpdater(
+                iterator, optimizer, n_processes=0)
+
+
+testing.run_module(__name__, __file__)
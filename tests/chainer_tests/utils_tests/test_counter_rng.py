@@ -0,0 +1,89 @@
+import unittest
+
+import mock
+import numpy
+
+from chainer.backends import cuda
+from chainer import testing
+from chainer.testing import attr
+from chainer.utils import counter_rng
+
+
+class TestRandomBits(unittest.TestCase):
+
+    def test_splitmix64(self):
+        # The first outputs of SplitMix64 seeded with zero.
+        bits = counter_rng.random_bits(numpy, 0, (2, 2))
+        self.assertEqual(bits.dtype, numpy.uint64)
+        numpy.testing.assert_array_equal(
+            bits, numpy.array([[0xe220a8397b1dcdaf, 0x6e789e6aa1b965f4],
+                               [0x06c45d188009454f, 0xf88bb8a8724c81ec]],
+                              dtype=numpy.uint64))
+
+    def test_counter(self):
+        # Each element depends only on the key and the index.
+        key = counter_rng.new_key()
+        bits = counter_rng.random_bits(numpy, key, (10,))
+        numpy.testing.assert_array_equal(
+            counter_rng.random_bits(numpy, key, (20,))[:10], bits)
+        self.assertFalse(
+            (counter_rng.random_bits(numpy, key + 1, (10,)) == bits).any())
+
+    def test_new_key(self):
+        numpy.random.seed(0)
+        key = counter_rng.new_key()
+        numpy.random.seed(0)
+        self.assertEqual(counter_rng.new_key(), key)
+        self.assertIsInstance(key, numpy.uint64)
+
+    @attr.gpu
+    def test_gpu(self):
+        key = counter_rng.new_key()
+        numpy.testing.assert_array_equal(
+            cuda.to_cpu(counter_rng.random_bits(cuda.cupy, key, (3, 4))),
+            counter_rng.random_bits(numpy, key, (3, 4)))
+
+
+@testing.parameterize(*testing.product({
+    'p': [0., 0.3, 1.],
+    'block': [7, counter_rng._CPU_BLOCK],
+}))
+class TestBernoulli(unittest.TestCase):
+
+    def test_bernoulli(self):
+        key = counter_rng.new_key()
+        shape = (3, 100, 11)
+        with mock.patch.object(counter_rng, '_CPU_BLOCK', self.block):
+            flag = counter_rng.bernoulli(numpy, key, shape, self.p)
+        self.assertEqual(flag.dtype, numpy.bool_)
+        self.assertEqual(flag.shape, shape)
+
+        bits = counter_rng.random_bits(numpy, key, shape)
+        expect = bits >> numpy.uint64(11) < numpy.uint64(self.p * (1 << 53))
+        numpy.testing.assert_array_equal(flag, expect)
+        self.assertAlmostEqual(flag.mean(), self.p, delta=0.03)
+
+
+@testing.parameterize(*testing.product({
+    'recompute': [True, False],
+}))
+class TestBernoulliMask(unittest.TestCase):
+
+    def test_array(self):
+        mask = counter_rng.BernoulliMask(
+            numpy, (4, 5), 0.5, recompute=self.recompute, key=3)
+        flag = mask.array
+        numpy.testing.assert_array_equal(
+            flag, counter_rng.bernoulli(numpy, 3, (4, 5), 0.5))
+        numpy.testing.assert_array_equal(mask.array, flag)
+        self.assertEqual(mask.array is flag, not self.recompute)
+
+    def test_new_key(self):
+        with mock.patch.object(
+                counter_rng, 'new_key', return_value=5) as m:
+            mask = counter_rng.BernoulliMask(numpy, (4, 5), 0.5)
+        m.assert_called_once_with()
+        self.assertEqual(mask.key, 5)
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,153 @@
+import unittest
+
+import numpy
+
+import chainer
+from chainer.backends import cuda
+from chainer import testing
+from chainer.testing import attr
+from chainer.utils import sparse_rows
+
+
+def _dense(rows, values, shape):
+    array = numpy.zeros(shape, dtype=values.dtype)
+    numpy.add.at(array, rows, values)
+    return array
+
+
+@testing.parameterize(*testing.product({
+    'shape': [(6,), (6, 3), (6, 2, 3)],
+    'dtype': [numpy.float16, numpy.float32, numpy.float64],
+}))
+class TestSparseRows(unittest.TestCase):
+
+    def setUp(self):
+        self.rows = numpy.array([4, 1, 4, 0, 1, 4], dtype=numpy.int32)
+        self.values = numpy.random.uniform(
+            -1, 1, (6,) + self.shape[1:]).astype(self.dtype)
+        self.expect = _dense(self.rows, self.values, self.shape)
+        if self.dtype == numpy.float16:
+            self.tol = {'atol': 1e-3, 'rtol': 1e-3}
+        else:
+            self.tol = {}
+
+    def check_coalesce(self, rows, values):
+        grad = sparse_rows.SparseRows(rows, values, self.shape).coalesce()
+        self.assertTrue(grad.coalesced)
+        self.assertIs(grad.coalesce(), grad)
+        self.assertEqual(grad.dtype, self.dtype)
+        numpy.testing.assert_array_equal(cuda.to_cpu(grad.rows), [0, 1, 4])
+        testing.assert_allclose(
+            grad.values, self.expect[[0, 1, 4]], **self.tol)
+
+    def test_coalesce_cpu(self):
+        self.check_coalesce(self.rows, self.values)
+
+    @attr.gpu
+    def test_coalesce_gpu(self):
+        self.check_coalesce(
+            cuda.to_gpu(self.rows), cuda.to_gpu(self.values))
+
+    def check_to_dense(self, rows, values):
+        grad = sparse_rows.SparseRows(rows, values, self.shape)
+        array = grad.to_dense()
+        self.assertIsInstance(array, type(values))
+        self.assertEqual(array.dtype, self.dtype)
+        testing.assert_allclose(array, self.expect, **self.tol)
+
+    def test_to_dense_cpu(self):
+        self.check_to_dense(self.rows, self.values)
+
+    @attr.gpu
+    def test_to_dense_gpu(self):
+        self.check_to_dense(
+            cuda.to_gpu(self.rows), cuda.to_gpu(self.values))
+
+    def test_add_to(self):
+        array = numpy.ones(self.shape, dtype=self.dtype)
+        sparse_rows.SparseRows(self.rows, self.values, self.shape).add_to(
+            array)
+        testing.assert_allclose(array, self.expect + 1, **self.tol)
+
+    def test_add(self):
+        a = sparse_rows.SparseRows(self.rows[:2], self.values[:2], self.shape)
+        b = sparse_rows.SparseRows(self.rows[2:], self.values[2:], self.shape)
+        grad = a + b
+        self.assertFalse(grad.coalesced)
+        testing.assert_allclose(grad.to_dense(), self.expect, **self.tol)
+
+    def test_add_shape_mismatch(self):
+        a = sparse_rows.SparseRows(self.rows, self.values, self.shape)
+        b = sparse_rows.SparseRows(
+            self.rows, self.values, (7,) + self.shape[1:])
+        with self.assertRaises(ValueError):
+            a + b
+
+    def test_empty(self):
+        grad = sparse_rows.SparseRows(
+            self.rows[:0], self.values[:0], self.shape)
+        testing.assert_allclose(
+            grad.to_dense(), numpy.zeros(self.shape, dtype=self.dtype))
+
+
+class TestGetSparseGradTarget(unittest.TestCase):
+
+    def setUp(self):
+        self.x = numpy.zeros((2, 3), dtype=numpy.float32)
+
+    def get_target(self, x, enable_backprop):
+        targets = []
+
+        class Identity(chainer.FunctionNode):
+
+            def forward(self, inputs):
+                return inputs
+
+            def backward(self, indexes, grad_outputs):
+                targets.append(sparse_rows.get_sparse_grad_target(self, 0))
+                return grad_outputs
+
+        y, = Identity().apply((x,))
+        y.grad = self.x
+        y.backward(enable_double_backprop=enable_backprop)
+        return targets[0]
+
+    def test_parameter(self):
+        param = chainer.Parameter(self.x)
+        self.assertIs(self.get_target(param, False), param)
+
+    def test_double_backprop(self):
+        param = chainer.Parameter(self.x)
+        self.assertIsNone(self.get_target(param, True))
+
+    def test_variable(self):
+        self.assertIsNone(self.get_target(chainer.Variable(self.x), False))
+
+    def test_loss_scale(self):
+        param = chainer.Parameter(self.x)
+        with sparse_rows.sparse_grad_scope(True, 16):
+            self.assertEqual(sparse_rows.get_loss_scale(), 16)
+            param.add_sparse_grad(sparse_rows.SparseRows(
+                numpy.array([1], numpy.int32), self.x[:1], self.x.shape))
+        self.assertEqual(param._loss_scale, 16)
+        self.assertIsNone(sparse_rows.get_loss_scale())
+
+    def test_grad(self):
+        targets = []
+
+        class Identity(chainer.FunctionNode):
+
+            def forward(self, inputs):
+                return inputs
+
+            def backward(self, indexes, grad_outputs):
+                targets.append(sparse_rows.get_sparse_grad_target(self, 0))
+                return grad_outputs
+
+        param = chainer.Parameter(self.x)
+        y, = Identity().apply((param,))
+        chainer.grad([y], [param], grad_outputs=[self.x])
+        self.assertIsNone(targets[0])
+
+
+testing.run_module(__name__, __file__)